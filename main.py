@@ -4,6 +4,7 @@ TOBS - Telegram Exporter to Markdown
 Main entry point for the application.
 """
 
+import argparse
 import asyncio
 import signal
 import sys
@@ -24,6 +25,7 @@ from src.config import Config
 from src.core_manager import CoreSystemManager
 from src.exceptions import ConfigError
 from src.export.exporter import TakeoutSessionWrapper, run_export
+from src.media.lazy_loader import LazyMediaLoader, lazy_metadata_dir
 from src.media.manager import MediaProcessor
 from src.note_generator import NoteGenerator
 from src.session_gc import run_session_gc
@@ -402,6 +404,7 @@ async def async_main():
     core_manager = CoreSystemManager(
         config_path=config.export_path,
         performance_profile=config.performance_profile,
+        cache_backend=config.cache_backend,
     )
     await core_manager.initialize()
 
@@ -561,9 +564,75 @@ async def async_main():
             await core_manager.shutdown()
 
 
+def parse_hydrate_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py hydrate",
+        description="Download media exported as lazy placeholders (ENABLE_LAZY_LOADING).",
+    )
+    parser.add_argument("--chat", help="Only this entity (id as used in the export)")
+    parser.add_argument("--type", dest="media_type", help="photo, video, audio, document, ...")
+    parser.add_argument("--min-size-mb", type=float, default=None)
+    parser.add_argument("--max-size-mb", type=float, default=None)
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent downloads")
+    return parser.parse_args(argv)
+
+
+async def async_hydrate(args):
+    """Hydrate lazy media placeholders of previous exports."""
+    setup_logging("INFO")
+    config = Config.from_env()
+    # Downloads go through the background queue: --workers sizes it
+    config.async_download_workers = max(1, args.workers)
+
+    core_manager = CoreSystemManager(
+        config_path=config.export_path,
+        performance_profile=config.performance_profile,
+        cache_backend=config.cache_backend,
+    )
+    await core_manager.initialize()
+    telegram_manager = TelegramManager(
+        config=config,
+        connection_manager=core_manager.get_connection_manager(),
+        cache_manager=core_manager.get_cache_manager(),
+    )
+    media_processor = None
+    try:
+        await telegram_manager.connect()
+        media_processor = MediaProcessor(
+            config=config,
+            client=telegram_manager.client,
+            cache_manager=core_manager.get_cache_manager(),
+            connection_manager=core_manager.get_connection_manager(),
+            max_workers=config.performance.workers,
+        )
+        await media_processor.start()
+
+        loader = LazyMediaLoader(media_processor, lazy_metadata_dir(config))
+        mb = 1024 * 1024
+        stats = await loader.hydrate(
+            entity_id=args.chat,
+            media_type=args.media_type,
+            min_size=int(args.min_size_mb * mb) if args.min_size_mb is not None else None,
+            max_size=int(args.max_size_mb * mb) if args.max_size_mb is not None else None,
+            workers=args.workers,
+        )
+        rprint(
+            f"[bold green]💧 Hydrated {stats['hydrated']}/{stats['pending']} media files[/bold green] "
+            f"({stats['missing']} missing, {stats['failed']} failed)"
+        )
+    finally:
+        if media_processor:
+            await media_processor.shutdown()
+        await telegram_manager.disconnect()
+        await core_manager.shutdown()
+
+
 def main():
     """Main entry point."""
     try:
+        if len(sys.argv) > 1 and sys.argv[1] == "hydrate":
+            asyncio.run(async_hydrate(parse_hydrate_args(sys.argv[2:])))
+            return
         asyncio.run(async_main())
     except KeyboardInterrupt:
         rprint("\n[bold yellow]Export cancelled by user[/bold yellow]")
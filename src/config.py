@@ -302,11 +302,41 @@ class PerformanceSettings:
     # Настройки throttling
     throttle_threshold_kbps: int = 50
     throttle_pause_s: int = 30
-    rate_limit_calls_per_second: float = 10.0
+    rate_limit_calls_per_second: float = 10.0  # History requests/s на аккаунт
+
+    # 🚦 Shared API rate limiter (token bucket на класс методов)
+    rate_limit_enabled: bool = True  # False = без pacing (FloodWait-штрафы учитываются всегда)
+    rate_limit_media_calls_per_second: float = 20.0  # Старты загрузок медиа/s
+    rate_limit_burst: int = 10  # Размер burst каждого bucket'а
+    rate_limit_recovery_s: float = 60.0  # Восстановление скорости после FloodWait
 
     # Download settings
     part_size_kb: int = 512  # 0 = auto-tuning based on file size
     download_retries: int = 5
+    download_resume_journal: bool = True  # Журнал завершённых частей для докачки
+    download_journal_checksums: bool = True  # CRC32 частей, проверка при докачке
+
+    # Content-addressed media store: одна копия на SHA-256 в <cache dir>/media_store,
+    # выходные файлы создаются через reflink / hardlink / copy
+    media_store_enabled: bool = False
+    media_store_link_mode: str = "auto"  # auto | reflink | hardlink | copy
+    media_store_gc_grace_hours: float = 168.0  # Неиспользуемые блобы старше - удаляются
+
+    # Индекс идентичности медиа (document/photo id + size + dc): уже скачанная
+    # медиа из любого чата переиспользуется без загрузки
+    media_identity_index: bool = True
+
+    # 🎚️ AIMD-регулировка числа параллельных фоновых загрузок по суммарной
+    # скорости аккаунта (FloodWait / throttling -> лимит уменьшается вдвое)
+    adaptive_download_concurrency: bool = True
+    adaptive_download_max_workers: int = 0  # 0 = max(2 x workers, workers + 2)
+    adaptive_download_interval_s: float = 10.0  # Окно измерения скорости
+
+    # 🖼️ Перекодирование изображений в пуле процессов (JPEG draft-декодирование,
+    # результат сохраняется только если он меньше оригинала)
+    image_process_pool: bool = True
+    image_process_workers: int = 0  # 0 = cores / 2, не больше 4
+    image_process_batch_size: int = 8  # Изображений на один вызов воркера
 
     @classmethod
     def auto_configure(
@@ -444,13 +474,19 @@ class TranscriptionConfig:
 
     # Caching
     cache_enabled: bool = True  # Enable result caching
+    cache_max_mb: int = 256  # Transcript cache size (least recently used evicted)
     cache_dir: Optional[str] = (
         None  # Cache directory (default: {export_path}/.cache/transcriptions)
     )
 
     # Parallelism settings (v5.1.0)
     max_concurrent: int = 2  # Max parallel transcriptions (0 = auto based on device)
-    sorting: str = "size_asc"  # 'none', 'size_asc', 'size_desc' (LPT scheduling)
+    # CPU: transcribe in worker processes, one resident model each. The pool is
+    # sized from cores and free RAM; max_concurrent > 0 only caps it further
+    use_process_pool: bool = True
+    # Order of queued voice messages by duration: 'none', 'size_asc' (shortest
+    # first), 'size_desc' (longest first, LPT scheduling)
+    sorting: str = "size_asc"
 
 
 @dataclass(slots=True)
@@ -502,6 +538,12 @@ class Config:
     use_takeout: bool = False  # Use Telegram Takeout for export
     takeout_fallback_delay: float = 1.0  # Delay in seconds if Takeout fails/disabled
 
+    # Multi-target export scheduling (export_all)
+    export_concurrent_targets: int = 1  # 1 = sequential (legacy behaviour)
+    export_api_concurrency: int = 4  # Concurrent history requests across targets
+    export_media_concurrency: int = 8  # Concurrent media downloads across targets
+    export_disk_concurrency: int = 4  # Concurrent file flushes across targets
+
     # Async pipeline configuration (fetch -> process -> write)
     # Feature flag to enable async pipeline - ON by default after TIER A completion
     async_pipeline_enabled: bool = True
@@ -517,6 +559,21 @@ class Config:
     async_pipeline_fetch_queue_size: int = 64
     async_pipeline_process_queue_size: int = 256
 
+    # Render message batches to markdown in worker processes (0 = in-process)
+    async_pipeline_render_workers: int = 0
+    async_pipeline_render_batch_size: int = 64  # Messages per render call
+
+    # Batch mode: stages exchange whole get_messages batches instead of single
+    # messages; backpressure is a cap on in-flight messages, not queue slots
+    async_pipeline_batch_mode: bool = False
+    async_pipeline_max_inflight_messages: int = 2000
+
+    # Grow/shrink process workers during a run from queue depth telemetry
+    async_pipeline_autoscale: bool = False
+    async_pipeline_min_process_workers: int = 1
+    async_pipeline_max_process_workers: int = 16
+    async_pipeline_autoscale_interval: float = 1.0  # Seconds between samples
+
     # DC-aware routing settings (P1)
     dc_aware_routing_enabled: bool = (
         True  # Enable DC-aware worker routing (ON by default)
@@ -546,6 +603,10 @@ class Config:
         # When False: always use BloomFilter (original B-4 behavior, ~7ms per batch)
     )
 
+    # Incremental export: resume regular chats from the last exported message
+    # and append to the existing chat file instead of re-exporting everything
+    incremental_export: bool = True
+
     # TTY-Aware Modes (TIER B - B-5)
     tty_mode: str = "auto"  # TTY detection mode: 'auto' | 'force-tty' | 'force-non-tty'
 
@@ -572,6 +633,10 @@ class Config:
     async_download_workers: int = (
         0  # 0 = auto (derived from performance.download_workers)
     )
+    # Очередь загрузок: отдельная полоса для больших файлов, SJF, честность по чатам
+    download_large_file_mb: int = 20  # Файлы от этого размера - в полосу "large"
+    download_large_lane_workers: int = 0  # 0 = все воркеры кроме одного
+    download_max_mb_in_flight: int = 512  # Бюджет одновременно загружаемых байт
 
     # Audio transcription settings (v3.0.0)
     transcription: TranscriptionConfig = field(default_factory=TranscriptionConfig)
@@ -666,6 +731,7 @@ class Config:
 
     cache_file: Path = field(default=DEFAULT_CACHE_PATH)
     cache_manager: Any = None
+    cache_backend: str = "json"  # 'json' (whole-file snapshot) | 'log' (append-only log)
 
     log_level: str = "INFO"
 
@@ -725,11 +791,99 @@ class Config:
         if env_cache_ttl is not None:
             self.performance.input_peer_cache_ttl = float(env_cache_ttl)
 
+        # 📒 Download resume journal overrides
+        env_journal = os.getenv("DOWNLOAD_RESUME_JOURNAL")
+        if env_journal is not None:
+            self.performance.download_resume_journal = env_journal.lower() == "true"
+
+        env_journal_crc = os.getenv("DOWNLOAD_JOURNAL_CHECKSUMS")
+        if env_journal_crc is not None:
+            self.performance.download_journal_checksums = env_journal_crc.lower() == "true"
+
+        # 🗄️ Content-addressed media store overrides
+        env_store = os.getenv("MEDIA_STORE_ENABLED")
+        if env_store is not None:
+            self.performance.media_store_enabled = env_store.lower() == "true"
+
+        env_store_mode = os.getenv("MEDIA_STORE_LINK_MODE")
+        if env_store_mode is not None:
+            self.performance.media_store_link_mode = env_store_mode.lower()
+
+        env_store_grace = os.getenv("MEDIA_STORE_GC_GRACE_HOURS")
+        if env_store_grace is not None:
+            self.performance.media_store_gc_grace_hours = float(env_store_grace)
+
+        env_identity = os.getenv("MEDIA_IDENTITY_INDEX")
+        if env_identity is not None:
+            self.performance.media_identity_index = env_identity.lower() == "true"
+
+        # 🎚️ Adaptive download concurrency overrides
+        env_adaptive = os.getenv("ADAPTIVE_DOWNLOAD_CONCURRENCY")
+        if env_adaptive is not None:
+            self.performance.adaptive_download_concurrency = env_adaptive.lower() == "true"
+
+        env_adaptive_max = os.getenv("ADAPTIVE_DOWNLOAD_MAX_WORKERS")
+        if env_adaptive_max is not None:
+            self.performance.adaptive_download_max_workers = int(env_adaptive_max)
+
+        env_adaptive_interval = os.getenv("ADAPTIVE_DOWNLOAD_INTERVAL_S")
+        if env_adaptive_interval is not None:
+            self.performance.adaptive_download_interval_s = float(env_adaptive_interval)
+
+        # 🖼️ Image process pool overrides
+        env_image_pool = os.getenv("IMAGE_PROCESS_POOL")
+        if env_image_pool is not None:
+            self.performance.image_process_pool = env_image_pool.lower() == "true"
+
+        env_image_workers = os.getenv("IMAGE_PROCESS_WORKERS")
+        if env_image_workers is not None:
+            self.performance.image_process_workers = int(env_image_workers)
+
+        env_image_batch = os.getenv("IMAGE_PROCESS_BATCH_SIZE")
+        if env_image_batch is not None:
+            self.performance.image_process_batch_size = int(env_image_batch)
+
+        # ⚡ Parallel part download overrides
+        env_parallel = os.getenv("ENABLE_PARALLEL_DOWNLOAD")
+        if env_parallel is not None:
+            self.performance.enable_parallel_download = env_parallel.lower() == "true"
+
+        env_parallel_min = os.getenv("PARALLEL_DOWNLOAD_MIN_SIZE_MB")
+        if env_parallel_min is not None:
+            self.performance.parallel_download_min_size_mb = int(env_parallel_min)
+
+        env_parallel_conns = os.getenv("MAX_PARALLEL_CONNECTIONS")
+        if env_parallel_conns is not None:
+            self.performance.max_parallel_connections = int(env_parallel_conns)
+
+        # 🚦 Shared API rate limiter overrides
+        env_rate_enabled = os.getenv("RATE_LIMIT_ENABLED")
+        if env_rate_enabled is not None:
+            self.performance.rate_limit_enabled = env_rate_enabled.lower() == "true"
+
+        env_rate = os.getenv("RATE_LIMIT_CALLS_PER_SECOND")
+        if env_rate is not None:
+            self.performance.rate_limit_calls_per_second = float(env_rate)
+
+        env_media_rate = os.getenv("RATE_LIMIT_MEDIA_CALLS_PER_SECOND")
+        if env_media_rate is not None:
+            self.performance.rate_limit_media_calls_per_second = float(env_media_rate)
+
+        env_rate_burst = os.getenv("RATE_LIMIT_BURST")
+        if env_rate_burst is not None:
+            self.performance.rate_limit_burst = int(env_rate_burst)
+
         # 🚀 Auto-configure async_download_workers from performance settings
         if self.async_download_workers == 0:
             # Derive from performance.media_download_workers (typically 1/3 to avoid overwhelming Telegram)
             self.async_download_workers = max(3, self.performance.media_download_workers // 3)
 
+        if self.cache_backend not in ("json", "log"):
+            logger.warning(
+                f"Unknown cache backend '{self.cache_backend}', using 'json'"
+            )
+            self.cache_backend = "json"
+
         # Если путь к кэшу не абсолютный — делаем его относительным к export_path
         if not Path(self.cache_file).is_absolute():
             self.cache_file = Path(self.export_path) / Path(self.cache_file).name
@@ -879,7 +1033,7 @@ class Config:
         logger.info(f"Async download workers: {self.async_download_workers}")
         logger.info(f"Memory limit: {self.performance.memory_limit_mb}MB")
         logger.info(f"Export path: {self.export_path}")
-        logger.info(f"Cache file: {self.cache_file}")
+        logger.info(f"Cache file: {self.cache_file} (backend: {self.cache_backend})")
         logger.info(f"Transcription cache: {self.transcription.cache_dir}")
         logger.info(f"Takeout enabled: {self.use_takeout}")
         logger.info(f"Async media download: {self.async_media_download}")
@@ -1135,6 +1289,12 @@ class Config:
                 "media_download": _parse_bool(
                     os.getenv("MEDIA_DOWNLOAD"), True
                 ),  # Backward compatibility
+                "enable_lazy_loading": _parse_bool(
+                    os.getenv("ENABLE_LAZY_LOADING"), False
+                ),
+                "lazy_media_metadata_dir": os.getenv(
+                    "LAZY_MEDIA_METADATA_DIR", "lazy_metadata"
+                ),
                 "export_comments": _parse_bool(os.getenv("EXPORT_COMMENTS"), False),
                 "export_reactions": _parse_bool(os.getenv("EXPORT_REACTIONS"), False),
                 "use_takeout": _parse_bool(os.getenv("USE_TAKEOUT"), False),
@@ -1148,6 +1308,28 @@ class Config:
                 "async_download_workers": int(
                     os.getenv("ASYNC_DOWNLOAD_WORKERS", "0")
                 ),  # 0 = auto
+                "download_large_file_mb": int(
+                    os.getenv("DOWNLOAD_LARGE_FILE_MB", "20")
+                ),
+                "download_large_lane_workers": int(
+                    os.getenv("DOWNLOAD_LARGE_LANE_WORKERS", "0")
+                ),  # 0 = auto
+                "download_max_mb_in_flight": int(
+                    os.getenv("DOWNLOAD_MAX_MB_IN_FLIGHT", "512")
+                ),
+                # Multi-target export scheduling
+                "export_concurrent_targets": int(
+                    os.getenv("EXPORT_CONCURRENT_TARGETS", "1")
+                ),
+                "export_api_concurrency": int(
+                    os.getenv("EXPORT_API_CONCURRENCY", "4")
+                ),
+                "export_media_concurrency": int(
+                    os.getenv("EXPORT_MEDIA_CONCURRENCY", "8")
+                ),
+                "export_disk_concurrency": int(
+                    os.getenv("EXPORT_DISK_CONCURRENCY", "4")
+                ),
                 # Async pipeline configuration (fetch -> process -> write)
                 "async_pipeline_enabled": _parse_bool(
                     os.getenv("ASYNC_PIPELINE_ENABLED"), False
@@ -1167,6 +1349,30 @@ class Config:
                 "async_pipeline_process_queue_size": int(
                     os.getenv("ASYNC_PIPELINE_PROCESS_QUEUE_SIZE", "256")
                 ),
+                "async_pipeline_render_workers": int(
+                    os.getenv("ASYNC_PIPELINE_RENDER_WORKERS", "0")
+                ),  # 0 = in-process rendering
+                "async_pipeline_render_batch_size": int(
+                    os.getenv("ASYNC_PIPELINE_RENDER_BATCH_SIZE", "64")
+                ),
+                "async_pipeline_batch_mode": _parse_bool(
+                    os.getenv("ASYNC_PIPELINE_BATCH_MODE"), False
+                ),
+                "async_pipeline_max_inflight_messages": int(
+                    os.getenv("ASYNC_PIPELINE_MAX_INFLIGHT_MESSAGES", "2000")
+                ),
+                "async_pipeline_autoscale": _parse_bool(
+                    os.getenv("ASYNC_PIPELINE_AUTOSCALE"), False
+                ),
+                "async_pipeline_min_process_workers": int(
+                    os.getenv("ASYNC_PIPELINE_MIN_PROCESS_WORKERS", "1")
+                ),
+                "async_pipeline_max_process_workers": int(
+                    os.getenv("ASYNC_PIPELINE_MAX_PROCESS_WORKERS", "16")
+                ),
+                "async_pipeline_autoscale_interval": float(
+                    os.getenv("ASYNC_PIPELINE_AUTOSCALE_INTERVAL", "1.0")
+                ),
                 # BloomFilter optimization (TIER B - B-4)
                 "bloom_filter_size_multiplier": float(
                     os.getenv("BLOOM_FILTER_SIZE_MULTIPLIER", "1.1")
@@ -1177,6 +1383,9 @@ class Config:
                 "bloom_filter_max_size": int(
                     os.getenv("BLOOM_FILTER_MAX_SIZE", "10000000")
                 ),
+                "incremental_export": _parse_bool(
+                    os.getenv("INCREMENTAL_EXPORT"), True
+                ),
                 # TTY-Aware Modes (TIER B - B-5)
                 "tty_mode": os.getenv("TTY_MODE", "auto"),
                 # DC-aware routing (P1)
@@ -1284,7 +1493,11 @@ class Config:
                     cache_dir=os.getenv(
                         "TRANSCRIPTION_CACHE_DIR"
                     ),  # None = auto ({export_path}/.cache/transcriptions)
+                    cache_max_mb=int(os.getenv("TRANSCRIPTION_CACHE_MAX_MB", "256")),
                     max_concurrent=int(os.getenv("TRANSCRIPTION_MAX_CONCURRENT", "2")),
+                    use_process_pool=_parse_bool(
+                        os.getenv("TRANSCRIPTION_USE_PROCESS_POOL"), True
+                    ),
                     sorting=os.getenv("TRANSCRIPTION_SORTING", "size_asc"),
                 ),
                 "transcription_timeout": float(
@@ -1292,6 +1505,7 @@ class Config:
                 ),
                 # Кэширование
                 "cache_file": os.getenv("CACHE_FILE", str(DEFAULT_CACHE_PATH)),
+                "cache_backend": os.getenv("CACHE_BACKEND", "json"),
                 # Интерактивный режим
                 "dialog_fetch_limit": int(os.getenv("DIALOG_FETCH_LIMIT", 20)),
                 # Прокси
@@ -3,6 +3,7 @@
 """
 
 from .cache import (
+    CacheBackend,
     CacheManager,
     CacheStrategy,
     CompressionType,
@@ -31,14 +32,24 @@ from .performance import (
     profile_sync,
     shutdown_performance_monitor,
 )
+from .id_index import ProcessedIdIndex
+from .concurrency_controller import AIMDController
+from .rate_limiter import (
+    RateLimiter,
+    TokenBucket,
+    get_rate_limiter,
+    reset_rate_limiter,
+)
 
 __all__ = [
     # Cache
+    "CacheBackend",
     "CacheStrategy",
     "CompressionType",
     "CacheManager",
     "get_cache_manager",
     "shutdown_cache_manager",
+    "ProcessedIdIndex",
     # Connection
     "BackoffStrategy",
     "PoolType",
@@ -59,4 +70,11 @@ __all__ = [
     "shutdown_performance_monitor",
     "profile_async",
     "profile_sync",
+    # Rate limiting
+    "RateLimiter",
+    "TokenBucket",
+    "get_rate_limiter",
+    "reset_rate_limiter",
+    # Adaptive concurrency
+    "AIMDController",
 ]
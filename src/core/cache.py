@@ -6,6 +6,7 @@ import asyncio
 import base64
 import logging
 import msgpack  # S-3: Security fix - replaced pickle with msgpack
+import os
 import time
 import zlib
 from collections import OrderedDict
@@ -17,6 +18,9 @@ from typing import Any, Dict, Optional, Union
 import aiofiles
 import orjson
 
+from .id_index import ProcessedIdIndex
+from .log_store import CacheLogStore, LogWriteBuffer
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,6 +40,13 @@ class CompressionType(Enum):
     MSGPACK = "msgpack"  # S-3: Renamed from PICKLE to MSGPACK
 
 
+class CacheBackend(Enum):
+    """Persistence backends."""
+
+    JSON = "json"  # Whole-file JSON snapshot on every save
+    LOG = "log"  # Append-only log: saves write only changed entries
+
+
 @dataclass
 class CacheEntry:
     """Cache entry."""
@@ -99,9 +110,12 @@ class CacheManager:
         compression: CompressionType = CompressionType.GZIP,
         auto_save_interval: float = 30.0,
         compression_threshold: int = 1024,  # Сжимать данные больше 1KB
+        backend: CacheBackend = CacheBackend.JSON,
+        compaction_ratio: float = 0.5,  # LOG: compact when >50% of the log is dead
     ):
         self.cache_path = cache_path.resolve()
         self.backup_path = self.cache_path.with_suffix(".backup")
+        self.backend = backend
         self.strategy = strategy
         self.max_size = max_size
         self.default_ttl = default_ttl
@@ -121,6 +135,26 @@ class CacheManager:
         self._stats = CacheStats()
         self._dirty = False
 
+        # LOG backend: track changed keys so saves are O(changes)
+        self._log_store: Optional[CacheLogStore] = None
+        self._log_writes: Optional[LogWriteBuffer] = None
+        self._dirty_keys: set[str] = set()
+        if backend == CacheBackend.LOG:
+            self._log_store = CacheLogStore(
+                self.cache_path.with_suffix(".log"),
+                backup_path=self.cache_path.with_suffix(".log.backup"),
+                index_path=self.cache_path.with_suffix(".idx"),
+                compaction_ratio=compaction_ratio,
+                default=_json_default,
+            )
+            # Live entries are encoded under the lock, so they are passed to
+            # the buffer instead of read by it from a worker thread
+            self._log_writes = LogWriteBuffer(self._log_store)
+
+        # Per-entity processed message ID indexes (persisted as processed_ids_{id})
+        self._processed_indexes: Dict[str, ProcessedIdIndex] = {}
+        self._dirty_indexes: set[str] = set()
+
         # TaskGroup для управления background tasks
         self._task_group: Optional[asyncio.TaskGroup] = None
         self._task_group_runner: Optional[asyncio.Task] = None
@@ -133,7 +167,10 @@ class CacheManager:
         self._task_group_runner = asyncio.create_task(self._run_background_tasks())
         # Backward compatibility: alias for older tests or code that expects _auto_save_task
         self._auto_save_task = self._task_group_runner
-        logger.info(f"Cache manager started with {self.strategy.value} strategy")
+        logger.info(
+            f"Cache manager started with {self.strategy.value} strategy, "
+            f"{self.backend.value} backend"
+        )
 
     async def _run_background_tasks(self):
         """
@@ -190,6 +227,7 @@ class CacheManager:
 
             for key in expired_keys:
                 del self._cache[key]
+                self._dirty_keys.add(key)
                 self._stats.evictions += 1
 
             if expired_keys:
@@ -296,6 +334,7 @@ class CacheManager:
             # Проверяем TTL
             if entry.is_expired():
                 del self._cache[key]
+                self._dirty_keys.add(key)
                 self._stats.misses += 1
                 self._stats.evictions += 1
                 self._dirty = True
@@ -339,6 +378,7 @@ class CacheManager:
 
             # Добавляем в кэш
             self._cache[key] = entry
+            self._dirty_keys.add(key)
             self._stats.sets += 1
             self._dirty = True
 
@@ -362,7 +402,8 @@ class CacheManager:
             # LRU - удаляем самые старые
             for _ in range(evict_count):
                 if self._cache:
-                    self._cache.popitem(last=False)
+                    evicted_key, _ = self._cache.popitem(last=False)
+                    self._dirty_keys.add(evicted_key)
                     self._stats.evictions += 1
         else:
             # Удаляем по времени последнего доступа
@@ -372,6 +413,7 @@ class CacheManager:
             for i in range(min(evict_count, len(items))):
                 key = items[i][0]
                 del self._cache[key]
+                self._dirty_keys.add(key)
                 self._stats.evictions += 1
 
         logger.debug(f"Evicted {evict_count} entries, cache size: {len(self._cache)}")
@@ -381,6 +423,7 @@ class CacheManager:
         async with self._lock:
             if key in self._cache:
                 del self._cache[key]
+                self._dirty_keys.add(key)
                 self._stats.deletes += 1
                 self._dirty = True
                 return True
@@ -391,12 +434,21 @@ class CacheManager:
         async with self._lock:
             cleared_count = len(self._cache)
             self._cache.clear()
+            self._dirty_keys.clear()
+            self._processed_indexes.clear()
+            self._dirty_indexes.clear()
+            if self._log_writes is not None:
+                self._log_writes.rewrite_pending = True  # Rewrite the log on next save
             self._stats.deletes += cleared_count
             self._dirty = True
             logger.info(f"Cache cleared, removed {cleared_count} entries")
 
     async def _load_cache(self):
         """Загрузка кэша из файла."""
+        if self._log_store is not None:
+            await self._load_log()
+            return
+
         if not self.cache_path.exists():
             logger.info("Cache file does not exist, starting fresh")
             return
@@ -524,11 +576,128 @@ class CacheManager:
         except Exception as e:
             logger.error(f"Failed to restore from backup: {e}")
 
+    async def _load_log(self):
+        """Загрузка кэша из append-only лога (LOG backend)."""
+        store = self._log_store
+        assert store is not None, "LOG backend must be configured"
+        log_exists = store.log_path.exists() or store.backup_path.exists()
+        try:
+            entries = await asyncio.to_thread(store.load)
+        except Exception as e:
+            logger.error(f"Failed to load cache log: {e}")
+            await asyncio.to_thread(store.set_aside)
+            entries = {}
+
+        loaded_count = 0
+        for key, entry_data in entries.items():
+            try:
+                entry = CacheEntry(**entry_data)
+            except Exception as e:
+                logger.warning(f"Skipping invalid cache log entry {key}: {e}")
+                continue
+            if entry.is_expired():
+                self._dirty_keys.add(key)
+                continue
+            self._cache[key] = entry
+            loaded_count += 1
+
+        if not log_exists and self.cache_path.exists():
+            await self._migrate_json()
+            loaded_count = len(self._cache)
+
+        if self._dirty_keys:
+            self._dirty = True
+
+        logger.info(f"Loaded {loaded_count} cache entries from log")
+
+    async def _migrate_json(self):
+        """
+        One-time import of the JSON snapshot into a new cache log.
+
+        Once the log is written the snapshot is renamed to *.migrated, so it is
+        never imported again (e.g. over a log whose entries all expired).
+        """
+        logger.info("Migrating JSON cache file into cache log")
+        store, self._log_store = self._log_store, None
+        try:
+            await self._load_cache()
+        finally:
+            self._log_store = store
+        assert self._log_writes is not None, "LOG backend must be configured"
+        self._log_writes.rewrite_pending = True
+        self._dirty = True
+        try:
+            await self._save_log()
+        except Exception as e:
+            logger.error(f"Failed to write migrated cache log, keeping JSON cache file: {e}")
+            return
+        migrated_path = self.cache_path.with_name(self.cache_path.name + ".migrated")
+        await asyncio.to_thread(os.replace, self.cache_path, migrated_path)
+
+    async def _save_log(self):
+        """
+        Сохранение изменений в append-only лог (LOG backend).
+
+        Only entries changed since the last save are encoded and appended, so the
+        cost is proportional to the number of changes, not to cache size. Encoding
+        happens under the lock (entries may be mutated by callers); file I/O runs
+        in a worker thread so the event loop is not blocked. Records of a failed
+        save stay in the write buffer and go out with the next one.
+        """
+        store = self._log_store
+        writes = self._log_writes
+        assert store is not None and writes is not None, "LOG backend must be configured"
+        async with self._lock:
+            live = None
+            if writes.rewrite_pending:
+                live = self._encode_live_entries(store)
+            else:
+                for key in self._dirty_keys:
+                    entry = self._cache.get(key)
+                    if entry is None or entry.is_expired():
+                        writes.put(key, None)
+                    else:
+                        writes.put(key, store.encode_set(key, asdict(entry)))
+            self._dirty_keys.clear()
+            self._dirty = False
+
+        count = len(writes)
+        try:
+            await asyncio.to_thread(writes.flush, live)
+        except BaseException:
+            async with self._lock:
+                self._dirty = True
+            raise
+        logger.debug(f"Cache log: wrote {count} records")
+
+        if store.should_compact():
+            async with self._lock:
+                live = self._encode_live_entries(store)
+            await asyncio.to_thread(writes.compact, live)
+
+    def _encode_live_entries(self, store: CacheLogStore) -> list:
+        """Encode all live entries for a full log rewrite."""
+        return [
+            (key, store.encode_set(key, asdict(entry)))
+            for key, entry in self._cache.items()
+            if not entry.is_expired()
+        ]
+
     async def _save_cache(self):
         """Сохранение кэша в файл."""
+        await self._flush_processed_indexes()
         if not self._dirty:
             return
 
+        if self._log_store is not None:
+            try:
+                await self._save_log()
+            except Exception as e:
+                self._dirty = True
+                logger.error(f"Failed to save cache log: {e}")
+                raise
+            return
+
         try:
             # Создаем резервную копию
             if self.cache_path.exists():
@@ -571,6 +740,7 @@ class CacheManager:
                 await f.write(json_bytes)
 
             self._dirty = False
+            self._dirty_keys.clear()
             logger.debug(f"Cache saved with {len(self._cache)} entries")
 
         except Exception as e:
@@ -600,6 +770,9 @@ class CacheManager:
         if self._dirty:
             await self._save_cache()
 
+        if self._log_store is not None:
+            await asyncio.to_thread(self._log_store.close)
+
         logger.info("Cache manager shutdown complete")
 
     def get_stats(self) -> CacheStats:
@@ -607,18 +780,86 @@ class CacheManager:
         self._stats.total_size_mb = len(self._cache) * 0.001  # Приблизительно
         return self._stats
 
+    def get_log_stats(self) -> Optional[Dict[str, Any]]:
+        """Статистика append-only лога (None для JSON backend)."""
+        return self._log_store.stats() if self._log_store is not None else None
+
     # Методы для обратной совместимости с старым API
 
+    async def get_processed_index(self, entity_id: str) -> ProcessedIdIndex:
+        """
+        Индекс обработанных сообщений сущности.
+
+        The index lives in memory and is written back to the cache on save, so
+        marking a message processed does not re-serialize anything. Entities
+        exported by older versions are migrated from their processed_messages dict.
+        """
+        entity_id = str(entity_id)
+        index = self._processed_indexes.get(entity_id)
+        if index is not None:
+            return index
+
+        index = ProcessedIdIndex()
+        migrated = False
+        stored = await self.get(f"processed_ids_{entity_id}")
+        if isinstance(stored, dict):
+            try:
+                index = ProcessedIdIndex.from_dict(stored)
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Invalid processed ID index for {entity_id}, rebuilding: {e}")
+                stored = None
+
+        if not isinstance(stored, dict):
+            entity_data = await self.get(f"entity_{entity_id}", {})
+            processed_messages = entity_data.get("processed_messages") or {}
+            for message_id in processed_messages:
+                try:
+                    index.add(int(message_id))
+                except (TypeError, ValueError):
+                    continue
+            migrated = len(index) > 0
+
+        # Another coroutine may have loaded the same entity meanwhile
+        index = self._processed_indexes.setdefault(entity_id, index)
+        if migrated:
+            self._dirty_indexes.add(entity_id)
+            self._dirty = True
+            logger.info(f"Migrated {len(index)} processed IDs for {entity_id} to range index")
+        return index
+
+    async def _flush_processed_indexes(self):
+        """Запись изменённых индексов в кэш."""
+        if not self._dirty_indexes:
+            return
+        dirty, self._dirty_indexes = self._dirty_indexes, set()
+        for entity_id in dirty:
+            index = self._processed_indexes.get(entity_id)
+            if index is not None:
+                await self.set(f"processed_ids_{entity_id}", index.to_dict())
+
     async def is_processed(self, message_id: int, entity_id: str) -> bool:
         """Проверка обработанного сообщения."""
-        entity_data = await self.get(f"entity_{entity_id}", {})
-        processed_messages = entity_data.get("processed_messages", {})
-        return str(message_id) in processed_messages
+        index = await self.get_processed_index(entity_id)
+        return int(message_id) in index
 
     async def add_processed_message_async(
         self, message_id: int, entity_id: str, **kwargs
     ):
-        """Добавление обработанного сообщения."""
+        """
+        Добавление обработанного сообщения.
+
+        The ID goes into the range index only; per-message metadata (reply_to,
+        filename, ...) is stored in the entity dict when provided.
+        """
+        entity_id = str(entity_id)
+        index = await self.get_processed_index(entity_id)
+        if index.add(message_id):
+            self._dirty_indexes.add(entity_id)
+            self._dirty = True
+
+        if not kwargs:
+            return
+
         entity_data = await self.get(
             f"entity_{entity_id}",
             {
@@ -629,7 +870,7 @@ class CacheManager:
             },
         )
 
-        entity_data["processed_messages"][str(message_id)] = {
+        entity_data.setdefault("processed_messages", {})[str(message_id)] = {
             "timestamp": time.time(),
             **kwargs,
         }
@@ -660,6 +901,10 @@ class CacheManager:
         self, entity_id: str
     ) -> Optional[int]:
         """Получение ID последнего обработанного сообщения."""
+        index = await self.get_processed_index(entity_id)
+        if index.max_id is not None:
+            return index.max_id
+
         entity_data = await self.get(f"entity_{entity_id}")
         if entity_data and "last_id" in entity_data:
             last_id = entity_data["last_id"]
@@ -702,7 +947,9 @@ class CacheManager:
 _cache_manager: Optional[CacheManager] = None
 
 
-async def get_cache_manager() -> CacheManager:
+async def get_cache_manager(
+    backend: CacheBackend = CacheBackend.JSON,
+) -> CacheManager:
     """Получение глобального экземпляра кэш-менеджера."""
     global _cache_manager
     if _cache_manager is None:
@@ -712,7 +959,7 @@ async def get_cache_manager() -> CacheManager:
         temp_dir = Path(tempfile.gettempdir()) / "tobs_cache"
         temp_dir.mkdir(exist_ok=True)
         cache_path = temp_dir / "cache.json"
-        _cache_manager = CacheManager(cache_path)
+        _cache_manager = CacheManager(cache_path, backend=backend)
         await _cache_manager.start()
     return _cache_manager
 
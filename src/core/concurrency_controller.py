@@ -0,0 +1,184 @@
+"""
+AIMD-контроллер параллельности загрузок медиа.
+
+Telegram ограничивает пропускную способность на аккаунт, поэтому оптимальное
+число одновременных загрузок заранее неизвестно: больше соединений помогает,
+пока суммарная скорость растёт, и вредит, когда аккаунт упирается в лимит.
+
+Раз в interval_s контроллер сравнивает суммарную скорость (байты от всех
+загрузок) с предыдущим окном:
+
+- FloodWait на media-запросах -> лимит умножается на decrease_factor;
+- скорость на одно соединение ниже throttle_kbps -> тоже multiplicative
+  decrease (аккаунт троттлится);
+- все слоты заняты и прошлое увеличение дало прирост >= min_gain ->
+  лимит +increase_step (additive increase);
+- прошлое увеличение прироста не дало -> шаг назад и пауза в несколько окон.
+
+Каждое изменение лимита записывается в decisions (попадает в отчёт экспорта).
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+# Сколько последних решений хранится для отчёта
+MAX_DECISIONS = 200
+# Сколько окон лимит не растёт после увеличения без прироста скорости
+HOLD_AFTER_NO_GAIN = 3
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease лимит параллельных загрузок."""
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        interval_s: float = 10.0,
+        increase_step: int = 1,
+        decrease_factor: float = 0.5,
+        min_gain: float = 0.05,
+        throttle_kbps: float = 0.0,
+        flood_wait_count: Optional[Callable[[], int]] = None,
+    ):
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = min(self.max_limit, max(self.min_limit, int(initial)))
+        self.interval_s = float(interval_s)
+        self.increase_step = max(1, int(increase_step))
+        self.decrease_factor = decrease_factor
+        self.min_gain = min_gain
+        self.throttle_kbps = float(throttle_kbps)
+        # Счётчик FloodWait (например, RateLimiter.stats[MEDIA]["flood_waits"])
+        self._flood_wait_count = flood_wait_count
+        self._flood_waits_seen = flood_wait_count() if flood_wait_count else 0
+        self._flood_wait_flag = False
+
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+        self._total_bytes = 0
+        self._last_throughput_kbps = 0.0
+        self._peak_throughput_kbps = 0.0
+        self._last_action: Optional[str] = None
+        self._hold = 0
+
+        self.decisions: List[Dict[str, Any]] = []
+        self._listeners: List[Callable[[int], None]] = []
+
+    def add_listener(self, callback: Callable[[int], None]) -> None:
+        """callback(new_limit) при каждом изменении лимита."""
+        self._listeners.append(callback)
+
+    def record_bytes(self, count: int) -> None:
+        """Учесть скачанные байты (любая загрузка аккаунта)."""
+        if count > 0:
+            self._window_bytes += count
+            self._total_bytes += count
+
+    def record_flood_wait(self) -> None:
+        """FloodWait на загрузке: уменьшить лимит при следующей оценке."""
+        self._flood_wait_flag = True
+
+    def _new_flood_waits(self) -> bool:
+        flagged, self._flood_wait_flag = self._flood_wait_flag, False
+        if self._flood_wait_count is None:
+            return flagged
+        count = self._flood_wait_count()
+        seen, self._flood_waits_seen = self._flood_waits_seen, count
+        return flagged or count > seen
+
+    def evaluate(self, in_flight: int, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Закрыть окно измерения (если прошло interval_s) и скорректировать лимит.
+
+        Args:
+            in_flight: Сколько загрузок сейчас выполняется.
+
+        Returns:
+            Запись решения, если лимит изменился.
+        """
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._window_start
+        if elapsed < self.interval_s:
+            return None
+
+        throughput = self._window_bytes / elapsed / 1024
+        previous = self._last_throughput_kbps
+        self._window_start = now
+        self._window_bytes = 0
+        if throughput > 0:
+            # Пустое окно не становится базой для сравнения прироста
+            self._last_throughput_kbps = throughput
+            self._peak_throughput_kbps = max(self._peak_throughput_kbps, throughput)
+
+        new_limit, reason = self.limit, None
+        if self._new_flood_waits():
+            new_limit = int(self.limit * self.decrease_factor)
+            reason = "flood_wait"
+        elif (
+            self.throttle_kbps > 0
+            and in_flight > 0
+            and 0 < throughput / in_flight < self.throttle_kbps
+        ):
+            new_limit = int(self.limit * self.decrease_factor)
+            reason = "throttled"
+        elif throughput <= 0:
+            # Нет измеримой скорости - нет и оснований повышать лимит;
+            # оценка результата последнего повышения ждёт следующего окна
+            return None
+        elif in_flight >= self.limit:
+            if self._last_action == "increase" and throughput < previous * (1 + self.min_gain):
+                new_limit = self.limit - self.increase_step
+                reason = "no_gain"
+                self._hold = HOLD_AFTER_NO_GAIN
+            elif self._hold > 0:
+                self._hold -= 1
+            else:
+                new_limit = self.limit + self.increase_step
+                reason = "probe_up"
+
+        new_limit = min(self.max_limit, max(self.min_limit, new_limit))
+        if reason is None or new_limit == self.limit:
+            self._last_action = None
+            return None
+        return self._apply(new_limit, reason, throughput, in_flight)
+
+    def _apply(
+        self, new_limit: int, reason: str, throughput: float, in_flight: int
+    ) -> Dict[str, Any]:
+        old_limit, self.limit = self.limit, new_limit
+        self._last_action = "increase" if new_limit > old_limit else "decrease"
+        decision = {
+            "time": round(time.time(), 1),
+            "reason": reason,
+            "from": old_limit,
+            "to": new_limit,
+            "throughput_kbps": round(throughput, 1),
+            "in_flight": in_flight,
+        }
+        self.decisions.append(decision)
+        if len(self.decisions) > MAX_DECISIONS:
+            del self.decisions[0]
+
+        log = logger.info if reason in ("flood_wait", "throttled") else logger.debug
+        log(
+            f"🎚️ Download concurrency {old_limit} -> {new_limit} ({reason}, "
+            f"{throughput:.0f} KB/s, {in_flight} in flight)"
+        )
+        for callback in self._listeners:
+            callback(new_limit)
+        return decision
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "last_throughput_kbps": round(self._last_throughput_kbps, 1),
+            "peak_throughput_kbps": round(self._peak_throughput_kbps, 1),
+            "total_mb": round(self._total_bytes / (1024 * 1024), 1),
+            "decisions": list(self.decisions),
+        }
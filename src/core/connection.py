@@ -332,6 +332,13 @@ class ConnectionManager:
         """Семафор для загрузок (для обратной совместимости)."""
         return self.pools[PoolType.DOWNLOAD].semaphore
 
+    def ensure_download_capacity(self, workers: int) -> None:
+        """Поднять лимит пула загрузок до workers (только пока он простаивает)."""
+        pool = self.pools[PoolType.DOWNLOAD]
+        if pool.max_workers < workers and pool.active_tasks == 0:
+            pool._resize_pool(workers)
+            logger.info(f"Download pool capacity raised to {workers}")
+
     @property
     def io_semaphore(self):
         """Семафор для IO операций (для обратной совместимости)."""
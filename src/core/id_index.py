@@ -0,0 +1,172 @@
+"""
+Compact index of processed message IDs.
+
+Message IDs within a chat are allocated sequentially, so the set of exported
+IDs is almost always a handful of contiguous runs separated by gaps (deleted
+messages, interrupted exports). Storing the runs instead of individual IDs
+keeps a 5M-message channel in a few kilobytes instead of gigabytes.
+"""
+
+import operator
+from bisect import bisect_right
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    SupportsIndex,
+    Tuple,
+    cast,
+)
+
+
+class ProcessedIdIndex:
+    """
+    Set of integer IDs stored as sorted, non-overlapping inclusive ranges.
+
+    - add(): O(1) for in-order (ascending) IDs, O(log n + k) otherwise
+      where n is the number of ranges
+    - membership: O(1) for IDs past the end, O(log n) otherwise
+    - serialized size is proportional to the number of gaps, not IDs
+    """
+
+    __slots__ = ("_starts", "_ends", "_count")
+
+    def __init__(self, ids: Optional[Iterable[int]] = None):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._count = 0
+        if ids is not None:
+            self.update(ids)
+
+    def add(self, item: int) -> bool:
+        """
+        Add an ID to the index.
+
+        Returns:
+            True if the ID was not present before
+        """
+        item = int(item)
+        starts, ends = self._starts, self._ends
+
+        # Fast path: export runs oldest -> newest, so IDs almost always
+        # extend (or start after) the last range
+        if not ends or item > ends[-1]:
+            if ends and item == ends[-1] + 1:
+                ends[-1] = item
+            else:
+                starts.append(item)
+                ends.append(item)
+            self._count += 1
+            return True
+
+        i = bisect_right(starts, item) - 1
+        if i >= 0 and item <= ends[i]:
+            return False
+
+        joins_left = i >= 0 and ends[i] + 1 == item
+        joins_right = i + 1 < len(starts) and starts[i + 1] == item + 1
+
+        if joins_left and joins_right:
+            ends[i] = ends[i + 1]
+            del starts[i + 1]
+            del ends[i + 1]
+        elif joins_left:
+            ends[i] = item
+        elif joins_right:
+            starts[i + 1] = item
+        else:
+            starts.insert(i + 1, item)
+            ends.insert(i + 1, item)
+
+        self._count += 1
+        return True
+
+    def discard_above(self, max_id: int) -> int:
+        """Remove all IDs greater than max_id. Returns the number removed."""
+        starts, ends = self._starts, self._ends
+        removed = 0
+        while ends and ends[-1] > max_id:
+            if starts[-1] > max_id:
+                removed += ends[-1] - starts[-1] + 1
+                starts.pop()
+                ends.pop()
+            else:
+                removed += ends[-1] - max_id
+                ends[-1] = max_id
+        self._count -= removed
+        return removed
+
+    def update(self, ids: Iterable[int]) -> int:
+        """Add many IDs. Returns the number of newly added IDs."""
+        return sum(1 for item in ids if self.add(item))
+
+    def __contains__(self, item: object) -> bool:
+        # Accept any integer type add() accepts (e.g. numpy.int64 batch IDs)
+        try:
+            value = operator.index(cast(SupportsIndex, item))
+        except TypeError:
+            return False
+        if not self._ends or value > self._ends[-1]:
+            return False
+        i = bisect_right(self._starts, value) - 1
+        return i >= 0 and value <= self._ends[i]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in zip(self._starts, self._ends):
+            yield from range(start, end + 1)
+
+    def __repr__(self) -> str:
+        return f"ProcessedIdIndex(ids={self._count}, ranges={len(self._starts)})"
+
+    @property
+    def max_id(self) -> Optional[int]:
+        """Highest ID in the index (None if empty)."""
+        return self._ends[-1] if self._ends else None
+
+    @property
+    def min_id(self) -> Optional[int]:
+        """Lowest ID in the index (None if empty)."""
+        return self._starts[0] if self._starts else None
+
+    @property
+    def range_count(self) -> int:
+        """Number of contiguous ranges."""
+        return len(self._starts)
+
+    def ranges(self) -> List[Tuple[int, int]]:
+        """Inclusive (start, end) ranges in ascending order."""
+        return list(zip(self._starts, self._ends))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to a JSON/msgpack-friendly dict."""
+        flat: List[int] = []
+        for start, end in zip(self._starts, self._ends):
+            flat.append(start)
+            flat.append(end)
+        return {"ranges": flat, "count": self._count}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProcessedIdIndex":
+        """Deserialize from dict produced by to_dict()."""
+        obj = cls()
+        flat = data.get("ranges") or []
+        if len(flat) % 2:
+            raise ValueError("ranges must contain start/end pairs")
+
+        for start, end in zip(flat[0::2], flat[1::2]):
+            start, end = int(start), int(end)
+            if end < start or (obj._ends and start <= obj._ends[-1]):
+                raise ValueError(f"ranges are not sorted/disjoint at {start}-{end}")
+            if obj._ends and start == obj._ends[-1] + 1:
+                obj._ends[-1] = end
+            else:
+                obj._starts.append(start)
+                obj._ends.append(end)
+            obj._count += end - start + 1
+        return obj
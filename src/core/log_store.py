@@ -0,0 +1,642 @@
+"""
+Append-only, log-structured persistence backend for CacheManager.
+
+File layout::
+
+    <magic:8><generation:8>                      -- log header
+    <length:u32><crc32:u32><msgpack payload>     -- record, repeated
+
+Each record is either ``{"op": "s", "k": key, "e": entry}`` (set) or
+``{"op": "d", "k": key}`` (delete). The latest record for a key wins, and
+load() returns keys in log order: the most recently written key comes last.
+
+Persistence cost is proportional to the number of changed entries: a save only
+appends the dirty records. Superseded records are reclaimed by compaction, which
+rewrites live entries into a fresh log and rotates the previous generation to the
+backup path. A small offset index (written on compaction and clean shutdown) lets
+startup read only live records instead of replaying the whole log.
+
+Crash safety:
+- A torn or corrupted tail record is detected via length/CRC and truncated.
+- If the log is missing or has an invalid header, the backup generation is used.
+- An existing log is never written over before it was loaded: append() and
+  compact() refuse, and an unreadable log is moved aside (set_aside()).
+- The index is tagged with the log generation and ignored if it does not match.
+
+LogWriteBuffer batches records in memory and appends them together; after a
+failed append it rewrites the log instead, since the append may have left a
+torn tail.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    cast,
+)
+
+import msgpack
+
+from src.exceptions import CacheError
+
+logger = logging.getLogger(__name__)
+
+LOG_MAGIC = b"TOBSLOG1"
+INDEX_MAGIC = "TOBSIDX1"
+
+_GENERATION = struct.Struct("<Q")
+_RECORD_HEADER = struct.Struct("<II")  # payload length, crc32
+_HEADER_SIZE = len(LOG_MAGIC) + _GENERATION.size
+
+OP_SET = "s"
+OP_DELETE = "d"
+
+# Entry placeholder of load(values=False): keys only, values read on demand
+_NO_VALUE = cast(Dict[str, Any], None)
+
+
+class CacheLogStore:
+    """Append-only record log with offset index, compaction and backup recovery."""
+
+    def __init__(
+        self,
+        log_path: Path,
+        backup_path: Optional[Path] = None,
+        index_path: Optional[Path] = None,
+        compaction_ratio: float = 0.5,
+        compaction_min_bytes: int = 4 * 1024 * 1024,
+        default: Optional[Callable[[Any], Any]] = None,
+    ):
+        """
+        Args:
+            log_path: Path of the active log file
+            backup_path: Previous log generation (kept on compaction, used for recovery)
+            index_path: Offset index file (default: log_path + ".idx")
+            compaction_ratio: Compact when dead bytes exceed this share of the log
+            compaction_min_bytes: Never compact logs smaller than this
+            default: msgpack ``default`` hook for non-native values
+        """
+        self.log_path = Path(log_path)
+        self.backup_path = (
+            Path(backup_path)
+            if backup_path
+            else self.log_path.with_name(self.log_path.name + ".backup")
+        )
+        self.index_path = (
+            Path(index_path)
+            if index_path
+            else self.log_path.with_name(self.log_path.name + ".idx")
+        )
+        self.compaction_ratio = compaction_ratio
+        self.compaction_min_bytes = compaction_min_bytes
+        self._default = default
+
+        self._generation = 0
+        self._offsets: Dict[str, Tuple[int, int]] = {}  # key -> (offset, record size)
+        self._size = 0
+        self._dead_bytes = 0
+        self._index_log_size = _HEADER_SIZE
+
+        # Statistics
+        self.records_appended = 0
+        self.compactions = 0
+        self.truncated_bytes = 0
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def encode_set(self, key: str, entry: Dict[str, Any]) -> bytes:
+        """Encode a set record (safe to call on the event loop, no I/O)."""
+        return self._frame({"op": OP_SET, "k": key, "e": entry})
+
+    def encode_delete(self, key: str) -> bytes:
+        """Encode a delete record."""
+        return self._frame({"op": OP_DELETE, "k": key})
+
+    def _frame(self, payload: Dict[str, Any]) -> bytes:
+        body = cast(bytes, msgpack.packb(payload, use_bin_type=True, default=self._default))
+        return _RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body
+
+    def decode(self, frame: bytes) -> Optional[Dict[str, Any]]:
+        """Entry of a frame made by encode_set() (None for anything else)."""
+        payload = self._read_record(frame, 0, len(frame))
+        if payload is None or payload.get("op") != OP_SET:
+            return None
+        entry: Dict[str, Any] = payload["e"]
+        return entry
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def load(self, values: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Load live entries from disk.
+
+        Args:
+            values: False to only rebuild the offset index; entries then map
+                to None and are read on demand with read_many()
+
+        Returns:
+            Mapping of key -> entry dict (as passed to encode_set), least
+            recently written first
+        """
+        self._reset_state()
+
+        if not self.log_path.exists():
+            if self.backup_path.exists():
+                logger.warning("Cache log missing, restoring previous generation from backup")
+                os.replace(self.backup_path, self.log_path)
+            else:
+                logger.info("Cache log does not exist, starting fresh")
+                return {}
+
+        try:
+            return self._load_file(values)
+        except ValueError as e:
+            logger.error(f"Invalid cache log {self.log_path}: {e}")
+            return self._restore_from_backup(values)
+
+    def _restore_from_backup(self, values: bool) -> Dict[str, Dict[str, Any]]:
+        self._reset_state()
+        if not self.backup_path.exists():
+            logger.info("No cache log backup found, starting fresh")
+            self._move_aside()
+            return {}
+
+        try:
+            os.replace(self.backup_path, self.log_path)
+            entries = self._load_file(values)
+            logger.info(f"Restored {len(entries)} entries from cache log backup")
+            return entries
+        except Exception as e:
+            logger.error(f"Failed to restore cache log from backup: {e}")
+            self._reset_state()
+            self._move_aside()
+            return {}
+
+    def _load_file(self, values: bool) -> Dict[str, Dict[str, Any]]:
+        file_size = self.log_path.stat().st_size
+        if file_size < _HEADER_SIZE:
+            raise ValueError("truncated header")
+
+        with open(self.log_path, "rb") as f:
+            if f.read(len(LOG_MAGIC)) != LOG_MAGIC:
+                raise ValueError("bad magic")
+            (self._generation,) = _GENERATION.unpack(f.read(_GENERATION.size))
+
+            if file_size == _HEADER_SIZE:
+                self._size = _HEADER_SIZE
+                return {}
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                entries = self._load_from_index(view, values)
+                if entries is None:
+                    entries, replay_start = {}, _HEADER_SIZE
+                    self._offsets.clear()
+                else:
+                    replay_start = self._index_log_size
+
+                valid_end = self._replay(view, replay_start, file_size, entries, values)
+
+        if valid_end < file_size:
+            self.truncated_bytes = file_size - valid_end
+            logger.warning(
+                f"Cache log has {self.truncated_bytes} bytes of torn/corrupt tail, truncating"
+            )
+            with open(self.log_path, "r+b") as f:
+                f.truncate(valid_end)
+
+        self._size = valid_end
+        live_bytes = sum(size for _, size in self._offsets.values())
+        self._dead_bytes = max(0, self._size - _HEADER_SIZE - live_bytes)
+        return entries
+
+    def _load_from_index(self, view, values: bool) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Read live records via the offset index. Returns None if index is unusable."""
+        if not self.index_path.exists():
+            return None
+
+        try:
+            with open(self.index_path, "rb") as f:
+                index = msgpack.unpackb(f.read(), raw=False)
+            if (
+                index.get("magic") != INDEX_MAGIC
+                or index.get("generation") != self._generation
+                or index.get("log_size", 0) > len(view)
+            ):
+                logger.info("Cache log index is stale, replaying full log")
+                return None
+
+            entries: Dict[str, Dict[str, Any]] = {}
+            live = sorted(index["offsets"].items(), key=lambda item: item[1][0])
+            for key, (offset, size) in live:
+                payload = self._read_record(view, offset, len(view))
+                if payload is None or payload.get("k") != key:
+                    logger.warning("Cache log index points at invalid record, replaying full log")
+                    return None
+                entries[key] = payload["e"] if values else _NO_VALUE
+                self._offsets[key] = (offset, size)
+
+            self._index_log_size = index["log_size"]
+            return entries
+        except Exception as e:
+            logger.warning(f"Failed to read cache log index: {e}")
+            return None
+
+    def _replay(
+        self, view, start: int, end: int, entries: Dict[str, Dict[str, Any]], values: bool
+    ) -> int:
+        """Apply records in [start, end) to entries. Returns offset of the valid end."""
+        offset = start
+        while offset < end:
+            payload = self._read_record(view, offset, end)
+            if payload is None:
+                break
+
+            size = _RECORD_HEADER.size + _RECORD_HEADER.unpack_from(view, offset)[0]
+            key: str = payload["k"]
+            entries.pop(key, None)
+            self._offsets.pop(key, None)
+            if payload.get("op") == OP_SET:
+                entries[key] = payload["e"] if values else _NO_VALUE
+                self._offsets[key] = (offset, size)
+
+            offset += size
+        return offset
+
+    @staticmethod
+    def _read_record(view, offset: int, end: int) -> Optional[Dict[str, Any]]:
+        if offset + _RECORD_HEADER.size > end:
+            return None
+        length, crc = _RECORD_HEADER.unpack_from(view, offset)
+        body_start = offset + _RECORD_HEADER.size
+        if body_start + length > end:
+            return None
+        body = view[body_start : body_start + length]
+        if zlib.crc32(body) != crc:
+            return None
+        try:
+            payload = msgpack.unpackb(body, raw=False)
+        except Exception:
+            return None
+        # A record without a string key is as unusable as one with a bad CRC
+        if not isinstance(payload, dict) or not isinstance(payload.get("k"), str):
+            return None
+        return payload
+
+    def read_many(self, keys: Iterable[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Read the live entries of keys from disk, in file order (one seek each).
+
+        Keys without a live record, or whose record fails its CRC, are skipped.
+        """
+        located = sorted(
+            (self._offsets[key][0], key) for key in keys if key in self._offsets
+        )
+        if not located:
+            return []
+        result = []
+        with open(self.log_path, "rb") as f:
+            for offset, key in located:
+                f.seek(offset)
+                frame = f.read(self._offsets[key][1])
+                payload = self._read_record(frame, 0, len(frame))
+                if payload is not None and payload.get("k") == key:
+                    result.append((key, payload["e"]))
+        return result
+
+    def read_frames(
+        self,
+        keys: Iterable[str],
+        buffered: Optional[Mapping[str, Optional[bytes]]] = None,
+    ) -> Iterator[Tuple[str, bytes]]:
+        """
+        Stored frames of live keys (in the given order), for compact() without re-encoding.
+
+        Frames in buffered (key -> frame, None = deleted) replace the stored ones.
+        """
+        buffered = buffered or {}
+        f = None
+        try:
+            for key in keys:
+                if key in buffered:
+                    frame = buffered[key]
+                    if frame is not None:
+                        yield key, frame
+                    continue
+                location = self._offsets.get(key)
+                if location is None:
+                    continue
+                if f is None:
+                    f = open(self.log_path, "rb")
+                f.seek(location[0])
+                yield key, f.read(location[1])
+        finally:
+            if f is not None:
+                f.close()
+
+    def record_size(self, key: str) -> int:
+        """On-disk size of the live record of key (0 if there is none)."""
+        location = self._offsets.get(key)
+        return location[1] if location else 0
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, records: Iterable[Tuple[str, Optional[bytes]]]) -> int:
+        """
+        Append records to the log.
+
+        Args:
+            records: (key, frame) pairs where frame comes from encode_set(),
+                or None to record a deletion of key
+
+        Returns:
+            Number of bytes written
+        """
+        frames: List[Tuple[str, bytes, bool]] = [
+            (key, frame, False) if frame is not None else (key, self.encode_delete(key), True)
+            for key, frame in records
+        ]
+        if not frames:
+            return 0
+
+        self._check_loaded()
+        if self._size == 0:
+            self._create_log()
+
+        blob = b"".join(frame for _, frame, _ in frames)
+        with open(self.log_path, "ab") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+
+        offset = self._size
+        for key, frame, is_delete in frames:
+            previous = self._offsets.pop(key, None)
+            if previous:
+                self._dead_bytes += previous[1]
+            if is_delete:
+                self._dead_bytes += len(frame)
+            else:
+                self._offsets[key] = (offset, len(frame))
+            offset += len(frame)
+
+        self._size = offset
+        self.records_appended += len(frames)
+        return len(blob)
+
+    def should_compact(self) -> bool:
+        """Check whether superseded records take up enough space to compact."""
+        if self._size < self.compaction_min_bytes:
+            return False
+        return self._dead_bytes > self._size * self.compaction_ratio
+
+    def compact(self, records: Iterable[Tuple[str, bytes]]) -> None:
+        """
+        Rewrite the log with only the given live records.
+
+        The current log becomes the backup; the new log is written to a temporary
+        file and atomically moved into place, followed by a fresh index.
+        Records may be produced lazily, e.g. by read_frames().
+        """
+        self._check_loaded()
+        tmp_path = self.log_path.with_name(self.log_path.name + ".tmp")
+        generation = self._generation + 1
+
+        offsets: Dict[str, Tuple[int, int]] = {}
+        offset = _HEADER_SIZE
+        with open(tmp_path, "wb") as f:
+            f.write(LOG_MAGIC + _GENERATION.pack(generation))
+            for key, frame in records:
+                f.write(frame)
+                offsets[key] = (offset, len(frame))
+                offset += len(frame)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Keep previous generation as backup, then swap in the compacted log.
+        # A crash between the two renames leaves only the backup, which load()
+        # restores automatically.
+        if self.log_path.exists():
+            os.replace(self.log_path, self.backup_path)
+        os.replace(tmp_path, self.log_path)
+
+        reclaimed = max(0, self._size - offset)
+        self._generation = generation
+        self._offsets = offsets
+        self._size = offset
+        self._dead_bytes = 0
+        self.compactions += 1
+        self.write_index()
+
+        logger.info(
+            f"Cache log compacted: {len(offsets)} live entries, reclaimed {reclaimed} bytes"
+        )
+
+    def write_index(self) -> None:
+        """Persist the offset index for fast startup."""
+        if self._size == 0:
+            return
+        index = {
+            "magic": INDEX_MAGIC,
+            "generation": self._generation,
+            "log_size": self._size,
+            "offsets": {k: list(v) for k, v in self._offsets.items()},
+        }
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(msgpack.packb(index, use_bin_type=True))
+        os.replace(tmp_path, self.index_path)
+
+    def close(self) -> None:
+        """Flush the index on clean shutdown."""
+        try:
+            self.write_index()
+        except Exception as e:
+            logger.warning(f"Failed to write cache log index: {e}")
+
+    def set_aside(self) -> Optional[Path]:
+        """
+        Move a log that failed to load out of the way, so a fresh one can be started.
+
+        The file is renamed, never deleted. Returns its new path, or None if
+        there was no log or it could not be moved (writes then keep failing).
+        """
+        self._reset_state()
+        try:
+            return self._move_aside()
+        except OSError as e:
+            logger.error(f"Failed to move unreadable cache log {self.log_path} aside: {e}")
+            return None
+
+    def _move_aside(self) -> Optional[Path]:
+        if not self.log_path.exists():
+            return None
+        target = self.log_path.with_name(f"{self.log_path.name}.unreadable-{int(time.time())}")
+        os.replace(self.log_path, target)
+        self.index_path.unlink(missing_ok=True)
+        logger.warning(f"Moved unreadable cache log aside to {target}")
+        return target
+
+    def _check_loaded(self) -> None:
+        """Refuse to write over a log that exists on disk but was never loaded."""
+        if self._size == 0 and self.log_path.exists():
+            raise CacheError(
+                f"Cache log {self.log_path} exists but is not loaded, refusing to overwrite it",
+                operation="write",
+            )
+
+    def _create_log(self) -> None:
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._generation = int.from_bytes(os.urandom(_GENERATION.size), "little")
+        with open(self.log_path, "xb") as f:
+            f.write(LOG_MAGIC + _GENERATION.pack(self._generation))
+        self._size = _HEADER_SIZE
+
+    def _reset_state(self) -> None:
+        self._generation = 0
+        self._offsets = {}
+        self._size = 0
+        self._dead_bytes = 0
+        self._index_log_size = _HEADER_SIZE
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Get log statistics."""
+        return {
+            "log_bytes": self._size,
+            "dead_bytes": self._dead_bytes,
+            "live_entries": len(self._offsets),
+            "records_appended": self.records_appended,
+            "compactions": self.compactions,
+            "truncated_bytes": self.truncated_bytes,
+        }
+
+    def live_keys(self) -> List[str]:
+        """Keys with a live record in the log."""
+        return list(self._offsets)
+
+
+class LogWriteBuffer:
+    """
+    Batched writes to a CacheLogStore.
+
+    Records are buffered as frames and appended together by flush(). A failed
+    append may leave a torn tail, so after one the buffer stays pending and
+    the next flush() rewrites the log with every live record instead.
+    """
+
+    def __init__(
+        self,
+        store: CacheLogStore,
+        live_frames: Optional[Callable[[], Iterable[Tuple[str, bytes]]]] = None,
+        flush_every: int = 64,
+    ):
+        """
+        Args:
+            store: Log the records are written to
+            live_frames: Every live record, for rewrites and compaction; without
+                it they must be passed to flush()/compact()
+            flush_every: Buffered records that make the buffer full
+        """
+        self.store = store
+        self.flush_every = flush_every
+        self._live_frames = live_frames
+        # key -> frame not yet written (None = deleted), in write order
+        self.pending: Dict[str, Optional[bytes]] = {}
+        self.rewrite_pending = False
+
+    def put(self, key: str, frame: Optional[bytes]) -> None:
+        """Buffer the latest record of key (frame None = deleted)."""
+        self.pending.pop(key, None)
+        self.pending[key] = frame
+
+    @property
+    def full(self) -> bool:
+        return len(self.pending) >= self.flush_every
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def flush(self, live_frames: Optional[Iterable[Tuple[str, bytes]]] = None) -> None:
+        """
+        Append buffered records, or rewrite the log if an earlier write failed.
+
+        Compacts the log when it has enough dead records. Raises on failure;
+        the records then stay buffered.
+
+        Args:
+            live_frames: Every live record, used instead of the live_frames
+                callback if the log has to be rewritten
+        """
+        if self.rewrite_pending:
+            self.compact(live_frames)
+            return
+        if not self.pending:
+            return
+
+        batch, self.pending = self.pending, {}
+        try:
+            self.store.append(batch.items())
+        except BaseException:
+            # A failed append may leave a torn tail: rewrite the log next time
+            batch.update(self.pending)
+            self.pending = batch
+            self.rewrite_pending = True
+            raise
+
+        if self.store.should_compact() and self._live_frames is not None:
+            self.compact()
+
+    def compact(self, live_frames: Optional[Iterable[Tuple[str, bytes]]] = None) -> None:
+        """Rewrite the log with every live record (buffered ones included)."""
+        if live_frames is None:
+            if self._live_frames is None:
+                return  # Nothing to rewrite from: the caller passes the records later
+            live_frames = self._live_frames()
+        try:
+            self.store.compact(live_frames)
+        except BaseException:
+            self.rewrite_pending = True
+            raise
+        self.pending.clear()
+        self.rewrite_pending = False
+
+    def frames(self, keys: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+        """Live frames of keys in the given order, buffered records included."""
+        return self.store.read_frames(keys, self.pending)
+
+    def read_many(self, keys: Iterable[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Entries of keys: buffered ones first, then the rest in file order."""
+        result = []
+        on_disk = []
+        for key in keys:
+            if key in self.pending:
+                frame = self.pending[key]
+                entry = self.store.decode(frame) if frame is not None else None
+                if entry is not None:
+                    result.append((key, entry))
+            else:
+                on_disk.append(key)
+        result.extend(self.store.read_many(on_disk))
+        return result
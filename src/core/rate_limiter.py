@@ -0,0 +1,228 @@
+"""
+Общий (account-wide) rate limiter для всех вызовов Telegram API.
+
+Telegram считает лимиты на аккаунт, а не на клиента: шардированные воркеры,
+основной клиент и загрузчик медиа расходуют один и тот же бюджет. Поэтому
+все они берут токены из одного RateLimiter:
+
+- token bucket на каждый класс методов (history / media / other);
+- FloodWait, полученный любым воркером, блокирует весь класс до истечения
+  штрафа и вдвое снижает скорость bucket'а; скорость линейно
+  восстанавливается за recovery_seconds.
+
+Вместо того чтобы каждый воркер независимо ловил FloodWait (и вся выгрузка
+стояла десятки секунд), остальные вызовы просто ждут своей очереди.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+HISTORY = "history"
+MEDIA = "media"
+OTHER = "other"
+
+# Во сколько раз снижается скорость класса после FloodWait и нижняя граница
+FLOOD_BACKOFF_FACTOR = 0.5
+MIN_RATE_FRACTION = 0.1
+
+
+class TokenBucket:
+    """Token bucket с резервированием: токены могут уходить в минус (очередь)."""
+
+    def __init__(self, rate: float, burst: int, recovery_seconds: float = 60.0):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.recovery_seconds = max(1.0, float(recovery_seconds))
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.base_rate <= 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+        if self.rate < self.base_rate:
+            # Линейное восстановление скорости после FloodWait
+            self.rate = min(
+                self.base_rate,
+                self.rate + self.base_rate * elapsed / self.recovery_seconds,
+            )
+        self.tokens = min(float(self.burst), self.tokens + elapsed * self.rate)
+
+    def reserve(self, now: float) -> float:
+        """Забрать токен; вернуть задержку (с), после которой его можно тратить."""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        self.tokens -= 1.0
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def slow_down(self, now: float) -> None:
+        """Снизить скорость после FloodWait и сбросить накопленный burst."""
+        if self.unlimited:
+            return
+        self._refill(now)
+        self.rate = max(
+            self.base_rate * MIN_RATE_FRACTION, self.rate * FLOOD_BACKOFF_FACTOR
+        )
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RateLimiter:
+    """Rate limiter, общий для всех клиентов одного аккаунта."""
+
+    def __init__(
+        self,
+        rates: Optional[Dict[str, float]] = None,
+        burst: int = 10,
+        recovery_seconds: float = 60.0,
+        enabled: bool = True,
+    ):
+        rates = dict(rates or {})
+        rates.setdefault(HISTORY, 10.0)
+        rates.setdefault(MEDIA, 20.0)
+        rates.setdefault(OTHER, rates[HISTORY])
+        if not enabled:
+            # Штрафы FloodWait учитываются всегда, выключается только pacing
+            rates = {name: 0.0 for name in rates}
+
+        self.enabled = enabled
+        self._buckets = {
+            name: TokenBucket(rate, burst, recovery_seconds)
+            for name, rate in rates.items()
+        }
+        self._blocked_until: Dict[str, float] = {}
+
+        self.stats: Dict[str, Dict[str, float]] = {
+            name: {
+                "acquired": 0,
+                "delayed": 0,
+                "wait_seconds": 0.0,
+                "flood_waits": 0,
+                "penalty_seconds": 0.0,
+            }
+            for name in self._buckets
+        }
+
+    @classmethod
+    def from_config(cls, config: Any) -> "RateLimiter":
+        """Создать limiter из config.performance (rate_limit_* настройки)."""
+        performance = getattr(config, "performance", None)
+
+        def _number(name: str, default: float) -> float:
+            value = getattr(performance, name, default)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return default
+            return float(value)
+
+        history_rate = _number("rate_limit_calls_per_second", 10.0)
+        return cls(
+            rates={
+                HISTORY: history_rate,
+                MEDIA: _number("rate_limit_media_calls_per_second", 20.0),
+                OTHER: history_rate,
+            },
+            burst=int(_number("rate_limit_burst", 10)),
+            recovery_seconds=_number("rate_limit_recovery_s", 60.0),
+            enabled=getattr(performance, "rate_limit_enabled", True) is not False,
+        )
+
+    def _class(self, method_class: str) -> str:
+        return method_class if method_class in self._buckets else OTHER
+
+    def penalty_remaining(self, method_class: str = HISTORY) -> float:
+        """Сколько секунд ещё действует FloodWait-штраф класса."""
+        blocked_until = self._blocked_until.get(self._class(method_class), 0.0)
+        return max(0.0, blocked_until - time.monotonic())
+
+    async def acquire(self, method_class: str = HISTORY) -> float:
+        """
+        Дождаться разрешения на один вызов API.
+
+        Returns:
+            Суммарное время ожидания в секундах.
+        """
+        name = self._class(method_class)
+        bucket = self._buckets[name]
+        stats = self.stats[name]
+        waited = 0.0
+        reserved = False
+
+        while True:
+            penalty = self.penalty_remaining(name)
+            if penalty > 0:
+                await asyncio.sleep(penalty)
+                waited += penalty
+                continue
+            if reserved:
+                break
+
+            reserved = True
+            delay = bucket.reserve(time.monotonic())
+            if delay > 0:
+                await asyncio.sleep(delay)
+                waited += delay
+            # Пока ждали токен, другой воркер мог поймать FloodWait -
+            # следующая итерация дождётся конца штрафа
+
+        stats["acquired"] += 1
+        if waited > 0:
+            stats["delayed"] += 1
+            stats["wait_seconds"] += waited
+        return waited
+
+    def report_flood_wait(self, method_class: str, seconds: float) -> None:
+        """
+        Зарегистрировать FloodWait, полученный любым клиентом аккаунта.
+
+        Все последующие acquire() этого класса ждут до конца штрафа.
+        """
+        name = self._class(method_class)
+        now = time.monotonic()
+        blocked_until = now + max(0.0, float(seconds))
+        if blocked_until > self._blocked_until.get(name, 0.0):
+            self._blocked_until[name] = blocked_until
+        self._buckets[name].slow_down(now)
+
+        stats = self.stats[name]
+        stats["flood_waits"] += 1
+        stats["penalty_seconds"] += float(seconds)
+        logger.warning(
+            f"🚦 FloodWait {seconds:.0f}s on '{name}' requests: pausing the class, "
+            f"rate lowered to {self._buckets[name].rate:.2f}/s"
+        )
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Статистика по классам методов (с текущей скоростью)."""
+        return {
+            name: {**stats, "rate": round(self._buckets[name].rate, 3)}
+            for name, stats in self.stats.items()
+        }
+
+
+# Глобальный экземпляр (один на процесс = один на аккаунт)
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter(config: Any = None) -> RateLimiter:
+    """Получение глобального rate limiter (создаётся из config при первом вызове)."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = (
+            RateLimiter.from_config(config) if config is not None else RateLimiter()
+        )
+    return _rate_limiter
+
+
+def reset_rate_limiter() -> None:
+    """Сброс глобального rate limiter (тесты, смена аккаунта)."""
+    global _rate_limiter
+    _rate_limiter = None
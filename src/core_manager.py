@@ -11,6 +11,7 @@ from typing import Any, Dict, Optional
 
 from .core import (
     AlertLevel,
+    CacheBackend,
     CacheManager,
     ConnectionManager,
     PerformanceMonitor,
@@ -34,10 +35,12 @@ class CoreSystemManager:
         config_path: Optional[Path] = None,
         performance_profile: str = "balanced",
         health_check_interval: float = 0.1,
+        cache_backend: str = "json",
     ):
         # config_path preserved for API compatibility but not used
         self.config_path = config_path
         self.performance_profile = performance_profile
+        self.cache_backend = CacheBackend(cache_backend)
 
         # Managers
         self._cache_manager: Optional[CacheManager] = None
@@ -90,7 +93,7 @@ class CoreSystemManager:
             logger.info("Performance monitor initialized")
 
             # 2. Then cache manager
-            self._cache_manager = await get_cache_manager()
+            self._cache_manager = await get_cache_manager(backend=self.cache_backend)
             logger.info("Cache manager initialized")
 
             # 3. Finally connection manager
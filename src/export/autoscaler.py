@@ -0,0 +1,125 @@
+"""
+Process-worker autoscaling for AsyncPipeline.
+
+The pipeline's queues tell us which stage is the bottleneck:
+- fetch queue full, write queue not full -> process-bound: add a worker
+- write queue (or reorder buffer, measured against the write queue size)
+  backing up -> write-bound: more processors only add memory pressure, drop
+  a worker
+- fetch queue empty -> fetch-bound (Telegram API / FloodWait): workers idle,
+  drop a worker
+Every decision is recorded so profiles can be tuned from real exports.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Queue fill ratios that classify a sample
+HIGH_WATERMARK = 0.8
+LOW_WATERMARK = 0.1
+
+# Keep stats dicts small on long exports
+MAX_RECORDED_DECISIONS = 100
+
+
+class WorkerAutoscaler:
+    """Decides process worker count from queue depth samples."""
+
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        interval: float = 1.0,
+        patience: int = 2,
+    ):
+        self.min_workers = max(1, int(min_workers))
+        self.max_workers = max(self.min_workers, int(max_workers))
+        self.interval = max(0.01, float(interval))
+        # Consecutive samples with the same verdict required before acting
+        self.patience = max(1, int(patience))
+
+        self.decisions: List[Dict[str, Any]] = []
+        self.decision_count = 0
+        self.samples = 0
+        self.peak_workers = 0
+        self._verdict: Optional[str] = None
+        self._streak = 0
+        self._start = time.time()
+
+    def clamp(self, workers: int) -> int:
+        """Bound an initial worker count to [min_workers, max_workers]."""
+        return min(self.max_workers, max(self.min_workers, int(workers)))
+
+    @staticmethod
+    def classify(fetch_fill: float, write_fill: float, buffer_fill: float = 0.0) -> str:
+        """Name the bottleneck stage for one sample."""
+        if write_fill >= HIGH_WATERMARK or buffer_fill >= HIGH_WATERMARK:
+            return "write-bound"
+        if fetch_fill >= HIGH_WATERMARK:
+            return "process-bound"
+        if fetch_fill <= LOW_WATERMARK:
+            return "fetch-bound"
+        return "balanced"
+
+    def observe(
+        self,
+        workers: int,
+        fetch_fill: float,
+        write_fill: float,
+        buffered: int = 0,
+        buffer_capacity: int = 0,
+    ) -> Tuple[int, str]:
+        """
+        Feed one sample, get the worker count delta (-1, 0, +1) and the verdict.
+
+        buffered is the writer's reorder buffer length; it counts as backing
+        up relative to buffer_capacity (the write queue size, 0 = ignored).
+        """
+        self.samples += 1
+        self.peak_workers = max(self.peak_workers, workers)
+
+        buffer_fill = buffered / buffer_capacity if buffer_capacity > 0 else 0.0
+        verdict = self.classify(fetch_fill, write_fill, buffer_fill)
+        if verdict == self._verdict:
+            self._streak += 1
+        else:
+            self._verdict = verdict
+            self._streak = 1
+
+        if self._streak < self.patience:
+            return 0, verdict
+
+        delta = 0
+        if verdict == "process-bound" and workers < self.max_workers:
+            delta = 1
+        elif verdict in ("write-bound", "fetch-bound") and workers > self.min_workers:
+            delta = -1
+
+        if delta:
+            self._streak = 0
+            self.decision_count += 1
+            if len(self.decisions) < MAX_RECORDED_DECISIONS:
+                self.decisions.append(
+                    {
+                        "t": round(time.time() - self._start, 3),
+                        "reason": verdict,
+                        "workers": workers + delta,
+                        "fetch_fill": round(fetch_fill, 2),
+                        "write_fill": round(write_fill, 2),
+                        "buffered": buffered,
+                    }
+                )
+            self.peak_workers = max(self.peak_workers, workers + delta)
+        return delta, verdict
+
+    def stats(self, final_workers: int) -> Dict[str, Any]:
+        """Summary for the pipeline stats dict."""
+        return {
+            "min_workers": self.min_workers,
+            "max_workers": self.max_workers,
+            "final_workers": final_workers,
+            "peak_workers": self.peak_workers,
+            "samples": self.samples,
+            "decision_count": self.decision_count,
+            "decisions": list(self.decisions),
+        }
@@ -5,9 +5,12 @@ Provides core export orchestration and processing capabilities with visual progr
 
 import asyncio
 import base64
+import contextlib
+import copy
 import functools
 import inspect
 import os
+import re
 import sys
 import time
 from dataclasses import dataclass, field
@@ -15,6 +18,7 @@ from typing import Any, Dict, List, Optional, Set, Union
 
 import aiofiles
 import aiohttp
+import numpy as np
 from rich import print as rprint
 from rich.progress import (
     BarColumn,
@@ -31,12 +35,24 @@ from telethon.tl.functions.account import (
 )
 
 from ..config import EXPORT_OPERATION_TIMEOUT, Config, ExportTarget
+from ..core.id_index import ProcessedIdIndex
 from ..export_reporter import ExportReporterManager
-from ..media import MediaProcessor
+from ..media import LazyMediaLoader, MediaProcessor
+from ..media.lazy_loader import lazy_metadata_dir
+from ..media.media_identity import media_identity_key
 from ..note_generator import NoteGenerator
 from ..telegram_client import TelegramManager
 from ..utils import is_voice_message, logger, sanitize_filename
 from .pipeline import AsyncPipeline
+from .render_pool import (
+    ProcessRenderPool,
+    extract_reactions,
+    format_timestamp,
+    media_type_name,
+    render_record,
+    render_records,
+)
+from .scheduler import ExportBudget, ExportScheduler, ScheduledTarget
 
 # ============================================================================
 # Configurable constants via environment variables
@@ -54,6 +70,12 @@ SENDER_CACHE_MAX_SIZE = int(os.getenv("SENDER_CACHE_SIZE", "10000"))
 # For HDD: 256KB (262144) may be more efficient
 EXPORT_BUFFER_SIZE = int(os.getenv("EXPORT_BUFFER_SIZE", "1048576"))  # 1MB (increased from 512KB)
 
+# Chat file header line updated after export (placeholder or count of a previous run)
+_TOTAL_MESSAGES_PATTERN = re.compile(r"^Total Messages: (?:Processing\.\.\.|\d+)$", re.M)
+
+# Voice message waiting for the transcription stage (path relative to the note)
+_TRANSCRIPTION_MARKER_PATTERN = re.compile(r"^<!-- transcription: (.+?) -->$", re.M)
+
 # Media file copy chunk size (8MB for large media files)
 # Larger chunks = fewer syscalls but more memory per operation
 MEDIA_COPY_CHUNK_SIZE = int(
@@ -61,10 +83,40 @@ MEDIA_COPY_CHUNK_SIZE = int(
 )  # 8MB
 
 
+# BloomFilter hashing: splitmix64 finalizer + double hashing (Kirsch-Mitzenmacher).
+# Unlike hash(), this is identical across processes and runs, so persisted
+# filters stay valid. Scalar and NumPy paths must produce the same bit indexes.
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+_SPLITMIX_GAMMA = 0x9E3779B97F4A7C15
+_SPLITMIX_MUL1 = 0xBF58476D1CE4E5B9
+_SPLITMIX_MUL2 = 0x94D049BB133111EB
+_BLOOM_SECOND_SEED = 0xD6E8FEB86659FD93
+BLOOM_FILTER_FORMAT = "splitmix64-dh-v1"
+
+
+def _splitmix64(x: int) -> int:
+    x = (x + _SPLITMIX_GAMMA) & _MASK64
+    x = ((x ^ (x >> 30)) * _SPLITMIX_MUL1) & _MASK64
+    x = ((x ^ (x >> 27)) * _SPLITMIX_MUL2) & _MASK64
+    return x ^ (x >> 31)
+
+
+def _splitmix64_np(x: np.ndarray) -> np.ndarray:
+    # uint64 arithmetic wraps modulo 2**64, matching the masked scalar version
+    x = x + np.uint64(_SPLITMIX_GAMMA)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(_SPLITMIX_MUL1)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(_SPLITMIX_MUL2)
+    result: np.ndarray = x ^ (x >> np.uint64(31))
+    return result
+
+
 class BloomFilter:
     """
     Memory-efficient Bloom filter for approximate set membership testing.
     Uses ~1.2MB for 1M items with 1% false positive rate.
+
+    Hashing is deterministic (see BLOOM_FILTER_FORMAT), and add_many()/contains_many()
+    process a whole fetched batch with NumPy instead of a per-bit Python loop.
     """
 
     def __init__(
@@ -80,41 +132,71 @@ class BloomFilter:
         import math
 
         # Calculate optimal parameters
-        self.size = int(
-            -expected_items * math.log(false_positive_rate) / (math.log(2) ** 2)
+        self.size = max(
+            8,
+            int(-expected_items * math.log(false_positive_rate) / (math.log(2) ** 2)),
         )
-        self.hash_count = int((self.size / expected_items) * math.log(2))
+        self.hash_count = max(1, int((self.size / expected_items) * math.log(2)))
 
         # Use bit array for memory efficiency
         self.bit_array = bytearray((self.size + 7) // 8)  # 1 byte = 8 bits
+        self._bits = np.frombuffer(self.bit_array, dtype=np.uint8)  # shared view
 
         # Statistics
         self.items_added = 0
 
-    def _hash(self, item: int, seed: int) -> int:
-        """Simple hash function with seed."""
-        # Use Python's built-in hash with seed mixing
-        return hash((item, seed)) % self.size
+    def _bit_indexes(self, item: int):
+        """Bit indexes for a single item (scalar fast path)."""
+        x = int(item) & _MASK64
+        h1 = _splitmix64(x)
+        h2 = _splitmix64(x ^ _BLOOM_SECOND_SEED) | 1
+        size = self.size
+        for i in range(self.hash_count):
+            yield ((h1 + i * h2) & _MASK64) % size
+
+    def _bit_indexes_many(self, items) -> np.ndarray:
+        """Bit indexes for a batch of items, shape (len(items), hash_count)."""
+        x = np.asarray(items, dtype=np.int64).astype(np.uint64)
+        h1 = _splitmix64_np(x)
+        h2 = _splitmix64_np(x ^ np.uint64(_BLOOM_SECOND_SEED)) | np.uint64(1)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.size)
 
     def add(self, item: int):
         """Add item to the filter."""
-        for i in range(self.hash_count):
-            bit_index = self._hash(item, i)
-            byte_index = bit_index // 8
-            bit_offset = bit_index % 8
-            self.bit_array[byte_index] |= 1 << bit_offset
+        bits = self.bit_array
+        for bit_index in self._bit_indexes(item):
+            bits[bit_index >> 3] |= 1 << (bit_index & 7)
         self.items_added += 1
 
+    def add_many(self, items) -> None:
+        """Add a batch of items in one vectorized pass."""
+        items = list(items)
+        if not items:
+            return
+        idx = self._bit_indexes_many(items).ravel()
+        masks = np.left_shift(1, (idx & np.uint64(7)).astype(np.uint8)).astype(np.uint8)
+        np.bitwise_or.at(self._bits, (idx >> np.uint64(3)).astype(np.intp), masks)
+        self.items_added += len(items)
+
     def __contains__(self, item: int) -> bool:
         """Check if item might be in the filter (false positives possible)."""
-        for i in range(self.hash_count):
-            bit_index = self._hash(item, i)
-            byte_index = bit_index // 8
-            bit_offset = bit_index % 8
-            if not (self.bit_array[byte_index] & (1 << bit_offset)):
+        bits = self.bit_array
+        for bit_index in self._bit_indexes(item):
+            if not (bits[bit_index >> 3] & (1 << (bit_index & 7))):
                 return False
         return True
 
+    def contains_many(self, items) -> np.ndarray:
+        """Vectorized membership test. Returns a bool array aligned with items."""
+        items = list(items)
+        if not items:
+            return np.zeros(0, dtype=bool)
+        idx = self._bit_indexes_many(items)
+        byte_values = self._bits[(idx >> np.uint64(3)).astype(np.intp)]
+        hits = (byte_values >> (idx & np.uint64(7)).astype(np.uint8)) & 1
+        return hits.all(axis=1)
+
     def memory_usage_mb(self) -> float:
         """Get memory usage in MB."""
         return len(self.bit_array) / (1024 * 1024)
@@ -132,6 +214,7 @@ class BloomFilter:
     def to_dict(self) -> Dict[str, Any]:
         """Serialize to dictionary."""
         return {
+            "format": BLOOM_FILTER_FORMAT,
             "size": self.size,
             "hash_count": self.hash_count,
             "items_added": self.items_added,
@@ -141,12 +224,22 @@ class BloomFilter:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "BloomFilter":
         """Deserialize from dictionary."""
+        # Filters saved before BLOOM_FILTER_FORMAT used per-process hash() and
+        # cannot be queried reliably
+        if data.get("format") != BLOOM_FILTER_FORMAT:
+            raise ValueError(
+                f"Unsupported BloomFilter format: {data.get('format', 'legacy')}"
+            )
+
         # Create instance without calling __init__ to avoid recalculating parameters
         obj = cls.__new__(cls)
         obj.size = data["size"]
         obj.hash_count = data["hash_count"]
         obj.items_added = data["items_added"]
         obj.bit_array = bytearray(base64.b64decode(data["bit_array_b64"]))
+        if len(obj.bit_array) != (obj.size + 7) // 8:
+            raise ValueError("BloomFilter bit array does not match its size")
+        obj._bits = np.frombuffer(obj.bit_array, dtype=np.uint8)
         return obj
 
 
@@ -338,21 +431,32 @@ class AsyncBufferedSaver:
     
     Security S-4: Implements atomic writes using tmp + rename pattern to prevent data corruption
     on crash/interruption. Writes to .tmp file first, then atomically renames to final file.
+
+    Append mode ("a") writes in place instead: existing content is never rewritten, and
+    incremental export truncates anything written after the last checkpoint (see tell()).
     """
 
     def __init__(
-        self, path, mode="w", encoding="utf-8", buffer_size=EXPORT_BUFFER_SIZE
+        self,
+        path,
+        mode="w",
+        encoding="utf-8",
+        buffer_size=EXPORT_BUFFER_SIZE,
+        io_semaphore: Optional[asyncio.Semaphore] = None,
     ):
         self.path = path
         self.mode = mode
         self.encoding = encoding
         self.buffer_size = buffer_size
-        self._buffer = []
+        self._buffer: List[str] = []
         self._current_size = 0
-        self._file = None
-        # S-4: Atomic write support - write to .tmp first
-        self._tmp_path = f"{path}.tmp"
+        self._file: Optional[Any] = None  # aiofiles handle while inside "async with"
+        # S-4: Atomic write support - write to .tmp first (not needed for append)
+        self._append = mode.startswith("a")
+        self._tmp_path = path if self._append else f"{path}.tmp"
         self._finalized = False
+        # Shared disk budget when several targets export concurrently
+        self._io_semaphore = io_semaphore
 
     async def __aenter__(self):
         # S-4: Write to temporary file first for atomicity
@@ -363,7 +467,12 @@ class AsyncBufferedSaver:
         await self.flush()
         if self._file:
             await self._file.close()
-        
+
+        if self._append:
+            # Keep appended data even on failure; resume truncates to the checkpoint
+            self._finalized = exc_type is None
+            return
+
         # S-4: Atomic rename on success, cleanup on failure
         if exc_type is None:
             # Success: atomically rename tmp -> final
@@ -408,8 +517,21 @@ class AsyncBufferedSaver:
         self._current_size = 0
 
         if self._file:
-            await self._file.write(content)
-            await self._file.flush()
+            if self._io_semaphore is not None:
+                async with self._io_semaphore:
+                    await self._file.write(content)
+                    await self._file.flush()
+            else:
+                await self._file.write(content)
+                await self._file.flush()
+
+    async def tell(self) -> int:
+        """Flush buffered data and return the current file offset."""
+        if self._file is None:
+            raise RuntimeError(f"tell() on {self.path} outside 'async with': file is not open")
+        await self.flush()
+        offset: int = await self._file.tell()
+        return offset
 
 
 class ForumTopic:
@@ -425,6 +547,10 @@ class ForumTopic:
         return f"ForumTopic(id={self.topic_id}, title='{self.title}', messages={self.message_count})"
 
 
+# Processed message IDs of a chat: exact range index, or a BloomFilter on resume
+ProcessedIds = Union[ProcessedIdIndex, BloomFilter, set]
+
+
 @dataclass
 class EntityCacheData:
     """Данные кэша для сущности."""
@@ -435,20 +561,38 @@ class EntityCacheData:
     total_messages: int = 0
     processed_messages: int = 0
     last_message_id: Optional[int] = None
-    processed_message_ids: Union[BloomFilter, set] = field(default_factory=set)  # 🚀 Optimized: set for new exports, BloomFilter for resume
-    
-    def to_dict(self) -> dict:
-        """Convert to serializable dict (excludes BloomFilter)."""
-        return {
+    processed_message_ids: ProcessedIds = field(
+        default_factory=ProcessedIdIndex
+    )  # 🚀 Range index: exact, a few KB even for millions of IDs
+    # Incremental export checkpoint: chat file size and last message ID known to be in it
+    chat_file_size: Optional[int] = None
+    chat_file_last_id: Optional[int] = None
+
+    def to_dict(self, include_bloom_filter: bool = True) -> dict:
+        """
+        Convert to serializable dict.
+
+        Args:
+            include_bloom_filter: Serialize a BloomFilter (megabytes of base64 for
+                large chats). Periodic saves skip it; final and shutdown saves keep it.
+        """
+        data = {
             "entity_id": self.entity_id,
             "entity_name": self.entity_name,
             "entity_type": self.entity_type,
             "total_messages": self.total_messages,
             "processed_messages": self.processed_messages,
             "last_message_id": self.last_message_id,
-            # Don't serialize processed_message_ids (BloomFilter not serializable)
-            # Resume will use last_message_id instead
+            "chat_file_size": self.chat_file_size,
+            "chat_file_last_id": self.chat_file_last_id,
         }
+        # Range index and BloomFilter (stable hashing) are restored on resume;
+        # a plain set is not persisted (resume falls back to last_message_id)
+        if isinstance(self.processed_message_ids, ProcessedIdIndex) or (
+            include_bloom_filter and isinstance(self.processed_message_ids, BloomFilter)
+        ):
+            data["processed_message_ids"] = self.processed_message_ids.to_dict()
+        return data
 
 
 class ExportStatistics:
@@ -523,7 +667,7 @@ class ExportStatistics:
     def end_transcription_phase(self):
         """Mark end of transcription."""
         if self._transcription_start:
-            self.transcription_duration = time.time() - self._transcription_start
+            self.transcription_duration += time.time() - self._transcription_start
             self._transcription_start = None
 
     @property
@@ -640,6 +784,22 @@ class Exporter:
         self._prefetch_result = None
         self._prefetch_stats = {"hits": 0, "misses": 0}
 
+        # Render process pool for the async pipeline (created on first use)
+        self._render_pool: Optional[ProcessRenderPool] = None
+
+        # Lazy media mode: placeholders now, `main.py hydrate` downloads later
+        self._lazy_loader: Optional[LazyMediaLoader] = None
+        if getattr(config, "enable_lazy_loading", False) is True and media_processor:
+            self._lazy_loader = LazyMediaLoader(
+                media_processor, lazy_metadata_dir(config)
+            )
+
+        # Shared resource budget, set while export_all runs targets concurrently
+        self._budget: Optional[ExportBudget] = None
+        # Concurrent targets can't each own a live progress display; the
+        # scheduler logs their progress instead
+        self._quiet_progress = False
+
         # Initialize the reporter manager
         self.reporter_manager = ExportReporterManager(
             base_monitoring_path=self.config.export_path,
@@ -756,15 +916,20 @@ class Exporter:
 
     async def _batch_cache_set(self, key: str, value: Any):
         """Add cache update to batch queue."""
-        # Serialize EntityCacheData to dict before caching
+        # Serialize EntityCacheData to dict before caching. Periodic saves leave
+        # the BloomFilter out; until the final save resume relies on last_message_id
         if isinstance(value, EntityCacheData):
-            value = value.to_dict()
+            value = value.to_dict(include_bloom_filter=False)
         self._pending_cache_updates[key] = value
         if len(self._pending_cache_updates) >= self._cache_batch_size:
             await self._flush_cache_batch()
 
     async def _flush_cache_batch(self):
         """Flush all pending cache updates in a single batch."""
+        # Lazy placeholders already written must have their metadata on disk
+        # before the resume checkpoint marks the messages as exported
+        if self._lazy_loader is not None:
+            self._lazy_loader.flush()
         if not self._pending_cache_updates:
             return
 
@@ -901,127 +1066,193 @@ class Exporter:
             # Fallback to current default (1M = ~1.2MB)
             return 1_000_000
 
-    async def _process_message_parallel(
+    async def _prepare_render_record(
         self, message, target, media_dir, output_dir, entity_reporter
-    ):
-        """Process a single message in parallel (optimized for memory efficiency)."""
-        try:
-            # Get sender name
-            sender_name = await self._get_sender_name(message)
-
-            # Format timestamp
-            timestamp = self._format_timestamp(message.date)
-
-            # Use list-based string building for better performance
-            content_parts = []
-            content_parts.append(f"{sender_name}, [{timestamp}]\n")
+    ) -> Dict[str, Any]:
+        """
+        Do the I/O-bound part of message export (sender, media, transcription).
 
-            if message.text:
-                content_parts.append(f"{message.text}\n")
+        Returns a picklable record for render_record() so the CPU-bound
+        formatting can run in the render process pool.
+        """
+        # Get sender name
+        sender_name = await self._get_sender_name(message)
 
-            local_media_count = 0
+        media_lines: List[str] = []
+        local_media_count = 0
 
-            # Handle media
-            if message.media and self.config.media_download:
-                try:
+        # Handle media
+        if message.media and self.config.media_download and self._lazy_loader:
+            media_lines.extend(
+                await self._lazy_loader.defer_media(
+                    message, target.id, media_dir=media_dir, link_root=output_dir
+                )
+            )
+        elif message.media and self.config.media_download:
+            try:
+                async with self._budget_slot("media"):
                     media_paths = await self.media_processor.download_and_process_media(
                         message=message,
                         entity_id=target.id,
                         entity_media_path=media_dir,
                     )
-                    if media_paths:
-                        local_media_count = len(media_paths)
+                if media_paths:
+                    local_media_count = len(media_paths)
 
-                        # Record media downloads
-                        for media_path in media_paths:
-                            try:
-                                file_size = media_path.stat().st_size
-                                entity_reporter.record_media_downloaded(
-                                    message.id, file_size, str(media_path)
-                                )
-                            except Exception:
-                                pass
+                    # Record media downloads
+                    for media_path in media_paths:
+                        try:
+                            file_size = media_path.stat().st_size
+                            entity_reporter.record_media_downloaded(
+                                message.id, file_size, str(media_path)
+                            )
+                        except Exception:
+                            pass
 
-                        # Add references
-                        for media_path in media_paths:
-                            try:
-                                relative_path = media_path.relative_to(output_dir)
-                                content_parts.append(f"![[{relative_path}]]\n")
+                    # Add references
+                    for media_path in media_paths:
+                        try:
+                            relative_path = media_path.relative_to(output_dir)
+                            media_lines.append(f"![[{relative_path}]]\n")
 
-                                # Transcription
-                                if (
-                                    self.config.enable_transcription
-                                    and is_voice_message(message)
+                            # Transcription: queued, the text replaces the
+                            # marker when the note is finalized
+                            if (
+                                self.config.enable_transcription
+                                and is_voice_message(message)
+                            ):
+                                duration = getattr(message.file, "duration", None)
+                                if self.media_processor.submit_transcription(
+                                    media_path,
+                                    duration=(
+                                        duration
+                                        if isinstance(duration, (int, float))
+                                        else None
+                                    ),
+                                    identity=media_identity_key(message),
                                 ):
-                                    try:
-                                        transcription = (
-                                            await self.media_processor.transcribe_audio(
-                                                media_path
-                                            )
-                                        )
-                                        if transcription:
-                                            content_parts.append(
-                                                f"**Расшифровка:** {transcription}\n"
-                                            )
-                                    except Exception:
-                                        pass
-                            except ValueError:
-                                content_parts.append(f"![[{media_path.name}]]\n")
-                    else:
-                        content_parts.append("[[No files downloaded]]\n")
-                except Exception as e:
-                    self._lazy_log(
-                        "WARNING",
-                        f"Failed to process media for message {message.id}: {e}",
-                    )
-                    content_parts.append("[[Failed to download]]\n")
-            elif message.media:
-                media_type = self._get_media_type_name(message.media)
-                content_parts.append(f"[{media_type}]\n")
-
-            # Reactions
-            if (
-                self.config.export_reactions
-                and hasattr(message, "reactions")
-                and message.reactions
-            ):
-                try:
-                    reactions_list = []
-                    if hasattr(message.reactions, "results"):
-                        for reaction_count in message.reactions.results:
-                            emoji = "?"
-                            # Handle standard emoji
-                            if hasattr(reaction_count.reaction, "emoticon"):
-                                emoji = reaction_count.reaction.emoticon
-                            # Handle custom emoji (document_id)
-                            elif hasattr(reaction_count.reaction, "document_id"):
-                                emoji = "🧩"  # Placeholder for custom emoji
-
-                            reactions_list.append(f"{emoji} {reaction_count.count}")
-
-                    if reactions_list:
-                        content_parts.append(
-                            f"**Reactions:** {', '.join(reactions_list)}\n"
-                        )
-                except Exception as e:
-                    self._lazy_log(
-                        "WARNING", f"Failed to export reactions for {message.id}: {e}"
-                    )
+                                    media_lines.append(
+                                        f"<!-- transcription: {relative_path} -->\n"
+                                    )
+                        except ValueError:
+                            media_lines.append(f"![[{media_path.name}]]\n")
+                else:
+                    media_lines.append("[[No files downloaded]]\n")
+            except Exception as e:
+                self._lazy_log(
+                    "WARNING",
+                    f"Failed to process media for message {message.id}: {e}",
+                )
+                media_lines.append("[[Failed to download]]\n")
+        elif message.media:
+            media_type = self._get_media_type_name(message.media)
+            media_lines.append(f"[{media_type}]\n")
+
+        # Reactions
+        reactions: List[Any] = []
+        if self.config.export_reactions:
+            try:
+                reactions = extract_reactions(message)
+            except Exception as e:
+                self._lazy_log(
+                    "WARNING", f"Failed to export reactions for {message.id}: {e}"
+                )
 
-            content_parts.append("\n")
+        return {
+            "id": message.id,
+            "date": message.date,
+            "sender_name": sender_name,
+            "text": message.text,
+            "media_lines": media_lines,
+            "reactions": reactions,
+            "has_media": bool(message.media),
+            "media_count": local_media_count,
+        }
+
+    async def _prepare_render_records(
+        self, messages, target, media_dir, output_dir, entity_reporter
+    ) -> List[Dict[str, Any]]:
+        """
+        Prepare render records for a batch, in message order.
 
-            # Join all parts at once for better performance
-            return (
-                "".join(content_parts),
-                message.id,
-                bool(message.media),
-                local_media_count,
+        Media messages are prepared concurrently (downloads); text-only
+        messages are awaited inline to avoid a task per message.
+        """
+
+        async def _prepare(message):
+            try:
+                return await self._prepare_render_record(
+                    message, target, media_dir, output_dir, entity_reporter
+                )
+            except Exception as e:
+                self._lazy_log("ERROR", f"Error processing message {message.id}: {e}")
+                return None
+
+        media_messages = [m for m in messages if m.media]
+        media_records = {}
+        if media_messages:
+            prepared = await asyncio.gather(*(_prepare(m) for m in media_messages))
+            media_records = {m.id: r for m, r in zip(media_messages, prepared)}
+
+        records = []
+        for message in messages:
+            record = (
+                media_records[message.id] if message.media else await _prepare(message)
             )
+            if record is not None:
+                records.append(record)
+        return records
+
+    async def _process_message_parallel(
+        self, message, target, media_dir, output_dir, entity_reporter
+    ):
+        """Process a single message in parallel (optimized for memory efficiency)."""
+        try:
+            record = await self._prepare_render_record(
+                message, target, media_dir, output_dir, entity_reporter
+            )
+            return render_record(record)
 
         except Exception as e:
             self._lazy_log("ERROR", f"Error processing message {message.id}: {e}")
             return "", message.id, False, 0
 
+    def _budget_semaphore(self, kind: str) -> Optional[asyncio.Semaphore]:
+        """Semaphore of the shared export budget ("api", "media", "disk"), if any."""
+        if self._budget is None:
+            return None
+        semaphore: asyncio.Semaphore = getattr(self._budget, kind)
+        return semaphore
+
+    def _budget_slot(self, kind: str):
+        """Async context manager holding one budget slot (no-op without a budget)."""
+        semaphore = self._budget_semaphore(kind)
+        return semaphore if semaphore is not None else contextlib.nullcontext()
+
+    def _pipeline_autoscale_kwargs(self) -> Dict[str, Any]:
+        """AsyncPipeline autoscaling arguments from config (empty when disabled)."""
+        if getattr(self.config, "async_pipeline_autoscale", False) is not True:
+            return {}
+        kwargs: Dict[str, Any] = {"autoscale": True}
+        for key, attr in (
+            ("min_process_workers", "async_pipeline_min_process_workers"),
+            ("max_process_workers", "async_pipeline_max_process_workers"),
+            ("autoscale_interval", "async_pipeline_autoscale_interval"),
+        ):
+            value = getattr(self.config, attr, None)
+            if isinstance(value, (int, float)):
+                kwargs[key] = value
+        return kwargs
+
+    def _get_render_pool(self) -> Optional[ProcessRenderPool]:
+        """Render process pool for the async pipeline (None when disabled)."""
+        workers = getattr(self.config, "async_pipeline_render_workers", 0)
+        if not isinstance(workers, int) or workers <= 0:
+            return None
+        if self._render_pool is None:
+            self._render_pool = ProcessRenderPool(workers)
+        return self._render_pool
+
     async def _export_regular_target(
         self, target: ExportTarget, progress_queue=None, task_id=None
     ) -> ExportStatistics:
@@ -1042,18 +1273,29 @@ class Exporter:
 
             # Load entity state from core cache
             cache_key = f"entity_state_{target.id}"
-            # 🔥 TEMPORARY: Disable cache loading to test fresh export
-            # entity_data = await self.cache_manager.get(cache_key)
-            entity_data = None  # Force fresh export
+            entity_data = None
+            if getattr(self.config, "incremental_export", False):
+                try:
+                    entity_data = await self.cache_manager.get(cache_key)
+                except Exception as e:
+                    logger.warning(f"Failed to load entity state {cache_key}: {e}")
 
             # Handle dict restoration (from JSON cache)
             if isinstance(entity_data, dict):
                 try:
                     # Try to restore BloomFilter if present
                     bf_data = entity_data.pop("processed_message_ids", None)
-                    bf = None
+                    bf: Optional[Union[ProcessedIdIndex, BloomFilter]] = None
 
-                    if (
+                    if bf_data and isinstance(bf_data, dict) and "ranges" in bf_data:
+                        try:
+                            bf = ProcessedIdIndex.from_dict(bf_data)
+                            logger.info(
+                                f"♻️ Restored processed ID index: {len(bf)} IDs in {bf.range_count} ranges"
+                            )
+                        except (ValueError, TypeError) as e:
+                            logger.warning(f"Failed to restore processed ID index: {e}")
+                    elif (
                         bf_data
                         and isinstance(bf_data, dict)
                         and "bit_array_b64" in bf_data
@@ -1081,15 +1323,15 @@ class Exporter:
                 # 🚀 OPTIMIZATION: Determine if this is a resume scenario
                 is_resume = entity_data is not None and hasattr(entity_data, 'processed_messages') and entity_data.processed_messages > 0
                 
-                # 🔄 TIER B-4: Use BloomFilter only for resume, lightweight set for new exports
+                # 🔄 TIER B-4: Use BloomFilter only for resume, range index for new exports
                 if self.config.bloom_filter_only_for_resume and not is_resume:
-                    # New export: use empty set (near-zero overhead)
-                    logger.info("🚀 New export detected: using lightweight set (BloomFilter disabled for performance)")
-                    processed_ids = set()
+                    # New export: exact range index (O(1) in-order adds, persisted for resume)
+                    logger.info("🚀 New export detected: using processed ID range index")
+                    new_ids: ProcessedIds = ProcessedIdIndex()
                 else:
                     # Resume or forced BloomFilter: calculate optimal size
                     bf_size = await self._calculate_bloom_filter_size(entity)
-                    processed_ids = BloomFilter(expected_items=bf_size)
+                    new_ids = BloomFilter(expected_items=bf_size)
                     if is_resume:
                         logger.info(f"♻️ Resume detected: using BloomFilter (size={bf_size:,})")
                     else:
@@ -1099,7 +1341,7 @@ class Exporter:
                     entity_id=str(target.id),
                     entity_name=entity_name,
                     entity_type="regular",
-                    processed_message_ids=processed_ids,
+                    processed_message_ids=new_ids,
                 )
 
             # Create output directory structure FIRST
@@ -1156,6 +1398,28 @@ class Exporter:
 
             logger.info(f"  📄 Chat file: {chat_file}")
 
+            # 🔄 Incremental export: append to the existing chat file if the saved
+            # checkpoint matches it, otherwise start over with a fresh file
+            resume_append = await self._prepare_incremental_resume(
+                entity_data, chat_file
+            )
+            if not resume_append:
+                had_checkpoint = entity_data.chat_file_size is not None
+                if entity_data.last_message_id:
+                    logger.info("🔄 Saved state does not match chat file, starting fresh export")
+                    entity_data.processed_message_ids = ProcessedIdIndex()
+                    entity_data.last_message_id = None
+                    entity_data.processed_messages = 0
+                # The .tmp file of a fresh export is discarded on failure, so there
+                # is no checkpoint until the file is finalized
+                entity_data.chat_file_size = None
+                entity_data.chat_file_last_id = None
+                if had_checkpoint:
+                    # The fresh file replaces the chat file: its old checkpoint
+                    # must not be on disk by then
+                    await self._persist_entity_state(cache_key, entity_data)
+            previous_processed = entity_data.processed_messages
+
             # Initialize counters (defined here so they're accessible in exception handler)
             processed_count = 0
             media_count = 0
@@ -1210,7 +1474,9 @@ class Exporter:
             ])
 
             # Use Rich progress bar for better UX
-            with Progress(*progress_columns, transient=False) as progress:
+            with Progress(
+                *progress_columns, transient=False, disable=self._quiet_progress
+            ) as progress:
                 task_id_progress = progress.add_task(
                     f"[cyan]Exporting {entity_name}...", 
                     total=total_messages if has_total else None,
@@ -1219,12 +1485,16 @@ class Exporter:
                 )
 
                 # Open chat file for writing (using AsyncBufferedSaver for I/O)
-                async with AsyncBufferedSaver(chat_file, "w", encoding="utf-8") as f:
-                    # Write chat header
-                    await f.write(f"# Chat Export: {entity_name}\n\n")
-                    await f.write(f"Export Date: {self._get_current_datetime()}\n")
-                    await f.write("Total Messages: Processing...\n\n")
-                    await f.write("---\n\n")
+                file_mode = "a" if resume_append else "w"
+                async with AsyncBufferedSaver(
+                    chat_file, file_mode, encoding="utf-8", io_semaphore=self._budget_semaphore("disk")
+                ) as f:
+                    if not resume_append:
+                        # Write chat header
+                        await f.write(f"# Chat Export: {entity_name}\n\n")
+                        await f.write(f"Export Date: {self._get_current_datetime()}\n")
+                        await f.write("Total Messages: Processing...\n\n")
+                        await f.write("---\n\n")
 
                     # Single-pass streaming: process messages as they arrive
                     # Start message export timer (measured across fetch -> process -> write)
@@ -1254,6 +1524,11 @@ class Exporter:
                                 ),
                             )
 
+                        # Optional process pool for the CPU-bound markdown rendering
+                        render_pool = self._get_render_pool()
+                        if render_pool is not None:
+                            process_workers = max(process_workers, render_pool.workers)
+
                         pipeline = AsyncPipeline(
                             fetch_workers=fetch_workers,
                             process_workers=process_workers,
@@ -1266,6 +1541,7 @@ class Exporter:
                             process_queue_size=getattr(
                                 self.config, "async_pipeline_process_queue_size", 256
                             ),
+                            **self._pipeline_autoscale_kwargs(),
                         )
 
                         async def process_fn(message):
@@ -1281,7 +1557,18 @@ class Exporter:
                             ):
                                 return None
 
-                            # Reuse existing exporter worker for formatting & media downloads
+                            if render_pool is not None:
+                                # Media/sender I/O here; formatting happens in the render pool
+                                try:
+                                    return await self._prepare_render_record(
+                                        message, target, media_dir, output_dir, entity_reporter
+                                    )
+                                except Exception as e:
+                                    self._lazy_log(
+                                        "ERROR", f"Error processing message {message.id}: {e}"
+                                    )
+                                    return None
+
                             # Reuse existing exporter worker for formatting & media downloads
                             result = await self._process_message_parallel(
                                 message, target, media_dir, output_dir, entity_reporter
@@ -1347,6 +1634,66 @@ class Exporter:
 
                             if processed_count % 100 == 0:
                                 try:
+                                    await self._checkpoint_chat_file(f, entity_data)
+                                    await self._batch_cache_set(cache_key, entity_data)
+                                    entity_reporter.save_metrics()
+                                except Exception as save_error:
+                                    logger.warning(
+                                        f"Failed pipeline periodic save: {save_error}"
+                                    )
+
+                        async def process_batch_fn(messages):
+                            # Same filtering as process_fn, once per fetched batch
+                            messages = self._drop_processed(
+                                messages, entity_data.processed_message_ids
+                            )
+                            messages = [
+                                m
+                                for m in messages
+                                if getattr(m, "text", None) or getattr(m, "media", None)
+                            ]
+                            records = await self._prepare_render_records(
+                                messages, target, media_dir, output_dir, entity_reporter
+                            )
+                            if render_pool is not None:
+                                return await render_pool.render(records)
+                            return render_records(records)
+
+                        async def batch_writer_fn(results):
+                            nonlocal processed_count, media_count
+                            results = [r for r in results if r[0]]
+                            if not results:
+                                return
+
+                            # One write per batch instead of one per message
+                            await f.write("".join(r[0] for r in results))
+
+                            previous_count = processed_count
+                            batch_media = 0
+                            for _, msg_id, has_media, media_cnt in results:
+                                batch_media += media_cnt
+                                entity_reporter.record_message_processed(
+                                    msg_id, has_media=has_media
+                                )
+                            processed_count += len(results)
+                            media_count += batch_media
+                            self.statistics.messages_processed += len(results)
+                            self.statistics.media_downloaded += batch_media
+
+                            written_ids = [r[1] for r in results]
+                            self._mark_processed(entity_data, written_ids)
+                            entity_data.last_message_id = written_ids[-1]
+
+                            progress.update(
+                                task_id_progress,
+                                completed=processed_count,
+                                messages=processed_count,
+                                media=media_count,
+                            )
+
+                            if processed_count // 100 != previous_count // 100:
+                                try:
+                                    await self._checkpoint_chat_file(f, entity_data)
                                     await self._batch_cache_set(cache_key, entity_data)
                                     entity_reporter.save_metrics()
                                 except Exception as save_error:
@@ -1362,16 +1709,43 @@ class Exporter:
                         else:
                             logger.info("📍 [Pipeline] Starting from beginning")
                         
-                        pipeline_stats = await pipeline.run(
-                            entity=entity,
-                            telegram_manager=self.telegram_manager,
-                            process_fn=process_fn,
-                            writer_fn=writer_fn,
-                            limit=None,
-                            min_id=resume_from_id,  # TIER B-4: Skip already processed messages
-                        )
+                        if getattr(self.config, "async_pipeline_batch_mode", False) is True:
+                            max_inflight = getattr(
+                                self.config, "async_pipeline_max_inflight_messages", 2000
+                            )
+                            pipeline_stats = await pipeline.run_batches(
+                                entity=entity,
+                                telegram_manager=self.telegram_manager,
+                                process_batch_fn=process_batch_fn,
+                                writer_fn=batch_writer_fn,
+                                limit=None,
+                                min_id=resume_from_id,
+                                max_inflight_messages=(
+                                    max_inflight if isinstance(max_inflight, int) else 2000
+                                ),
+                            )
+                        else:
+                            pipeline_stats = await pipeline.run(
+                                entity=entity,
+                                telegram_manager=self.telegram_manager,
+                                process_fn=process_fn,
+                                writer_fn=writer_fn,
+                                limit=None,
+                                min_id=resume_from_id,  # TIER B-4: Skip already processed messages
+                                render_fn=render_pool.render if render_pool is not None else None,
+                                render_batch_size=getattr(
+                                    self.config, "async_pipeline_render_batch_size", 64
+                                ),
+                            )
 
                         logger.info(f"Async pipeline finished: {pipeline_stats}")
+                        autoscale_stats = (pipeline_stats or {}).get("autoscale")
+                        if autoscale_stats:
+                            logger.info(
+                                f"⚖️ Pipeline autoscaler: {autoscale_stats['decision_count']} decisions, "
+                                f"peak {autoscale_stats['peak_workers']} / final "
+                                f"{autoscale_stats['final_workers']} process workers"
+                            )
 
                         # Record pipeline-level stats into ExportStatistics for later reporting
                         try:
@@ -1406,7 +1780,9 @@ class Exporter:
                         from src.shutdown_manager import shutdown_manager
                         
                         # 🔧 HOTPATH FIX 2: Cache BloomFilter reference (only check if resuming)
-                        processed_ids = entity_data.processed_message_ids if resume_from_id > 0 else None
+                        processed_ids: Optional[ProcessedIds] = (
+                            entity_data.processed_message_ids if resume_from_id > 0 else None
+                        )
 
                         # ⚡ PREFETCH OPTIMIZATION: Use producer-consumer pipeline if enabled
                         if self.config.enable_prefetch_batches:
@@ -1448,13 +1824,6 @@ class Exporter:
                                     logger.info("🛑 Graceful shutdown requested, stopping message fetch")
                                     break
                                 
-                                # 🔄 TIER B-4: Early skip check for already-processed messages
-                                # This handles edge cases like message ID gaps (deleted messages)
-                                # where min_id alone might not be sufficient
-                                if processed_ids and message.id in processed_ids:
-                                    logger.debug(f"⏭️ Skipping message {message.id} (already in BloomFilter)")
-                                    continue
-                                
                                 fetched_count += 1
                                 batch.append(message)
 
@@ -1479,8 +1848,14 @@ class Exporter:
                                         msg, target, media_dir, output_dir, entity_reporter
                                     )
                                 
-                                # Filter empty messages
-                                messages_to_process = [msg for msg in batch if (msg.text or msg.media)]
+                                # 🔄 TIER B-4: Drop already-processed messages with one check per
+                                # batch (covers ID gaps where min_id alone is not sufficient),
+                                # then filter empty messages
+                                messages_to_process = [
+                                    msg
+                                    for msg in self._drop_processed(batch, processed_ids)
+                                    if (msg.text or msg.media)
+                                ]
                                 
                                 if messages_to_process:
                                     # 🚀 OPTIMIZATION: Pre-load sender names for batch
@@ -1498,6 +1873,7 @@ class Exporter:
                                     io_start = time.time()
 
                                     # Write results sequentially
+                                    written_ids = []
                                     for result in results:
                                         # Handle exceptions from gather
                                         if isinstance(result, Exception):
@@ -1517,11 +1893,13 @@ class Exporter:
                                         self.statistics.media_downloaded += media_cnt
 
                                         # Update entity data
-                                        entity_data.processed_message_ids.add(msg_id)
+                                        written_ids.append(msg_id)
                                         entity_data.last_message_id = msg_id
                                         entity_reporter.record_message_processed(
                                             msg_id, has_media=has_media
                                         )
+
+                                    self._mark_processed(entity_data, written_ids)
                                 
                                 io_time = time.time() - io_start
                                 self.statistics.time_file_io += io_time
@@ -1541,6 +1919,9 @@ class Exporter:
                                         save_start = time.time()
 
                                         # Batch cache update instead of immediate save
+                                        await self._checkpoint_chat_file(
+                                            f, entity_data
+                                        )
                                         await self._batch_cache_set(
                                             cache_key, entity_data
                                         )
@@ -1625,7 +2006,11 @@ class Exporter:
                                         msg, target, media_dir, output_dir, entity_reporter
                                     )
                                 
-                                messages_to_process = [msg for msg in batch if (msg.text or msg.media)]
+                                messages_to_process = [
+                                    msg
+                                    for msg in self._drop_processed(batch, processed_ids)
+                                    if (msg.text or msg.media)
+                                ]
                                 
                                 if messages_to_process:
                                     # 🚀 OPTIMIZATION: Pre-load sender names for final batch
@@ -1641,6 +2026,7 @@ class Exporter:
                                     # Track file I/O time for final batch
                                     io_start = time.time()
 
+                                    written_ids = []
                                     for result in results:
                                         # Handle exceptions from gather
                                         if isinstance(result, Exception):
@@ -1658,11 +2044,13 @@ class Exporter:
                                         self.statistics.messages_processed += 1
                                         self.statistics.media_downloaded += media_cnt
 
-                                        entity_data.processed_message_ids.add(msg_id)
+                                        written_ids.append(msg_id)
                                         entity_data.last_message_id = msg_id
                                         entity_reporter.record_message_processed(
                                             msg_id, has_media=has_media
                                         )
+
+                                    self._mark_processed(entity_data, written_ids)
                                     
                                     io_time = time.time() - io_start
                                     self.statistics.time_file_io += io_time
@@ -1681,8 +2069,23 @@ class Exporter:
             except Exception:
                 logger.exception("Failed to record messages phase timing")
 
-            # Update total messages count in file
-            await self._update_message_count(chat_file, processed_count)
+            # Update total messages count in file. The rewrite (count, transcripts)
+            # moves every byte offset, so the checkpoint on disk is dropped first:
+            # a crash before the new size is saved restarts the chat on the next
+            # run instead of truncating it at a stale offset
+            total_exported = previous_processed + processed_count
+            try:
+                if entity_data.chat_file_size is not None:
+                    await self._flush_cache_batch()
+                    entity_data.chat_file_size = None
+                    entity_data.chat_file_last_id = None
+                    await self._persist_entity_state(cache_key, entity_data)
+            except Exception as e:
+                logger.warning(
+                    f"Failed to drop chat file checkpoint, keeping {chat_file.name} as written: {e}"
+                )
+            else:
+                await self._update_message_count(chat_file, total_exported)
             self.statistics.notes_created = 1  # One file created
 
             logger.info(
@@ -1696,8 +2099,15 @@ class Exporter:
             try:
                 # Flush any remaining cache updates
                 await self._flush_cache_batch()
-                # Final cache save
-                await self.cache_manager.set(cache_key, entity_data.to_dict())
+                # Final cache save (file is finalized: record resume checkpoint)
+                entity_data.processed_messages = total_exported
+                try:
+                    chat_stat = await asyncio.to_thread(chat_file.stat)
+                    entity_data.chat_file_size = chat_stat.st_size
+                    entity_data.chat_file_last_id = entity_data.last_message_id
+                except OSError as e:
+                    logger.warning(f"Failed to record chat file checkpoint: {e}")
+                await self._persist_entity_state(cache_key, entity_data)
 
                 # Set total_messages and processed_messages in metrics before finishing
                 entity_reporter.metrics.total_messages = processed_count
@@ -1734,6 +2144,19 @@ class Exporter:
                         f"throttles: {parallel_metrics.memory_throttles}"
                     )
 
+                # 🎚️ Adaptive download concurrency decisions
+                concurrency_report = getattr(
+                    self.media_processor, "get_concurrency_report", None
+                )
+                concurrency = concurrency_report() if callable(concurrency_report) else None
+                if isinstance(concurrency, dict):
+                    entity_reporter.metrics.download_concurrency = concurrency
+                    logger.info(
+                        f"🎚️ Download concurrency: limit {concurrency['limit']}, "
+                        f"peak {concurrency['peak_throughput_kbps']:.0f} KB/s, "
+                        f"{len(concurrency['decisions'])} adjustments"
+                    )
+
                 entity_reporter.finish_export()
                 entity_reporter.save_report()
 
@@ -1773,7 +2196,9 @@ class Exporter:
 
             # Try to save cache/monitoring even on failure
             try:
-                await self.cache_manager.set(cache_key, entity_data.to_dict())
+                # Unset if the export failed before its state was loaded
+                if isinstance(entity_data, EntityCacheData):
+                    await self.cache_manager.set(cache_key, entity_data.to_dict())
 
                 # Set metrics even on failure for emergency save
                 entity_reporter.metrics.total_messages = processed_count
@@ -1971,36 +2396,7 @@ class Exporter:
         Convert message timestamps to UTC+3 before rendering to keep exported
         notes consistently in the desired timezone.
         """
-        import datetime as _dt
-
-        try:
-            if dt is None:
-                return self._intern_string("Unknown Date")
-
-            # If naive, assume UTC (best-effort) then convert to UTC+3
-            if getattr(dt, "tzinfo", None) is None:
-                dt = dt.replace(tzinfo=_dt.timezone.utc)
-
-            tz = _dt.timezone(_dt.timedelta(hours=3))
-            dt_local = dt.astimezone(tz)
-
-            timestamp_str = (
-                f"{dt_local.day:02d}.{dt_local.month:02d}.{dt_local.year} "
-                f"{dt_local.hour:02d}:{dt_local.minute:02d}"
-            )
-        except Exception:
-            # Fallback to safe formatting if anything goes wrong
-            try:
-                timestamp_str = (
-                    f"{getattr(dt, 'day', 0):02d}."
-                    f"{getattr(dt, 'month', 0):02d}."
-                    f"{getattr(dt, 'year', 0)} "
-                    f"{getattr(dt, 'hour', 0):02d}:{getattr(dt, 'minute', 0):02d}"
-                )
-            except Exception:
-                timestamp_str = "00.00.0000 00:00"
-
-        return self._intern_string(timestamp_str)
+        return self._intern_string(format_timestamp(dt))
 
     def _get_current_datetime(self) -> str:
         """Get current datetime formatted in UTC+3."""
@@ -2014,20 +2410,90 @@ class Exporter:
 
     def _get_media_type_name(self, media) -> str:
         """Get human-readable media type name."""
-        media_type = type(media).__name__
-        type_mapping = {
-            "MessageMediaPhoto": "Photo",
-            "MessageMediaDocument": "Document",
-            "MessageMediaVideo": "Video",
-            "MessageMediaAudio": "Audio",
-            "MessageMediaVoice": "Voice Message",
-            "MessageMediaContact": "Contact",
-            "MessageMediaLocation": "Location",
-            "MessageMediaPoll": "Poll",
-            "MessageMediaSticker": "Sticker",
-            "MessageMediaGif": "GIF",
-        }
-        return type_mapping.get(media_type, "Media")
+        return media_type_name(media)
+
+    @staticmethod
+    def _drop_processed(messages: List, processed_ids) -> List:
+        """Remove already-exported messages from a fetched batch."""
+        if not processed_ids or not messages:
+            return messages
+        if isinstance(processed_ids, BloomFilter):
+            seen = processed_ids.contains_many([msg.id for msg in messages])
+            return [msg for msg, is_seen in zip(messages, seen) if not is_seen]
+        return [msg for msg in messages if msg.id not in processed_ids]
+
+    @staticmethod
+    def _mark_processed(entity_data: EntityCacheData, message_ids: List[int]) -> None:
+        """Record a written batch of message IDs in the entity's processed-ID structure."""
+        if not message_ids:
+            return
+        processed_ids = entity_data.processed_message_ids
+        if isinstance(processed_ids, BloomFilter):
+            processed_ids.add_many(message_ids)
+        else:
+            processed_ids.update(message_ids)
+
+    async def _prepare_incremental_resume(
+        self, entity_data: EntityCacheData, chat_file
+    ) -> bool:
+        """
+        Validate a saved checkpoint against the chat file before appending to it.
+
+        Anything written after the checkpoint is truncated and the processed ID
+        index is rolled back to it, so messages are neither duplicated nor lost.
+
+        Returns:
+            True if the export can resume by appending to chat_file
+        """
+        size = entity_data.chat_file_size
+        last_id = entity_data.chat_file_last_id
+        if not getattr(self.config, "incremental_export", False) or size is None or not last_id:
+            return False
+
+        try:
+            actual_size = (await asyncio.to_thread(chat_file.stat)).st_size
+        except FileNotFoundError:
+            return False
+
+        if actual_size < size:
+            logger.warning(
+                f"⚠️ Chat file {chat_file.name} is smaller than its checkpoint "
+                f"({actual_size} < {size} bytes)"
+            )
+            return False
+        if actual_size > size:
+            logger.info(
+                f"✂️ Truncating {actual_size - size} bytes written after the last checkpoint"
+            )
+            await asyncio.to_thread(os.truncate, chat_file, size)
+
+        processed_ids = entity_data.processed_message_ids
+        if isinstance(processed_ids, ProcessedIdIndex):
+            processed_ids.discard_above(last_id)
+        elif not (
+            isinstance(processed_ids, BloomFilter)
+            and entity_data.last_message_id == last_id
+        ):
+            # A BloomFilter cannot be rolled back past the checkpoint
+            entity_data.processed_message_ids = ProcessedIdIndex()
+        entity_data.last_message_id = last_id
+
+        logger.info(
+            f"♻️ Incremental export: appending to {chat_file.name} after message ID {last_id}"
+        )
+        return True
+
+    async def _persist_entity_state(self, cache_key: str, entity_data: EntityCacheData) -> None:
+        """Store entity state and write the cache to disk now (not at the next auto-save)."""
+        await self.cache_manager.set(cache_key, entity_data.to_dict())
+        await self.cache_manager.flush_all_pending()
+
+    async def _checkpoint_chat_file(self, f, entity_data: EntityCacheData) -> None:
+        """Record how much of an appended chat file is on disk (incremental export)."""
+        if not isinstance(f, AsyncBufferedSaver) or not f.mode.startswith("a"):
+            return
+        entity_data.chat_file_size = await f.tell()
+        entity_data.chat_file_last_id = entity_data.last_message_id
 
     async def _update_message_count(self, file_path, count):
         """
@@ -2040,10 +2506,11 @@ class Exporter:
             async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
                 content = await f.read()
 
-            # Replace the placeholder
-            content = content.replace(
-                "Total Messages: Processing...", f"Total Messages: {count}"
+            # Replace the placeholder (or the previous count on incremental export)
+            content = _TOTAL_MESSAGES_PATTERN.sub(
+                f"Total Messages: {count}", content, count=1
             )
+            content = await self._apply_transcriptions(content, file_path.parent)
 
             # S-4: Atomic write - write to .tmp then rename
             tmp_path = f"{file_path}.tmp"
@@ -2058,6 +2525,59 @@ class Exporter:
         finally:
             self.statistics.end_time = time.time()
 
+    async def _apply_transcriptions(self, content: str, base_dir) -> str:
+        """
+        Replace transcription markers with the transcripts of the queued voice
+        messages (waits for the transcription stage). Failed ones keep their
+        marker and are retried by the next run.
+        """
+        if self.config.enable_transcription is not True:
+            return content
+        paths = {
+            rel: base_dir / rel
+            for rel in _TRANSCRIPTION_MARKER_PATTERN.findall(content)
+        }
+        if not paths:
+            return content
+
+        self.statistics.start_transcription_phase()
+        try:
+            results = await self.media_processor.wait_for_transcriptions(
+                list(set(paths.values()))
+            )
+        except Exception as e:
+            logger.warning(f"Transcription stage failed: {e}")
+            return content
+        finally:
+            self.statistics.end_transcription_phase()
+
+        def _substitute(match):
+            text = results.get(paths[match.group(1)])
+            return f"**Расшифровка:** {text}" if text else match.group(0)
+
+        patched = _TRANSCRIPTION_MARKER_PATTERN.sub(_substitute, content)
+        logger.info(
+            f"🎙️ Transcripts added: {sum(1 for t in results.values() if t)}/{len(paths)}"
+        )
+        return patched
+
+    async def _patch_transcriptions(self, file_path) -> None:
+        """Back-patch transcripts into a finished note (forum topics)."""
+        if self.config.enable_transcription is not True:
+            return
+        try:
+            async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
+                content = await f.read()
+            patched = await self._apply_transcriptions(content, file_path.parent)
+            if patched == content:
+                return
+            tmp_path = f"{file_path}.tmp"
+            async with aiofiles.open(tmp_path, "w", encoding="utf-8") as f:
+                await f.write(patched)
+            await aiofiles.os.rename(tmp_path, file_path)
+        except Exception as e:
+            logger.warning(f"Failed to add transcripts to {file_path}: {e}")
+
     # --- Forum Export Methods ---
 
     async def _export_forum(
@@ -2190,7 +2710,9 @@ class Exporter:
                 topic_task_id = topic_tasks.get(topic.topic_id)
 
                 try:
-                    async with AsyncBufferedSaver(topic_file, "w", encoding="utf-8") as f:
+                    async with AsyncBufferedSaver(
+                        topic_file, "w", encoding="utf-8", io_semaphore=self._budget_semaphore("disk")
+                    ) as f:
                         await f.write(f"# Topic: {topic_title}\n")
                         await f.write(f"ID: {topic.topic_id}\n\n")
 
@@ -2362,6 +2884,7 @@ class Exporter:
                                 current=topic_processed_count,
                             )
 
+                    await self._patch_transcriptions(topic_file)
                     logger.info(
                         f"  ✅ Finished topic {topic_title}: {topic_processed_count} messages"
                     )
@@ -2391,6 +2914,7 @@ class Exporter:
                 TextColumn("[cyan]{task.fields[current]}/{task.fields[total_field]} msgs"),
                 TimeRemainingColumn(),
                 transient=False,
+                disable=self._quiet_progress,
             ) as progress:
                 await _do_export(progress, None)
 
@@ -2405,7 +2929,10 @@ class Exporter:
         self, targets: List[ExportTarget], progress_queue=None
     ) -> List[ExportStatistics]:
         """
-        Export multiple targets sequentially.
+        Export multiple targets.
+
+        Targets run sequentially unless export_concurrent_targets > 1, in which
+        case ExportScheduler runs them concurrently under a shared budget.
 
         Args:
             targets: List of ExportTarget objects
@@ -2414,6 +2941,88 @@ class Exporter:
         Returns:
             List of ExportStatistics for each target
         """
+        concurrent_targets = getattr(self.config, "export_concurrent_targets", 1)
+        if isinstance(concurrent_targets, int) and concurrent_targets > 1 and len(targets) > 1:
+            results = await self._export_all_concurrent(
+                targets, progress_queue, concurrent_targets
+            )
+        else:
+            results = await self._export_all_sequential(targets, progress_queue)
+
+        # 🚀 Wait for background downloads to complete
+        if getattr(self.config, "async_media_download", True):
+            logger.info("⏳ Waiting for background media downloads...")
+            await self.media_processor.wait_for_downloads(timeout=3600)  # 1 hour max
+
+        # 🚀 Run Deferred Media Processing
+        if self.config.deferred_processing:
+            logger.info("⏳ Starting deferred media processing...")
+            await self.media_processor.process_pending_tasks()
+
+        return results
+
+    def _fork(self) -> "Exporter":
+        """
+        Exporter for one concurrently exported target.
+
+        Shares clients, caches, pools and the reporter manager with self, but
+        has its own statistics and per-target caches.
+        """
+        clone = copy.copy(self)
+        clone.statistics = ExportStatistics()
+        clone._sender_name_cache = {}
+        clone._prefetch_task = None
+        clone._prefetch_result = None
+        clone._prefetch_stats = {"hits": 0, "misses": 0}
+        clone._pending_cache_updates = {}
+        clone._last_progress_update = 0.0
+        return clone
+
+    async def _export_all_concurrent(
+        self, targets: List[ExportTarget], progress_queue, concurrent_targets: int
+    ) -> List[ExportStatistics]:
+        """Export targets concurrently, largest first, under a shared ExportBudget."""
+        budget = ExportBudget(
+            api=getattr(self.config, "export_api_concurrency", 4),
+            media=getattr(self.config, "export_media_concurrency", 8),
+            disk=getattr(self.config, "export_disk_concurrency", 4),
+        )
+        scheduler = ExportScheduler(
+            self.telegram_manager,
+            budget,
+            max_concurrent_targets=concurrent_targets,
+            reporter_manager=self.reporter_manager,
+        )
+        # Create shared pools before forking so workers don't each start one
+        self._get_render_pool()
+
+        async def _export(scheduled: ScheduledTarget) -> ExportStatistics:
+            target = scheduled.target
+            logger.info(
+                f"Exporting target {scheduled.index + 1}/{len(targets)}: {target.name} "
+                f"(~{max(scheduled.estimated_messages, 0)} messages)"
+            )
+            worker = self._fork()
+            worker._budget = budget
+            worker._quiet_progress = True
+            stats = await worker.export_target(
+                target, progress_queue, f"target_{scheduled.index}"
+            )
+            logger.info(f"✅ Target {target.name} exported successfully")
+            logger.info(f"   Messages: {stats.messages_processed}")
+            logger.info(f"   Media: {stats.media_downloaded}")
+            logger.info(f"   Duration: {stats.duration:.1f}s")
+            return stats
+
+        results = await scheduler.run(
+            targets, _export, should_stop=lambda: self._shutdown_requested
+        )
+        return [stats if stats is not None else ExportStatistics() for stats in results]
+
+    async def _export_all_sequential(
+        self, targets: List[ExportTarget], progress_queue=None
+    ) -> List[ExportStatistics]:
+        """Export targets one by one (legacy export_all behaviour)."""
         results = []
 
         with Progress(
@@ -2481,16 +3090,6 @@ class Exporter:
 
                 progress.advance(task_id_progress)
 
-        # 🚀 Wait for background downloads to complete
-        if getattr(self.config, "async_media_download", True):
-            logger.info("⏳ Waiting for background media downloads...")
-            await self.media_processor.wait_for_downloads(timeout=3600)  # 1 hour max
-
-        # 🚀 Run Deferred Media Processing
-        if self.config.deferred_processing:
-            logger.info("⏳ Starting deferred media processing...")
-            await self.media_processor.process_pending_tasks()
-
         return results
 
     async def _save_progress_on_shutdown(self, entity_data: EntityCacheData, cache_key: str) -> None:
@@ -2573,6 +3172,7 @@ class Exporter:
         # Write results
         io_start = time.time()
         
+        written_ids = []
         for result in results:
             if isinstance(result, Exception):
                 logger.warning(f"Failed to process message: {result}")
@@ -2591,10 +3191,11 @@ class Exporter:
             self.statistics.media_downloaded += media_cnt
             
             # Update entity data
-            entity_data.processed_message_ids.add(msg_id)
+            written_ids.append(msg_id)
             entity_data.last_message_id = msg_id
             entity_reporter.record_message_processed(msg_id, has_media=has_media)
         
+        self._mark_processed(entity_data, written_ids)
         io_time = time.time() - io_start
         self.statistics.time_file_io += io_time
         
@@ -2609,6 +3210,7 @@ class Exporter:
         if processed_count % 100 == 0:
             try:
                 save_start = time.time()
+                await self._checkpoint_chat_file(f, entity_data)
                 await self._batch_cache_set(cache_key, entity_data)
                 entity_reporter.save_metrics()
                 save_time = time.time() - save_start
@@ -2689,18 +3291,15 @@ class Exporter:
             queue_size=self.config.prefetch_queue_size,
         )
         
-        # Define skip condition for already-processed messages
-        def should_skip(msg):
-            return processed_ids and msg.id in processed_ids
-        
-        # Start producer (background fetch task)
+        # Start producer (background fetch task); already-processed messages are
+        # dropped per batch in the consumer with one vectorized check
         await prefetch.start_producer(
             self.telegram_manager.fetch_messages(
                 entity,
                 limit=None,
                 min_id=resume_from_id,
             ),
-            skip_condition=should_skip if processed_ids else None,
+            skip_condition=None,
         )
         
         # Counters (using lists as mutable references)
@@ -2726,6 +3325,10 @@ class Exporter:
                     logger.info("✅ All batches processed")
                     break
                 
+                batch = self._drop_processed(batch, processed_ids)
+                if not batch:
+                    continue
+                
                 # Track API time (time spent fetching this batch)
                 api_time = time.time() - batch_fetch_start
                 self.statistics.time_api_requests += api_time
@@ -2941,6 +3544,11 @@ class Exporter:
     async def shutdown(self):
         """Gracefully shutdown the exporter."""
         self._shutdown_requested = True
+        if self._lazy_loader is not None:
+            self._lazy_loader.flush()
+        if self._render_pool is not None:
+            self._render_pool.shutdown()
+            self._render_pool = None
         logger.info("Exporter shutdown initiated")
 
 
@@ -13,13 +13,20 @@ Design goals for this first pass:
 - Failures in `process_fn` are recorded but do not stop the pipeline; failing messages are
   skipped in output while being counted in `errors`.
 - Return a small stats dict including processed_count, errors and duration.
+- Optional render stage: process_fn produces lightweight payloads and a batch
+  render_fn (e.g. a process pool) turns them into writer results; ordering still
+  comes from the sequence-number writer.
+- Batch mode (`run_batches`): stages exchange whole fetched batches, sequence numbers
+  and instrumentation are per batch, and backpressure is a cap on in-flight messages.
+- Optional autoscaling (`run` only): a WorkerAutoscaler samples queue depths and grows or
+  shrinks process workers between min/max bounds; decisions are reported in stats.
 """
 
 from __future__ import annotations
 
 import asyncio
 import time
-from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 # Prefer project logger if available; fall back to standard logging.
 try:
@@ -29,9 +36,46 @@ except Exception:  # pragma: no cover - fallback for minimal test environments
 
     logger = _logging.getLogger(__name__)
 
+from .autoscaler import WorkerAutoscaler
+
 
 ProcessFn = Callable[[Any], Awaitable[Any]]
 WriterFn = Callable[[Any], Awaitable[None]]
+RenderFn = Callable[[List[Any]], Awaitable[List[Any]]]
+BatchProcessFn = Callable[[List[Any]], Awaitable[List[Any]]]
+BatchWriterFn = Callable[[List[Any]], Awaitable[None]]
+
+
+class MessageBudget:
+    """
+    Counting limiter for messages in flight between fetch and write.
+
+    Queue maxsize counts slots, which means nothing when one slot holds a batch
+    of 1 or 100 messages; the budget counts messages instead. A batch larger
+    than the whole budget is admitted when nothing else is in flight so it can
+    never deadlock.
+    """
+
+    def __init__(self, max_messages: int):
+        self.max_messages = max(1, int(max_messages))
+        self.in_flight = 0
+        self.max_observed = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, count: int) -> None:
+        async with self._cond:
+            await self._cond.wait_for(
+                lambda: self.in_flight == 0
+                or self.in_flight + count <= self.max_messages
+            )
+            self.in_flight += count
+            if self.in_flight > self.max_observed:
+                self.max_observed = self.in_flight
+
+    async def release(self, count: int) -> None:
+        async with self._cond:
+            self.in_flight -= count
+            self._cond.notify_all()
 
 
 class AsyncPipeline:
@@ -54,6 +98,10 @@ class AsyncPipeline:
         write_workers: int = 1,
         fetch_queue_size: int = 64,
         process_queue_size: int = 256,
+        autoscale: bool = False,
+        min_process_workers: int = 1,
+        max_process_workers: int = 16,
+        autoscale_interval: float = 1.0,
     ):
         # Stage parallelism
         self.fetch_workers = int(fetch_workers)
@@ -64,6 +112,11 @@ class AsyncPipeline:
         # Queue sizes (bounded for backpressure)
         self.fetch_queue_size = int(fetch_queue_size)
         self.process_queue_size = int(process_queue_size)
+        # Process worker autoscaling (bounds apply only when enabled)
+        self.autoscale = bool(autoscale)
+        self.min_process_workers = int(min_process_workers)
+        self.max_process_workers = int(max_process_workers)
+        self.autoscale_interval = float(autoscale_interval)
 
     async def run(
         self,
@@ -73,6 +126,8 @@ class AsyncPipeline:
         writer_fn: WriterFn,
         limit: Optional[int] = None,
         min_id: int = 0,  # TIER B-4: Resume from this message ID
+        render_fn: Optional[RenderFn] = None,
+        render_batch_size: int = 64,
     ) -> Dict[str, Any]:
         """
         Run the pipeline for a single entity.
@@ -84,6 +139,11 @@ class AsyncPipeline:
             writer_fn: async callable: writer_fn(processed_result) -> None
             limit: Optional limit for fetching messages.
             min_id: Resume from this message ID (skip messages with id <= min_id). Default: 0 (start from beginning).
+            render_fn: Optional async callable: render_fn(payloads) -> results (same order).
+                When set, each processor worker takes up to render_batch_size queued messages,
+                runs process_fn on them concurrently (None = skip) and renders the payloads
+                in one call.
+            render_batch_size: Maximum messages per render_fn call.
 
         Returns:
             stats dict: {'processed_count': int, 'errors': int, 'duration': float}
@@ -113,7 +173,20 @@ class AsyncPipeline:
         # These accumulate approximate duration spent in each stage.
         fetch_time_total = 0.0
         process_time_total = 0.0
+        render_time_total = 0.0
         write_time_total = 0.0
+        render_batches = 0
+
+        # Autoscaling state: workers exit at their next loop iteration while
+        # retire_requests > 0
+        retire_requests = 0
+        autoscaler: Optional[WorkerAutoscaler] = None
+        if self.autoscale:
+            autoscaler = WorkerAutoscaler(
+                self.min_process_workers,
+                self.max_process_workers,
+                interval=self.autoscale_interval,
+            )
 
         # Internal helpers -------------------------------------------------
         async def _fetcher():
@@ -148,13 +221,17 @@ class AsyncPipeline:
                 raise
 
         async def _processor_worker(worker_idx: int):
-            nonlocal errors, max_write_q, process_time_total
+            nonlocal errors, max_write_q, process_time_total, retire_requests
             while True:
                 # Check for graceful shutdown before getting next item
                 from src.shutdown_manager import shutdown_manager
                 if shutdown_manager.shutdown_requested:
                     logger.debug(f"Processor worker {worker_idx}: shutdown requested, exiting")
                     break
+                if retire_requests > 0:
+                    retire_requests -= 1
+                    logger.debug(f"Processor worker {worker_idx}: retired by autoscaler")
+                    break
                     
                 seq_msg = await fetch_q.get()
                 try:
@@ -192,6 +269,87 @@ class AsyncPipeline:
                     logger.exception("AsyncPipeline.processor_worker: unexpected error")
                     fetch_q.task_done()
 
+        async def _render_worker(worker_idx: int):
+            """Batch variant of _processor_worker used when render_fn is set."""
+            nonlocal errors, max_write_q, process_time_total, render_time_total, render_batches
+            nonlocal retire_requests
+            from src.shutdown_manager import shutdown_manager
+
+            assert render_fn is not None  # Only used when a render stage is set
+            batch_limit = max(1, int(render_batch_size))
+
+            done = False
+            while not done:
+                if shutdown_manager.shutdown_requested:
+                    logger.debug(f"Render worker {worker_idx}: shutdown requested, exiting")
+                    break
+                if retire_requests > 0:
+                    retire_requests -= 1
+                    logger.debug(f"Render worker {worker_idx}: retired by autoscaler")
+                    break
+
+                # Block for the first item, then drain what is already queued.
+                # Stop at a sentinel so each worker consumes exactly one.
+                items = [await fetch_q.get()]
+                while (
+                    items[-1][0] is not None
+                    and len(items) < batch_limit
+                    and not fetch_q.empty()
+                ):
+                    items.append(fetch_q.get_nowait())
+
+                batch = [item for item in items if item[0] is not None]
+                if len(batch) < len(items):
+                    done = True
+                    logger.debug("Render worker received sentinel, exiting after batch")
+
+                try:
+                    # process_fn is I/O-bound (media downloads): run the batch concurrently
+                    process_start = time.time()
+                    payloads = await asyncio.gather(
+                        *(process_fn(message) for _, message in batch),
+                        return_exceptions=True,
+                    )
+                    process_time_total += time.time() - process_start
+
+                    outcomes: list = []  # (seq, payload, exc)
+                    for (seq, _), payload in zip(batch, payloads):
+                        if isinstance(payload, BaseException):
+                            outcomes.append((seq, None, payload))
+                            errors += 1
+                        else:
+                            outcomes.append((seq, payload, None))
+
+                    to_render = [(i, o[1]) for i, o in enumerate(outcomes) if o[1] is not None]
+                    if to_render:
+                        render_start = time.time()
+                        try:
+                            rendered = await render_fn([payload for _, payload in to_render])
+                            for (i, _), value in zip(to_render, rendered):
+                                outcomes[i] = (outcomes[i][0], value, None)
+                        except Exception as e:
+                            logger.warning(f"AsyncPipeline: render batch failed: {e}")
+                            for i, _ in to_render:
+                                outcomes[i] = (outcomes[i][0], None, e)
+                            errors += len(to_render)
+                        render_time_total += time.time() - render_start
+                        render_batches += 1
+
+                    for outcome in outcomes:
+                        await write_q.put(outcome)
+                    if write_q.qsize() > max_write_q:
+                        max_write_q = write_q.qsize()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("AsyncPipeline.render_worker: unexpected error")
+                finally:
+                    for _ in items:
+                        fetch_q.task_done()
+
+        # Out-of-order results waiting for their turn (also sampled by the autoscaler)
+        writer_buffer: Dict[int, Tuple[Optional[Any], Optional[Exception]]] = {}
+
         async def _writer():
             """
             Single writer that preserves ordering using sequence numbers.
@@ -199,7 +357,7 @@ class AsyncPipeline:
             """
             nonlocal processed_count, max_buffered, write_time_total
             expected_seq = 1
-            buffer: dict[int, Tuple[Optional[Any], Optional[Exception]]] = {}
+            buffer = writer_buffer
 
             while True:
                 item = await write_q.get()
@@ -246,20 +404,60 @@ class AsyncPipeline:
                     logger.exception("AsyncPipeline.writer: unexpected error")
                     write_q.task_done()
 
+        def _live_workers() -> int:
+            return sum(1 for t in proc_tasks if not t.done()) - retire_requests
+
+        async def _autoscale_controller():
+            nonlocal retire_requests
+            assert autoscaler is not None  # Only started when autoscaling is on
+            while True:
+                await asyncio.sleep(autoscaler.interval)
+                workers = _live_workers()
+                delta, verdict = autoscaler.observe(
+                    workers,
+                    fetch_fill=fetch_q.qsize() / max(1, self.fetch_queue_size),
+                    write_fill=write_q.qsize() / max(1, self.process_queue_size),
+                    buffered=len(writer_buffer),
+                    buffer_capacity=self.process_queue_size,
+                )
+                if delta > 0:
+                    if retire_requests > 0:
+                        retire_requests -= 1
+                    else:
+                        _spawn_worker()
+                elif delta < 0:
+                    retire_requests += 1
+                if delta:
+                    logger.debug(
+                        f"AsyncPipeline autoscaler: {verdict}, workers {workers} -> {workers + delta}"
+                    )
+
+        def _spawn_worker():
+            t = asyncio.create_task(worker_fn(len(proc_tasks)))
+            proc_tasks.append(t)
+            tasks.append(t)
+
         # Launch tasks
-        tasks = []
+        tasks: List[asyncio.Task] = []
         fetch_task = asyncio.create_task(_fetcher())
         tasks.append(fetch_task)
 
-        proc_tasks = []
-        for i in range(self.process_workers):
-            t = asyncio.create_task(_processor_worker(i))
-            proc_tasks.append(t)
-            tasks.append(t)
+        proc_tasks: List[asyncio.Task] = []
+        worker_fn = _render_worker if render_fn is not None else _processor_worker
+        initial_workers = (
+            autoscaler.clamp(self.process_workers) if autoscaler else self.process_workers
+        )
+        for _ in range(initial_workers):
+            _spawn_worker()
 
         writer_task = asyncio.create_task(_writer())
         tasks.append(writer_task)
 
+        controller_task = None
+        if autoscaler is not None:
+            controller_task = asyncio.create_task(_autoscale_controller())
+            tasks.append(controller_task)
+
         # Orchestrate termination carefully
         try:
             # Wait for the fetcher to finish fetching all messages
@@ -268,8 +466,15 @@ class AsyncPipeline:
             # Wait until processors have consumed all fetched items
             await fetch_q.join()
 
+            # Freeze the worker count before sending one sentinel per live worker
+            if controller_task is not None:
+                controller_task.cancel()
+                await asyncio.gather(controller_task, return_exceptions=True)
+            retire_requests = 0
+
             # Send sentinel to processors so they exit cleanly
-            for _ in range(self.process_workers):
+            final_workers = sum(1 for t in proc_tasks if not t.done())
+            for _ in range(final_workers):
                 await fetch_q.put((None, None))
 
             # Wait for processors to exit
@@ -284,17 +489,22 @@ class AsyncPipeline:
             await writer_task
 
             duration = time.time() - start_time
-            stats = {
+            stats: Dict[str, Any] = {
                 "processed_count": processed_count,
                 "errors": errors,
                 "duration": duration,
                 "fetch_time": fetch_time_total,
                 "process_time": process_time_total,
                 "write_time": write_time_total,
+                "render_time": render_time_total,
+                "render_batches": render_batches,
+                "process_workers": final_workers,
                 "max_fetch_queue_len": max_fetch_q,
                 "max_write_queue_len": max_write_q,
                 "max_writer_buffered": max_buffered,
             }
+            if autoscaler is not None:
+                stats["autoscale"] = autoscaler.stats(final_workers)
             # Convenience averages (safe guards)
             if processed_count > 0:
                 stats["avg_process_time_per_message"] = (
@@ -308,10 +518,15 @@ class AsyncPipeline:
             # 📊 TIER C-4: Record stage metrics
             if metrics:
                 try:
-                    # Record each pipeline stage
-                    metrics.record_stage("pipeline_fetch", fetch_time_total, last_seq)
-                    metrics.record_stage("pipeline_process", process_time_total, processed_count)
-                    metrics.record_stage("pipeline_write", write_time_total, processed_count)
+                    # Record each pipeline stage; message counts are in the returned
+                    # stats, record_stage() only takes an error flag
+                    metrics.record_stage("pipeline_fetch", fetch_time_total)
+                    metrics.record_stage(
+                        "pipeline_process", process_time_total, error=errors > 0
+                    )
+                    metrics.record_stage("pipeline_write", write_time_total)
+                    if render_batches:
+                        metrics.record_stage("pipeline_render", render_time_total)
                 except Exception as e:
                     logger.debug(f"Failed to record pipeline metrics: {e}")
 
@@ -327,3 +542,225 @@ class AsyncPipeline:
             await asyncio.gather(
                 *[t for t in tasks if not t.done()], return_exceptions=True
             )
+
+    async def run_batches(
+        self,
+        entity: Any,
+        telegram_manager: Any,
+        process_batch_fn: BatchProcessFn,
+        writer_fn: BatchWriterFn,
+        limit: Optional[int] = None,
+        min_id: int = 0,
+        max_inflight_messages: int = 2000,
+    ) -> Dict[str, Any]:
+        """
+        Run the pipeline in batch mode.
+
+        Args:
+            entity: entity/peer to fetch messages for.
+            telegram_manager: object with fetch_message_batches(entity, limit=..., min_id=...)
+                (falls back to grouping fetch_messages() output).
+            process_batch_fn: async callable(messages) -> list of results (None entries = skip).
+            writer_fn: async callable(results) called once per batch, in fetch order,
+                with the non-None results of that batch.
+            limit: optional maximum number of messages to fetch.
+            min_id: Resume from this message ID.
+            max_inflight_messages: Backpressure - max fetched-but-unwritten messages.
+
+        Returns:
+            dict with stats (same keys as run() plus batches / max_inflight_messages).
+        """
+        try:
+            from ..monitoring import get_metrics_collector
+            metrics = get_metrics_collector()
+        except Exception:
+            metrics = None
+
+        budget = MessageBudget(max_inflight_messages)
+        # Unbounded queues: the message budget is the backpressure
+        fetch_q: asyncio.Queue = asyncio.Queue()
+        write_q: asyncio.Queue = asyncio.Queue()
+
+        processed_count = 0
+        errors = 0
+        fetched_messages = 0
+        batch_count = 0
+        start_time = time.time()
+        max_buffered = 0
+
+        fetch_time_total = 0.0
+        process_time_total = 0.0
+        write_time_total = 0.0
+
+        async def _batches():
+            source = getattr(telegram_manager, "fetch_message_batches", None)
+            if source is not None:
+                async for batch in source(entity, limit=limit, min_id=min_id):
+                    yield batch
+                return
+            batch = []
+            async for message in telegram_manager.fetch_messages(
+                entity, limit=limit, min_id=min_id
+            ):
+                batch.append(message)
+                if len(batch) >= 100:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        async def _fetcher():
+            nonlocal fetched_messages, batch_count, fetch_time_total
+            from src.shutdown_manager import shutdown_manager
+
+            fetch_start = time.time()
+            try:
+                async for batch in _batches():
+                    if shutdown_manager.shutdown_requested:
+                        logger.info("🛑 AsyncPipeline: shutdown requested, stopping fetch")
+                        break
+                    if not batch:
+                        continue
+                    await budget.acquire(len(batch))
+                    batch_count += 1
+                    fetched_messages += len(batch)
+                    await fetch_q.put((batch_count, batch))
+                fetch_time_total += time.time() - fetch_start
+                logger.debug(
+                    f"AsyncPipeline.fetcher: fetched {fetched_messages} messages in {batch_count} batches (min_id={min_id})"
+                )
+            except Exception as e:
+                logger.exception(f"AsyncPipeline.fetcher error: {e}")
+                raise
+
+        async def _processor_worker(worker_idx: int):
+            nonlocal errors, process_time_total
+            while True:
+                seq, batch = await fetch_q.get()
+                try:
+                    if seq is None:
+                        logger.debug(f"Batch processor {worker_idx} received sentinel, exiting")
+                        break
+
+                    process_start = time.time()
+                    try:
+                        results = await process_batch_fn(batch)
+                        await write_q.put((seq, results, len(batch), None))
+                    except Exception as e:
+                        await write_q.put((seq, None, len(batch), e))
+                        errors += len(batch)
+                    process_time_total += time.time() - process_start
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("AsyncPipeline.batch_processor: unexpected error")
+                finally:
+                    fetch_q.task_done()
+
+        async def _writer():
+            nonlocal processed_count, write_time_total, max_buffered
+            buffer: Dict[int, Tuple[Any, int, Optional[BaseException]]] = {}
+            expected_seq = 1
+            while True:
+                seq, results, size, exc = await write_q.get()
+                try:
+                    if seq is None:
+                        logger.debug("Batch writer received sentinel, finishing")
+                        break
+
+                    buffer[seq] = (results, size, exc)
+                    if len(buffer) > max_buffered:
+                        max_buffered = len(buffer)
+
+                    while expected_seq in buffer:
+                        results, size, exc = buffer.pop(expected_seq)
+                        if exc is not None:
+                            logger.warning(
+                                f"AsyncPipeline: batch {expected_seq} ({size} messages) failed: {exc}"
+                            )
+                        elif results:
+                            ready = [r for r in results if r is not None]
+                            if ready:
+                                try:
+                                    writer_start = time.time()
+                                    await writer_fn(ready)
+                                    processed_count += len(ready)
+                                    write_time_total += time.time() - writer_start
+                                except Exception:
+                                    logger.exception(
+                                        f"Writer function failed for batch seq={expected_seq}"
+                                    )
+                        await budget.release(size)
+                        expected_seq += 1
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("AsyncPipeline.batch_writer: unexpected error")
+                finally:
+                    write_q.task_done()
+
+        tasks = []
+        fetch_task = asyncio.create_task(_fetcher())
+        tasks.append(fetch_task)
+
+        proc_tasks = []
+        for i in range(max(1, self.process_workers)):
+            t = asyncio.create_task(_processor_worker(i))
+            proc_tasks.append(t)
+            tasks.append(t)
+
+        writer_task = asyncio.create_task(_writer())
+        tasks.append(writer_task)
+
+        try:
+            await fetch_task
+            await fetch_q.join()
+            for _ in proc_tasks:
+                await fetch_q.put((None, None))
+            await asyncio.gather(*proc_tasks, return_exceptions=False)
+
+            await write_q.join()
+            await write_q.put((None, None, 0, None))
+            await writer_task
+
+            duration = time.time() - start_time
+            stats = {
+                "processed_count": processed_count,
+                "errors": errors,
+                "duration": duration,
+                "batches": batch_count,
+                "fetch_time": fetch_time_total,
+                "process_time": process_time_total,
+                "write_time": write_time_total,
+                "max_inflight_messages": budget.max_observed,
+                "max_writer_buffered": max_buffered,
+            }
+            if processed_count > 0:
+                stats["avg_process_time_per_message"] = (
+                    process_time_total / processed_count
+                )
+                stats["avg_write_time_per_message"] = write_time_total / processed_count
+            else:
+                stats["avg_process_time_per_message"] = 0.0
+                stats["avg_write_time_per_message"] = 0.0
+
+            if metrics:
+                try:
+                    metrics.record_stage("pipeline_fetch", fetch_time_total)
+                    metrics.record_stage(
+                        "pipeline_process", process_time_total, error=errors > 0
+                    )
+                    metrics.record_stage("pipeline_write", write_time_total)
+                except Exception as e:
+                    logger.debug(f"Failed to record pipeline metrics: {e}")
+
+            logger.debug(f"AsyncPipeline.run_batches completed: {stats}")
+            return stats
+
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(
+                *[t for t in tasks if not t.done()], return_exceptions=True
+            )
@@ -0,0 +1,169 @@
+"""
+Process-pool message rendering for the export pipeline.
+
+Rendering a message to markdown (timestamp conversion, reactions, string
+assembly) is pure CPU work. The exporter does the I/O-bound part of each
+message on the event loop (sender lookup, media download, transcription) and
+reduces it to a small picklable record; render_records() then turns batches of
+records into markdown in worker processes so text-heavy exports scale past one
+core. The same functions are used in-process when the pool is disabled, so
+output is identical in both modes.
+"""
+
+import asyncio
+import datetime as _dt
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils import logger
+
+# Exported notes are rendered in UTC+3 (see Exporter._format_timestamp)
+EXPORT_TIMEZONE = _dt.timezone(_dt.timedelta(hours=3))
+
+MEDIA_TYPE_NAMES = {
+    "MessageMediaPhoto": "Photo",
+    "MessageMediaDocument": "Document",
+    "MessageMediaVideo": "Video",
+    "MessageMediaAudio": "Audio",
+    "MessageMediaVoice": "Voice Message",
+    "MessageMediaContact": "Contact",
+    "MessageMediaLocation": "Location",
+    "MessageMediaPoll": "Poll",
+    "MessageMediaSticker": "Sticker",
+    "MessageMediaGif": "GIF",
+}
+
+# (formatted, message_id, has_media, media_count) - the exporter's writer contract
+RenderResult = Tuple[str, int, bool, int]
+
+
+def format_timestamp(dt) -> str:
+    """Format datetime in Telegram export format (UTC+3)."""
+    try:
+        if dt is None:
+            return "Unknown Date"
+
+        # If naive, assume UTC (best-effort) then convert to UTC+3
+        if getattr(dt, "tzinfo", None) is None:
+            dt = dt.replace(tzinfo=_dt.timezone.utc)
+
+        dt_local = dt.astimezone(EXPORT_TIMEZONE)
+        return (
+            f"{dt_local.day:02d}.{dt_local.month:02d}.{dt_local.year} "
+            f"{dt_local.hour:02d}:{dt_local.minute:02d}"
+        )
+    except Exception:
+        # Fallback to safe formatting if anything goes wrong
+        try:
+            return (
+                f"{getattr(dt, 'day', 0):02d}."
+                f"{getattr(dt, 'month', 0):02d}."
+                f"{getattr(dt, 'year', 0)} "
+                f"{getattr(dt, 'hour', 0):02d}:{getattr(dt, 'minute', 0):02d}"
+            )
+        except Exception:
+            return "00.00.0000 00:00"
+
+
+def media_type_name(media) -> str:
+    """Get human-readable media type name."""
+    return MEDIA_TYPE_NAMES.get(type(media).__name__, "Media")
+
+
+def extract_reactions(message) -> List[Tuple[str, int]]:
+    """Reduce message.reactions to picklable (emoji, count) pairs."""
+    reactions = getattr(message, "reactions", None)
+    if not reactions or not hasattr(reactions, "results"):
+        return []
+
+    pairs = []
+    for reaction_count in reactions.results:
+        emoji = "?"
+        # Handle standard emoji
+        if hasattr(reaction_count.reaction, "emoticon"):
+            emoji = reaction_count.reaction.emoticon
+        # Handle custom emoji (document_id)
+        elif hasattr(reaction_count.reaction, "document_id"):
+            emoji = "🧩"  # Placeholder for custom emoji
+        pairs.append((emoji, reaction_count.count))
+    return pairs
+
+
+def render_record(record: Dict[str, Any]) -> RenderResult:
+    """
+    Render one message record to markdown.
+
+    Record keys: id, date, sender_name, text, media_lines (pre-rendered media
+    references), reactions ((emoji, count) pairs), has_media, media_count.
+    """
+    parts = [f"{record['sender_name']}, [{format_timestamp(record['date'])}]\n"]
+
+    if record.get("text"):
+        parts.append(f"{record['text']}\n")
+
+    parts.extend(record.get("media_lines") or ())
+
+    reactions = record.get("reactions")
+    if reactions:
+        parts.append(
+            f"**Reactions:** {', '.join(f'{emoji} {count}' for emoji, count in reactions)}\n"
+        )
+
+    parts.append("\n")
+    return (
+        "".join(parts),
+        record["id"],
+        bool(record.get("has_media")),
+        int(record.get("media_count", 0)),
+    )
+
+
+def render_records(records: List[Dict[str, Any]]) -> List[RenderResult]:
+    """Render a batch of records (runs in worker processes)."""
+    return [render_record(record) for record in records]
+
+
+class ProcessRenderPool:
+    """Process pool that renders message record batches off the event loop."""
+
+    def __init__(self, workers: int):
+        self.workers = max(1, int(workers))
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Statistics
+        self.batches_rendered = 0
+        self.records_rendered = 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Executor, created on first use."""
+        if self._executor is None:
+            # spawn, not fork: the exporter process already runs Telethon,
+            # thread pool and logging threads when the pool is created
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"🧵 Render process pool started with {self.workers} workers")
+        return self._executor
+
+    async def render(self, records: List[Dict[str, Any]]) -> List[RenderResult]:
+        """Render a batch in a worker process, preserving order."""
+        if not records:
+            return []
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(self.executor, render_records, records)
+        self.batches_rendered += 1
+        self.records_rendered += len(records)
+        return results
+
+    def shutdown(self) -> None:
+        """Stop worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info(
+                f"🧵 Render process pool stopped "
+                f"({self.records_rendered} messages in {self.batches_rendered} batches)"
+            )
@@ -0,0 +1,190 @@
+"""
+Concurrent multi-target export scheduling.
+
+Exporting targets one by one leaves the process idle whenever the current
+target sleeps on FloodWait or waits for media. ExportScheduler runs several
+targets at once, largest first (estimated via get_total_message_count), while
+an ExportBudget caps the shared resources across all of them:
+
+- api:   concurrent history requests (TelegramManager.request_semaphore)
+- media: concurrent media downloads started by the exporter
+- disk:  concurrent buffered file flushes
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..utils import logger
+
+# Sort key for targets whose size could not be estimated (exported last)
+UNKNOWN_SIZE = -1
+
+
+class ExportBudget:
+    """Global concurrency budget shared by concurrently exported targets."""
+
+    def __init__(self, api: int = 4, media: int = 8, disk: int = 4):
+        self.limits = {
+            "api": max(1, int(api)),
+            "media": max(1, int(media)),
+            "disk": max(1, int(disk)),
+        }
+        self.api = asyncio.Semaphore(self.limits["api"])
+        self.media = asyncio.Semaphore(self.limits["media"])
+        self.disk = asyncio.Semaphore(self.limits["disk"])
+
+    def in_use(self) -> Dict[str, int]:
+        """Slots currently held per resource."""
+        return {
+            name: limit - getattr(self, name)._value
+            for name, limit in self.limits.items()
+        }
+
+
+@dataclass(slots=True)
+class ScheduledTarget:
+    """Export target with its position in the input and estimated size."""
+
+    index: int
+    target: Any
+    estimated_messages: int = UNKNOWN_SIZE
+
+
+class ExportScheduler:
+    """Runs target exports concurrently under a shared ExportBudget."""
+
+    def __init__(
+        self,
+        telegram_manager: Any,
+        budget: ExportBudget,
+        max_concurrent_targets: int = 4,
+        reporter_manager: Any = None,
+        progress_interval: float = 30.0,
+    ):
+        self.telegram_manager = telegram_manager
+        self.budget = budget
+        self.max_concurrent_targets = max(1, int(max_concurrent_targets))
+        self.reporter_manager = reporter_manager
+        self.progress_interval = float(progress_interval)
+
+        self.active: Dict[int, ScheduledTarget] = {}
+        self.completed = 0
+
+    async def _estimate(self, scheduled: ScheduledTarget) -> None:
+        try:
+            async with self.budget.api:
+                entity = await self.telegram_manager.resolve_entity(scheduled.target.id)
+                if entity is None:
+                    return
+                count = await self.telegram_manager.get_total_message_count(entity)
+            if isinstance(count, int) and count >= 0:
+                scheduled.estimated_messages = count
+        except Exception as e:
+            logger.debug(f"Size estimate failed for {scheduled.target.id}: {e}")
+
+    async def plan(self, targets: List[Any]) -> List[ScheduledTarget]:
+        """Estimate target sizes and return them largest first."""
+        scheduled = [ScheduledTarget(i, target) for i, target in enumerate(targets)]
+        await asyncio.gather(*(self._estimate(s) for s in scheduled))
+        # Largest first keeps the long tail short; stable for equal sizes
+        # (unknown sizes are -1, so they go last)
+        scheduled.sort(key=lambda s: (-s.estimated_messages, s.index))
+        return scheduled
+
+    async def run(
+        self,
+        targets: List[Any],
+        export_fn: Callable[[ScheduledTarget], Awaitable[Any]],
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> List[Any]:
+        """
+        Export all targets.
+
+        Args:
+            targets: Targets in their original order.
+            export_fn: async callable(scheduled) -> per-target result.
+            should_stop: Optional callable; no new target starts once it returns True.
+
+        Returns:
+            Results in the original target order (None for failed / skipped targets).
+        """
+        results: List[Any] = [None] * len(targets)
+        queue = await self.plan(targets)
+        pending = list(reversed(queue))  # pop() from the end = largest first
+
+        logger.info(
+            f"🗂️ Scheduling {len(targets)} targets, {self.max_concurrent_targets} at a time "
+            f"(budget: {self.budget.limits})"
+        )
+
+        previous_semaphore = getattr(self.telegram_manager, "request_semaphore", None)
+        self.telegram_manager.request_semaphore = self.budget.api
+
+        async def _worker(worker_idx: int):
+            while pending:
+                if should_stop is not None and should_stop():
+                    logger.info("Shutdown requested, not starting further targets")
+                    return
+                scheduled = pending.pop()
+                self.active[scheduled.index] = scheduled
+                started = time.time()
+                try:
+                    results[scheduled.index] = await export_fn(scheduled)
+                except Exception as e:
+                    logger.error(f"❌ Failed to export target {scheduled.target.name}: {e}")
+                finally:
+                    self.active.pop(scheduled.index, None)
+                    self.completed += 1
+                    logger.info(
+                        f"🗂️ [{self.completed}/{len(targets)}] {scheduled.target.name} "
+                        f"done in {time.time() - started:.1f}s (worker {worker_idx})"
+                    )
+
+        monitor = asyncio.create_task(self._progress_monitor(len(targets)))
+        try:
+            await asyncio.gather(
+                *(_worker(i) for i in range(min(self.max_concurrent_targets, len(queue))))
+            )
+        finally:
+            monitor.cancel()
+            await asyncio.gather(monitor, return_exceptions=True)
+            self.telegram_manager.request_semaphore = previous_semaphore
+
+        return results
+
+    def progress_snapshot(self) -> List[Dict[str, Any]]:
+        """Per-target progress of running exports (from ExportReporterManager)."""
+        reported: Dict[str, Dict[str, Any]] = {}
+        if self.reporter_manager is not None:
+            try:
+                reported = self.reporter_manager.get_active_progress()
+            except Exception as e:
+                logger.debug(f"Failed to read export progress: {e}")
+
+        snapshot = []
+        for scheduled in list(self.active.values()):
+            entry: Dict[str, Any] = {
+                "target": scheduled.target.name,
+                "estimated_messages": scheduled.estimated_messages,
+            }
+            entry.update(reported.get(str(scheduled.target.id), {}))
+            snapshot.append(entry)
+        return snapshot
+
+    async def _progress_monitor(self, total: int) -> None:
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            parts = []
+            for entry in self.progress_snapshot():
+                done = entry.get("processed_messages", 0)
+                estimate = entry["estimated_messages"]
+                if estimate > 0:
+                    parts.append(f"{entry['target']} {done}/{estimate}")
+                else:
+                    parts.append(f"{entry['target']} {done}")
+            logger.info(
+                f"🗂️ {self.completed}/{total} targets done, active: "
+                f"{', '.join(parts) or '-'} | budget in use: {self.budget.in_use()}"
+            )
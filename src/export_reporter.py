@@ -65,6 +65,9 @@ class ExportMetrics:
     # C-3: InputPeer cache metrics (TIER C optimization)
     input_peer_cache_metrics: Optional[Dict[str, Any]] = None
 
+    # AIMD download concurrency: final limit, throughput, limit decisions
+    download_concurrency: Optional[Dict[str, Any]] = None
+
 
 @dataclass(slots=True)
 class SystemInfo:
@@ -462,6 +465,22 @@ class ExportReporterManager:
         logger.info(f"Saved {saved_count}/{len(self.reporters)} export reports")
         return saved_count
 
+    def get_active_progress(self) -> Dict[str, Dict[str, Any]]:
+        """Прогресс экспортов, которые начаты, но ещё не завершены."""
+        active = {}
+        for entity_key, reporter in list(self.reporters.items()):
+            if not reporter.export_started or reporter.export_finished:
+                continue
+            metrics = reporter.metrics
+            active[entity_key] = {
+                "entity_name": reporter.entity_name,
+                "total_messages": metrics.total_messages,
+                "processed_messages": metrics.processed_messages,
+                "failed_messages": metrics.failed_messages,
+                "downloaded_media": metrics.downloaded_media_files,
+            }
+        return active
+
     def get_global_summary(self) -> Dict[str, Any]:
         """Получить глобальную сводку всех экспортов."""
         total_entities = len(self.reporters)
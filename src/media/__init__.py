@@ -8,6 +8,7 @@ Main components:
 - MediaProcessor: Main orchestrator for media operations
 - MediaDownloader: Download management with resume support
 - MediaDownloadQueue: Background async download queue
+- LazyMediaLoader: Placeholders at export time, batch hydration later
 - Hardware acceleration detection and configuration
 - Specialized processors for video/audio/image files
 - Metadata extraction and file validation
@@ -16,6 +17,7 @@ Main components:
 from .download_queue import DownloadStatus, DownloadTask, MediaDownloadQueue, QueueStats
 from .downloader import MediaDownloader
 from .hardware import HardwareAccelerationDetector
+from .lazy_loader import LazyMediaLoader, LazyMediaMetadata
 from .manager import MediaProcessor
 from .models import MediaMetadata, ProcessingSettings, ProcessingTask
 
@@ -26,6 +28,8 @@ __all__ = [
     "DownloadTask",
     "DownloadStatus",
     "QueueStats",
+    "LazyMediaLoader",
+    "LazyMediaMetadata",
     "HardwareAccelerationDetector",
     "MediaMetadata",
     "ProcessingSettings",
@@ -0,0 +1,395 @@
+"""
+Content-addressed media store.
+
+Downloaded media is kept once per content under the cache dir:
+
+    <root>/blobs/ab/cd/<sha256>      read-only blob
+    <root>/refs.log                  output path -> {sha256, method}
+
+Outputs are materialized from the blob instead of being copied:
+
+1. reflink (FICLONE ioctl, btrfs/xfs/...): copy-on-write clone, independent file
+2. hardlink: same inode; the blob is read-only so outputs cannot be edited in place
+3. copy: shutil.copyfile (sendfile / copy_file_range on Linux)
+
+Every materialized output is a reference. gc() drops references whose path
+is gone or no longer holds the blob content (size / inode check) and deletes
+blobs without live references that are older than the grace period.
+
+References are kept in a CacheLogStore log (src/core/log_store.py) with one
+record per output path; changes are buffered and appended in batches. A
+legacy refs.msgpack snapshot is migrated into the log once.
+
+    python -m src.media.blob_store stats <root>
+    python -m src.media.blob_store gc <root> [--grace-hours N] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import errno
+import os
+import shutil
+import stat
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import msgpack
+from loguru import logger
+
+from src.core.log_store import CacheLogStore, LogWriteBuffer
+from src.media.streaming_hash import sha256_file_async
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+MATERIALIZE_MODES = ("auto", "reflink", "hardlink", "copy")
+
+
+def reflink_file(src: Path, dst: Path) -> bool:
+    """Clone src into a new dst with FICLONE; False when unsupported."""
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        return False
+
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except OSError as e:
+        Path(dst).unlink(missing_ok=True)
+        if e.errno not in (
+            errno.EOPNOTSUPP,
+            errno.ENOTTY,
+            errno.EXDEV,
+            errno.EINVAL,
+            errno.ENOSYS,
+            errno.EPERM,
+        ):
+            logger.debug(f"reflink {src} -> {dst} failed: {e}")
+        return False
+
+
+def materialize_file(src: Path, dst: Path, mode: str = "auto") -> str:
+    """
+    Create dst with the content of src; returns the method used.
+
+    The file appears atomically (temp name + os.replace), so a crash never
+    leaves a half-written output.
+    """
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(dst.name + ".cas_tmp")
+    tmp.unlink(missing_ok=True)
+
+    if mode in ("auto", "reflink") and reflink_file(src, tmp):
+        os.replace(tmp, dst)
+        return "reflink"
+
+    if mode in ("auto", "hardlink"):
+        try:
+            os.link(src, tmp)
+            os.replace(tmp, dst)
+            return "hardlink"
+        except OSError as e:
+            tmp.unlink(missing_ok=True)
+            logger.debug(f"hardlink {src} -> {dst} failed: {e}")
+
+    shutil.copyfile(src, tmp)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, dst)
+    return "copy"
+
+
+class BlobStore:
+    """Content-addressed blob store with reference tracking."""
+
+    def __init__(self, root: Path, mode: str = "auto"):
+        if mode not in MATERIALIZE_MODES:
+            raise ValueError(f"Unknown materialize mode {mode!r}, expected one of {MATERIALIZE_MODES}")
+        self.root = Path(root)
+        self.blobs_dir = self.root / "blobs"
+        self.refs_path = self.root / "refs.log"
+        self.mode = mode
+
+        self._refs: Dict[str, Dict[str, str]] = {}
+        # output path -> digest: an output holds one content at a time
+        self._owners: Dict[str, str] = {}
+        self._log = CacheLogStore(self.refs_path, compaction_min_bytes=256 * 1024)
+        self._writes = LogWriteBuffer(
+            self._log,
+            lambda: (
+                (key, self._encode_ref(key, digest))
+                for key, digest in self._owners.items()
+            ),
+        )
+        self.stats: Dict[str, int] = {
+            "ingested": 0,
+            "ingest_dedup_hits": 0,
+            "reflink": 0,
+            "hardlink": 0,
+            "copy": 0,
+            "bytes_saved": 0,
+        }
+        self._load_refs()
+
+    # --- paths -----------------------------------------------------------
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest[:2] / digest[2:4] / digest
+
+    def digest_of(self, path: Path) -> Optional[str]:
+        """Digest if path is a blob of this store, else None."""
+        try:
+            relative = Path(path).resolve().relative_to(self.blobs_dir.resolve())
+        except ValueError:
+            return None
+        return relative.name if len(relative.parts) == 3 else None
+
+    def has(self, digest: str) -> bool:
+        return self.blob_path(digest).exists()
+
+    # --- refs ------------------------------------------------------------
+
+    def _load_refs(self) -> None:
+        log_exists = self._log.log_path.exists() or self._log.backup_path.exists()
+        try:
+            records = self._log.load()
+        except Exception as e:
+            logger.warning(f"Failed to load media store refs: {e}, starting fresh")
+            self._log.set_aside()
+            records = {}
+        for key, record in records.items():
+            if isinstance(record, dict) and record.get("d"):
+                self._set_ref(record["d"], key, record.get("m", "external"))
+
+        legacy_path = self.root / "refs.msgpack"
+        if not log_exists and legacy_path.exists():
+            # One-time migration from the msgpack snapshot
+            try:
+                with open(legacy_path, "rb") as f:
+                    snapshot = msgpack.unpackb(f.read(), raw=False) or {}
+                for digest, refs in snapshot.items():
+                    for key, method in refs.items():
+                        self._set_ref(digest, key, method)
+            except Exception as e:
+                logger.warning(f"Failed to read legacy media store refs: {e}")
+            self._writes.rewrite_pending = True
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning(f"Failed to migrate media store refs: {e}")
+                return
+            legacy_path.unlink(missing_ok=True)
+
+    def _encode_ref(self, key: str, digest: str) -> bytes:
+        return self._log.encode_set(key, {"d": digest, "m": self._refs[digest][key]})
+
+    def _set_ref(self, digest: str, key: str, method: str) -> None:
+        # An output path holds one content: drop it from any other blob
+        previous = self._owners.get(key)
+        if previous is not None and previous != digest:
+            self._refs.get(previous, {}).pop(key, None)
+        self._owners[key] = digest
+        self._refs.setdefault(digest, {})[key] = method
+
+    def _changed(self, key: str) -> None:
+        digest = self._owners.get(key)
+        self._writes.put(key, self._encode_ref(key, digest) if digest is not None else None)
+        if self._writes.full:
+            self.flush()
+
+    def _forget(self, digest: str, keys) -> None:
+        """Drop the reverse entries of references removed from `digest`."""
+        for key in keys:
+            if self._owners.get(key) == digest:
+                del self._owners[key]
+                self._changed(key)
+
+    def flush(self) -> None:
+        """Write buffered reference changes to the log (compacting it when needed)."""
+        self._writes.flush()
+
+    def add_ref(self, digest: str, path: Path, method: str = "external") -> None:
+        """Record that `path` holds the content of blob `digest`."""
+        key = str(Path(path).absolute())
+        self._set_ref(digest, key, method)
+        self._changed(key)
+
+    def release(self, path: Path) -> None:
+        """Forget an output path (e.g. the output was deleted on purpose)."""
+        key = str(Path(path).absolute())
+        digest = self._owners.pop(key, None)
+        if digest is not None and self._refs.get(digest, {}).pop(key, None) is not None:
+            self._changed(key)
+
+    def refcount(self, digest: str) -> int:
+        return len(self._refs.get(digest, {}))
+
+    # --- ingest / materialize -------------------------------------------
+
+    def _ingest_sync(self, src: Path, digest: str) -> str:
+        blob = self.blob_path(digest)
+        if blob.exists():
+            self.stats["ingest_dedup_hits"] += 1
+            self.stats["bytes_saved"] += blob.stat().st_size
+            Path(src).unlink(missing_ok=True)
+            return digest
+
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(src, blob)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Different filesystem: copy next to the blob, then rename
+            tmp = blob.with_name(blob.name + ".tmp")
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, blob)
+            Path(src).unlink(missing_ok=True)
+        # Read-only: hardlinked outputs must not modify the shared inode
+        os.chmod(blob, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        self.stats["ingested"] += 1
+        return digest
+
+    async def ingest(self, src: Path, digest: Optional[str] = None) -> str:
+        """
+        Move a downloaded file into the store; returns its SHA-256.
+
+        If the content is already stored, src is deleted instead. Pass the
+        digest when it was computed during the download to skip re-reading.
+        """
+        existing = self.digest_of(src)
+        if existing is not None:
+            return existing
+        if digest is None:
+            digest = await sha256_file_async(src)
+        return await asyncio.to_thread(self._ingest_sync, Path(src), digest)
+
+    async def materialize(self, digest: str, dst: Path) -> str:
+        """Create dst from blob `digest` (reflink > hardlink > copy) and reference it."""
+        blob = self.blob_path(digest)
+        if not blob.exists():
+            raise FileNotFoundError(f"Blob {digest} is not in the media store")
+        method = await asyncio.to_thread(materialize_file, blob, Path(dst), self.mode)
+        self.stats[method] += 1
+        if method != "copy":
+            self.stats["bytes_saved"] += blob.stat().st_size
+        self.add_ref(digest, dst, method)
+        return method
+
+    # --- garbage collection ---------------------------------------------
+
+    def _ref_is_live(self, blob_stat: os.stat_result, path: str, method: str) -> bool:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if method == "hardlink":
+            return st.st_ino == blob_stat.st_ino and st.st_dev == blob_stat.st_dev
+        return st.st_size == blob_stat.st_size
+
+    def _iter_blobs(self):
+        if not self.blobs_dir.exists():
+            return
+        for first in self.blobs_dir.iterdir():
+            if not first.is_dir():
+                continue
+            for second in first.iterdir():
+                if not second.is_dir():
+                    continue
+                for blob in second.iterdir():
+                    if blob.is_file() and not blob.name.endswith(".tmp"):
+                        yield blob
+
+    def gc(self, grace_seconds: float = 7 * 24 * 3600, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Drop dead references and delete unreferenced blobs older than grace_seconds.
+        """
+        now = time.time()
+        result: Dict[str, Any] = {
+            "blobs": 0,
+            "dead_refs": 0,
+            "deleted_blobs": 0,
+            "freed_bytes": 0,
+            "kept_bytes": 0,
+        }
+
+        for blob in list(self._iter_blobs()):
+            result["blobs"] += 1
+            digest = blob.name
+            blob_stat = blob.stat()
+            refs = self._refs.get(digest, {})
+            live = {
+                path: method
+                for path, method in refs.items()
+                if self._ref_is_live(blob_stat, path, method)
+            }
+            result["dead_refs"] += len(refs) - len(live)
+            if not dry_run and len(live) != len(refs):
+                self._refs[digest] = live
+                self._forget(digest, [key for key in refs if key not in live])
+
+            if not live and now - blob_stat.st_mtime >= grace_seconds:
+                result["deleted_blobs"] += 1
+                result["freed_bytes"] += blob_stat.st_size
+                if not dry_run:
+                    blob.unlink(missing_ok=True)
+                    self._forget(digest, self._refs.pop(digest, {}))
+            else:
+                result["kept_bytes"] += blob_stat.st_size
+
+        # References to blobs that no longer exist
+        for digest in [d for d in self._refs if not self.has(d)]:
+            result["dead_refs"] += len(self._refs[digest])
+            if not dry_run:
+                self._forget(digest, self._refs.pop(digest))
+
+        if not dry_run:
+            self.flush()
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        """Blob count / size and reference count."""
+        blobs = list(self._iter_blobs())
+        return {
+            "blobs": len(blobs),
+            "bytes": sum(b.stat().st_size for b in blobs),
+            "refs": sum(len(r) for r in self._refs.values()),
+            **self.stats,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.media.blob_store",
+        description="Inspect or garbage-collect the content-addressed media store.",
+    )
+    parser.add_argument("command", choices=["stats", "gc"])
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--grace-hours", type=float, default=24 * 7)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    store = BlobStore(args.root)
+    if args.command == "stats":
+        info = store.summary()
+        print(
+            f"{args.root}: {info['blobs']} blobs, {info['bytes'] / 1024 / 1024:.1f} MB, "
+            f"{info['refs']} references"
+        )
+        return 0
+
+    result = store.gc(args.grace_hours * 3600, dry_run=args.dry_run)
+    prefix = "would delete" if args.dry_run else "deleted"
+    print(
+        f"{args.root}: {result['blobs']} blobs, {result['dead_refs']} dead references, "
+        f"{prefix} {result['deleted_blobs']} blobs ({result['freed_bytes'] / 1024 / 1024:.1f} MB)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
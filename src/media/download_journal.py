@@ -0,0 +1,201 @@
+"""
+Byte-range resume journal for persistent downloads.
+
+Persistent downloads write parts in place into a preallocated file
+(ParallelPartDownloader). Next to the data file a sidecar journal records
+every completed part, so a restart, crash or TelegramServerError fast-fail
+resumes exactly at the missing parts - also in a later tobs run.
+
+Format (text, append-only, one line appended per completed part):
+
+    {"version": 1, "key": "doc_..", "file_size": N, "part_size": P}
+    <index> <offset> <length> <crc32 hex>
+    ...
+
+A torn last line (crash mid-append) is ignored. On load, recorded parts are
+re-checked against the data file with their CRC32, so a corrupted tail
+costs only the affected parts, not the whole file.
+"""
+
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+from loguru import logger
+
+from src.media.parallel_download import plan_parts
+
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = ".journal"
+# Bytes read per step while re-checking part checksums
+VERIFY_READ_SIZE = 1024 * 1024
+
+
+class DownloadJournal:
+    """Completed-part journal for one resumable download."""
+
+    def __init__(
+        self,
+        data_path: Path,
+        key: str,
+        file_size: int,
+        part_size: int,
+        checksums: bool = True,
+    ):
+        self.data_path = Path(data_path)
+        self.path = self.data_path.with_name(self.data_path.name + JOURNAL_SUFFIX)
+        self.key = key
+        self.file_size = int(file_size)
+        self.part_size = int(part_size)
+        self.checksums = checksums
+
+        self.parts: List[Tuple[int, int]] = plan_parts(self.file_size, self.part_size)
+        self.done_parts: Set[int] = set()
+        self._crcs: Dict[int, int] = {}
+
+        # Filled by load(): parts recovered from a previous run / dropped as corrupt
+        self.resumed_parts = 0
+        self.dropped_parts = 0
+
+    @classmethod
+    def open(
+        cls,
+        data_path: Path,
+        key: str,
+        file_size: int,
+        part_size: int,
+        checksums: bool = True,
+    ) -> "DownloadJournal":
+        """Load the journal next to data_path (or start a fresh one)."""
+        journal = cls(data_path, key, file_size, part_size, checksums)
+        journal.load()
+        return journal
+
+    @property
+    def header(self) -> Dict[str, object]:
+        return {
+            "version": JOURNAL_VERSION,
+            "key": self.key,
+            "file_size": self.file_size,
+            "part_size": self.part_size,
+        }
+
+    @property
+    def bytes_done(self) -> int:
+        return sum(self.parts[i][1] for i in self.done_parts)
+
+    @property
+    def is_complete(self) -> bool:
+        return len(self.done_parts) == len(self.parts)
+
+    def load(self) -> None:
+        """Read recorded parts, drop torn lines and parts failing their CRC."""
+        self.done_parts.clear()
+        self._crcs.clear()
+        if not self.path.exists() or not self.data_path.exists():
+            self._rewrite()
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+            header = json.loads(lines[0]) if lines else None
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            logger.warning(f"Unreadable download journal {self.path.name}: {e}, starting over")
+            header = None
+
+        if header != self.header:
+            # Different file / part size / format: nothing can be reused
+            self._rewrite()
+            return
+
+        for line in lines[1:]:
+            if not line.endswith("\n"):
+                break  # Torn append from a crash
+            fields = line.split()
+            try:
+                index, offset, length, crc = (
+                    int(fields[0]),
+                    int(fields[1]),
+                    int(fields[2]),
+                    int(fields[3], 16),
+                )
+            except (IndexError, ValueError):
+                break
+            if 0 <= index < len(self.parts) and self.parts[index] == (offset, length):
+                self.done_parts.add(index)
+                self._crcs[index] = crc
+
+        if self.checksums and self.done_parts:
+            self._verify_data()
+        self.resumed_parts = len(self.done_parts)
+        self._rewrite()
+
+    def _verify_data(self) -> None:
+        """Drop recorded parts whose data no longer matches the CRC."""
+        if self.data_path.stat().st_size != self.file_size:
+            # Truncated / grown data file: only parts fully inside it survive
+            size = self.data_path.stat().st_size
+            for index in list(self.done_parts):
+                offset, length = self.parts[index]
+                if offset + length > size:
+                    self.done_parts.discard(index)
+                    self.dropped_parts += 1
+
+        with open(self.data_path, "rb") as f:
+            for index in sorted(self.done_parts):
+                offset, length = self.parts[index]
+                f.seek(offset)
+                crc = 0
+                remaining = length
+                while remaining > 0:
+                    chunk = f.read(min(VERIFY_READ_SIZE, remaining))
+                    if not chunk:
+                        break
+                    crc = zlib.crc32(chunk, crc)
+                    remaining -= len(chunk)
+                if remaining or crc != self._crcs.get(index):
+                    self.done_parts.discard(index)
+                    self.dropped_parts += 1
+
+        if self.dropped_parts:
+            logger.warning(
+                f"Download journal {self.path.name}: {self.dropped_parts} corrupted "
+                f"part(s) will be downloaded again"
+            )
+
+    def _rewrite(self) -> None:
+        """Write a compact journal (header + current parts) atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.header) + "\n")
+            for index in sorted(self.done_parts):
+                f.write(self._line(index, self._crcs.get(index, 0)))
+        os.replace(tmp_path, self.path)
+
+    def _line(self, index: int, crc: int) -> str:
+        offset, length = self.parts[index]
+        return f"{index} {offset} {length} {crc:08x}\n"
+
+    def record(self, index: int, offset: int, data: bytes) -> None:
+        """Append a completed part (on_part hook of ParallelPartDownloader)."""
+        crc = zlib.crc32(data) if self.checksums else 0
+        self.done_parts.add(index)
+        self._crcs[index] = crc
+        # Opened per part so an interrupted download never holds a handle
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(self._line(index, crc))
+
+    def finish(self) -> None:
+        """Download complete: the journal is no longer needed."""
+        self.path.unlink(missing_ok=True)
+
+    def discard(self) -> None:
+        """Drop the journal and the partial data."""
+        self.finish()
+        self.data_path.unlink(missing_ok=True)
+        self.done_parts.clear()
+        self._crcs.clear()
@@ -21,6 +21,8 @@ from typing import Any, Callable, Dict, List, Optional, Union
 from loguru import logger
 from telethon.tl.types import Message
 
+from .download_scheduler import LaneScheduler
+
 # Patterns indicating Telegram server-side issues (not client-side)
 TELEGRAM_SERVER_ERROR_PATTERNS = [
     r"Telegram is having internal issues",
@@ -132,6 +134,10 @@ class MediaDownloadQueue:
         retry_delay: float = 2.0,
         task_timeout: float = 1800.0,  # 30 min max per task
         telegram_error_threshold: int = 5,  # Pause after N consecutive Telegram errors
+        large_file_threshold: int = 20 * 1024 * 1024,
+        large_lane_workers: int = 0,  # 0 = all workers but one
+        max_bytes_in_flight: int = 512 * 1024 * 1024,
+        controller: Optional[Any] = None,  # AIMDController
     ):
         """
         Initialize the download queue.
@@ -143,19 +149,39 @@ class MediaDownloadQueue:
             retry_delay: Delay between retry attempts
             task_timeout: Maximum time for a single task (prevents stuck workers)
             telegram_error_threshold: Pause downloads after this many Telegram errors
+            large_file_threshold: Tasks from this expected size go to the large lane
+            large_lane_workers: Max workers busy with large files (0 = auto:
+                all but one; with max_workers=1 small files get no reserved slot)
+            max_bytes_in_flight: Budget of expected bytes downloading at once
+            controller: Optional AIMDController; workers are spawned up to its
+                max_limit and the scheduler follows its current limit
         """
         self.downloader = downloader
+        self.controller = controller
+        if controller is not None:
+            max_workers = max(max_workers, controller.max_limit)
         self.max_workers = max_workers
         self.max_queue_size = max_queue_size
         self.retry_delay = retry_delay
         self.task_timeout = task_timeout
         self.telegram_error_threshold = telegram_error_threshold
 
-        # Queue and tracking
-        self._queue: asyncio.Queue = asyncio.Queue(
-            maxsize=max_queue_size if max_queue_size > 0 else 0
+        # Queue and tracking: small/large lanes, SJF, per-entity round robin
+        self._queue = LaneScheduler(
+            max_workers=max_workers,
+            large_file_threshold=large_file_threshold,
+            large_lane_workers=large_lane_workers,
+            max_bytes_in_flight=max_bytes_in_flight,
+            maxsize=max_queue_size if max_queue_size > 0 else 0,
         )
+        if controller is not None:
+            self._queue.concurrency_limit = controller.limit
+            controller.add_listener(self._queue.set_limit)
+        self._controller_task: Optional[asyncio.Task] = None
         self._tasks: Dict[str, DownloadTask] = {}
+        # output_path -> task_id of downloads not finished yet
+        self._active_paths: Dict[Path, str] = {}
+        self._path_listeners: List[Callable[[Path], None]] = []
         self._workers: List[asyncio.Task] = []
         self._active_downloads: Dict[
             str, asyncio.Task
@@ -195,6 +221,11 @@ class MediaDownloadQueue:
             )
             self._workers.append(worker)
 
+        if self.controller is not None:
+            self._controller_task = asyncio.create_task(
+                self._controller_loop(), name="download_concurrency_controller"
+            )
+
         logger.info(f"Started {self.max_workers} download workers")
 
     async def stop(self, wait_for_completion: bool = True) -> None:
@@ -215,6 +246,11 @@ class MediaDownloadQueue:
         self._running = False
         self._shutdown_event.set()
 
+        if self._controller_task is not None:
+            self._controller_task.cancel()
+            await asyncio.gather(self._controller_task, return_exceptions=True)
+            self._controller_task = None
+
         # Cancel all workers
         for worker in self._workers:
             worker.cancel()
@@ -265,6 +301,7 @@ class MediaDownloadQueue:
 
         async with self._lock:
             self._tasks[task_id] = task
+            self._active_paths[output_path] = task_id
             self.stats.total_queued += 1
             current_size = self._queue.qsize() + 1
             if current_size > self.stats.peak_queue_size:
@@ -281,6 +318,14 @@ class MediaDownloadQueue:
         """Get status of a specific task."""
         return self._tasks.get(task_id)
 
+    def is_downloading(self, path: Path) -> bool:
+        """True while a queued or running download will still write to path."""
+        return path in self._active_paths
+
+    def add_path_listener(self, callback: Callable[[Path], None]) -> None:
+        """callback(path) when the last download writing to path has finished."""
+        self._path_listeners.append(callback)
+
     def get_pending_count(self) -> int:
         """Get number of pending downloads."""
         return self._queue.qsize()
@@ -426,6 +471,16 @@ class MediaDownloadQueue:
             "bytes_downloaded": self.stats.total_bytes_downloaded,
         }
 
+    async def _controller_loop(self, tick: float = 1.0) -> None:
+        """Feed the bandwidth controller with the current in-flight count."""
+        controller = self.controller
+        if controller is None:
+            return
+        while self._running:
+            await asyncio.sleep(tick)
+            if not self._paused:
+                controller.evaluate(self._queue.in_flight)
+
     async def _worker_loop(self, worker_name: str) -> None:
         """Main loop for a download worker."""
         logger.debug(f"{worker_name} started")
@@ -442,8 +497,10 @@ class MediaDownloadQueue:
                 except asyncio.TimeoutError:
                     continue
 
-                await self._process_task(task, worker_name)
-                self._queue.task_done()
+                try:
+                    await self._process_task(task, worker_name)
+                finally:
+                    self._queue.task_done(task)
 
             except asyncio.CancelledError:
                 logger.debug(f"{worker_name} cancelled")
@@ -502,13 +559,10 @@ class MediaDownloadQueue:
                     except Exception:
                         pass
 
-                # Move to output path if different
+                # Move (or materialize a store blob) to output path if different
                 if result_path != task.output_path:
                     try:
-                        import shutil
-
-                        task.output_path.parent.mkdir(parents=True, exist_ok=True)
-                        shutil.move(str(result_path), str(task.output_path))
+                        await self.downloader.place_media(result_path, task.output_path)
                         task.result_path = task.output_path
                     except Exception as e:
                         logger.warning(f"Failed to move file to output path: {e}")
@@ -617,6 +671,21 @@ class MediaDownloadQueue:
                     except Exception:
                         pass
 
+        finally:
+            # Retries go back to the queue as PENDING and keep the path active
+            output_path = task.output_path
+            if (
+                output_path is not None
+                and task.status != DownloadStatus.PENDING
+                and self._active_paths.get(output_path) == task.task_id
+            ):
+                del self._active_paths[output_path]
+                for callback in self._path_listeners:
+                    try:
+                        callback(output_path)
+                    except Exception as e:
+                        logger.warning(f"Download path listener failed: {e}")
+
     def set_callbacks(
         self,
         on_complete: Optional[Callable[[DownloadTask], None]] = None,
@@ -642,6 +711,9 @@ class MediaDownloadQueue:
             "peak_queue_size": self.stats.peak_queue_size,
             "telegram_errors": self.stats.telegram_errors,
             "paused": self._paused,
+            "mb_in_flight": round(self._queue.bytes_in_flight / (1024 * 1024), 1),
+            "lanes": self._queue.get_lane_stats(),
+            "concurrency": self._queue.concurrency_limit or self.max_workers,
         }
 
     def log_stats(self) -> None:
@@ -655,6 +727,14 @@ class MediaDownloadQueue:
         if stats["paused"]:
             extra_info += " [PAUSED]"
 
+        lanes = stats["lanes"]
+        extra_info += (
+            f", Lanes: small {lanes['small']['finished']} done "
+            f"(avg wait {lanes['small']['avg_wait_s']:.1f}s), "
+            f"large {lanes['large']['finished']} done "
+            f"(avg wait {lanes['large']['avg_wait_s']:.1f}s)"
+        )
+
         logger.info(
             f"📊 Download Queue Stats: "
             f"Completed: {stats['total_completed']}, "
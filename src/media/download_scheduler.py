@@ -0,0 +1,245 @@
+"""
+Lane scheduler for the background media download queue.
+
+Replaces the FIFO asyncio.Queue of MediaDownloadQueue:
+
+- Two lanes by expected_size: "small" (photos, voice, documents) and
+  "large" (videos, archives). The large lane may occupy at most
+  `large_lane_workers` workers and never the last free slot of the current
+  concurrency limit, so small files keep flowing while multi-GB videos
+  download. With a single slot (one worker, or a limit of 1) there is nothing
+  to reserve: the cap is off and small files wait behind a large download.
+- Shortest job first inside a lane.
+- Per-entity fairness: entities with pending tasks take turns (round robin),
+  one chat with 10k photos cannot starve another.
+- Bytes-in-flight budget: a task starts only if its expected size fits the
+  remaining budget (a single task larger than the budget starts alone).
+- Optional concurrency limit below the worker count (set_limit(), driven by
+  the AIMD bandwidth controller).
+
+The interface mirrors the asyncio.Queue subset the download queue uses:
+put(), get(), qsize(), task_done(task).
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+SMALL = "small"
+LARGE = "large"
+LANES = (SMALL, LARGE)
+
+
+@dataclass(slots=True)
+class LaneStats:
+    """Counters for one scheduler lane."""
+
+    queued: int = 0
+    started: int = 0
+    finished: int = 0
+    pending: int = 0
+    in_flight: int = 0
+    bytes_started: int = 0
+    total_wait_s: float = 0.0
+
+    @property
+    def avg_wait_s(self) -> float:
+        return self.total_wait_s / self.started if self.started else 0.0
+
+
+class _Lane:
+    """Pending tasks of one lane: per-entity SJF heaps served round robin."""
+
+    def __init__(self) -> None:
+        self.heaps: "OrderedDict[Any, List[Tuple[int, int, Any]]]" = OrderedDict()
+        self.turns: Deque[Any] = deque()
+        self.stats = LaneStats()
+
+    def push(self, entity: Any, size: int, seq: int, task: Any) -> None:
+        heap = self.heaps.get(entity)
+        if heap is None:
+            heap = self.heaps[entity] = []
+            self.turns.append(entity)
+        heapq.heappush(heap, (size, seq, task))
+        self.stats.pending += 1
+
+    def pick(self, fits: Callable[[int], bool]) -> Optional[Any]:
+        """
+        First entity in turn order whose smallest task fits the byte budget.
+
+        An entity whose next file does not fit yet keeps its place in line,
+        the others may start their (smaller) files meanwhile.
+        """
+        for entity in self.turns:
+            if fits(self.heaps[entity][0][0]):
+                return entity
+        return None
+
+    def pop(self, entity: Any) -> Any:
+        self.turns.remove(entity)
+        heap = self.heaps[entity]
+        _, _, task = heapq.heappop(heap)
+        if heap:
+            self.turns.append(entity)  # Next entity's turn
+        else:
+            del self.heaps[entity]
+        self.stats.pending -= 1
+        return task
+
+    def __len__(self) -> int:
+        return self.stats.pending
+
+
+class LaneScheduler:
+    """Size-aware, fair download scheduler (see module docstring)."""
+
+    def __init__(
+        self,
+        max_workers: int,
+        large_file_threshold: int = 20 * 1024 * 1024,
+        large_lane_workers: int = 0,
+        max_bytes_in_flight: int = 512 * 1024 * 1024,
+        maxsize: int = 0,
+    ):
+        self.large_file_threshold = large_file_threshold
+        # Default: all workers but one for large files; a single worker
+        # serves both lanes (no small-lane guarantee, see large_lane_limit)
+        if large_lane_workers <= 0:
+            large_lane_workers = max(1, max_workers - 1)
+        self.large_lane_workers = large_lane_workers
+        self.max_workers = max_workers
+        self.max_bytes_in_flight = max_bytes_in_flight
+        self.maxsize = maxsize
+        self.concurrency_limit: Optional[int] = None
+
+        self._lanes: Dict[str, _Lane] = {lane: _Lane() for lane in LANES}
+        self._seq = itertools.count()
+        self._cond = asyncio.Condition()
+        # task id -> [lane, expected size, starts]; a retried task can be
+        # started again before the worker that requeued it calls task_done()
+        self._in_flight: Dict[int, List[Any]] = {}
+        self._enqueued_at: Dict[int, float] = {}
+        self.bytes_in_flight = 0
+
+    def lane_of(self, task: Any) -> str:
+        return LARGE if (task.expected_size or 0) >= self.large_file_threshold else SMALL
+
+    @property
+    def in_flight(self) -> int:
+        return sum(lane.stats.in_flight for lane in self._lanes.values())
+
+    def set_limit(self, limit: Optional[int]) -> None:
+        """Cap concurrently started tasks (None = only the workers limit)."""
+        self.concurrency_limit = limit
+        asyncio.get_running_loop().create_task(self._notify())
+
+    def qsize(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def put_nowait(self, task: Any) -> None:
+        lane = self.lane_of(task)
+        self._lanes[lane].push(task.entity_id, task.expected_size or 0, next(self._seq), task)
+        self._lanes[lane].stats.queued += 1
+        self._enqueued_at[id(task)] = time.time()
+
+    async def put(self, task: Any) -> None:
+        async with self._cond:
+            if self.maxsize > 0:
+                await self._cond.wait_for(lambda: self.qsize() < self.maxsize)
+            self.put_nowait(task)
+            self._cond.notify_all()
+
+    @property
+    def large_lane_limit(self) -> int:
+        """
+        Large-lane slots now: one slot of the current limit stays with small
+        files. A single slot is shared, otherwise large files would never start.
+        """
+        slots = self.concurrency_limit or self.max_workers
+        return max(1, min(self.large_lane_workers, slots - 1))
+
+    def _fits_budget(self, size: int) -> bool:
+        return not self._in_flight or self.bytes_in_flight + size <= self.max_bytes_in_flight
+
+    def _next(self) -> Optional[Tuple[str, Any]]:
+        """(lane, entity) allowed to start a task now, or None."""
+        if self.concurrency_limit is not None and self.in_flight >= self.concurrency_limit:
+            return None
+        large = self._lanes[LARGE]
+        if len(large) and large.stats.in_flight < self.large_lane_limit:
+            entity = large.pick(self._fits_budget)
+            if entity is not None:
+                return LARGE, entity
+        small = self._lanes[SMALL]
+        if len(small):
+            entity = small.pick(self._fits_budget)
+            if entity is not None:
+                return SMALL, entity
+        return None
+
+    async def get(self) -> Any:
+        """Wait for the next task allowed to start and mark it in flight."""
+        picked: Optional[Tuple[str, Any]] = None
+
+        def _ready() -> bool:
+            nonlocal picked
+            picked = self._next()
+            return picked is not None
+
+        async with self._cond:
+            # Keep the pick the predicate saw instead of picking a second time
+            await self._cond.wait_for(_ready)
+            assert picked is not None
+            lane_name, entity = picked
+            lane = self._lanes[lane_name]
+            task = lane.pop(entity)
+            size = task.expected_size or 0
+
+            entry = self._in_flight.setdefault(id(task), [lane_name, size, 0])
+            entry[2] += 1
+            self.bytes_in_flight += size
+            lane.stats.in_flight += 1
+            lane.stats.started += 1
+            lane.stats.bytes_started += size
+            enqueued_at = self._enqueued_at.pop(id(task), None)
+            if enqueued_at is not None:
+                lane.stats.total_wait_s += time.time() - enqueued_at
+            self._cond.notify_all()  # Frees a slot for put() with maxsize
+            return task
+
+    def task_done(self, task: Any) -> None:
+        """Release the lane slot and byte budget of a started task."""
+        entry = self._in_flight.get(id(task))
+        if entry is None:
+            return
+        lane_name, size, _ = entry
+        entry[2] -= 1
+        if entry[2] == 0:
+            del self._in_flight[id(task)]
+        self.bytes_in_flight -= size
+        stats = self._lanes[lane_name].stats
+        stats.in_flight -= 1
+        stats.finished += 1
+        asyncio.get_running_loop().create_task(self._notify())
+
+    async def _notify(self) -> None:
+        async with self._cond:
+            self._cond.notify_all()
+
+    def get_lane_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "pending": lane.stats.pending,
+                "in_flight": lane.stats.in_flight,
+                "queued": lane.stats.queued,
+                "started": lane.stats.started,
+                "finished": lane.stats.finished,
+                "mb_started": round(lane.stats.bytes_started / (1024 * 1024), 1),
+                "avg_wait_s": round(lane.stats.avg_wait_s, 2),
+            }
+            for name, lane in self._lanes.items()
+        }
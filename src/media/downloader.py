@@ -8,17 +8,27 @@ resume support, and multiple download strategies.
 import asyncio
 import os
 import re
+import shutil
 import time
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Set
 
 from loguru import logger
 from telethon import utils
+from telethon.errors import FloodWaitError
 from telethon.tl.functions import InvokeWithTakeoutRequest
 from telethon.tl.types import Message
 
+from src.core.concurrency_controller import AIMDController
+from src.core.rate_limiter import MEDIA, get_rate_limiter
+
 # B-6: Hash-based deduplication
 from src.media.hash_dedup import HashBasedDeduplicator
+from src.media.blob_store import MATERIALIZE_MODES, BlobStore, materialize_file
+from src.media.media_identity import MediaIdentityIndex, media_identity_key
+from src.media.download_journal import DownloadJournal
+from src.media.parallel_download import ParallelPartDownloader, aligned_part_size
+from src.media.streaming_hash import StreamingHasher, sha256_file_async
 
 
 class TelegramServerError(Exception):
@@ -53,6 +63,8 @@ ENABLE_PARALLEL_DOWNLOAD = (
 PARALLEL_DOWNLOAD_MIN_SIZE_MB = int(os.getenv("PARALLEL_DOWNLOAD_MIN_SIZE_MB", "5"))
 MAX_PARALLEL_CONNECTIONS = int(os.getenv("MAX_PARALLEL_CONNECTIONS", "4"))
 MAX_CONCURRENT_DOWNLOADS = int(os.getenv("MAX_CONCURRENT_DOWNLOADS", "2"))
+# Rounds of "fetch missing parts" before falling back to a sequential download
+MAX_PARALLEL_ATTEMPTS = 3
 
 # Persistent download mode - never give up on files (DEFAULT: enabled for all files)
 PERSISTENT_DOWNLOAD_MODE = (
@@ -267,6 +279,11 @@ class MediaDownloader:
         self.worker_clients = worker_clients or []
         self.cache_manager = cache_manager
         self.config = config
+
+        # Account-wide API pacing shared with history fetches
+        self.rate_limiter = get_rate_limiter(config)
+        # AIMDController (MediaProcessor), получает скачанные байты
+        self.bandwidth_controller: Optional[AIMDController] = None
         
         # In-memory cache for current session deduplication
         self._downloaded_cache: Dict[str, Path] = {}
@@ -280,6 +297,69 @@ class MediaDownloader:
         # Настройки из environment
         self._persistent_enabled = PERSISTENT_DOWNLOAD_MODE
         self._persistent_min_size_mb = PERSISTENT_MIN_SIZE_MB
+
+        # Многопоточная загрузка частей для больших документов
+        performance = getattr(config, "performance", None)
+        self._parallel_enabled = (
+            getattr(performance, "enable_parallel_download", False) is True
+        )
+        min_size_mb = getattr(
+            performance, "parallel_download_min_size_mb", PARALLEL_DOWNLOAD_MIN_SIZE_MB
+        )
+        if not isinstance(min_size_mb, (int, float)):
+            min_size_mb = PARALLEL_DOWNLOAD_MIN_SIZE_MB
+        self._parallel_min_size = int(min_size_mb * 1024 * 1024)
+        max_connections = getattr(
+            performance, "max_parallel_connections", MAX_PARALLEL_CONNECTIONS
+        )
+        if not isinstance(max_connections, int):
+            max_connections = MAX_PARALLEL_CONNECTIONS
+        self._parallel_max_connections = max(1, max_connections)
+        self._parallel_download_attempts = 0
+        self._parallel_download_successes = 0
+
+        # Журнал докачки: завершённые части документов в sidecar-файле рядом
+        # с частичным файлом (вне temp_dir, который чистится при shutdown)
+        self._journal_enabled = (
+            getattr(performance, "download_resume_journal", True) is not False
+        )
+        self._journal_checksums = (
+            getattr(performance, "download_journal_checksums", True) is not False
+        )
+        cache_file = getattr(config, "cache_file", None)
+        resume_base = (
+            Path(cache_file).parent if isinstance(cache_file, (str, Path)) else temp_dir
+        )
+        self._resume_dir = resume_base / "partial_downloads"
+        self._journal_resumed_parts = 0
+        self._journal_dropped_parts = 0
+
+        # Content-addressed store: загруженные файлы хранятся один раз на SHA-256,
+        # выходные пути материализуются через place_media()
+        self._blob_store: Optional[BlobStore] = None
+        if getattr(performance, "media_store_enabled", False) is True:
+            link_mode = getattr(performance, "media_store_link_mode", "auto")
+            if link_mode not in MATERIALIZE_MODES:
+                link_mode = "auto"
+            self._blob_store = BlobStore(resume_base / "media_store", mode=link_mode)
+            logger.info(f"🗄️ Content-addressed media store ENABLED ({link_mode})")
+        grace_hours = getattr(performance, "media_store_gc_grace_hours", 168.0)
+        if not isinstance(grace_hours, (int, float)):
+            grace_hours = 168.0
+        self._blob_gc_grace_s = float(grace_hours) * 3600
+
+        # SHA-256 считается по частям во время записи (path -> hasher)
+        self._stream_hashers: Dict[str, StreamingHasher] = {}
+        self._streamed_hash_bytes = 0
+        self._fallback_hash_bytes = 0
+
+        # Идентичность медиа (id + size + dc, без access_hash) -> локальный файл:
+        # пересланное из другого чата медиа не скачивается повторно
+        self._identity_index: Optional[MediaIdentityIndex] = None
+        if getattr(performance, "media_identity_index", True) is not False:
+            self._identity_index = MediaIdentityIndex(resume_base / "media_identity.log")
+        # Копии найденных по идентичности файлов: могут быть уже обработаны (меньше)
+        self._identity_copies: Set[str] = set()
         
         # B-6: Hash-based deduplication
         if config and hasattr(config, 'performance') and config.performance.hash_based_deduplication:
@@ -425,22 +505,52 @@ class MediaDownloader:
             logger.warning(f"Message {message.id} has zero file size")
             return None
 
+        # Та же медиа (id + size + dc) уже на диске, например из другого чата
+        identity_key = media_identity_key(message)
+        if self._identity_index:
+            reused_path = await self._reuse_identity_hit(message, identity_key)
+            if reused_path is not None:
+                if file_key:
+                    self._downloaded_cache[file_key] = reused_path
+                return reused_path
+
         file_size_mb = expected_size / (1024 * 1024)
         logger.info(
             f"Downloading message {message.id}: {file_size_mb:.2f} MB"
         )
 
         result_path = None
-        # Используем persistent download для всех файлов (guaranteed completion)
-        if self._persistent_enabled:
-            result_path = await self._persistent_download(
-                message, expected_size, progress_queue, task_id
-            )
-        else:
-            result_path = await self._standard_download(
+        # Большие документы - параллельно по частям через несколько соединений
+        if self._should_download_parallel(message, expected_size):
+            result_path = await self._parallel_download(
                 message, expected_size, progress_queue, task_id
             )
+
+        if result_path is None:
+            # Используем persistent download для всех файлов (guaranteed completion)
+            if self._persistent_enabled:
+                result_path = await self._persistent_download(
+                    message, expected_size, progress_queue, task_id
+                )
+            else:
+                result_path = await self._standard_download(
+                    message, expected_size, progress_queue, task_id
+                )
             
+        content_hash: Optional[str] = None
+        if result_path and result_path.exists() and (self._blob_store or self._hash_dedup):
+            content_hash = await self._content_hash(result_path, expected_size)
+        elif result_path is not None:
+            self._stream_hashers.pop(str(result_path), None)
+
+        # Один экземпляр на содержимое: файл переезжает в content-addressed store
+        if self._blob_store and result_path and result_path.exists():
+            try:
+                digest = await self._blob_store.ingest(result_path, content_hash)
+                result_path = self._blob_store.blob_path(digest)
+            except OSError as e:
+                logger.warning(f"Media store ingest failed for msg {message.id}: {e}")
+
         # === Update ALL Caches on Success ===
         if result_path and result_path.exists():
             # Update ID cache (existing)
@@ -449,13 +559,349 @@ class MediaDownloader:
                 if self.cache_manager and hasattr(self.cache_manager, "store_file_path"):
                     await self.cache_manager.store_file_path(file_key, str(result_path))
             
+            if self._identity_index:
+                self._identity_index.record(identity_key, result_path)
+
             # Update hash cache (B-6 new)
+            file_hash = file_hash or content_hash
             if self._hash_dedup and file_hash:
                 self._hash_dedup.add_to_cache(file_hash, result_path)
                 logger.debug(f"Updated hash cache: {file_hash[:16]}... -> {result_path.name}")
                 
         return result_path
 
+    def _part_hook(
+        self, path: Path, journal: Optional[DownloadJournal]
+    ) -> Optional[Any]:
+        """on_part hook for ParallelPartDownloader: resume journal + streaming hash."""
+        hasher = None
+        if self._blob_store or self._hash_dedup:
+            hasher = self._stream_hashers.get(str(path))
+            if hasher is None:
+                hasher = self._stream_hashers[str(path)] = StreamingHasher(path)
+        if hasher is None:
+            return journal.record if journal is not None else None
+
+        def on_part(index: int, offset: int, data: bytes) -> None:
+            if journal is not None:
+                journal.record(index, offset, data)
+            hasher.update_at(offset, data)
+
+        return on_part
+
+    async def _content_hash(self, path: Path, file_size: int) -> Optional[str]:
+        """SHA-256 of a downloaded file: streamed during download or hashed off-loop."""
+        hasher = self._stream_hashers.pop(str(path), None)
+        try:
+            if hasher is not None:
+                self._streamed_hash_bytes += hasher.streamed_bytes
+                self._fallback_hash_bytes += file_size - hasher.streamed_bytes
+                return await hasher.hexdigest(file_size)
+            self._fallback_hash_bytes += file_size
+            return await sha256_file_async(path)
+        except OSError as e:
+            logger.warning(f"Failed to hash {path.name}: {e}")
+            return None
+
+    async def _reuse_identity_hit(
+        self, message: Message, identity_key: Optional[str]
+    ) -> Optional[Path]:
+        """Local copy of an already downloaded identical media, without network I/O."""
+        if self._identity_index is None:
+            return None
+        known_path = self._identity_index.lookup(identity_key)
+        if known_path is None:
+            return None
+
+        if self.is_blob(known_path):
+            logger.info(f"♻️ Media identity hit: msg {message.id} -> store blob")
+            return known_path
+
+        # known_path is another export's output: callers move download results,
+        # so hand out an independent copy (reflink where supported)
+        reuse_path = self.temp_dir / f"reuse_{message.id}_{known_path.name}"
+        try:
+            await asyncio.to_thread(materialize_file, known_path, reuse_path, "reflink")
+        except OSError as e:
+            logger.warning(f"Media identity hit for msg {message.id} not reusable: {e}")
+            return None
+        logger.info(f"♻️ Media identity hit: msg {message.id} -> {known_path.name}")
+        self._identity_copies.add(str(reuse_path))
+        return reuse_path
+
+    def _record_transfer(self, callback: Any, downloaded: int) -> None:
+        """
+        Передать прирост скачанных байт в bandwidth controller.
+
+        Отправная точка - callback.last_transferred: смещение докачки, которое
+        задаёт загрузчик (0 для новой загрузки), чтобы уже скачанное не
+        выглядело как всплеск скорости, а первый отчёт не терялся.
+        """
+        if self.bandwidth_controller is None:
+            return
+        last = getattr(callback, "last_transferred", 0)
+        callback.last_transferred = downloaded
+        self.bandwidth_controller.record_bytes(downloaded - last)
+
+    def track_output(self, source: Path, output_path: Path) -> None:
+        """A download result now lives at output_path (moved or processed from source)."""
+        self._identity_copies.discard(str(source))
+        # A store blob keeps the raw bytes: identities stay on it
+        if self._identity_index and not self.is_blob(source):
+            self._identity_index.relocate(source, output_path)
+
+    def is_identity_copy(self, path: Optional[Path]) -> bool:
+        """
+        True if path is a copy of an earlier export's output (identity hit).
+
+        That output may have been processed, so its size can differ from the
+        Telegram size; lookup() already checked it against the recorded size.
+        """
+        return path is not None and str(path) in self._identity_copies
+
+    def is_blob(self, path: Optional[Path]) -> bool:
+        """True if path is a blob of the content-addressed store (must not be moved)."""
+        return bool(self._blob_store and path and self._blob_store.digest_of(path))
+
+    async def place_media(self, source: Path, output_path: Path) -> Path:
+        """
+        Put a download_media() result at output_path.
+
+        Store blobs are materialized (reflink / hardlink / copy) and stay in
+        the store; plain temp files are moved as before.
+        """
+        if self._blob_store is not None:
+            digest = self._blob_store.digest_of(source)
+            if digest:
+                await self._blob_store.materialize(digest, output_path)
+                return output_path
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(source), str(output_path))
+        self.track_output(source, output_path)
+        return output_path
+
+    def close(self) -> None:
+        """
+        Persist dedup indexes and store references, GC the media store.
+
+        Blocking (file I/O over the whole store): async callers run it in a
+        thread.
+        """
+        if self._identity_index:
+            self._identity_index.flush()
+        if self._hash_dedup:
+            self._hash_dedup.flush()
+        if not self._blob_store:
+            return
+        try:
+            result = self._blob_store.gc(self._blob_gc_grace_s)
+            if result["deleted_blobs"] or result["dead_refs"]:
+                logger.info(
+                    f"🗄️ Media store GC: {result['deleted_blobs']} blobs deleted "
+                    f"({result['freed_bytes'] / 1024 / 1024:.1f} MB), "
+                    f"{result['dead_refs']} dead references"
+                )
+        except OSError as e:
+            logger.warning(f"Media store GC failed: {e}")
+            self._blob_store.flush()
+
+    def _should_download_parallel(self, message: Message, expected_size: int) -> bool:
+        """Parallel part download: enabled, large enough, and a document."""
+        if not self._parallel_enabled or expected_size < self._parallel_min_size:
+            return False
+        return getattr(message.media, "document", None) is not None
+
+    async def _parallel_download(
+        self,
+        message: Message,
+        expected_size: int,
+        progress_queue: Optional[Any] = None,
+        task_id: Optional[str] = None,
+    ) -> Optional[Path]:
+        """
+        Загрузка документа частями через несколько соединений.
+
+        Части распределяются по worker_clients (сначала воркеры в DC файла)
+        и пишутся через pwrite в заранее выделенный файл. После сбоя
+        повторная попытка догружает только недостающие части.
+
+        Returns:
+            Path к файлу или None (вызывающий переходит на последовательную загрузку)
+        """
+        self._parallel_download_attempts += 1
+        journal = self._open_journal(message, expected_size)
+        temp_path = (
+            journal.data_path
+            if journal is not None
+            else self.temp_dir / f"parallel_{message.id}.tmp"
+        )
+
+        try:
+            dc_id, _ = utils.get_input_location(message.media)
+        except Exception:
+            dc_id = None
+
+        # iter_download runs on the raw client: takeout wrappers only patch __call__
+        clients = [
+            c._client if isinstance(c, TakeoutClientWrapper) else c
+            for c in (self.worker_clients or [self.client])
+            if c is not None
+        ]
+        if not clients:
+            return None
+
+        connections = get_best_threads(expected_size, self._parallel_max_connections)
+        downloader = ParallelPartDownloader(
+            clients,
+            connections=connections,
+            part_size_kb=(
+                journal.part_size // 1024
+                if journal is not None
+                else self._get_part_size(expected_size)
+            ),
+            rate_limiter=self.rate_limiter,
+        )
+
+        async def progress_callback(downloaded: int, total: int) -> None:
+            self._record_transfer(progress_callback, downloaded)
+            if progress_queue and task_id:
+                advance = downloaded - getattr(
+                    progress_callback,
+                    "last_reported",
+                    0,  # type: ignore[attr-defined]
+                )
+                if advance > 0:
+                    await progress_queue.put(
+                        {
+                            "type": "update",
+                            "task_id": task_id,
+                            "data": {"advance": advance},
+                        }
+                    )
+                    progress_callback.last_reported = downloaded  # type: ignore[attr-defined]
+
+        # Отчёты продолжаются с уже скачанных частей журнала
+        progress_callback.last_transferred = (  # type: ignore[attr-defined]
+            journal.bytes_done if journal is not None else 0
+        )
+        done_parts: Set[int] = journal.done_parts if journal is not None else set()
+        start_time = time.time()
+        logger.info(
+            f"⚡ Parallel download for message {message.id}: "
+            f"{expected_size / 1024 / 1024:.1f}MB over {connections} connections "
+            f"({len(clients)} clients, DC {dc_id or '?'})"
+        )
+
+        for attempt in range(1, MAX_PARALLEL_ATTEMPTS + 1):
+            try:
+                async with self.connection_manager.download_semaphore:
+                    await downloader.download(
+                        message.media,
+                        temp_path,
+                        expected_size,
+                        done_parts,
+                        dc_id=dc_id or 0,
+                        progress_callback=progress_callback,
+                        on_part=self._part_hook(temp_path, journal),
+                    )
+                if journal is not None:
+                    journal.finish()
+                elapsed = time.time() - start_time
+                logger.info(
+                    f"✅ Parallel download completed for message {message.id}: "
+                    f"{expected_size / 1024 / 1024:.1f}MB in {elapsed:.1f}s "
+                    f"({expected_size / max(elapsed, 1e-6) / 1024:.1f} KB/s)"
+                )
+                self._parallel_download_successes += 1
+                return temp_path
+            except Exception as e:
+                logger.warning(
+                    f"Parallel download attempt {attempt} for message {message.id} failed: "
+                    f"{type(e).__name__}: {e} ({len(done_parts)} parts done, resuming the rest)"
+                )
+
+        logger.warning(
+            f"Parallel download gave up for message {message.id}, "
+            f"falling back to sequential download"
+        )
+        # The persistent download rehashes what it finds in the journal
+        self._stream_hashers.pop(str(temp_path), None)
+        if journal is None:
+            temp_path.unlink(missing_ok=True)
+        # With a journal the persistent download continues from the same parts
+        return None
+
+    def _open_journal(
+        self, message: Message, expected_size: int
+    ) -> Optional[DownloadJournal]:
+        """Resume journal for a document download (None when not applicable)."""
+        if not self._journal_enabled:
+            return None
+        if getattr(message.media, "document", None) is None:
+            return None
+        file_key = self._get_file_key(message)
+        if not file_key:
+            return None
+
+        part_size = aligned_part_size(self._get_part_size(expected_size))
+        try:
+            journal = DownloadJournal.open(
+                self._resume_dir / f"{file_key}.part",
+                key=file_key,
+                file_size=expected_size,
+                part_size=part_size,
+                checksums=self._journal_checksums,
+            )
+        except OSError as e:
+            logger.warning(f"Download journal unavailable for message {message.id}: {e}")
+            return None
+
+        # Parts may have been dropped (CRC mismatch) below what a leftover
+        # streamed hash already consumed: hash the reopened file from scratch
+        self._stream_hashers.pop(str(journal.data_path), None)
+        self._journal_dropped_parts += journal.dropped_parts
+        if journal.resumed_parts:
+            self._journal_resumed_parts += journal.resumed_parts
+            logger.info(
+                f"♻️ Resuming message {message.id} from journal: "
+                f"{journal.resumed_parts}/{len(journal.parts)} parts "
+                f"({journal.bytes_done / 1024 / 1024:.1f}/{expected_size / 1024 / 1024:.1f} MB)"
+            )
+        return journal
+
+    async def _journaled_download(
+        self,
+        download_client: Any,
+        message: Message,
+        journal: DownloadJournal,
+        progress_callback: Any,
+    ) -> None:
+        """Fetch the parts missing from the journal over one connection."""
+        # iter_download runs on the raw client: takeout wrappers only patch __call__
+        if isinstance(download_client, TakeoutClientWrapper):
+            download_client = download_client._client
+        try:
+            dc_id, _ = utils.get_input_location(message.media)
+        except Exception:
+            dc_id = None
+
+        downloader = ParallelPartDownloader(
+            [download_client],
+            connections=1,
+            part_size_kb=journal.part_size // 1024,
+            rate_limiter=self.rate_limiter,
+        )
+        await downloader.download(
+            message.media,
+            journal.data_path,
+            journal.file_size,
+            journal.done_parts,
+            dc_id=dc_id or 0,
+            progress_callback=progress_callback,
+            on_part=self._part_hook(journal.data_path, journal),
+        )
+
     async def _persistent_download(
         self,
         message: Message,
@@ -483,7 +929,32 @@ class MediaDownloader:
         """
         self._persistent_download_attempts += 1
 
-        temp_path = self.temp_dir / f"persistent_{message.id}.tmp"
+        # Documents go part by part through the resume journal: restarts,
+        # crashes and server fast-fails continue at the missing parts
+        journal = self._open_journal(message, expected_size)
+        temp_path = (
+            journal.data_path
+            if journal is not None
+            else self.temp_dir / f"persistent_{message.id}.tmp"
+        )
+        result = await self._persistent_attempts(
+            message, expected_size, journal, temp_path, progress_queue, task_id
+        )
+        if result is None:
+            # A retry must not continue the streamed hash of this attempt
+            self._stream_hashers.pop(str(temp_path), None)
+        return result
+
+    async def _persistent_attempts(
+        self,
+        message: Message,
+        expected_size: int,
+        journal: Optional[DownloadJournal],
+        temp_path: Path,
+        progress_queue: Optional[Any],
+        task_id: Optional[str],
+    ) -> Optional[Path]:
+        """Attempt loop of _persistent_download (None after critical failures)."""
         # Reduced from 50 to 10 - download_queue already handles retries at task level
         # with its own retry logic. No need for double retry loops.
         MAX_PERSISTENT_ATTEMPTS = 10
@@ -520,7 +991,17 @@ class MediaDownloader:
 
             # Проверяем текущий размер файла
             current_size = 0
-            if temp_path.exists():
+            if journal is not None:
+                current_size = journal.bytes_done
+                if journal.is_complete:
+                    journal.finish()
+                    logger.info(
+                        f"✅ Persistent download completed for message {message.id}: "
+                        f"{current_size / 1024 / 1024:.2f} MB"
+                    )
+                    self._persistent_download_successes += 1
+                    return temp_path
+            elif temp_path.exists():
                 current_size = temp_path.stat().st_size
 
                 # Проверяем, завершена ли загрузка
@@ -557,6 +1038,7 @@ class MediaDownloader:
 
             # Progress callback для Rich progress bar
             async def progress_callback(downloaded: int, total: int) -> None:
+                self._record_transfer(progress_callback, downloaded)
                 if progress_queue and task_id:
                     advance = downloaded - getattr(
                         progress_callback,
@@ -573,35 +1055,64 @@ class MediaDownloader:
                         )
                         progress_callback.last_reported = downloaded  # type: ignore[attr-defined]
 
+            # Журнал докачивает с current_size, download_file пишет файл заново
+            progress_callback.last_transferred = (  # type: ignore[attr-defined]
+                current_size if journal is not None else 0
+            )
+
             try:
                 # Используем семафор connection manager для контроля конкурентности
                 async with self.connection_manager.download_semaphore:
-                    # Try to use download_file for better control (part_size_kb)
-                    try:
-                        location = utils.get_input_location(message.media)
+                    if journal is not None:
                         await asyncio.wait_for(
-                            download_client.download_file(
-                                location,
-                                file=temp_path,
-                                progress_callback=progress_callback,
-                                part_size_kb=self._get_part_size(expected_size),
-                            ),
-                            timeout=chunk_timeout,
-                        )
-                    except Exception:
-                        # Fallback to download_media if download_file fails (e.g. location extraction issue)
-                        await asyncio.wait_for(
-                            download_client.download_media(
-                                message,
-                                file=temp_path,
-                                progress_callback=progress_callback,
+                            self._journaled_download(
+                                download_client, message, journal, progress_callback
                             ),
                             timeout=chunk_timeout,
                         )
+                    else:
+                        await self.rate_limiter.acquire(MEDIA)
+                        # Try to use download_file for better control (part_size_kb)
+                        try:
+                            location = utils.get_input_location(message.media)
+                            await asyncio.wait_for(
+                                download_client.download_file(
+                                    location,
+                                    file=temp_path,
+                                    progress_callback=progress_callback,
+                                    part_size_kb=self._get_part_size(expected_size),
+                                ),
+                                timeout=chunk_timeout,
+                            )
+                        except FloodWaitError:
+                            raise
+                        except Exception:
+                            # Fallback to download_media if download_file fails (e.g. location extraction issue)
+                            await asyncio.wait_for(
+                                download_client.download_media(
+                                    message,
+                                    file=temp_path,
+                                    progress_callback=progress_callback,
+                                ),
+                                timeout=chunk_timeout,
+                            )
+
+                if journal is not None and journal.is_complete:
+                    journal.finish()
+                    logger.info(
+                        f"✅ Persistent download completed for message {message.id}: "
+                        f"{file_size_mb:.2f} MB"
+                    )
+                    self._persistent_download_successes += 1
+                    return temp_path
 
                 # Проверяем прогресс после попытки
                 if temp_path.exists():
-                    new_size = temp_path.stat().st_size
+                    new_size = (
+                        journal.bytes_done
+                        if journal is not None
+                        else temp_path.stat().st_size
+                    )
                     if new_size > current_size:
                         # Прогресс есть, сбрасываем счетчик неудач
                         consecutive_failures = 0
@@ -625,6 +1136,14 @@ class MediaDownloader:
                     f"Persistent download attempt {attempt} timed out after {chunk_timeout}s"
                 )
                 consecutive_failures += 1
+            except FloodWaitError as e:
+                # Shared penalty: the next attempt (and every other media
+                # download) waits for it in rate_limiter.acquire()
+                logger.warning(
+                    f"⏳ FloodWait {e.seconds}s during persistent download of message {message.id}"
+                )
+                self.rate_limiter.report_flood_wait(MEDIA, e.seconds + 1)
+                continue
             except Exception as e:
                 error_str = str(e)
                 logger.warning(
@@ -642,6 +1161,9 @@ class MediaDownloader:
                         f"This is a final failure - not retrying. "
                         f"Downloaded: {temp_path.stat().st_size if temp_path.exists() else 0} bytes"
                     )
+                    if journal is not None:
+                        # Completed parts stay journaled for the next run
+                        return None
                     # Return partial file if exists and has data, otherwise None
                     if temp_path.exists() and temp_path.stat().st_size > 0:
                         final_size = temp_path.stat().st_size
@@ -690,7 +1212,16 @@ class MediaDownloader:
 
             # При множественных неудачах подряд - принимаем решение
             if consecutive_failures >= max_consecutive_failures:
-                if temp_path.exists():
+                if journal is not None:
+                    # Journaled parts are exact: no holes accepted, no restart
+                    # from scratch; the journal keeps them for the next run
+                    if attempt >= MAX_PERSISTENT_ATTEMPTS * 0.8:
+                        logger.error(
+                            f"❌ Giving up after {attempt} attempts, "
+                            f"{len(journal.done_parts)}/{len(journal.parts)} parts kept for resume"
+                        )
+                        return None
+                elif temp_path.exists():
                     final_size = temp_path.stat().st_size
                     completion_percent = (
                         (final_size / expected_size) * 100 if expected_size > 0 else 0
@@ -810,6 +1341,7 @@ class MediaDownloader:
                 # Progress callback с логированием каждые 30 секунд
                 async def progress_callback(downloaded: int, total: int) -> None:
                     nonlocal last_progress_time
+                    self._record_transfer(progress_callback, downloaded)
 
                     if progress_queue and task_id:
                         advance = downloaded - getattr(
@@ -850,6 +1382,7 @@ class MediaDownloader:
 
                 # Загрузка с семафором
                 async with self.connection_manager.download_semaphore:
+                    await self.rate_limiter.acquire(MEDIA)
                     try:
                         location = utils.get_input_location(message.media)
                         await asyncio.wait_for(
@@ -861,6 +1394,8 @@ class MediaDownloader:
                             ),
                             timeout=base_timeout,
                         )
+                    except FloodWaitError:
+                        raise
                     except Exception:
                         # Fallback to download_media if download_file fails (e.g. location extraction issue)
                         await asyncio.wait_for(
@@ -910,6 +1445,11 @@ class MediaDownloader:
                     delay = min(30 + attempt * 10, 120)
                     logger.info(f"Retrying in {delay}s...")
                     await asyncio.sleep(delay)
+            except FloodWaitError as e:
+                logger.warning(
+                    f"⏳ FloodWait {e.seconds}s during standard download of message {message.id}"
+                )
+                self.rate_limiter.report_flood_wait(MEDIA, e.seconds + 1)
             except Exception as e:
                 logger.warning(
                     f"Standard download attempt {attempt + 1} failed with error: "
@@ -963,6 +1503,18 @@ class MediaDownloader:
         hash_dedup_stats = self.get_hash_dedup_stats() if self._hash_dedup else {}
 
         return {
+            "parallel_downloads": {
+                "enabled": self._parallel_enabled,
+                "attempts": self._parallel_download_attempts,
+                "successes": self._parallel_download_successes,
+                "min_size_mb": self._parallel_min_size / (1024 * 1024),
+                "max_connections": self._parallel_max_connections,
+            },
+            "resume_journal": {
+                "enabled": self._journal_enabled,
+                "resumed_parts": self._journal_resumed_parts,
+                "dropped_parts": self._journal_dropped_parts,
+            },
             "persistent_downloads": {
                 "enabled": self._persistent_enabled,
                 "attempts": self._persistent_download_attempts,
@@ -976,6 +1528,15 @@ class MediaDownloader:
                 "success_rate_percent": standard_success_rate,
             },
             "hash_deduplication": hash_dedup_stats,  # B-6: Hash-based dedup stats
+            "media_store": dict(self._blob_store.stats) if self._blob_store else {},
+            "content_hashing": {
+                "streamed_bytes": self._streamed_hash_bytes,
+                "reread_bytes": self._fallback_hash_bytes,
+            },
+            "media_identity": (
+                self._identity_index.get_stats() if self._identity_index else {}
+            ),
+            "rate_limiter": self.rate_limiter.get_stats(),
         }
     
     def get_hash_dedup_stats(self) -> Dict[str, int]:
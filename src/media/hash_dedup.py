@@ -4,16 +4,23 @@ Hash-based media deduplication using local SHA256 hashing.
 Note: Telethon does NOT provide upload.GetFileHashes API as of v1.33+.
 This implementation uses local hash computation during download instead.
 Enables deduplication across different Telegram IDs and chat contexts.
+
+The cache is persisted in a CacheLogStore log (src/core/log_store.py) with
+one record per hash; changes are buffered and appended in batches. A legacy
+snapshot file (one msgpack map) is migrated into the log once.
 """
 
 import asyncio
-import hashlib
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, Optional
 
 import msgpack
 from loguru import logger
 
+from src.core.log_store import CacheLogStore, LogWriteBuffer
+from src.media.streaming_hash import sha256_file_async
+
 
 class HashBasedDeduplicator:
     """
@@ -23,11 +30,14 @@ class HashBasedDeduplicator:
     to local file paths. Enables reuse of identical files across
     different Telegram message IDs.
     
-    Cache Structure:
+    Cache Structure (in memory, least recently used first):
     {
         "hash_sha256_64chars": "/path/to/file.jpg",
         ...
     }
+
+    Entries are validated lazily: a path is only checked when its hash is
+    looked up, never for the whole cache at startup.
     """
     
     def __init__(
@@ -40,7 +50,8 @@ class HashBasedDeduplicator:
         Initialize hash-based deduplicator.
         
         Args:
-            cache_path: Path to persistent hash cache file
+            cache_path: Path to persistent hash cache file (the log is
+                written next to it with a .log suffix)
             max_cache_size: Maximum entries in cache (LRU eviction)
             enable_api_hashing: Use Telegram API for hashing (vs local)
         """
@@ -48,8 +59,23 @@ class HashBasedDeduplicator:
         self._max_cache_size = max_cache_size
         self._enable_api_hashing = enable_api_hashing
         
-        # Hash cache: hash -> file_path
-        self._hash_cache: Dict[str, Path] = {}
+        # Hash cache: hash -> file_path, LRU order
+        self._hash_cache: "OrderedDict[str, Path]" = OrderedDict()
+
+        # Hash log: the last record of a hash wins, so re-writing a hash on
+        # a hit keeps its recency across restarts
+        self._log = CacheLogStore(
+            self._cache_path.with_suffix(".log"),
+            compaction_ratio=0.75,
+            compaction_min_bytes=256 * 1024,
+        )
+        self._writes = LogWriteBuffer(
+            self._log,
+            lambda: (
+                (file_hash, self._encode(file_hash, path))
+                for file_hash, path in self._hash_cache.items()
+            ),
+        )
         
         # Statistics
         self._stats = {
@@ -64,45 +90,59 @@ class HashBasedDeduplicator:
         self._load_cache()
         
     def _load_cache(self):
-        """Load hash cache from disk (msgpack format)."""
-        if not self._cache_path.exists():
-            logger.debug("Hash cache file not found, starting fresh")
-            return
-            
+        """Load the hash cache log from disk (no per-entry file checks)."""
         try:
-            with open(self._cache_path, 'rb') as f:
-                data = msgpack.unpackb(f.read(), raw=False)
-                # Convert strings back to Path objects
-                self._hash_cache = {
-                    k: Path(v) for k, v in data.items()
-                    if Path(v).exists()  # Filter out stale entries
-                }
-            logger.info(
-                f"Loaded hash cache: {len(self._hash_cache)} entries from "
-                f"{self._cache_path}"
-            )
+            entries = self._log.load()
         except Exception as e:
             logger.warning(f"Failed to load hash cache: {e}, starting fresh")
-            self._hash_cache = {}
-            
-    def _save_cache(self):
-        """Save hash cache to disk (msgpack format)."""
+            self._log.set_aside()
+            entries = {}
+
+        for file_hash, entry in entries.items():
+            if isinstance(entry, dict) and entry.get("path"):
+                self._hash_cache[file_hash] = Path(entry["path"])
+
+        legacy = not entries and self._cache_path.exists()
+        if legacy:
+            # One-time migration from the msgpack snapshot
+            try:
+                with open(self._cache_path, 'rb') as f:
+                    snapshot = msgpack.unpackb(f.read(), raw=False)
+                for file_hash, path in snapshot.items():
+                    self._hash_cache[file_hash] = Path(path)
+            except Exception as e:
+                logger.warning(f"Failed to read legacy hash cache: {e}")
+            self._writes.rewrite_pending = True
+
+        while len(self._hash_cache) > self._max_cache_size:
+            evicted_hash, _ = self._hash_cache.popitem(last=False)
+            self._writes.put(evicted_hash, None)
+
+        logger.info(
+            f"Loaded hash cache: {len(self._hash_cache)} entries from "
+            f"{self._log.log_path}"
+        )
+        self.flush()
+        if legacy and not self._writes.rewrite_pending:
+            self._cache_path.unlink(missing_ok=True)
+
+    def _record(self, file_hash: str, file_path: Optional[Path]):
+        """Queue a change; appended once the write buffer is full."""
+        self._writes.put(
+            file_hash, self._encode(file_hash, file_path) if file_path else None
+        )
+        if self._writes.full:
+            self.flush()
+
+    def flush(self):
+        """Write buffered changes to the log (compacting it in LRU order when needed)."""
         try:
-            # Ensure directory exists
-            self._cache_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Convert Path objects to strings for msgpack
-            data = {k: str(v) for k, v in self._hash_cache.items()}
-            
-            # Atomic write: write to .tmp, then rename
-            tmp_path = self._cache_path.with_suffix('.tmp')
-            with open(tmp_path, 'wb') as f:
-                f.write(msgpack.packb(data, use_bin_type=True))
-            tmp_path.replace(self._cache_path)
-            
-            logger.debug(f"Saved hash cache: {len(self._hash_cache)} entries")
+            self._writes.flush()
         except Exception as e:
             logger.error(f"Failed to save hash cache: {e}")
+
+    def _encode(self, file_hash: str, file_path: Path) -> bytes:
+        return self._log.encode_set(file_hash, {"path": str(file_path)})
             
     async def get_file_hash(self, client, media, timeout: float = 5.0) -> Optional[str]:
         """
@@ -130,8 +170,9 @@ class HashBasedDeduplicator:
         Compute SHA256 hash of local file.
         
         Since Telethon doesn't provide GetFileHashes API, we compute
-        hash locally after download. This still provides deduplication
-        benefits for identical files across different Telegram IDs.
+        hash locally for files that were not hashed during download. This
+        still provides deduplication benefits for identical files across
+        different Telegram IDs.
         
         Args:
             file_path: Path to downloaded file
@@ -143,14 +184,10 @@ class HashBasedDeduplicator:
             return None
             
         try:
-            sha256_hash = hashlib.sha256()
-            
-            # Read file in chunks to handle large files efficiently
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(8192), b""):
-                    sha256_hash.update(chunk)
-                    
-            file_hash = sha256_hash.hexdigest()
+            # Large reads in the unified thread pool - never on the event loop.
+            # Downloads through MediaDownloader hash while writing (StreamingHasher)
+            # and do not need this at all.
+            file_hash = await sha256_file_async(file_path)
             logger.debug(f"Computed file hash: {file_hash[:16]}... for {file_path.name}")
             return file_hash
             
@@ -174,13 +211,15 @@ class HashBasedDeduplicator:
             # Verify file still exists
             if cached_path.exists() and cached_path.stat().st_size > 0:
                 self._stats["hits"] += 1
+                self._hash_cache.move_to_end(file_hash)
+                self._record(file_hash, cached_path)  # Recency survives restarts
                 logger.info(f"🔐 Hash cache HIT: {file_hash[:16]}... -> {cached_path.name}")
                 return cached_path
             else:
                 # Stale entry, remove it
                 logger.debug(f"Removing stale hash cache entry: {file_hash[:16]}")
                 del self._hash_cache[file_hash]
-                self._save_cache()
+                self._record(file_hash, None)
                 
         self._stats["misses"] += 1
         return None
@@ -190,16 +229,23 @@ class HashBasedDeduplicator:
         Add file to hash cache.
         
         Implements LRU eviction when cache size exceeds max_cache_size.
+        O(1): one buffered log record, no file rewrite.
         
         Args:
             file_hash: SHA256 hash (hex string)
             file_path: Path to downloaded file
         """
-        # Check if we need to evict (simple FIFO for now)
-        if len(self._hash_cache) >= self._max_cache_size:
-            # Remove oldest entry (first key in dict)
-            evicted_hash = next(iter(self._hash_cache))
-            evicted_path = self._hash_cache.pop(evicted_hash)
+        if self._hash_cache.get(file_hash) == file_path:
+            self._hash_cache.move_to_end(file_hash)
+            return
+
+        # Evict the least recently used entry
+        if (
+            file_hash not in self._hash_cache
+            and len(self._hash_cache) >= self._max_cache_size
+        ):
+            evicted_hash, evicted_path = self._hash_cache.popitem(last=False)
+            self._record(evicted_hash, None)
             self._stats["evictions"] += 1
             logger.debug(
                 f"Evicted hash cache entry: {evicted_hash[:16]}... "
@@ -208,10 +254,10 @@ class HashBasedDeduplicator:
             
         # Add new entry
         self._hash_cache[file_hash] = file_path
+        self._hash_cache.move_to_end(file_hash)
         logger.debug(f"Added to hash cache: {file_hash[:16]}... -> {file_path.name}")
-        
-        # Save to disk
-        self._save_cache()
+
+        self._record(file_hash, file_path)
         
     def get_stats(self) -> Dict[str, int]:
         """Get deduplication statistics."""
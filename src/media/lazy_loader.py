@@ -2,18 +2,36 @@
 
 Provides lazy loading functionality for media files, allowing metadata storage
 and on-demand downloading instead of immediate downloads during export.
+
+Export writes a placeholder per media message and stores (in a single
+LazyMetadataStore log, see lazy_store.py) what is needed to re-fetch it later
+(peer, message id, document id / access hash / file reference, DC).
+`hydrate()` (`python main.py hydrate ...`) re-fetches the messages in batches
+of 100 per chat - file references expire, so the stored one is informational -
+downloads the media through the regular MediaProcessor pipeline and replaces
+the placeholders in the exported notes.
 """
 
-import json
+import asyncio
+import os
+import re
 import time
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, fields
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Set, Union
 
 from loguru import logger
 from telethon.tl.types import Message
 
+from .lazy_store import LazyMetadataStore
 from .manager import MediaProcessor
+from .media_identity import media_identity_key
+
+# Сообщений на один get_messages при гидратации (лимит Telegram API)
+FETCH_BATCH = 100
+STORE_FILE = "metadata.log"
+
+PLACEHOLDER_RE = re.compile(r"!\[\[Lazy Load: [^\n]*? - Token: (?P<token>[^\]\s]+)\]\]")
 
 
 @dataclass(slots=True)
@@ -33,14 +51,24 @@ class LazyMediaMetadata:
     download_url: Optional[str] = None
     created_at: Optional[float] = None
     lazy_load_token: Optional[str] = None
+    # Re-fetch information
+    peer_id: Optional[int] = None  # Marked peer id (-100... for channels)
+    document_id: Optional[int] = None
+    access_hash: Optional[int] = None
+    file_reference: Optional[str] = None  # hex, expires - informational only
+    dc_id: Optional[int] = None
+    identity_key: Optional[str] = None  # media_identity_key()
+    # Where the hydrated file goes and what its note links are relative to
+    media_dir: Optional[str] = None
+    link_root: Optional[str] = None
+    hydrated_path: Optional[str] = None
 
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = time.time()
         if self.lazy_load_token is None:
-            self.lazy_load_token = (
-                f"{self.entity_id}_{self.message_id}_{int(self.created_at)}"
-            )
+            # Stable per message: re-exporting a chat reuses the same entry
+            self.lazy_load_token = f"{self.entity_id}_{self.message_id}"
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
@@ -50,7 +78,8 @@ class LazyMediaMetadata:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "LazyMediaMetadata":
         """Create from dictionary."""
-        return cls(**data)
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
 
 
 @dataclass
@@ -87,22 +116,54 @@ class LazyMediaLoader:
 
         Args:
             media_processor: The main media processor
-            metadata_dir: Directory to store metadata files
+            metadata_dir: Directory of the metadata store
             cache_manager: Optional cache manager for downloaded files
         """
         self.media_processor = media_processor
         self.metadata_dir = metadata_dir
         self.cache_manager = cache_manager
-        self.metadata_dir.mkdir(exist_ok=True)
+        self.metadata_dir.mkdir(parents=True, exist_ok=True)
 
-        # In-memory cache of metadata
-        self._metadata_cache: Dict[str, LazyMediaMetadata] = {}
-        self._placeholders_cache: Dict[str, LazyLoadPlaceholder] = {}
+        # One indexed log instead of a JSON file per media item
+        self._store = LazyMetadataStore(metadata_dir / STORE_FILE)
+        self._store.import_json_dir(metadata_dir)
 
         logger.info(f"LazyMediaLoader initialized with metadata dir: {metadata_dir}")
 
+    async def defer_media(
+        self,
+        message: Message,
+        entity_id: Union[str, int],
+        media_dir: Path,
+        link_root: Path,
+    ) -> List[str]:
+        """
+        Export-time replacement for downloading: store metadata, return placeholders.
+
+        Honours the media type and extension filters of the media processor,
+        so only media that would have been downloaded is deferred.
+
+        Returns:
+            Markdown lines (empty if the message has no downloadable media)
+        """
+        lines = []
+        media_items = await self.media_processor._extract_media_from_message(message)
+        for media_type, msg in media_items:
+            metadata = await self.store_media_metadata(
+                msg, entity_id, media_type, media_dir=media_dir, link_root=link_root
+            )
+            if metadata is not None:
+                placeholder = await self.create_placeholder(metadata)
+                lines.append(placeholder.to_markdown() + "\n")
+        return lines
+
     async def store_media_metadata(
-        self, message: Message, entity_id: Union[str, int], media_type: str
+        self,
+        message: Message,
+        entity_id: Union[str, int],
+        media_type: str,
+        media_dir: Optional[Path] = None,
+        link_root: Optional[Path] = None,
     ) -> Optional[LazyMediaMetadata]:
         """
         Store media metadata for lazy loading instead of downloading.
@@ -123,12 +184,12 @@ class LazyMediaLoader:
             metadata = await self._extract_metadata(message, entity_id, media_type)
             if not metadata:
                 return None
+            if media_dir is not None:
+                metadata.media_dir = str(media_dir)
+            if link_root is not None:
+                metadata.link_root = str(link_root)
 
-            # Store in memory cache
-            assert metadata.lazy_load_token is not None
-            self._metadata_cache[metadata.lazy_load_token] = metadata
-
-            # Save to disk
+            # Buffered; appended to the store in batches
             await self._save_metadata(metadata)
 
             logger.debug(
@@ -164,9 +225,6 @@ class LazyMediaLoader:
             description=description,
         )
 
-        # Cache placeholder
-        self._placeholders_cache[metadata.lazy_load_token] = placeholder
-
         return placeholder
 
     async def download_lazy_media(
@@ -196,19 +254,14 @@ class LazyMediaLoader:
                 if cached_path:
                     return cached_path
 
-            # Create output path
-            output_path = output_dir / metadata.file_name
-            output_path.parent.mkdir(exist_ok=True)
-
-            # For now, we'll need to reconstruct the message or use stored info
-            # This is a simplified implementation - in practice, we'd need more context
-            logger.warning(f"Lazy download not fully implemented for token: {token}")
-            logger.info(
-                f"Would download {metadata.file_name} ({metadata.file_size} bytes)"
-            )
-
-            # TODO: Implement actual download using stored telegram_file_id or message reconstruction
-            # This would require storing more information or having access to the original message
+            metadata.media_dir = str(output_dir)
+            paths = await self._hydrate_batch(metadata.peer_id or metadata.entity_id, [metadata])
+            await self.media_processor.wait_for_downloads(show_progress=False)
+            existing = [p for p in paths.get(token, []) if p.exists()]
+            if existing:
+                await self._mark_hydrated(metadata, existing[0])
+                self._store.flush()
+                return existing[0]
 
             return None
 
@@ -226,17 +279,7 @@ class LazyMediaLoader:
         Returns:
             Metadata if found, None otherwise
         """
-        # Check memory cache first
-        if token in self._metadata_cache:
-            return self._metadata_cache[token]
-
-        # Try to load from disk
-        metadata = await self._load_metadata(token)
-        if metadata:
-            self._metadata_cache[token] = metadata
-            return metadata
-
-        return None
+        return await self._load_metadata(token)
 
     async def get_placeholder(self, token: str) -> Optional[LazyLoadPlaceholder]:
         """
@@ -248,10 +291,6 @@ class LazyMediaLoader:
         Returns:
             Placeholder if found, None otherwise
         """
-        if token in self._placeholders_cache:
-            return self._placeholders_cache[token]
-
-        # Get metadata and create placeholder
         metadata = await self.get_metadata(token)
         if metadata:
             placeholder = await self.create_placeholder(metadata)
@@ -263,6 +302,9 @@ class LazyMediaLoader:
         self,
         entity_id: Optional[Union[str, int]] = None,
         media_type: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        include_hydrated: bool = False,
     ) -> List[LazyMediaMetadata]:
         """
         List all pending lazy downloads, optionally filtered.
@@ -270,64 +312,214 @@ class LazyMediaLoader:
         Args:
             entity_id: Filter by entity ID
             media_type: Filter by media type
+            min_size: Only files of at least this many bytes
+            max_size: Only files of at most this many bytes
+            include_hydrated: Also return entries that were already downloaded
 
         Returns:
             List of metadata for pending downloads
         """
-        all_metadata = []
+        records = self._store.query(
+            entity_id=entity_id,
+            media_type=media_type,
+            min_size=min_size,
+            max_size=max_size,
+            include_hydrated=include_hydrated,
+        )
+        return [LazyMediaMetadata.from_dict(record) for record in records]
 
-        # Load all metadata files
-        for metadata_file in self.metadata_dir.glob("*.json"):
-            try:
-                import aiofiles
+    async def hydrate(
+        self,
+        entity_id: Optional[Union[str, int]] = None,
+        media_type: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        workers: int = 4,
+    ) -> Dict[str, int]:
+        """
+        Download pending lazy media (all or a filtered subset) in parallel.
 
-                async with aiofiles.open(metadata_file, "r", encoding="utf-8") as f:
-                    data = json.loads(await f.read())
-                    metadata = LazyMediaMetadata.from_dict(data)
-                    all_metadata.append(metadata)
-            except Exception as e:
-                logger.warning(f"Failed to load metadata from {metadata_file}: {e}")
+        Messages are re-fetched per chat in batches of FETCH_BATCH ids to get
+        fresh file references; downloads run through MediaProcessor (background
+        download queue when enabled). Placeholders of downloaded media are then
+        replaced with links in the exported notes.
 
-        # Apply filters
-        filtered = all_metadata
-        if entity_id is not None:
-            filtered = [m for m in filtered if m.entity_id == entity_id]
-        if media_type is not None:
-            filtered = [m for m in filtered if m.media_type == media_type]
+        Args:
+            workers: Concurrent downloads when MediaProcessor downloads inline.
+                With the background queue download_and_process_media returns
+                at once and concurrency is the queue's (async_download_workers),
+                so size the queue instead (main.py hydrate does).
 
-        return filtered
+        Returns:
+            Counters: pending, hydrated, missing (message/media gone or
+            replaced), failed
+        """
+        pending = await self.list_pending_downloads(
+            entity_id, media_type, min_size=min_size, max_size=max_size
+        )
+        stats = {"pending": len(pending), "hydrated": 0, "missing": 0, "failed": 0}
+        if not pending:
+            return stats
+
+        total_mb = sum(m.file_size for m in pending) / (1024 * 1024)
+        logger.info(f"💧 Hydrating {len(pending)} lazy media files ({total_mb:.1f} MB)")
+
+        by_peer: Dict[Any, List[LazyMediaMetadata]] = {}
+        for metadata in sorted(pending, key=lambda m: m.message_id):
+            by_peer.setdefault(metadata.peer_id or metadata.entity_id, []).append(metadata)
+
+        semaphore = asyncio.Semaphore(max(1, workers))
+        paths: Dict[str, List[Path]] = {}
+        for peer, items in by_peer.items():
+            for start in range(0, len(items), FETCH_BATCH):
+                batch = items[start : start + FETCH_BATCH]
+                paths.update(await self._hydrate_batch(peer, batch, semaphore))
+
+        # Background queue: files appear once the workers are done
+        await self.media_processor.wait_for_downloads(show_progress=False)
+
+        hydrated: Dict[str, List[Path]] = {}
+        for metadata in pending:
+            token = metadata.lazy_load_token
+            if token not in paths:
+                stats["missing"] += 1
+                continue
+            existing = [p for p in paths[token] if p.exists()]
+            if not existing:
+                stats["failed"] += 1
+                continue
+            await self._mark_hydrated(metadata, existing[0])
+            hydrated[token] = existing
+            stats["hydrated"] += 1
+
+        self._store.flush()
+
+        replaced = await asyncio.to_thread(self._rewrite_placeholders, pending, hydrated)
+        logger.info(
+            f"💧 Hydrated {stats['hydrated']}/{stats['pending']} media "
+            f"({stats['missing']} missing, {stats['failed']} failed), "
+            f"{replaced} placeholders replaced"
+        )
+        return stats
+
+    async def _hydrate_batch(
+        self,
+        peer: Any,
+        batch: List[LazyMediaMetadata],
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> Dict[str, List[Path]]:
+        """Re-fetch one batch of messages of a chat and download their media."""
+        client = self.media_processor.client
+        try:
+            messages = await client.get_messages(peer, ids=[m.message_id for m in batch])
+        except Exception as e:
+            logger.warning(f"Failed to re-fetch {len(batch)} messages from {peer}: {e}")
+            return {}
+        if not isinstance(messages, list):
+            messages = [messages]
+
+        semaphore = semaphore or asyncio.Semaphore(1)
+        results: Dict[str, List[Path]] = {}
+
+        async def _download(metadata: LazyMediaMetadata, message: Message) -> None:
+            token = metadata.lazy_load_token
+            assert token is not None  # Set by LazyMediaMetadata.__post_init__
+            media_dir = (
+                Path(metadata.media_dir)
+                if metadata.media_dir
+                else self.metadata_dir.parent / "media"
+            )
+            async with semaphore:
+                results[token] = (
+                    await self.media_processor.download_and_process_media(
+                        message=message,
+                        entity_id=metadata.entity_id,
+                        entity_media_path=media_dir,
+                    )
+                )
+
+        downloads = []
+        for metadata, message in zip(batch, messages):
+            if message is None or not getattr(message, "media", None):
+                logger.debug(f"Lazy media {metadata.lazy_load_token}: message is gone")
+                continue
+            if metadata.document_id is not None and _document_id(message) != metadata.document_id:
+                # Edited message: the placeholder describes a file that no longer exists
+                logger.debug(f"Lazy media {metadata.lazy_load_token}: media was replaced, skipping")
+                continue
+            downloads.append(_download(metadata, message))
+        await asyncio.gather(*downloads)
+        return results
+
+    async def _mark_hydrated(self, metadata: LazyMediaMetadata, path: Path) -> None:
+        metadata.hydrated_path = str(path)
+        await self._save_metadata(metadata)
+
+    def _rewrite_placeholders(
+        self, entries: List[LazyMediaMetadata], hydrated: Dict[str, List[Path]]
+    ) -> int:
+        """Replace placeholders of hydrated media with links in exported notes."""
+        roots: Set[str] = {
+            m.link_root for m in entries if m.link_root and m.lazy_load_token in hydrated
+        }
+        replaced = 0
+
+        for root in roots:
+            root_path = Path(root)
+
+            def _link(match: "re.Match[str]") -> str:
+                nonlocal replaced
+                files = hydrated.get(match.group("token"))
+                if not files:
+                    return match.group(0)
+                replaced += 1
+                links = []
+                for path in files:
+                    try:
+                        links.append(f"![[{path.relative_to(root_path)}]]")
+                    except ValueError:
+                        links.append(f"![[{path.name}]]")
+                return "\n".join(links)
+
+            for note in root_path.rglob("*.md"):
+                try:
+                    text = note.read_text(encoding="utf-8")
+                    if "Token: " not in text:
+                        continue
+                    updated = PLACEHOLDER_RE.sub(_link, text)
+                    if updated != text:
+                        tmp_path = note.with_suffix(".md.tmp")
+                        tmp_path.write_text(updated, encoding="utf-8")
+                        os.replace(tmp_path, note)
+                except Exception as e:
+                    logger.warning(f"Failed to replace lazy placeholders in {note}: {e}")
+
+        return replaced
 
     async def cleanup_old_metadata(self, days_old: int = 30) -> int:
         """
-        Clean up old metadata files.
+        Clean up old metadata entries.
 
         Args:
             days_old: Remove metadata older than this many days
 
         Returns:
-            Number of files removed
+            Number of entries removed
         """
         cutoff_time = time.time() - (days_old * 24 * 60 * 60)
-        removed_count = 0
+        tokens = self._store.match(include_hydrated=True, created_before=cutoff_time)
+        removed_count = self._store.delete(tokens)
+        self._store.flush()
 
-        for metadata_file in self.metadata_dir.glob("*.json"):
-            try:
-                # Check file modification time
-                stat = metadata_file.stat()
-                if stat.st_mtime < cutoff_time:
-                    metadata_file.unlink()
-                    removed_count += 1
+        logger.info(f"Cleaned up {removed_count} old metadata entries")
+        return removed_count
 
-                    # Remove from cache if loaded
-                    token = metadata_file.stem
-                    self._metadata_cache.pop(token, None)
-                    self._placeholders_cache.pop(token, None)
+    def flush(self) -> None:
+        """Persist buffered metadata (export checkpoints, end of hydration)."""
+        self._store.flush()
 
-            except Exception as e:
-                logger.warning(f"Failed to cleanup {metadata_file}: {e}")
-
-        logger.info(f"Cleaned up {removed_count} old metadata files")
-        return removed_count
+    def get_stats(self) -> Dict[str, Any]:
+        return self._store.get_stats()
 
     async def _extract_metadata(
         self, message: Message, entity_id: Union[str, int], media_type: str
@@ -338,16 +530,27 @@ class LazyMediaLoader:
                 return None
 
             file = message.file
+            media = message.media
+            document = getattr(media, "document", None) or getattr(media, "photo", None)
+            file_reference = getattr(document, "file_reference", None)
 
             # Basic metadata
             metadata = LazyMediaMetadata(
                 message_id=message.id,
                 entity_id=entity_id,
                 media_type=media_type,
-                file_name=getattr(file, "name", f"msg_{message.id}"),
-                file_size=getattr(file, "size", 0),
+                file_name=getattr(file, "name", None) or f"msg_{message.id}",
+                file_size=getattr(file, "size", None) or 0,
                 mime_type=getattr(file, "mime_type", None),
                 telegram_file_id=getattr(file, "id", None),
+                peer_id=_peer_id(message),
+                document_id=getattr(document, "id", None),
+                access_hash=getattr(document, "access_hash", None),
+                file_reference=(
+                    file_reference.hex() if isinstance(file_reference, bytes) else None
+                ),
+                dc_id=getattr(document, "dc_id", None),
+                identity_key=media_identity_key(message),
             )
 
             # Extract additional attributes based on media type
@@ -385,34 +588,19 @@ class LazyMediaLoader:
         return " ".join(desc_parts)
 
     async def _save_metadata(self, metadata: LazyMediaMetadata):
-        """Save metadata to disk."""
+        """Save metadata to the store (buffered)."""
         try:
-            import aiofiles
-
-            metadata_file = self.metadata_dir / f"{metadata.lazy_load_token}.json"
-            data = metadata.to_dict()
-
-            async with aiofiles.open(metadata_file, "w", encoding="utf-8") as f:
-                await f.write(json.dumps(data, indent=2, ensure_ascii=False))
-
+            self._store.put(metadata.to_dict())
         except Exception as e:
             logger.error(
                 f"Failed to save metadata for token {metadata.lazy_load_token}: {e}"
             )
 
     async def _load_metadata(self, token: str) -> Optional[LazyMediaMetadata]:
-        """Load metadata from disk."""
+        """Load metadata from the store."""
         try:
-            import aiofiles
-
-            metadata_file = self.metadata_dir / f"{token}.json"
-            if not metadata_file.exists():
-                return None
-
-            async with aiofiles.open(metadata_file, "r", encoding="utf-8") as f:
-                data = json.loads(await f.read())
-                return LazyMediaMetadata.from_dict(data)
-
+            data = self._store.get(token)
+            return LazyMediaMetadata.from_dict(data) if data else None
         except Exception as e:
             logger.error(f"Failed to load metadata for token {token}: {e}")
             return None
@@ -431,3 +619,30 @@ class LazyMediaLoader:
             return output_path
 
         return None
+
+
+def lazy_metadata_dir(config: Any) -> Path:
+    """Metadata directory of lazy media (relative paths are under export_path)."""
+    directory = Path(getattr(config, "lazy_media_metadata_dir", "lazy_metadata"))
+    if directory.is_absolute():
+        return directory
+    return Path(config.export_path) / directory
+
+
+def _peer_id(message: Message) -> Optional[int]:
+    """Marked peer id of the message's chat (None if unknown)."""
+    peer = getattr(message, "peer_id", None)
+    if peer is None:
+        return None
+    try:
+        from telethon.utils import get_peer_id
+
+        return int(get_peer_id(peer))
+    except Exception:
+        return None
+
+
+def _document_id(message: Message) -> Optional[int]:
+    media = getattr(message, "media", None)
+    document = getattr(media, "document", None) or getattr(media, "photo", None)
+    return getattr(document, "id", None)
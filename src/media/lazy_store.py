@@ -0,0 +1,223 @@
+"""
+Single-file store for lazy media metadata.
+
+Replaces one JSON file per media item (half a million files for a large
+chat, plus a directory scan on every listing) with a CacheLogStore log
+(src/core/log_store.py) keyed by lazy_load_token. Only a compact index
+stays in memory:
+
+    token -> entity, media type, size, creation time and hydration state
+
+so filtering by chat, type and size range never touches the disk and the
+matching records are read by offset, one seek each. Writes from the export
+path are buffered and appended in batches.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from loguru import logger
+
+from src.core.log_store import CacheLogStore, LogWriteBuffer
+
+# The export path stores one record per media item: append them in larger batches
+FLUSH_EVERY = 256
+
+
+@dataclass(slots=True)
+class _IndexEntry:
+    entity: str
+    peer: str  # Marked peer id, also accepted as entity filter
+    media_type: str
+    file_size: int
+    created_at: float
+    hydrated: bool
+
+
+class LazyMetadataStore:
+    """Metadata log with an in-memory index (see module docstring)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._log = CacheLogStore(path, compaction_min_bytes=1024 * 1024)
+        self._index: Dict[str, _IndexEntry] = {}
+        self._by_entity: Dict[str, Set[str]] = {}
+        self._writes = LogWriteBuffer(
+            self._log, lambda: self._writes.frames(self._index), FLUSH_EVERY
+        )
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Loading / persistence
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        try:
+            records = self._log.load()
+        except Exception as e:
+            logger.warning(f"Failed to load lazy metadata store: {e}, starting fresh")
+            self._log.set_aside()
+            return
+        for token, record in records.items():
+            self._index_record(token, record)
+        logger.info(f"Loaded lazy metadata store: {len(self._index)} entries")
+        if self._log.should_compact():
+            self.compact()
+
+    def _index_record(self, token: str, record: Dict[str, Any]) -> None:
+        self._unindex(token)
+        entity = str(record.get("entity_id"))
+        peer_id = record.get("peer_id")
+        peer = str(peer_id) if peer_id is not None and str(peer_id) != entity else ""
+        self._index[token] = _IndexEntry(
+            entity=entity,
+            peer=peer,
+            media_type=record.get("media_type") or "",
+            file_size=record.get("file_size") or 0,
+            created_at=record.get("created_at") or 0.0,
+            hydrated=bool(record.get("hydrated_path")),
+        )
+        self._by_entity.setdefault(entity, set()).add(token)
+        if peer:
+            self._by_entity.setdefault(peer, set()).add(token)
+
+    def _unindex(self, token: str) -> None:
+        entry = self._index.pop(token, None)
+        if entry is None:
+            return
+        for key in (entry.entity, entry.peer):
+            tokens = self._by_entity.get(key)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._by_entity[key]
+
+    def flush(self) -> None:
+        """Write buffered records to the log (compacting it when needed)."""
+        try:
+            self._writes.flush()
+        except Exception as e:
+            logger.error(f"Failed to save lazy metadata store: {e}")
+
+    def compact(self) -> None:
+        """Rewrite the log with only the live records, buffered ones included."""
+        try:
+            self._writes.compact()
+        except Exception as e:
+            logger.error(f"Failed to compact lazy metadata store: {e}")
+
+    # ------------------------------------------------------------------
+    # Records
+    # ------------------------------------------------------------------
+
+    def put(self, record: Dict[str, Any]) -> None:
+        """Insert or replace the record of record["lazy_load_token"] (buffered)."""
+        token = record["lazy_load_token"]
+        self._index_record(token, record)
+        self._writes.put(token, self._log.encode_set(token, record))
+        if self._writes.full:
+            self.flush()
+
+    def put_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.put(record)
+
+    def delete(self, tokens: Iterable[str]) -> int:
+        removed = 0
+        for token in tokens:
+            if token in self._index:
+                self._unindex(token)
+                self._writes.put(token, None)
+                removed += 1
+        if self._writes.full:
+            self.flush()
+        return removed
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        if token not in self._index:
+            return None
+        records = self._read([token])
+        return records[0][1] if records else None
+
+    def _read(self, tokens: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Records of indexed tokens, buffered ones first, then in file order."""
+        return self._writes.read_many(tokens)
+
+    def query(
+        self,
+        entity_id: Optional[Union[str, int]] = None,
+        media_type: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        include_hydrated: bool = False,
+        created_before: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Records matching all given filters (index only, then one read each)."""
+        tokens = self.match(
+            entity_id, media_type, min_size, max_size, include_hydrated, created_before
+        )
+        return [record for _, record in self._read(tokens)]
+
+    def match(
+        self,
+        entity_id: Optional[Union[str, int]] = None,
+        media_type: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        include_hydrated: bool = False,
+        created_before: Optional[float] = None,
+    ) -> List[str]:
+        """Tokens matching the filters, without reading any record."""
+        if entity_id is not None:
+            candidates: Iterable[str] = self._by_entity.get(str(entity_id), ())
+        else:
+            candidates = self._index
+        tokens = []
+        for token in candidates:
+            entry = self._index[token]
+            if entry.hydrated and not include_hydrated:
+                continue
+            if media_type is not None and entry.media_type != media_type:
+                continue
+            if min_size is not None and entry.file_size < min_size:
+                continue
+            if max_size is not None and entry.file_size > max_size:
+                continue
+            if created_before is not None and entry.created_at >= created_before:
+                continue
+            tokens.append(token)
+        return tokens
+
+    def import_json_dir(self, directory: Path) -> int:
+        """Move legacy one-file-per-item JSON metadata into the store."""
+        imported: List[Path] = []
+        for json_file in directory.glob("*.json"):
+            try:
+                record = json.loads(json_file.read_text(encoding="utf-8"))
+            except Exception as e:
+                logger.warning(f"Failed to import lazy metadata {json_file}: {e}")
+                continue
+            if record.get("lazy_load_token"):
+                self.put(record)
+                imported.append(json_file)
+        self.flush()
+        if self._writes:
+            return 0  # Append failed: keep the JSON files
+        for json_file in imported:
+            json_file.unlink(missing_ok=True)
+        if imported:
+            logger.info(f"Imported {len(imported)} lazy metadata files into {self.path.name}")
+        return len(imported)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._index),
+            "pending": sum(1 for e in self._index.values() if not e.hydrated),
+            "entities": len({e.entity for e in self._index.values()}),
+            **self._log.stats(),
+        }
@@ -18,6 +18,8 @@ import aiofiles.os
 from loguru import logger
 from telethon.tl.types import Message
 
+from src.core.concurrency_controller import AIMDController
+from src.core.rate_limiter import MEDIA
 from src.core.thread_pool import get_thread_pool  # 🧵 TIER B - B-1: Unified thread pool
 from src.utils import sanitize_filename
 
@@ -30,9 +32,12 @@ from .models import ProcessingSettings, ProcessingTask
 from .processors.audio import AudioProcessor
 from .processors.image import ImageProcessor
 from .processors.video import VideoProcessor
+from .streaming_hash import sha256_file_async
+from .transcript_cache import TranscriptCache, transcript_key
+from .transcription_queue import TranscriptionQueue, default_transcription_workers
 
 if TYPE_CHECKING:
-    from .processors import WhisperTranscriber
+    from .processors import WhisperProcessPool, WhisperTranscriber
 from .validators import MediaValidator
 
 
@@ -112,6 +117,9 @@ class MediaProcessor:
 
         # Транскрайбер (опционально, если включена транскрипция)
         self._transcriber: Optional["WhisperTranscriber"] = None
+        self._transcription_queue: Optional[TranscriptionQueue] = None
+        self._whisper_pool: Optional["WhisperProcessPool"] = None
+        self._transcript_cache: Optional[TranscriptCache] = None
 
         # Очередь обработки
         self._processing_queue: asyncio.Queue = asyncio.Queue()
@@ -121,6 +129,7 @@ class MediaProcessor:
 
         # 🚀 Background Download Queue (async media downloads)
         self._download_queue: Optional[MediaDownloadQueue] = None
+        self._concurrency_controller: Optional[AIMDController] = None
 
         # Статистика
         self._processed_files = 0
@@ -173,10 +182,23 @@ class MediaProcessor:
             # 🚀 Инициализация Background Download Queue (если включено)
             if getattr(self.config, "async_media_download", True):
                 workers = getattr(self.config, "async_download_workers", 3)
+                lane_settings = {}
+                large_mb = getattr(self.config, "download_large_file_mb", None)
+                if isinstance(large_mb, (int, float)) and large_mb > 0:
+                    lane_settings["large_file_threshold"] = int(large_mb * 1024 * 1024)
+                large_workers = getattr(self.config, "download_large_lane_workers", None)
+                if isinstance(large_workers, int):
+                    lane_settings["large_lane_workers"] = large_workers
+                in_flight_mb = getattr(self.config, "download_max_mb_in_flight", None)
+                if isinstance(in_flight_mb, (int, float)) and in_flight_mb > 0:
+                    lane_settings["max_bytes_in_flight"] = int(in_flight_mb * 1024 * 1024)
+                self._concurrency_controller = self._create_concurrency_controller(workers)
                 self._download_queue = MediaDownloadQueue(
                     downloader=self._downloader,
                     max_workers=workers,
                     max_queue_size=1000,
+                    controller=self._concurrency_controller,
+                    **lane_settings,
                 )
                 await self._download_queue.start()
                 logger.info(
@@ -224,19 +246,53 @@ class MediaProcessor:
 
                         cache_dir = Path(transcription_config.cache_dir)
 
+                    # Кэш по содержимому (один файл на все чаты) заменяет
+                    # пофайловый кэш транскрайбера
+                    if transcription_config.cache_enabled:
+                        self._transcript_cache = TranscriptCache(
+                            (cache_dir or Path(".cache/transcriptions"))
+                            / "transcripts.log",
+                            max_bytes=int(transcription_config.cache_max_mb * 1024 * 1024),
+                        )
+
                     self._transcriber = WhisperTranscriber(
                         device=transcription_config.device,
                         compute_type=transcription_config.compute_type,
                         batch_size=transcription_config.batch_size,
                         duration_threshold=transcription_config.duration_threshold,
                         use_batched=transcription_config.use_batched,
-                        enable_cache=transcription_config.cache_enabled,
+                        enable_cache=False,
                         cache_dir=cache_dir,
                     )
 
                     # Lazy loading: model will be loaded on first transcription request
                     logger.info("Transcriber configured (model will load on first use)")
 
+                    # Отдельная стадия: экспорт только ставит голосовые в очередь
+                    workers = transcription_config.max_concurrent
+                    if (
+                        transcription_config.use_process_pool is True
+                        and self._transcriber.device == "cpu"
+                    ):
+                        self._whisper_pool = self._create_whisper_pool(
+                            transcription_config, workers, cache_dir
+                        )
+                        workers = self._whisper_pool.workers
+                    elif not isinstance(workers, int) or workers <= 0:
+                        workers = default_transcription_workers(self._transcriber.device)
+                    self._transcription_queue = TranscriptionQueue(
+                        transcribe=self.transcribe_audio,
+                        workers=workers,
+                        sorting=transcription_config.sorting,
+                        is_pending=self.is_download_pending,
+                    )
+                    if self._download_queue is not None:
+                        # Ожидающие файлы продвигаются по завершении загрузки
+                        self._download_queue.add_path_listener(
+                            self._transcription_queue.notify_downloaded
+                        )
+                    await self._transcription_queue.start()
+
                 except Exception as e:
                     logger.error(f"Failed to initialize transcriber: {e}")
                     logger.warning("Transcription will be disabled for this session")
@@ -261,6 +317,73 @@ class MediaProcessor:
             self._hw_acceleration_ready = False
             raise
 
+    def _create_concurrency_controller(self, workers: int) -> Optional[AIMDController]:
+        """AIMD-контроллер параллельности фоновых загрузок (если включён)."""
+        performance = getattr(self.config, "performance", None)
+        if getattr(performance, "adaptive_download_concurrency", False) is not True:
+            return None
+
+        max_limit = getattr(performance, "adaptive_download_max_workers", 0)
+        if not isinstance(max_limit, int) or max_limit <= 0:
+            max_limit = max(workers * 2, workers + 2)
+        interval = getattr(performance, "adaptive_download_interval_s", 10.0)
+        if not isinstance(interval, (int, float)) or interval <= 0:
+            interval = 10.0
+        throttle_kbps = getattr(performance, "throttle_threshold_kbps", 0)
+        if not isinstance(throttle_kbps, (int, float)):
+            throttle_kbps = 0
+
+        assert self._downloader is not None, "Downloader must be initialized"
+        rate_limiter = self._downloader.rate_limiter
+        controller = AIMDController(
+            initial=workers,
+            max_limit=max_limit,
+            interval_s=interval,
+            throttle_kbps=throttle_kbps,
+            flood_wait_count=lambda: int(rate_limiter.stats[MEDIA]["flood_waits"]),
+        )
+        self._downloader.bandwidth_controller = controller
+        # Семафор загрузок не должен ограничивать сильнее контроллера
+        self.connection_manager.ensure_download_capacity(controller.max_limit)
+        logger.info(
+            f"🎚️ Adaptive download concurrency: start {controller.limit}, "
+            f"max {controller.max_limit}, window {interval:.0f}s"
+        )
+        return controller
+
+    def _create_whisper_pool(
+        self, transcription_config, workers: int, cache_dir: Optional[Path]
+    ) -> "WhisperProcessPool":
+        """Процессный пул Whisper: не больше процессов, чем выдержат ядра и RAM."""
+        from .processors.whisper_pool import WhisperProcessPool, whisper_pool_size
+
+        compute_type = self._transcriber.compute_type  # type: ignore[union-attr]
+        # Each worker loads a full model copy: max_concurrent is only an upper bound
+        limit = whisper_pool_size(compute_type)
+        if not isinstance(workers, int) or workers <= 0:
+            workers = limit
+        elif workers > limit:
+            logger.warning(
+                f"Whisper pool: {workers} workers requested, free RAM and cores "
+                f"carry {limit} ({compute_type} models)"
+            )
+            workers = limit
+        return WhisperProcessPool(
+            workers=workers,
+            device="cpu",
+            compute_type=compute_type,
+            batch_size=transcription_config.batch_size,
+            duration_threshold=transcription_config.duration_threshold,
+            use_batched=transcription_config.use_batched,
+            enable_cache=False,  # Content-keyed cache lives in this process
+            cache_dir=cache_dir,
+        )
+
+    def get_concurrency_report(self) -> Optional[Dict[str, Any]]:
+        """Лимит и решения AIMD-контроллера для отчёта экспорта."""
+        controller = getattr(self, "_concurrency_controller", None)
+        return controller.get_stats() if controller is not None else None
+
     async def get_media_metadata(self, message: Message) -> Optional[Dict[str, Any]]:
         """
         Получение метаданных медиа из сообщения без загрузки файла.
@@ -625,7 +748,12 @@ class MediaProcessor:
                 getattr(message.file, "size", 0) if hasattr(message, "file") else 0
             )
 
-            if expected_size > 0 and downloaded_size < expected_size * 0.95:
+            # Копия уже обработанного (например, пережатого) файла меньше оригинала
+            if (
+                expected_size > 0
+                and downloaded_size < expected_size * 0.95
+                and not self._downloader.is_identity_copy(temp_path)
+            ):
                 logger.error(
                     f"Downloaded file is incomplete! Downloaded: {downloaded_size} bytes, "
                     f"Expected: {expected_size} bytes ({(downloaded_size / expected_size) * 100:.1f}%)"
@@ -640,7 +768,7 @@ class MediaProcessor:
             # Only try to extract metadata if file is not empty
             if downloaded_size > 0:
                 metadata = await self._metadata_extractor.get_metadata(
-                    temp_path, media_type
+                    temp_path, media_type, message=message
                 )
             else:
                 metadata = None
@@ -659,11 +787,8 @@ class MediaProcessor:
                 # Move temp file to final location immediately (raw)
                 # We will process it in-place later
                 try:
-                    # Ensure parent dir exists
-                    await aiofiles.os.makedirs(output_path.parent, exist_ok=True)
-
-                    # Move file
-                    shutil.move(str(temp_path), str(output_path))
+                    # Move file (store blobs are materialized and stay in the store)
+                    await self._downloader.place_media(temp_path, output_path)
 
                     # Update task to point to the new location as input
                     processing_task.input_path = output_path
@@ -708,9 +833,16 @@ class MediaProcessor:
                     f"Media processing completed: {result_size / 1024 / 1024:.1f}MB -> {result_path}"
                 )
 
-                # Очистка временного файла
+                # Дубликаты этой медиа теперь берутся из результата
+                self._downloader.track_output(temp_path, result_path)
+
+                # Очистка временного файла (блоб content-addressed store остаётся)
                 try:
-                    if temp_path and temp_path.exists():
+                    if (
+                        temp_path
+                        and temp_path.exists()
+                        and not self._downloader.is_blob(temp_path)
+                    ):
                         await aiofiles.os.unlink(temp_path)
                 except Exception as e:
                     logger.warning(f"Failed to cleanup temp file {temp_path}: {e}")
@@ -1055,6 +1187,8 @@ class MediaProcessor:
         if self._downloader:
             stats["downloader"] = self._downloader.get_statistics()
 
+        stats["metadata"] = self._metadata_extractor.get_statistics()
+
         # Добавляем статистику от процессоров
         if self._video_processor:
             stats["video_processor"] = self._video_processor.get_statistics()
@@ -1065,6 +1199,13 @@ class MediaProcessor:
         if self._image_processor:
             stats["image_processor"] = self._image_processor.get_statistics()
 
+        if self._transcription_queue:
+            stats["transcription_queue"] = self._transcription_queue.get_stats()
+        if self._whisper_pool:
+            stats["whisper_pool"] = self._whisper_pool.get_stats()
+        if self._transcript_cache:
+            stats["transcript_cache"] = self._transcript_cache.get_stats()
+
         return stats
 
     async def is_idle(self) -> bool:
@@ -1284,6 +1425,7 @@ class MediaProcessor:
 
         total = len(self._pending_tasks)
         logger.info(f"🚀 Starting deferred processing for {total} files...")
+        tasks = list(self._pending_tasks)
 
         for i, task in enumerate(self._pending_tasks):
             try:
@@ -1306,9 +1448,51 @@ class MediaProcessor:
 
         # Wait for all to finish
         await self.wait_until_idle()
+
+        # Обработка на месте меняет размер: дубликаты берутся из результата
+        if self._downloader:
+            for task in tasks:
+                self._downloader.track_output(task.output_path, task.output_path)
         logger.info("✅ Deferred processing complete.")
 
-    async def transcribe_audio(self, file_path: Path) -> Optional[str]:
+    def is_download_pending(self, path: Path) -> bool:
+        """Файл ещё скачивается фоновой очередью."""
+        return self._download_queue is not None and self._download_queue.is_downloading(path)
+
+    def submit_transcription(
+        self,
+        file_path: Path,
+        duration: Optional[float] = None,
+        size: int = 0,
+        identity: Optional[str] = None,
+    ) -> bool:
+        """
+        Поставить голосовое сообщение в очередь транскрипции.
+
+        Файл может ещё скачиваться: задача дождётся его появления.
+        identity (media_identity_key) - ключ кэша транскриптов; без него
+        используется SHA256 файла.
+        Returns:
+            False если транскрипция недоступна
+        """
+        if self._transcription_queue is None:
+            return False
+        self._transcription_queue.submit(
+            file_path, duration=duration, size=size, identity=identity
+        )
+        return True
+
+    async def wait_for_transcriptions(
+        self, paths: List[Path], timeout: Optional[float] = None
+    ) -> Dict[Path, Optional[str]]:
+        """Дождаться текстов для файлов (незнакомые файлы ставятся в очередь)."""
+        if self._transcription_queue is None:
+            return {}
+        return await self._transcription_queue.wait_for(paths, timeout=timeout)
+
+    async def transcribe_audio(
+        self, file_path: Path, identity: Optional[str] = None
+    ) -> Optional[str]:
         """
         Транскрибировать аудиофайл (голосовое сообщение).
 
@@ -1316,6 +1500,7 @@ class MediaProcessor:
 
         Args:
             file_path: Путь к аудиофайлу
+            identity: Идентичность медиа в Telegram (ключ кэша транскриптов)
 
         Returns:
             Текст транскрипции или None при ошибке
@@ -1330,14 +1515,42 @@ class MediaProcessor:
             # Get language from config
             language = getattr(self.config.transcription, "language", None)
 
-            # Run transcription in executor to avoid blocking
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                self.cpu_executor,
-                lambda: self._transcriber.transcribe(file_path, language=language),  # type: ignore
-            )
+            cache_key = None
+            if self._transcript_cache is not None:
+                if identity is None:
+                    identity = f"sha256:{await sha256_file_async(file_path)}"
+                cache_key = transcript_key(
+                    identity, language, self._transcriber.compute_type
+                )
+                cached = self._transcript_cache.get(cache_key)
+                if cached is not None:
+                    logger.debug(f"Transcript cache HIT: {file_path.name}")
+                    text: Optional[str] = cached["text"]
+                    return text
+
+            if self._whisper_pool is not None:
+                # Worker process with its own resident model
+                result = await self._whisper_pool.transcribe(file_path, language)
+                if result is None:
+                    return None  # Worker died; the pool logged and restarts
+            else:
+                # Run transcription in executor to avoid blocking
+                loop = asyncio.get_event_loop()
+                result = await loop.run_in_executor(
+                    self.cpu_executor,
+                    lambda: self._transcriber.transcribe(file_path, language=language),  # type: ignore
+                )
 
             if result and result.text:
+                if cache_key is not None:
+                    self._transcript_cache.put(  # type: ignore[union-attr]
+                        cache_key,
+                        {
+                            "text": result.text,
+                            "language": result.language,
+                            "duration_seconds": result.duration_seconds,
+                        },
+                    )
                 logger.debug(
                     f"Transcription successful: {file_path.name} "
                     f"({len(result.text)} chars, language={result.language})"
@@ -1366,6 +1579,19 @@ class MediaProcessor:
             await self._download_queue.stop(wait_for_completion=True)
             logger.info("Background download queue stopped")
 
+        if self._transcription_queue:
+            logger.info(f"Transcription queue stats: {self._transcription_queue.get_stats()}")
+            await self._transcription_queue.stop()
+
+        if self._whisper_pool:
+            await asyncio.to_thread(self._whisper_pool.shutdown)
+
+        if self._transcript_cache:
+            self._transcript_cache.flush()
+
+        if self._image_processor:
+            await self._image_processor.shutdown()
+
         # Логирование статистики ошибок перед завершением
         if self._failed_tasks > 0 or self._worker_errors:
             logger.warning(
@@ -1414,6 +1640,13 @@ class MediaProcessor:
         except Exception as e:
             logger.error(f"Error during executor shutdown: {e}")
 
+        # Индекс идентичности медиа, ссылки content-addressed store + сборка мусора
+        if self._downloader:
+            try:
+                await asyncio.to_thread(self._downloader.close)
+            except Exception as e:
+                logger.error(f"Error closing media downloader: {e}")
+
         # Очистка временных файлов
         try:
             import shutil
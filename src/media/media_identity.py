@@ -0,0 +1,201 @@
+"""
+Persistent media identity index for pre-download deduplication.
+
+Telegram keeps one server-side file per document/photo id; a forward into
+another chat gets a different access_hash but the same id, size and dc.
+The index maps that identity to the local file already holding the bytes,
+so download_media() can skip the network transfer entirely:
+
+    doc:<id>:<size>:<dc>    -> /path/to/file, size on disk
+    photo:<id>:<size>:<dc>  -> ...
+
+The index is a CacheLogStore log (src/core/log_store.py) with one record per
+identity; changes are buffered and appended in batches. A legacy snapshot
+file (one msgpack map) is migrated into the log once.
+
+Entries are validated on lookup (file exists, size matches) and follow the
+file when it is moved or processed into its output location (relocate()).
+The size checked is the one the file had when it was recorded, not the
+Telegram size in the key: processing (e.g. image recompression) changes it.
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+import msgpack
+from loguru import logger
+
+from src.core.log_store import CacheLogStore, LogWriteBuffer
+
+
+def media_identity_key(message: Any) -> Optional[str]:
+    """Identity of a message's document/photo: kind, id, size and dc (no access_hash)."""
+    media = getattr(message, "media", None)
+    if media is None:
+        return None
+
+    document = getattr(media, "document", None)
+    if document is not None:
+        kind, obj = "doc", document
+        size = getattr(document, "size", None)
+    else:
+        photo = getattr(media, "photo", None)
+        if photo is None:
+            return None
+        kind, obj = "photo", photo
+        # Photo objects carry several sizes; the downloaded one is message.file.size
+        size = getattr(getattr(message, "file", None), "size", None)
+
+    media_id = getattr(obj, "id", None)
+    dc_id = getattr(obj, "dc_id", 0)
+    if not isinstance(media_id, int) or not isinstance(size, int) or size <= 0:
+        return None
+    if not isinstance(dc_id, int):
+        dc_id = 0
+    return f"{kind}:{media_id}:{size}:{dc_id}"
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return -1
+
+
+class MediaIdentityIndex:
+    """Media identity -> local path, persisted in a CacheLogStore log."""
+
+    def __init__(self, index_path: Path):
+        """
+        Args:
+            index_path: Log file of the index (a legacy msgpack snapshot is
+                read from the same path with a .msgpack suffix)
+        """
+        self._index_path = Path(index_path)
+        # identity -> (path, size on disk)
+        self._entries: Dict[str, Tuple[str, int]] = {}
+        # Reverse index so moves can update every identity stored in one file
+        self._by_path: Dict[str, Set[str]] = {}
+        self._log = CacheLogStore(self._index_path, compaction_min_bytes=256 * 1024)
+        self._writes = LogWriteBuffer(
+            self._log,
+            lambda: (
+                (key, self._encode(key, entry)) for key, entry in self._entries.items()
+            ),
+        )
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "recorded": 0}
+        self._load()
+
+    def _load(self) -> None:
+        log_exists = self._log.log_path.exists() or self._log.backup_path.exists()
+        try:
+            records = self._log.load()
+        except Exception as e:
+            logger.warning(f"Failed to load media identity index: {e}, starting fresh")
+            self._log.set_aside()
+            records = {}
+        for key, record in records.items():
+            if isinstance(record, dict) and record.get("p"):
+                self._set(key, record["p"], record.get("s", -1))
+
+        legacy_path = self._index_path.with_suffix(".msgpack")
+        if not log_exists and legacy_path.exists():
+            # One-time migration from the msgpack snapshot
+            try:
+                with open(legacy_path, "rb") as f:
+                    snapshot = msgpack.unpackb(f.read(), raw=False) or {}
+                for key, path in snapshot.items():
+                    self._set(key, path, _file_size(path))
+            except Exception as e:
+                logger.warning(f"Failed to read legacy media identity index: {e}")
+            self._writes.rewrite_pending = True
+            self.flush()
+            if not self._writes.rewrite_pending:
+                legacy_path.unlink(missing_ok=True)
+        logger.debug(f"Loaded media identity index: {len(self._entries)} entries")
+
+    def _encode(self, key: str, entry: Tuple[str, int]) -> bytes:
+        return self._log.encode_set(key, {"p": entry[0], "s": entry[1]})
+
+    def flush(self) -> None:
+        """Write buffered changes to the log (compacting it when needed)."""
+        try:
+            self._writes.flush()
+        except Exception as e:
+            logger.error(f"Failed to save media identity index: {e}")
+
+    def _changed(self, key: str) -> None:
+        entry = self._entries.get(key)
+        self._writes.put(key, self._encode(key, entry) if entry is not None else None)
+        if self._writes.full:
+            self.flush()
+
+    def _set(self, key: str, path: str, size: int) -> None:
+        self._unset(key)
+        self._entries[key] = (path, size)
+        self._by_path.setdefault(path, set()).add(key)
+
+    def _unset(self, key: str) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            keys = self._by_path.get(old[0])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_path[old[0]]
+
+    def lookup(self, key: Optional[str]) -> Optional[Path]:
+        """Local file for this identity, or None (stale entries are dropped)."""
+        if not key:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        path_str, size = entry
+        if _file_size(path_str) != size:
+            self._stats["stale"] += 1
+            self._stats["misses"] += 1
+            self._unset(key)
+            self._changed(key)
+            return None
+        self._stats["hits"] += 1
+        return Path(path_str)
+
+    def record(self, key: Optional[str], path: Path) -> None:
+        """Remember that `path` holds the file of this identity."""
+        if not key:
+            return
+        path_str = str(Path(path).absolute())
+        entry = (path_str, _file_size(path_str))
+        if self._entries.get(key) == entry:
+            return
+        self._set(key, *entry)
+        self._stats["recorded"] += 1
+        self._changed(key)
+
+    def relocate(self, old_path: Path, new_path: Path) -> None:
+        """
+        The file moved: every identity stored at old_path now lives at new_path.
+
+        new_path may be a processed version of the file (or old_path itself,
+        processed in place); its current size becomes the one checked.
+        """
+        old_str = str(Path(old_path).absolute())
+        keys = self._by_path.get(old_str)
+        if not keys:
+            return
+        new_str = str(Path(new_path).absolute())
+        size = _file_size(new_str)
+        for key in list(keys):
+            self._set(key, new_str, size)
+            self._changed(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = dict(self._stats)
+        stats["entries"] = len(self._entries)
+        return stats
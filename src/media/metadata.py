@@ -3,14 +3,22 @@ Metadata extraction for media files.
 
 Extracts metadata from video, audio, and image files using FFmpeg and PIL.
 Provides caching for improved performance.
+
+Cache entries are keyed by a cheap identity instead of a hash of the whole
+file: the Telegram document identity when the message is known, otherwise
+the file size plus a hash of its first and last SAMPLE_BYTES (one thread hop,
+at most 128 KB read). Videos for which Telegram already reports duration and
+resolution (DocumentAttributeVideo) skip ffprobe.
 """
 
 import asyncio
 import hashlib
 import mimetypes
+import os
+from collections import OrderedDict
 from fractions import Fraction
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import aiofiles
 import aiofiles.os
@@ -18,8 +26,49 @@ import ffmpeg
 from loguru import logger
 from PIL import Image
 
+from .media_identity import media_identity_key
 from .models import MediaMetadata
 
+# Bytes hashed from each end of a file for its sample identity
+SAMPLE_BYTES = 64 * 1024
+# Metadata entries kept in memory (least recently used evicted)
+METADATA_CACHE_SIZE = 4096
+
+
+def sample_identity(file_path: Path) -> str:
+    """size + hash of head and tail: identifies a downloaded file without reading it all."""
+    size = os.path.getsize(file_path)
+    hash_obj = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        hash_obj.update(f.read(SAMPLE_BYTES))
+        if size > SAMPLE_BYTES:
+            f.seek(max(SAMPLE_BYTES, size - SAMPLE_BYTES))
+            hash_obj.update(f.read(SAMPLE_BYTES))
+    return f"sample:{size}:{hash_obj.hexdigest()}"
+
+
+def telegram_video_attributes(message: Any) -> Optional[Dict[str, Any]]:
+    """duration/width/height from DocumentAttributeVideo, if Telegram supplied them."""
+    document = getattr(getattr(message, "media", None), "document", None)
+    for attr in getattr(document, "attributes", None) or ():
+        if type(attr).__name__ != "DocumentAttributeVideo":
+            continue
+        duration, width, height = (
+            getattr(attr, "duration", None),
+            getattr(attr, "w", None),
+            getattr(attr, "h", None),
+        )
+        if (
+            isinstance(duration, (int, float))
+            and duration > 0
+            and isinstance(width, int)
+            and width > 0
+            and isinstance(height, int)
+            and height > 0
+        ):
+            return {"duration": float(duration), "width": width, "height": height}
+    return None
+
 
 def _parse_frame_rate(rate_str: str) -> float:
     """
@@ -51,19 +100,29 @@ class MetadataExtractor:
             thread_pool: Unified thread pool for CPU-bound operations
         """
         self.thread_pool = thread_pool  # 🧵 TIER B - B-1
-        self._metadata_cache: Dict[str, MediaMetadata] = {}
-        self._file_checksums: Dict[Path, str] = {}
+        self._metadata_cache: "OrderedDict[str, MediaMetadata]" = OrderedDict()
+        self._stats = {"cache_hits": 0, "ffprobe_calls": 0, "ffprobe_skipped": 0}
         
         # Legacy compatibility
         self.io_executor = None
 
-    async def get_metadata(self, file_path: Path, media_type: str) -> MediaMetadata:
-        """Получение метаданных медиа файла."""
+    async def get_metadata(
+        self, file_path: Path, media_type: str, message: Any = None
+    ) -> MediaMetadata:
+        """
+        Получение метаданных медиа файла.
+
+        Args:
+            message: Сообщение Telegram, если известно (ключ кэша и атрибуты видео)
+        """
         try:
             # Проверка кэша метаданных
-            file_hash = await self._get_file_hash(file_path)
-            if file_hash in self._metadata_cache:
-                return self._metadata_cache[file_hash]
+            identity = await self._get_identity(file_path, message)
+            cached = self._metadata_cache.get(identity)
+            if cached is not None:
+                self._metadata_cache.move_to_end(identity)
+                self._stats["cache_hits"] += 1
+                return cached
 
             # Базовая информация
             stat = await aiofiles.os.stat(file_path)
@@ -72,11 +131,23 @@ class MetadataExtractor:
             metadata = MediaMetadata(
                 file_size=stat.st_size,
                 mime_type=mime_type or "application/octet-stream",
-                checksum=file_hash,
+                checksum=identity,
             )
 
             # Дополнительные метаданные в зависимости от типа
-            if media_type in ["video", "audio"]:
+            telegram_video = (
+                telegram_video_attributes(message) if media_type == "video" else None
+            )
+            if telegram_video:
+                # Telegram уже знает длительность и разрешение: ffprobe не нужен
+                self._stats["ffprobe_skipped"] += 1
+                metadata.duration = telegram_video["duration"]
+                metadata.width = telegram_video["width"]
+                metadata.height = telegram_video["height"]
+                metadata.bitrate = int(stat.st_size * 8 / telegram_video["duration"])
+
+            elif media_type in ["video", "audio"]:
+                self._stats["ffprobe_calls"] += 1
                 video_metadata = await self._get_ffmpeg_metadata(file_path)
                 metadata.duration = video_metadata.get("duration")
                 metadata.width = video_metadata.get("width")
@@ -94,7 +165,9 @@ class MetadataExtractor:
                 metadata.format = image_metadata.get("format")
 
             # Сохранение в кэш
-            self._metadata_cache[file_hash] = metadata
+            self._metadata_cache[identity] = metadata
+            if len(self._metadata_cache) > METADATA_CACHE_SIZE:
+                self._metadata_cache.popitem(last=False)
 
             return metadata
 
@@ -184,21 +257,19 @@ class MetadataExtractor:
             logger.error(f"Failed to get image metadata for {file_path}: {e}")
             return {}
 
-    async def _get_file_hash(self, file_path: Path) -> str:
-        """Получение хэша файла."""
-        if file_path in self._file_checksums:
-            return self._file_checksums[file_path]
-
+    async def _get_identity(self, file_path: Path, message: Any = None) -> str:
+        """Ключ кэша: идентичность документа в Telegram или sample-хэш файла."""
+        identity = media_identity_key(message) if message is not None else None
+        if identity:
+            return identity
         try:
-            hash_obj = hashlib.md5()
-            async with aiofiles.open(file_path, "rb") as f:
-                while chunk := await f.read(8192):
-                    hash_obj.update(chunk)
-
-            file_hash = hash_obj.hexdigest()
-            self._file_checksums[file_path] = file_hash
-            return file_hash
-
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self.io_executor, sample_identity, file_path
+            )
         except Exception as e:
-            logger.error(f"Failed to calculate hash for {file_path}: {e}")
+            logger.error(f"Failed to identify {file_path}: {e}")
             return str(file_path)
+
+    def get_statistics(self) -> Dict[str, int]:
+        return {**self._stats, "cached": len(self._metadata_cache)}
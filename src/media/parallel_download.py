@@ -0,0 +1,269 @@
+"""
+Multi-connection parallel part downloader for large media.
+
+A document is split into part-aligned ranges (part size from
+MediaDownloader._get_part_size, always a multiple of 4 KiB and a divisor of
+1 MiB, as upload.getFile requires). Connections pull runs of consecutive
+missing parts from a shared queue and fetch them with iter_download on the
+worker clients, preferring workers already connected to the file's DC
+(DCRouter). Every received part is written with pwrite into a preallocated
+file, so parts can complete in any order.
+
+Completed part indices are kept in a set owned by the caller: after a failure
+the next download() call fetches only the parts that are still missing.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+from loguru import logger
+from telethon.errors import FloodWaitError
+
+from src.core.rate_limiter import MEDIA
+from src.telegram_dc_utils import DCRouter
+
+# Consecutive parts fetched by one iter_download call (one request iterator,
+# one exported sender borrow for foreign DCs)
+PARTS_PER_RUN = 8
+# Attempts per part before the download is declared failed (resumable)
+MAX_PART_ATTEMPTS = 5
+# Pause per failed attempt of a part before it is retried (capped at 5s)
+RETRY_BACKOFF_S = 0.5
+# upload.getFile limits: 4 KiB granularity, at most 512 KiB per request
+MIN_PART_SIZE = 4 * 1024
+MAX_PART_SIZE = 512 * 1024
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+class PartDownloadError(Exception):
+    """Raised when some parts could not be fetched; completed parts are kept."""
+
+
+def plan_parts(file_size: int, part_size: int) -> List[Tuple[int, int]]:
+    """Split a file into (offset, length) ranges of part_size bytes."""
+    if file_size <= 0 or part_size <= 0:
+        return []
+    return [
+        (offset, min(part_size, file_size - offset))
+        for offset in range(0, file_size, part_size)
+    ]
+
+
+def aligned_part_size(part_size_kb: int) -> int:
+    """
+    Largest power-of-two part size (bytes) not above part_size_kb.
+
+    Powers of two between 4 KiB and 512 KiB divide 1 MiB, so aligned parts
+    never cross a 1 MiB boundary (another getFile requirement).
+    """
+    size = MIN_PART_SIZE
+    target = max(MIN_PART_SIZE, min(MAX_PART_SIZE, int(part_size_kb) * 1024))
+    while size * 2 <= target:
+        size *= 2
+    return size
+
+
+def preallocate(path: Path, size: int) -> None:
+    """Create the output file at its final size (keeps existing content)."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if os.fstat(fd).st_size != size:
+            os.ftruncate(fd, size)
+        fallocate = getattr(os, "posix_fallocate", None)
+        if fallocate is not None:
+            try:
+                fallocate(fd, 0, size)
+            except OSError:
+                pass  # Filesystem without fallocate support - sparse file is fine
+    finally:
+        os.close(fd)
+
+
+def _pwrite(fd: int, data: bytes, offset: int) -> None:
+    pwrite = getattr(os, "pwrite", None)
+    if pwrite is not None:
+        written = 0
+        view = memoryview(data)
+        while written < len(view):
+            written += pwrite(fd, view[written:], offset + written)
+        return
+    # Windows: no pwrite; the event loop is single-threaded so seek+write is safe
+    os.lseek(fd, offset, os.SEEK_SET)
+    os.write(fd, data)
+
+
+class ParallelPartDownloader:
+    """Downloads one file over several connections into a preallocated file."""
+
+    def __init__(
+        self,
+        clients: List[Any],
+        connections: int = 4,
+        part_size_kb: int = 512,
+        rate_limiter: Any = None,
+    ):
+        if not clients:
+            raise ValueError("ParallelPartDownloader needs at least one client")
+        self.clients = list(clients)
+        self.connections = max(1, int(connections))
+        self.part_size = aligned_part_size(part_size_kb)
+        self.rate_limiter = rate_limiter
+
+    def _ordered_clients(self, dc_id: int) -> List[Any]:
+        """Clients for each connection, same-DC workers first."""
+        order = DCRouter.prioritize_workers_by_dc(self.clients, dc_id)
+        ordered = [self.clients[i] for i in order]
+        return [ordered[i % len(ordered)] for i in range(self.connections)]
+
+    async def download(
+        self,
+        media: Any,
+        path: Path,
+        file_size: int,
+        done_parts: Set[int],
+        dc_id: int = 0,
+        progress_callback: Optional[ProgressCallback] = None,
+        on_part: Optional[Callable[[int, int, bytes], None]] = None,
+    ) -> Path:
+        """
+        Fetch every part of `media` missing from `done_parts` into `path`.
+
+        Args:
+            media: Message media / document accepted by iter_download.
+            path: Output file (preallocated to file_size).
+            file_size: Exact file size in bytes.
+            done_parts: Indices of completed parts; updated in place.
+            dc_id: DC the file lives on (for worker selection).
+            progress_callback: async callable(downloaded_bytes, total_bytes).
+            on_part: Optional sync hook(index, offset, data) after each part write.
+
+        Raises:
+            PartDownloadError: if some parts failed MAX_PART_ATTEMPTS times.
+        """
+        parts = plan_parts(file_size, self.part_size)
+        preallocate(path, file_size)
+
+        missing = [i for i in range(len(parts)) if i not in done_parts]
+        if not missing:
+            return path
+
+        # Runs of consecutive missing parts, fetched by one request iterator each
+        runs: List[List[int]] = []
+        for index in missing:
+            if runs and runs[-1][-1] == index - 1 and len(runs[-1]) < PARTS_PER_RUN:
+                runs[-1].append(index)
+            else:
+                runs.append([index])
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for run in runs:
+            queue.put_nowait(run)
+
+        attempts = {index: 0 for index in missing}
+        failed: Set[int] = set()
+        downloaded = sum(parts[i][1] for i in done_parts if i < len(parts))
+        last_error: Optional[BaseException] = None
+
+        fd = os.open(path, os.O_RDWR)
+
+        async def _fetch_run(client: Any, run: List[int]) -> None:
+            nonlocal downloaded
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(MEDIA)
+            position = 0
+            async for chunk in client.iter_download(
+                media,
+                offset=parts[run[0]][0],
+                limit=len(run),
+                request_size=self.part_size,
+                file_size=file_size,
+                dc_id=dc_id or None,
+            ):
+                index = run[position]
+                offset, length = parts[index]
+                data = bytes(chunk[:length])
+                if len(data) != length:
+                    raise PartDownloadError(
+                        f"part {index}: got {len(data)} bytes, expected {length}"
+                    )
+                _pwrite(fd, data, offset)
+                done_parts.add(index)
+                if on_part is not None:
+                    on_part(index, offset, data)
+                downloaded += length
+                position += 1
+                if progress_callback is not None:
+                    await progress_callback(downloaded, file_size)
+                if position == len(run):
+                    break
+            if position < len(run):
+                raise PartDownloadError(
+                    f"stream ended after {position}/{len(run)} parts at part {run[0]}"
+                )
+
+        async def _connection(conn_idx: int, client: Any) -> None:
+            nonlocal last_error
+            while True:
+                try:
+                    run = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    await _fetch_run(client, run)
+                except FloodWaitError as e:
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.report_flood_wait(MEDIA, e.seconds + 1)
+                    else:
+                        await asyncio.sleep(e.seconds + 1)
+                    self._requeue(queue, run, done_parts, attempts, failed, count=False)
+                except Exception as e:
+                    last_error = e
+                    logger.debug(
+                        f"Parallel download connection {conn_idx}: run at part {run[0]} failed: "
+                        f"{type(e).__name__}: {e}"
+                    )
+                    self._requeue(queue, run, done_parts, attempts, failed, count=True)
+                    await asyncio.sleep(min(RETRY_BACKOFF_S * attempts.get(run[0], 1), 5.0))
+
+        try:
+            await asyncio.gather(
+                *(
+                    _connection(i, client)
+                    for i, client in enumerate(self._ordered_clients(dc_id))
+                )
+            )
+        finally:
+            os.close(fd)
+
+        if failed or len(done_parts) < len(parts):
+            remaining = len(parts) - len(done_parts)
+            # The last error text is kept so callers can classify the failure
+            # (Telegram server errors, Telethon retry exhaustion)
+            raise PartDownloadError(
+                f"{remaining}/{len(parts)} parts missing after parallel download; "
+                f"last error: {type(last_error).__name__}: {last_error}"
+            )
+        return path
+
+    @staticmethod
+    def _requeue(
+        queue: asyncio.Queue,
+        run: List[int],
+        done_parts: Set[int],
+        attempts: dict,
+        failed: Set[int],
+        count: bool,
+    ) -> None:
+        """Put the unfinished parts of a run back (single parts, any connection)."""
+        for index in run:
+            if index in done_parts:
+                continue
+            if count:
+                attempts[index] += 1
+                if attempts[index] >= MAX_PART_ATTEMPTS:
+                    failed.add(index)
+                    continue
+            queue.put_nowait([index])
@@ -11,6 +11,7 @@ from .base import BaseProcessor
 from .image import ImageProcessor
 from .transcription import TranscriptionResult, WhisperTranscriber
 from .video import VideoProcessor
+from .whisper_pool import WhisperProcessPool
 
 __all__ = [
     # Media Processors
@@ -21,4 +22,5 @@ __all__ = [
     # Transcription
     "WhisperTranscriber",
     "TranscriptionResult",
+    "WhisperProcessPool",
 ]
@@ -3,6 +3,10 @@ Image processor for media files.
 
 Handles image file processing including resizing, format conversion,
 EXIF rotation, and quality optimization using PIL/Pillow.
+
+Recompression itself lives in image_pool.process_image_file and runs in a
+process pool (performance.image_process_pool) or, when disabled, in the
+thread executor.
 """
 
 import asyncio
@@ -12,10 +16,14 @@ from typing import Any, Optional
 
 import aiofiles
 from loguru import logger
-from PIL import Image, ImageOps
-
 from ..models import MediaMetadata, ProcessingSettings, ProcessingTask
 from .base import BaseProcessor
+from .image_pool import (
+    ImageJob,
+    ImageProcessPool,
+    default_image_workers,
+    process_image_file,
+)
 
 # Environment variables for processing control (fallback values)
 DEFAULT_PROCESS_IMAGES = os.getenv("PROCESS_IMAGES", "true").lower() == "true"
@@ -41,9 +49,27 @@ class ImageProcessor(BaseProcessor):
         super().__init__(thread_pool, settings)  # 🧵 TIER B - B-1
         self.config = config
 
+        # Пул процессов для перекодирования (лениво стартует при первой задаче)
+        self._pool: Optional[ImageProcessPool] = None
+        performance = getattr(config, "performance", None)
+        if getattr(performance, "image_process_pool", False) is True:
+            workers = getattr(performance, "image_process_workers", 0)
+            batch_size = getattr(performance, "image_process_batch_size", 8)
+            self._pool = ImageProcessPool(
+                workers=workers if isinstance(workers, int) and workers > 0
+                else default_image_workers(),
+                batch_size=batch_size if isinstance(batch_size, int) else 8,
+            )
+
         # Статистика
         self._image_processed_count = 0
         self._image_copied_count = 0
+        self._image_not_smaller_count = 0
+        self._draft_decodes = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._recompress_time = 0.0
+        self._recompress_count = 0
 
     async def process(self, task: ProcessingTask, worker_name: str) -> bool:
         """
@@ -69,22 +95,46 @@ class ImageProcessor(BaseProcessor):
                 )
                 return await self._copy_file(task)
 
-            # Обработка изображения в отдельном потоке
-            loop = asyncio.get_event_loop()
-            success = await loop.run_in_executor(
-                self.cpu_executor,
-                self._process_image_sync,
-                task,
-                settings,
+            max_width, max_height = settings.image_max_size
+            job: ImageJob = (
+                str(task.input_path),
+                str(task.output_path),
+                (max_width, max_height),
+                settings.image_quality,
             )
+            if self._pool is not None:
+                result = await self._pool.process(*job)
+            else:
+                # Обработка изображения в отдельном потоке
+                loop = asyncio.get_event_loop()
+                result = await loop.run_in_executor(
+                    self.cpu_executor, process_image_file, *job
+                )
+            self._record_result(result)
+
+            if result["status"] == "not_smaller":
+                # Перекодирование не уменьшает файл - оставляем оригинал
+                logger.debug(
+                    f"Recompressed image not smaller ({result['output_size']} >= "
+                    f"{result['source_size']} bytes), keeping original: {task.input_path}"
+                )
+                self._image_not_smaller_count += 1
+                if self._is_in_place(task):
+                    # Отложенная обработка на месте: оригинал уже на своём пути
+                    return True
+                return await self._copy_file(task)
 
-            if success and task.output_path.exists():
+            if result["status"] == "optimized" and task.output_path.exists():
                 logger.debug(
                     f"✅ Image processing completed: {task.input_path} -> {task.output_path}"
                 )
                 self._image_processed_count += 1
                 return True
             else:
+                if result.get("error"):
+                    logger.error(
+                        f"PIL processing failed for {task.input_path}: {result['error']}"
+                    )
                 logger.debug(f"Using fallback copy for image {task.input_path}")
                 return await self._copy_file(task)
 
@@ -92,6 +142,19 @@ class ImageProcessor(BaseProcessor):
             logger.error(f"Image processing failed: {e}")
             return await self._copy_file(task)
 
+    def _record_result(self, result: dict[str, Any]) -> None:
+        if "elapsed" not in result:
+            return  # Pool failure before the image was touched
+        self._recompress_count += 1
+        self._recompress_time += result["elapsed"]
+        self._bytes_in += result.get("source_size", 0)
+        if result["status"] == "optimized":
+            self._bytes_out += result.get("output_size", 0)
+        else:
+            self._bytes_out += result.get("source_size", 0)
+        if result.get("draft"):
+            self._draft_decodes += 1
+
     def needs_processing(self, file_path: Path, settings: ProcessingSettings) -> bool:
         """
         Определяет, нужна ли обработка изображения (базовая проверка).
@@ -168,104 +231,13 @@ class ImageProcessor(BaseProcessor):
 
         return False
 
-    def _process_image_sync(
-        self,
-        task: ProcessingTask,
-        settings: ProcessingSettings,
-    ) -> bool:
-        """
-        Синхронная обработка изображения через PIL (для executor).
-
-        Args:
-            task: Задача обработки
-            settings: Настройки обработки
-
-        Returns:
-            True если обработка успешна
-        """
+    @staticmethod
+    def _is_in_place(task: ProcessingTask) -> bool:
+        """True when the task writes back over its own input file."""
         try:
-            # Валидация входного файла
-            if not task.input_path.exists():
-                logger.error(f"Input image file does not exist: {task.input_path}")
-                return False
-
-            file_size = task.input_path.stat().st_size
-            if file_size == 0:
-                logger.error(f"Input image file is empty: {task.input_path}")
-                return False
-
-            logger.debug(
-                f"Processing image file: {task.input_path} (size: {file_size} bytes)"
-            )
-
-            # Открытие и обработка изображения
-            with Image.open(task.input_path) as img:
-                # Поворот по EXIF данным (автоповорот)
-                img = ImageOps.exif_transpose(img)
-
-                # Изменение размера если нужно
-                if (
-                    img.width > settings.image_max_size[0]
-                    or img.height > settings.image_max_size[1]
-                ):
-                    logger.debug(
-                        f"Resizing image from {img.width}x{img.height} "
-                        f"to max {settings.image_max_size[0]}x{settings.image_max_size[1]}"
-                    )
-                    img.thumbnail(settings.image_max_size, Image.Resampling.LANCZOS)
-
-                # Конвертация в RGB если нужно (для JPEG)
-                if img.mode in ("RGBA", "LA", "P"):
-                    logger.debug(f"Converting image from {img.mode} to RGB")
-                    rgb_img = Image.new("RGB", img.size, (255, 255, 255))
-                    rgb_img.paste(
-                        img,
-                        mask=img.split()[-1] if img.mode == "RGBA" else None,
-                    )
-                    img = rgb_img
-
-                # Создание директории для вывода
-                task.output_path.parent.mkdir(parents=True, exist_ok=True)
-
-                # Сохранение с оптимизацией
-                save_kwargs: dict[str, Any] = {
-                    "format": "JPEG",
-                    "quality": settings.image_quality,
-                    "progressive": True,
-                    "optimize": True,
-                }
-
-                img.save(str(task.output_path), **save_kwargs)
-
-            # Проверка результата
-            if not task.output_path.exists():
-                logger.error(
-                    f"PIL completed but output file not found: {task.output_path}"
-                )
-                return False
-
-            output_size = task.output_path.stat().st_size
-            if output_size == 0:
-                logger.error(f"PIL produced empty file: {task.output_path}")
-                return False
-
-            # Проверка на подозрительно маленький размер
-            source_size = task.input_path.stat().st_size
-            if output_size < source_size * 0.01:  # Меньше 1% от исходного
-                logger.warning(
-                    f"PIL output suspiciously small: {output_size} bytes from {source_size} bytes"
-                )
-                return False
-
-            logger.debug(
-                f"Image processed successfully: {source_size} → {output_size} bytes "
-                f"({(output_size / source_size) * 100:.1f}%)"
-            )
-            return True
-
-        except Exception as e:
-            logger.error(f"PIL processing failed for {task.input_path}: {str(e)}")
-            return False
+            return task.input_path.resolve() == task.output_path.resolve()
+        except OSError:
+            return task.input_path == task.output_path
 
     async def _copy_file(self, task: ProcessingTask) -> bool:
         """
@@ -293,13 +265,13 @@ class ImageProcessor(BaseProcessor):
                     logger.error(f"Source file is empty: {task.input_path}")
                     return False
 
+                if self._is_in_place(task):
+                    # Копировать некуда: удаление назначения удалило бы оригинал
+                    return True
+
                 # Создание директории
                 task.output_path.parent.mkdir(parents=True, exist_ok=True)
 
-                # Удаляем существующий файл если есть
-                if task.output_path.exists():
-                    task.output_path.unlink()
-
                 # Zero-copy transfer
                 config = ZeroCopyConfig(
                     enabled=True,
@@ -352,13 +324,36 @@ class ImageProcessor(BaseProcessor):
             "optimized": self._image_processed_count,
             "copied": self._image_copied_count,
             "optimization_percentage": processing_percentage,
+            "not_smaller": self._image_not_smaller_count,
+            "draft_decodes": self._draft_decodes,
+            "bytes_saved": self._bytes_in - self._bytes_out,
+            # Пропускная способность перекодирования (время воркеров)
+            "images_per_second": (
+                self._recompress_count / self._recompress_time
+                if self._recompress_time > 0
+                else 0.0
+            ),
+            "mb_per_second": (
+                self._bytes_in / 1024 / 1024 / self._recompress_time
+                if self._recompress_time > 0
+                else 0.0
+            ),
+            "process_pool_workers": self._pool.workers if self._pool else 0,
+            "process_pool_batches": self._pool.batches if self._pool else 0,
         }
 
+    async def shutdown(self) -> None:
+        """Остановить пул процессов."""
+        if self._pool is not None:
+            await self._pool.shutdown()
+
     def log_statistics(self) -> None:
         """Логировать статистику обработки изображений."""
         stats = self.get_statistics()
         logger.info(
             f"Image processing stats: {stats['total_processed']} total, "
             f"{stats['optimized']} optimized, {stats['copied']} copied, "
-            f"Optimization rate: {stats['optimization_percentage']:.1f}%"
+            f"Optimization rate: {stats['optimization_percentage']:.1f}%, "
+            f"{stats['not_smaller']} not smaller, {stats['draft_decodes']} draft decodes, "
+            f"{stats['images_per_second']:.1f} img/s"
         )
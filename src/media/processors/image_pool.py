@@ -0,0 +1,236 @@
+"""
+Process-pool image recompression.
+
+ImageProcessor used to decode, transpose, downscale and re-encode every image
+in a thread executor: GIL-bound, and always at full resolution. Here the work
+is a pure function of (input, output, max size, quality) that runs in worker
+processes, so several images are recompressed in parallel:
+
+- JPEGs that need a large downscale are opened in draft mode: libjpeg decodes
+  directly at 1/2, 1/4 or 1/8 scale (never below the target size), before the
+  EXIF transpose would force a full-size load.
+- The result is encoded in memory and only written when it is smaller than
+  the source; otherwise the caller keeps the original file.
+- Images are sent to the workers in batches to amortize the per-call
+  pickling and scheduling cost.
+
+The same function runs in-process when the pool is disabled, so output is
+identical in both modes.
+"""
+
+import asyncio
+import io
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from PIL import Image, ImageOps
+
+# EXIF orientations that swap width and height
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+_EXIF_ORIENTATION = 0x0112
+
+# (input_path, output_path, max_size, quality)
+ImageJob = Tuple[str, str, Tuple[int, int], int]
+
+
+def default_image_workers() -> int:
+    return max(1, min(4, (os.cpu_count() or 1) // 2))
+
+
+def _draft_size(img: Image.Image, max_size: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+    """Smallest decode size that still covers the thumbnail, or None if no downscale."""
+    max_w, max_h = max_size
+    if img.getexif().get(_EXIF_ORIENTATION, 1) in _TRANSPOSED_ORIENTATIONS:
+        max_w, max_h = max_h, max_w
+    scale = min(max_w / img.width, max_h / img.height)
+    if scale > 0.5:
+        return None  # libjpeg cannot reduce by less than 2x
+    return (math.ceil(img.width * scale), math.ceil(img.height * scale))
+
+
+def process_image_file(
+    input_path: str, output_path: str, max_size: Tuple[int, int], quality: int
+) -> Dict[str, Any]:
+    """
+    Recompress one image to JPEG.
+
+    Returns:
+        {"status": "optimized" | "not_smaller" | "failed", "source_size",
+         "output_size", "draft", "elapsed", "error"}
+    """
+    started = time.perf_counter()
+    result: Dict[str, Any] = {
+        "status": "failed",
+        "source_size": 0,
+        "output_size": 0,
+        "draft": False,
+        "error": None,
+    }
+    try:
+        source_size = os.path.getsize(input_path)
+        result["source_size"] = source_size
+        if source_size == 0:
+            result["error"] = "empty input"
+            return result
+
+        with Image.open(input_path) as source:
+            if source.format == "JPEG":
+                draft_size = _draft_size(source, max_size)
+                if draft_size is not None and source.draft(None, draft_size):
+                    result["draft"] = True
+
+            # Поворот по EXIF данным (загружает пиксели)
+            img = ImageOps.exif_transpose(source)
+
+            if img.width > max_size[0] or img.height > max_size[1]:
+                img.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+            # Конвертация в RGB если нужно (для JPEG)
+            if img.mode in ("RGBA", "LA", "P"):
+                rgb_img = Image.new("RGB", img.size, (255, 255, 255))
+                rgb_img.paste(
+                    img, mask=img.split()[-1] if img.mode == "RGBA" else None
+                )
+                img = rgb_img
+
+            buffer = io.BytesIO()
+            img.save(
+                buffer, format="JPEG", quality=quality, progressive=True, optimize=True
+            )
+
+        output_size = buffer.tell()
+        result["output_size"] = output_size
+        if output_size >= source_size:
+            result["status"] = "not_smaller"
+            return result
+        if output_size < source_size * 0.01:
+            result["error"] = f"output suspiciously small: {output_size} bytes"
+            return result
+
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getbuffer())
+        os.replace(tmp_path, output_path)
+        result["status"] = "optimized"
+        return result
+
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+    finally:
+        result["elapsed"] = time.perf_counter() - started
+
+
+def process_image_batch(jobs: List[ImageJob]) -> List[Dict[str, Any]]:
+    """Recompress a batch of images (runs in worker processes)."""
+    return [process_image_file(*job) for job in jobs]
+
+
+class ImageProcessPool:
+    """Process pool that recompresses images in micro-batches."""
+
+    def __init__(self, workers: int, batch_size: int = 8, batch_delay: float = 0.02):
+        """
+        Args:
+            workers: Worker processes
+            batch_size: Images sent to a worker per call
+            batch_delay: How long a partial batch waits for more images (seconds)
+        """
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.batch_delay = batch_delay
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: List[Tuple[ImageJob, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._running: set = set()
+
+        # Statistics
+        self.batches = 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Executor, created on first use."""
+        if self._executor is None:
+            # spawn: the exporter is multi-threaded, fork() could copy held locks
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(
+                f"🖼️ Image process pool started with {self.workers} workers "
+                f"(batch={self.batch_size})"
+            )
+        return self._executor
+
+    async def process(
+        self,
+        input_path: str,
+        output_path: str,
+        max_size: Tuple[int, int],
+        quality: int,
+    ) -> Dict[str, Any]:
+        """Queue one image; resolves when its batch has been processed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(
+            ((str(input_path), str(output_path), (max_size[0], max_size[1]), quality), future)
+        )
+        if len(self._pending) >= self.batch_size:
+            self._dispatch()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_delay, self._dispatch)
+        result: Dict[str, Any] = await future
+        return result
+
+    def _dispatch(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: List[Tuple[ImageJob, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        results: List[Dict[str, Any]] = []
+        try:
+            results = await loop.run_in_executor(
+                self.executor, process_image_batch, [job for job, _ in batch]
+            )
+            self.batches += 1
+        except Exception as e:
+            results = [{"status": "failed", "error": str(e)} for _ in batch]
+        finally:
+            # Cancelled batches still resolve their callers
+            for i, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(
+                        results[i]
+                        if i < len(results)
+                        else {"status": "failed", "error": "cancelled"}
+                    )
+
+    async def shutdown(self) -> None:
+        """Stop worker processes (call on the event loop thread)."""
+        # Timer and futures belong to the loop: resolve them here, not in a thread
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for _, future in self._pending:
+            if not future.done():
+                future.set_result({"status": "failed", "error": "pool stopped"})
+        self._pending.clear()
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            # Waiting for the workers to exit blocks: only that goes to a thread
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+            logger.info(f"🖼️ Image process pool stopped ({self.batches} batches)")
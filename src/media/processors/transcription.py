@@ -84,6 +84,7 @@ class WhisperTranscriber:
         enable_cache: bool = True,
         cache_dir: Optional[Path] = None,
         auto_unload_timeout: Optional[int] = None,
+        cpu_threads: int = 0,
     ):
         """
         Initialize Whisper transcriber.
@@ -98,6 +99,7 @@ class WhisperTranscriber:
             cache_dir: Optional cache directory (default: .cache/transcriptions)
             auto_unload_timeout: Seconds of inactivity before auto-unloading model.
                                  Set to 0 or None to disable. Default: 60s.
+            cpu_threads: CTranslate2 threads on CPU (0 = library default)
 
         Raises:
             RuntimeError: If faster-whisper is not installed
@@ -115,6 +117,7 @@ class WhisperTranscriber:
         self.use_batched = use_batched and BATCHED_AVAILABLE
         self.enable_cache = enable_cache
         self.cache_dir = cache_dir or Path(".cache/transcriptions")
+        self.cpu_threads = cpu_threads
 
         if self.enable_cache:
             self.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -186,6 +189,7 @@ class WhisperTranscriber:
                 "Systran/faster-whisper-large-v3",
                 device=self.device,
                 compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads,
             )
 
             # Initialize batched model if enabled
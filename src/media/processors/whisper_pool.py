@@ -0,0 +1,171 @@
+"""
+Process-pool Whisper engine for CPU transcription.
+
+A single WhisperTranscriber in the exporter process serves every
+transcription from executor threads, so concurrent voice messages queue on
+one model and the GIL. WhisperProcessPool starts N worker processes that
+each build a transcriber and load the model once in the pool initializer;
+the event loop only sends file paths and gets TranscriptionResult objects
+back. Each worker gets cores / N CTranslate2 threads so the processes do not
+oversubscribe the CPU, and N is bounded by available RAM (one model copy per
+process).
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import psutil
+from loguru import logger
+
+from .transcription import TranscriptionResult, WhisperTranscriber
+
+# CTranslate2 threads per model: fewer starve a worker, more just contend
+THREADS_PER_WORKER = 4
+# Resident size of one large-v3 model per compute type (bytes)
+MODEL_MEMORY = {
+    "int8": 2 * 1024**3,
+    "int8_float16": 2 * 1024**3,
+    "float16": 4 * 1024**3,
+    "float32": 6 * 1024**3,
+}
+# RAM left to the exporter itself
+MEMORY_RESERVE = 2 * 1024**3
+
+# Set in each worker process by _init_worker
+_worker_transcriber: Optional[WhisperTranscriber] = None
+
+
+def whisper_pool_size(
+    compute_type: str = "int8",
+    cpu_count: Optional[int] = None,
+    available_memory: Optional[int] = None,
+) -> int:
+    """Number of worker processes the cores and free RAM can carry."""
+    cores = cpu_count if cpu_count is not None else (os.cpu_count() or 1)
+    if available_memory is None:
+        available_memory = psutil.virtual_memory().available
+    by_cpu = cores // THREADS_PER_WORKER
+    by_memory = (available_memory - MEMORY_RESERVE) // MODEL_MEMORY.get(
+        compute_type, MODEL_MEMORY["float32"]
+    )
+    return max(1, min(by_cpu, by_memory))
+
+
+def _init_worker(transcriber_kwargs: Dict[str, Any], cpu_threads: int) -> None:
+    """Pool initializer: build the transcriber and load the model once."""
+    global _worker_transcriber
+    _worker_transcriber = WhisperTranscriber(
+        **transcriber_kwargs, cpu_threads=cpu_threads, auto_unload_timeout=0
+    )
+    _worker_transcriber.load_model()
+
+
+def _transcribe_in_worker(path: str, language: Optional[str]) -> TranscriptionResult:
+    if _worker_transcriber is None:
+        raise RuntimeError("Whisper worker is not initialized")
+    return _worker_transcriber.transcribe(Path(path), language=language)
+
+
+class WhisperProcessPool:
+    """Worker processes with one resident Whisper model each."""
+
+    def __init__(
+        self,
+        workers: int,
+        device: str = "cpu",
+        compute_type: str = "int8",
+        batch_size: int = 8,
+        duration_threshold: int = 60,
+        use_batched: bool = True,
+        enable_cache: bool = True,
+        cache_dir: Optional[Path] = None,
+    ):
+        self.workers = max(1, int(workers))
+        self.cpu_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._transcriber_kwargs: Dict[str, Any] = {
+            "device": device,
+            "compute_type": compute_type,
+            "batch_size": batch_size,
+            "duration_threshold": duration_threshold,
+            "use_batched": use_batched,
+            "enable_cache": enable_cache,
+            "cache_dir": cache_dir,
+        }
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Statistics
+        self.files_transcribed = 0
+        self.audio_seconds = 0.0
+        self.restarts = 0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Executor, created on first use (models load in the workers)."""
+        if self._executor is None:
+            # spawn: CTranslate2 / OpenMP state is not fork-safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._transcriber_kwargs, self.cpu_threads),
+            )
+            logger.info(
+                f"🎙️ Whisper process pool started: {self.workers} workers × "
+                f"{self.cpu_threads} threads "
+                f"(compute_type={self._transcriber_kwargs['compute_type']})"
+            )
+        return self._executor
+
+    async def transcribe(
+        self, path: Path, language: Optional[str] = None
+    ) -> Optional[TranscriptionResult]:
+        """
+        Transcribe one file in a worker process.
+
+        Returns None when a worker died (e.g. OOM-killed) during the call; the
+        broken pool is dropped and the next call starts a fresh one.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            result = await loop.run_in_executor(
+                executor, _transcribe_in_worker, str(path), language
+            )
+        except BrokenProcessPool:
+            # Every call in flight fails with the same pool: reset and log once
+            if self._executor is executor:
+                self._executor = None
+                self.restarts += 1
+                executor.shutdown(wait=False, cancel_futures=True)
+                logger.error(
+                    f"🎙️ Whisper worker process died, restarting the pool "
+                    f"(restart #{self.restarts})"
+                )
+            return None
+        self.files_transcribed += 1
+        self.audio_seconds += result.duration_seconds or 0.0
+        return result
+
+    def shutdown(self) -> None:
+        """Stop worker processes (frees one model per worker)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info(
+                f"🎙️ Whisper process pool stopped "
+                f"({self.files_transcribed} files, {self.audio_seconds:.0f}s of audio)"
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "cpu_threads": self.cpu_threads,
+            "files_transcribed": self.files_transcribed,
+            "audio_seconds": round(self.audio_seconds, 1),
+            "restarts": self.restarts,
+        }
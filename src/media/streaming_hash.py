@@ -0,0 +1,98 @@
+"""
+SHA-256 of downloaded media without re-reading the file.
+
+StreamingHasher is fed the parts as the downloader writes them. Parts that
+arrive in order update the digest directly; parts that arrive early (parallel
+connections) wait in a bounded buffer until the gap before them is filled.
+Whatever could not be streamed (resumed parts from an earlier run, overflow
+of the buffer) is read from disk once, off the event loop, on finalize.
+
+sha256_file_async() is the fallback for files that were not downloaded
+through a part hook: large reads in the UnifiedThreadPool.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.core.thread_pool import get_thread_pool
+
+# Read size for off-loop hashing (fewer syscalls than 8 KiB steps)
+HASH_READ_SIZE = 4 * 1024 * 1024
+# Out-of-order parts kept in memory per file before streaming gives up
+MAX_PENDING_BYTES = 32 * 1024 * 1024
+
+
+def _sha256_range(path: Path, hasher: "hashlib._Hash", start: int) -> None:
+    """Continue `hasher` with the file content from `start` to EOF."""
+    with open(path, "rb", buffering=0) as f:
+        f.seek(start)
+        while chunk := f.read(HASH_READ_SIZE):
+            hasher.update(chunk)
+
+
+def sha256_file_sync(path: Path) -> str:
+    hasher = hashlib.sha256()
+    _sha256_range(path, hasher, 0)
+    return hasher.hexdigest()
+
+
+async def sha256_file_async(path: Path) -> str:
+    """SHA-256 of an existing file, computed in the unified thread pool."""
+    digest: str = await get_thread_pool().submit(sha256_file_sync, Path(path))
+    return digest
+
+
+class StreamingHasher:
+    """Incremental SHA-256 over (offset, data) parts of one file."""
+
+    def __init__(self, path: Path, max_pending_bytes: int = MAX_PENDING_BYTES):
+        self.path = Path(path)
+        self.max_pending_bytes = max_pending_bytes
+        self.position = 0  # Bytes hashed so far (contiguous prefix)
+        self.streamed_bytes = 0
+        self._hasher = hashlib.sha256()
+        self._pending: Dict[int, bytes] = {}
+        self._pending_bytes = 0
+        self._overflow = False
+
+    def update_at(self, offset: int, data: bytes) -> None:
+        """Feed a part written at `offset` (any order, duplicates ignored)."""
+        if offset < self.position or not data:
+            return
+        if offset > self.position:
+            if self._overflow or offset in self._pending:
+                return
+            if self._pending_bytes + len(data) > self.max_pending_bytes:
+                # The gap stays open: the rest is read from disk on finalize
+                self._overflow = True
+                self._pending.clear()
+                self._pending_bytes = 0
+                return
+            self._pending[offset] = bytes(data)
+            self._pending_bytes += len(data)
+            return
+
+        self._consume(data)
+        while self.position in self._pending:
+            chunk = self._pending.pop(self.position)
+            self._pending_bytes -= len(chunk)
+            self._consume(chunk)
+
+    def _consume(self, data: bytes) -> None:
+        self._hasher.update(data)
+        self.position += len(data)
+        self.streamed_bytes += len(data)
+
+    async def hexdigest(self, file_size: Optional[int] = None) -> str:
+        """
+        Final digest; the part of the file not streamed is hashed off-loop.
+
+        The state is consumed: call once, after the file is complete.
+        """
+        self._pending.clear()
+        if file_size is None or self.position < file_size:
+            await get_thread_pool().submit(
+                _sha256_range, self.path, self._hasher, self.position
+            )
+        return self._hasher.hexdigest()
@@ -0,0 +1,135 @@
+"""
+Content-keyed transcript cache shared across chats and re-exports.
+
+WhisperTranscriber's own cache keys a transcript by file size, mtime and
+name and writes one JSON file per transcript, so a voice note forwarded to
+another chat, downloaded again or moved is transcribed again. This cache
+keys by what the audio is:
+
+    doc:<id>:<size>:<dc>|<language>|<compute_type>   (Telegram identity)
+    sha256:<hex>|<language>|<compute_type>           (files without one)
+
+and keeps every transcript in a CacheLogStore log (src/core/log_store.py).
+Only key -> record size is held in memory, in LRU order; when the live
+transcripts exceed max_bytes the least recently used ones are evicted.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from src.core.log_store import CacheLogStore, LogWriteBuffer
+
+
+def transcript_key(identity: str, language: Optional[str], compute_type: str) -> str:
+    return f"{identity}|{language or 'auto'}|{compute_type}"
+
+
+class TranscriptCache:
+    """Size-bounded transcript store (see module docstring)."""
+
+    def __init__(self, path: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._log = CacheLogStore(path)
+        # key -> record size, least recently used first
+        self._lru: "OrderedDict[str, int]" = OrderedDict()
+        self._writes = LogWriteBuffer(self._log, lambda: self._writes.frames(self._lru))
+        self._live_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Loading / persistence
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        try:
+            keys = self._log.load(values=False)
+        except Exception as e:
+            logger.warning(f"Failed to load transcript cache: {e}, starting fresh")
+            self._log.set_aside()
+            return
+        for key in keys:
+            size = self._log.record_size(key)
+            self._lru[key] = size
+            self._live_bytes += size
+        logger.info(f"Loaded transcript cache: {len(self._lru)} transcripts")
+        self._evict()
+        self.flush()
+        if self._log.should_compact():
+            self.compact()
+
+    def _drop(self, key: str) -> None:
+        size = self._lru.pop(key, None)
+        if size is not None:
+            self._live_bytes -= size
+
+    def _evict(self) -> None:
+        """Drop least recently used transcripts until the live size fits."""
+        while self._live_bytes > self.max_bytes and len(self._lru) > 1:
+            key = next(iter(self._lru))
+            self._drop(key)
+            self._writes.put(key, None)
+            self._stats["evicted"] += 1
+
+    def flush(self) -> None:
+        """Write buffered records to the log (compacting it when needed)."""
+        try:
+            self._writes.flush()
+        except Exception as e:
+            logger.error(f"Failed to save transcript cache: {e}")
+
+    def compact(self) -> None:
+        """Rewrite the log with the live transcripts in LRU order."""
+        try:
+            self._writes.compact()
+        except Exception as e:
+            logger.error(f"Failed to compact transcript cache: {e}")
+
+    # ------------------------------------------------------------------
+    # Records
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored transcript record (text, language, duration_seconds) or None."""
+        if key not in self._lru:
+            self._stats["misses"] += 1
+            return None
+        try:
+            found = self._writes.read_many([key])
+        except Exception as e:
+            logger.debug(f"Transcript cache read failed: {e}")
+            found = []
+        record = found[0][1] if found else None
+        if record is None:
+            self._stats["misses"] += 1
+            return None
+        self._lru.move_to_end(key)
+        self._stats["hits"] += 1
+        return record
+
+    def put(self, key: str, record: Dict[str, Any]) -> None:
+        """Store a transcript (buffered); evicts LRU entries beyond max_bytes."""
+        self._drop(key)
+        frame = self._log.encode_set(key, record)
+        self._lru[key] = len(frame)
+        self._live_bytes += len(frame)
+        self._writes.put(key, frame)
+        self._stats["stored"] += 1
+        self._evict()
+        if self._writes.full:
+            self.flush()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "entries": len(self._lru),
+            "live_bytes": self._live_bytes,
+            **self._log.stats(),
+        }
@@ -0,0 +1,239 @@
+"""
+Background transcription stage for voice messages.
+
+The export path only submits voice files here and writes a marker into the
+note; Whisper runs on N workers outside the message pipeline, so a slow
+transcription never holds a message slot. Jobs whose file is still being
+downloaded by the background queue wait until the queue reports the path done
+(notify_downloaded), so nothing polls the filesystem. Ready jobs are ordered
+by audio duration (file size when Telegram reported none):
+
+    size_asc  - shortest first, transcripts appear as early as possible
+    size_desc - longest first (LPT), best makespan across the workers
+    none      - submission order
+
+The exporter awaits the results of a chat before finalizing its file and
+substitutes them for the markers.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+SORTING_MODES = ("none", "size_asc", "size_desc")
+
+
+@dataclass(slots=True)
+class TranscriptionJob:
+    """A voice file waiting for (or being) transcribed."""
+
+    path: Path
+    future: asyncio.Future  # Resolves to the transcript text (None on failure)
+    duration: Optional[float] = None
+    size: int = 0
+    identity: Optional[str] = None  # Content identity for the transcript cache
+    submitted_at: float = field(default_factory=time.time)
+
+    @property
+    def cost(self) -> float:
+        """Scheduling weight: duration in seconds, else size in KB."""
+        if self.duration:
+            return float(self.duration)
+        return self.size / 1024
+
+
+def default_transcription_workers(device: str = "cpu") -> int:
+    """Worker count for max_concurrent=0: one per GPU stream, else cores/4."""
+    if "cuda" in (device or ""):
+        return 2
+    return max(1, min(4, (os.cpu_count() or 1) // 4))
+
+
+class TranscriptionQueue:
+    """Duration-ordered transcription jobs processed by N asyncio workers."""
+
+    def __init__(
+        self,
+        transcribe: Callable[[Path, Optional[str]], Awaitable[Optional[str]]],
+        workers: int = 2,
+        sorting: str = "size_asc",
+        is_pending: Optional[Callable[[Path], bool]] = None,
+    ):
+        """
+        Args:
+            transcribe: Coroutine (path, identity) returning the text of one
+                file (None on failure)
+            workers: Number of concurrent transcriptions
+            sorting: 'none', 'size_asc' or 'size_desc'
+            is_pending: True while a path is still being downloaded; such jobs
+                wait for notify_downloaded(path)
+        """
+        if sorting not in SORTING_MODES:
+            logger.warning(f"Unknown transcription sorting '{sorting}', using 'none'")
+            sorting = "none"
+        self.transcribe = transcribe
+        self.workers = max(1, workers)
+        self.sorting = sorting
+        self.is_pending = is_pending or (lambda path: False)
+
+        self._jobs: Dict[Path, TranscriptionJob] = {}
+        self._ready: List[Tuple[float, int, TranscriptionJob]] = []
+        self._waiting: Dict[Path, TranscriptionJob] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._worker_tasks: List[asyncio.Task] = []
+
+        self._completed = 0
+        self._failed = 0
+        self._busy_time = 0.0
+        self._audio_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        if self._worker_tasks:
+            return
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(f"transcriber_{i}"))
+            for i in range(self.workers)
+        ]
+        logger.info(
+            f"🎙️ Transcription queue started: {self.workers} workers, sorting={self.sorting}"
+        )
+
+    async def stop(self) -> None:
+        """Cancel the workers; unfinished jobs resolve to None."""
+        for task in self._worker_tasks:
+            task.cancel()
+        if self._worker_tasks:
+            await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks.clear()
+        for job in self._jobs.values():
+            if not job.future.done():
+                job.future.set_result(None)
+        self._ready.clear()
+        self._waiting.clear()
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        path: Path,
+        duration: Optional[float] = None,
+        size: int = 0,
+        identity: Optional[str] = None,
+    ) -> asyncio.Future:
+        """Schedule a file (once per path) and return the future of its text."""
+        job = self._jobs.get(path)
+        if job is not None:
+            return job.future
+
+        future = asyncio.get_running_loop().create_future()
+        job = TranscriptionJob(
+            path=path,
+            future=future,
+            duration=duration,
+            size=size,
+            identity=identity,
+        )
+        self._jobs[path] = job
+        if self.is_pending(path):
+            self._waiting[path] = job
+        else:
+            self._promote(job)
+        return future
+
+    def notify_downloaded(self, path: Path) -> None:
+        """The download queue has no unfinished download of path left."""
+        job = self._waiting.pop(path, None)
+        if job is not None:
+            self._promote(job)
+
+    async def wait_for(
+        self, paths: Iterable[Path], timeout: Optional[float] = None
+    ) -> Dict[Path, Optional[str]]:
+        """
+        Results for the given files; files never submitted (e.g. written by an
+        interrupted run) are scheduled first.
+        """
+        futures = {path: self.submit(path) for path in paths}
+        if not futures:
+            return {}
+        done, _ = await asyncio.wait(futures.values(), timeout=timeout)
+        results = {}
+        for path, future in futures.items():
+            results[path] = future.result() if future in done else None
+            if future in done:
+                self._jobs.pop(path, None)  # Delivered: release the text
+        return results
+
+    def _promote(self, job: TranscriptionJob) -> None:
+        """Queue a job whose download is over: ready if the file exists, else failed."""
+        try:
+            size = job.path.stat().st_size
+        except OSError:
+            logger.debug(f"Transcription skipped, file missing: {job.path}")
+            self._failed += 1
+            job.future.set_result(None)
+            return
+        job.size = job.size or size
+        heapq.heappush(self._ready, (self._order(job), next(self._seq), job))
+        self._wakeup.set()
+
+    def _order(self, job: TranscriptionJob) -> float:
+        if self.sorting == "size_asc":
+            return job.cost
+        if self.sorting == "size_desc":
+            return -job.cost
+        return 0.0
+
+    async def _next_job(self) -> TranscriptionJob:
+        while not self._ready:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        return heapq.heappop(self._ready)[2]
+
+    async def _worker(self, name: str) -> None:
+        while True:
+            job = await self._next_job()
+            started = time.time()
+            try:
+                text = await self.transcribe(job.path, job.identity)
+            except asyncio.CancelledError:
+                job.future.set_result(None)
+                raise
+            except Exception as e:
+                logger.warning(f"{name}: transcription failed for {job.path.name}: {e}")
+                text = None
+            self._busy_time += time.time() - started
+            if text:
+                self._completed += 1
+                self._audio_seconds += job.duration or 0.0
+            else:
+                self._failed += 1
+            if not job.future.done():
+                job.future.set_result(text)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "sorting": self.sorting,
+            "submitted": len(self._jobs),
+            "waiting_download": len(self._waiting),
+            "ready": len(self._ready),
+            "completed": self._completed,
+            "failed": self._failed,
+            "busy_time_s": round(self._busy_time, 2),
+            "audio_seconds": round(self._audio_seconds, 1),
+        }
@@ -0,0 +1,285 @@
+"""
+Streaming reader/writer for sharded-fetch spill files.
+
+Format (unchanged from the original ShardedTelegramManager._fetch_chunk writer):
+
+    repeated chunks of
+        [length: 4 bytes, big-endian] [flag: 1 byte, 1 = zlib] [payload: length bytes]
+    payload = msgpack array of lightweight message dicts (optionally zlib-compressed)
+
+The writer streams each chunk through msgpack.Packer and zlib.compressobj and
+patches the length prefix afterwards, so a chunk never exists as one packed or
+compressed blob. The reader maps the file with mmap and feeds bounded slices
+through zlib.decompressobj into msgpack.Unpacker, yielding one message dict
+at a time: memory stays bounded by READ_STEP regardless of chunk size.
+
+This module is a standalone tool, not part of the export path. The streaming
+workers used by fetch_messages keep Message objects in memory and produce no
+spill files; only the file-based worker mode (_worker_task / _fetch_chunk),
+which nothing calls any more, writes this format, with its own inline encoder.
+SpillWriter and the readers exist to produce, inspect and verify such files
+offline.
+
+Inspect / verify spill files:
+
+    python -m src.shard_spill inspect worker_0.bin [worker_1.bin ...]
+    python -m src.shard_spill verify worker_0.bin
+"""
+
+import argparse
+import mmap
+import struct
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+import msgpack
+
+CHUNK_HEADER = struct.Struct(">IB")  # payload length, compression flag
+FLAG_RAW = 0
+FLAG_ZLIB = 1
+
+# Compressed bytes fed to the decompressor per step; decompressed output per
+# step is capped at the same size
+READ_STEP = 64 * 1024
+
+
+class SpillFormatError(ValueError):
+    """Raised when a spill file is truncated or corrupted."""
+
+
+class SpillWriter:
+    """Appends message chunks to an open binary spill file."""
+
+    def __init__(self, f: BinaryIO, compress: bool = True, compression_level: int = 1):
+        self._f = f
+        self.compress = compress
+        self.compression_level = compression_level
+        self.chunks_written = 0
+        self.records_written = 0
+        self.bytes_written = 0
+
+    def write_chunk(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Write one chunk; returns the payload size in bytes.
+
+        The length prefix is written as a placeholder and patched once the
+        streamed payload is complete (the file must be seekable).
+        """
+        f = self._f
+        header_pos = f.tell()
+        flag = FLAG_ZLIB if self.compress else FLAG_RAW
+        f.write(CHUNK_HEADER.pack(0, flag))
+
+        packer = msgpack.Packer(use_bin_type=True)
+        compressor = zlib.compressobj(self.compression_level) if self.compress else None
+        size = 0
+
+        def _emit(data: bytes) -> None:
+            nonlocal size
+            if compressor is not None:
+                data = compressor.compress(data)
+            if data:
+                f.write(data)
+                size += len(data)
+
+        _emit(packer.pack_array_header(len(records)))
+        for record in records:
+            _emit(packer.pack(record))
+        if compressor is not None:
+            tail = compressor.flush()
+            f.write(tail)
+            size += len(tail)
+
+        end_pos = f.tell()
+        f.seek(header_pos)
+        f.write(CHUNK_HEADER.pack(size, flag))
+        f.seek(end_pos)
+        f.flush()
+
+        self.chunks_written += 1
+        self.records_written += len(records)
+        self.bytes_written += CHUNK_HEADER.size + size
+        return size
+
+
+def _payload_pieces(view: memoryview, flag: int) -> Iterator[bytes]:
+    """Yield the decoded payload of one chunk in bounded pieces."""
+    if flag == FLAG_RAW:
+        for pos in range(0, len(view), READ_STEP):
+            yield view[pos : pos + READ_STEP].tobytes()
+        return
+    if flag != FLAG_ZLIB:
+        raise SpillFormatError(f"unknown compression flag {flag}")
+
+    decompressor = zlib.decompressobj()
+    try:
+        for pos in range(0, len(view), READ_STEP):
+            data = decompressor.decompress(view[pos : pos + READ_STEP], READ_STEP)
+            while data:
+                yield data
+                data = decompressor.decompress(
+                    decompressor.unconsumed_tail, READ_STEP
+                )
+        data = decompressor.flush()
+        if data:
+            yield data
+    except zlib.error as e:
+        raise SpillFormatError(f"corrupted zlib payload: {e}") from e
+    if not decompressor.eof:
+        raise SpillFormatError("truncated zlib payload")
+
+
+def _iter_chunk_records(view: memoryview, flag: int) -> Iterator[Any]:
+    """Stream the records of one chunk payload."""
+    unpacker = msgpack.Unpacker(raw=False)
+    pieces = _payload_pieces(view, flag)
+    remaining: Optional[int] = None
+
+    while True:
+        try:
+            if remaining is None:
+                remaining = unpacker.read_array_header()
+            if remaining == 0:
+                break
+            record = unpacker.unpack()
+            remaining -= 1
+            yield record
+        except msgpack.OutOfData:
+            piece = next(pieces, None)
+            if piece is None:
+                raise SpillFormatError("chunk payload ended mid-record")
+            unpacker.feed(piece)
+        except (msgpack.UnpackException, ValueError) as e:
+            if isinstance(e, SpillFormatError):
+                raise
+            raise SpillFormatError(f"invalid msgpack payload: {e}") from e
+
+    # Trailing bytes after the array mean the chunk was not written by SpillWriter
+    for piece in pieces:
+        if piece:
+            raise SpillFormatError("unexpected data after chunk records")
+
+
+def _iter_chunks(mapped: Union[mmap.mmap, bytes]) -> Iterator[tuple]:
+    """Yield (offset, flag, payload view) for every chunk in a mapped file."""
+    view = memoryview(mapped)
+    offset = 0
+    total = len(view)
+    try:
+        while offset < total:
+            if offset + CHUNK_HEADER.size > total:
+                raise SpillFormatError(f"truncated chunk header at offset {offset}")
+            length, flag = CHUNK_HEADER.unpack_from(view, offset)
+            start = offset + CHUNK_HEADER.size
+            if start + length > total:
+                raise SpillFormatError(
+                    f"chunk at offset {offset} needs {length} bytes, file ends first"
+                )
+            payload = view[start : start + length]
+            try:
+                yield offset, flag, payload
+            finally:
+                payload.release()
+            offset = start + length
+    finally:
+        view.release()
+
+
+def iter_spill_file(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """Stream message dicts from one spill file with bounded memory."""
+    with open(path, "rb") as f:
+        if Path(path).stat().st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for _, flag, payload in _iter_chunks(mapped):
+                yield from _iter_chunk_records(payload, flag)
+
+
+def iter_spill_files(paths: Iterable[Union[str, Path]]) -> Iterator[Dict[str, Any]]:
+    """Stream message dicts from several spill files (e.g. one per shard worker)."""
+    for path in paths:
+        yield from iter_spill_file(path)
+
+
+def inspect_spill_file(path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Walk a spill file and summarize it.
+
+    Never raises on corruption: the problem is reported in "error" and the
+    counters cover everything read before it.
+    """
+    summary: Dict[str, Any] = {
+        "path": str(path),
+        "file_bytes": Path(path).stat().st_size,
+        "chunks": 0,
+        "compressed_chunks": 0,
+        "records": 0,
+        "min_id": None,
+        "max_id": None,
+        "error": None,
+    }
+    try:
+        with open(path, "rb") as f:
+            if summary["file_bytes"] == 0:
+                return summary
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for offset, flag, payload in _iter_chunks(mapped):
+                    summary["chunks"] += 1
+                    summary["compressed_chunks"] += flag == FLAG_ZLIB
+                    try:
+                        for record in _iter_chunk_records(payload, flag):
+                            summary["records"] += 1
+                            msg_id = record.get("id") if isinstance(record, dict) else None
+                            if isinstance(msg_id, int):
+                                if summary["min_id"] is None or msg_id < summary["min_id"]:
+                                    summary["min_id"] = msg_id
+                                if summary["max_id"] is None or msg_id > summary["max_id"]:
+                                    summary["max_id"] = msg_id
+                    except SpillFormatError as e:
+                        raise SpillFormatError(f"chunk at offset {offset}: {e}") from e
+    except SpillFormatError as e:
+        summary["error"] = str(e)
+    return summary
+
+
+def verify_spill_file(path: Union[str, Path]) -> Dict[str, Any]:
+    """Like inspect_spill_file(), but raise SpillFormatError on corruption."""
+    summary = inspect_spill_file(path)
+    if summary["error"]:
+        raise SpillFormatError(f"{path}: {summary['error']}")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.shard_spill",
+        description="Inspect or verify sharded fetch spill files.",
+    )
+    parser.add_argument("command", choices=["inspect", "verify"])
+    parser.add_argument("paths", nargs="+", type=Path)
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.paths:
+        summary = inspect_spill_file(path)
+        ids = (
+            f"ids {summary['min_id']}..{summary['max_id']}"
+            if summary["min_id"] is not None
+            else "no ids"
+        )
+        status = "OK" if not summary["error"] else f"ERROR: {summary['error']}"
+        print(
+            f"{path}: {summary['chunks']} chunks ({summary['compressed_chunks']} zlib), "
+            f"{summary['records']} messages, {ids}, {summary['file_bytes']} bytes - {status}"
+        )
+        failed += bool(summary["error"])
+
+    if args.command == "verify" and failed:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
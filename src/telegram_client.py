@@ -1,4 +1,5 @@
 import asyncio
+import contextlib
 import re
 import sys
 import os
@@ -23,6 +24,7 @@ from telethon.tl.types import Channel, ForumTopic, Message, User
 
 from src.config import ITER_MESSAGES_TIMEOUT, Config, ExportTarget
 from src.core.connection import PoolType
+from src.core.rate_limiter import HISTORY, OTHER, get_rate_limiter
 from src.exceptions import TelegramConnectionError
 from src.input_peer_cache import InputPeerCache
 from src.logging_context import update_context_prefix
@@ -239,6 +241,14 @@ class TelegramManager:
         self._throttle_detector = ThrottleDetector(window_size=100, threshold_multiplier=3.0)
         logger.debug("ThrottleDetector initialized")
 
+        # Optional shared cap on concurrent history requests; set by the
+        # multi-target export scheduler so parallel exports share one budget
+        self.request_semaphore: Optional[asyncio.Semaphore] = None
+
+        # Account-wide token buckets shared with sharded workers and media
+        # downloads; FloodWait from any caller pauses the whole method class
+        self.rate_limiter = get_rate_limiter(config)
+
     async def connect(self) -> bool:
         """
         Connect and authenticate with Telegram.
@@ -387,7 +397,8 @@ class TelegramManager:
             return await _resolve_operation()
         except FloodWaitError as e:
             logger.warning(f"Flood wait: {e.seconds}s. Waiting...")
-            await asyncio.sleep(e.seconds + 1)
+            self.rate_limiter.report_flood_wait(OTHER, e.seconds + 1)
+            await self.rate_limiter.acquire(OTHER)
             try:
                 return await _resolve_operation()
             except Exception:
@@ -573,6 +584,39 @@ class TelegramManager:
         else:
             effective_limit = limit
 
+        async for batch in self._fetch_message_batches(
+            entity, limit=effective_limit, min_id=min_id, offset_id=offset_id
+        ):
+            for message in batch:
+                yield message
+
+    async def fetch_message_batches(
+        self,
+        entity: Any,
+        limit: Optional[int] = None,
+        min_id: Optional[int] = None,
+    ) -> AsyncGenerator[List[Message], None]:
+        """
+        Fetch messages as the get_messages batches they arrive in (oldest first).
+
+        Same retry/filtering semantics as fetch_messages(), but without the
+        per-message generator hop; used by the batch-mode AsyncPipeline.
+        """
+        async for batch in self._fetch_message_batches(
+            entity, limit=limit, min_id=min_id
+        ):
+            yield batch
+
+    async def _fetch_message_batches(
+        self,
+        entity: Any,
+        limit: Optional[int] = None,
+        min_id: Optional[int] = None,
+        offset_id: int = 0,
+    ) -> AsyncGenerator[List[Message], None]:
+        """Batch fetch loop shared by fetch_messages() and fetch_message_batches()."""
+        effective_limit = limit
+
         # Optimization: Use batch fetching with get_messages instead of iter_messages
         batch_size = getattr(self.config, "batch_fetch_size", 100)
         total_fetched = 0
@@ -601,14 +645,15 @@ class TelegramManager:
                     # Note: using reverse=True to fetch messages in chronological order (oldest first).
                     # We get a batch of oldest messages first and then use the last element's id as the offset
                     # for the next batch to continue forward in time.
-                    batch_messages = await self.client.get_messages(
-                        entity=entity,
-                        limit=current_batch_limit,
-                        offset_id=current_offset_id,
-                        min_id=min_id or 0,
-                        wait_time=self.config.request_delay,
-                        reverse=True,
-                    )
+                    async with self._request_slot():
+                        batch_messages = await self.client.get_messages(
+                            entity=entity,
+                            limit=current_batch_limit,
+                            offset_id=current_offset_id,
+                            min_id=min_id or 0,
+                            wait_time=self.config.request_delay,
+                            reverse=True,
+                        )
                     break  # Success
                 except FloodWaitError as e:
                     retry_count += 1
@@ -616,9 +661,10 @@ class TelegramManager:
                     logger.warning(
                         f"⏳ FloodWait detected: need to wait {wait_time}s (attempt {retry_count}/{max_retries})"
                     )
-                    if retry_count < max_retries:
-                        await asyncio.sleep(wait_time + 1)
-                    else:
+                    # The penalty is shared: every history request (sharded
+                    # workers, other exports) waits it out in _request_slot()
+                    self.rate_limiter.report_flood_wait(HISTORY, wait_time + 1)
+                    if retry_count >= max_retries:
                         logger.error(
                             "❌ Max retries reached for batch fetching (FloodWait)"
                         )
@@ -643,23 +689,43 @@ class TelegramManager:
                 last_id = batch_messages[-1].id
                 logger.info(f"📦 Batch: {len(batch_messages)} messages, IDs {first_id} → {last_id} (reverse=True)")
             
+            batch = []
             for message in batch_messages:
                 # Accept Telethon Message instances or any message-like object with an id.
                 # Skip service messages that have an 'action' attribute set.
                 if getattr(message, "action", None):
                     continue
-                yield message
+                batch.append(message)
                 total_fetched += 1
 
                 if effective_limit is not None and total_fetched >= effective_limit:
                     break
 
+            if batch:
+                yield batch
+
             # Update offset for next batch
             # With reverse=True: batch goes from old→new, so last message is newest
             # Next batch starts AFTER this ID to continue forward in time
             if batch_messages:
                 current_offset_id = batch_messages[-1].id
 
+    @contextlib.asynccontextmanager
+    async def _request_slot(self, method_class: str = HISTORY):
+        """
+        Pace one API request through the shared rate limiter, then hold a
+        request_semaphore slot (when the export scheduler set one).
+        """
+        rate_limiter = getattr(self, "rate_limiter", None)
+        if rate_limiter is not None:
+            await rate_limiter.acquire(method_class)
+        semaphore = getattr(self, "request_semaphore", None)
+        if semaphore is None:
+            yield
+            return
+        async with semaphore:
+            yield
+
     async def _yield_with_timeout(self, value):
         """Helper to yield value without blocking (used with asyncio.wait_for)."""
         return value
@@ -1399,15 +1465,16 @@ class TelegramManager:
             while retry_count < max_retries:
                 try:
                     # Fetch batch of topic messages with latency tracking
-                    start_time = time.time()
-                    batch_messages = await self.client.get_messages(
-                        entity=entity,
-                        limit=current_batch_limit,
-                        offset_id=current_offset_id,
-                        reply_to=topic_id,
-                        min_id=min_id or 0,
-                        wait_time=self.config.request_delay,
-                    )
+                    async with self._request_slot():
+                        start_time = time.time()
+                        batch_messages = await self.client.get_messages(
+                            entity=entity,
+                            limit=current_batch_limit,
+                            offset_id=current_offset_id,
+                            reply_to=topic_id,
+                            min_id=min_id or 0,
+                            wait_time=self.config.request_delay,
+                        )
                     
                     # Record latency for throttle detection
                     latency_ms = (time.time() - start_time) * 1000
@@ -1420,15 +1487,14 @@ class TelegramManager:
                     logger.warning(
                         f"⏳ FloodWait detected in topic {topic_id}: need to wait {wait_time}s (attempt {retry_count}/{max_retries})"
                     )
-                    if retry_count < max_retries:
-                        # Adaptive backoff: increase wait time if throttling detected
-                        if self._throttle_detector.is_throttled():
-                            extra_wait = min(wait_time * 0.5, 60)  # Add up to 60s extra
-                            logger.info(f"🐌 Throttling detected, adding {extra_wait:.0f}s extra wait")
-                            await asyncio.sleep(wait_time + extra_wait)
-                        else:
-                            await asyncio.sleep(wait_time + 1)
-                    else:
+                    # Adaptive backoff: increase wait time if throttling detected
+                    extra_wait = 1
+                    if self._throttle_detector.is_throttled():
+                        extra_wait = min(wait_time * 0.5, 60)  # Add up to 60s extra
+                        logger.info(f"🐌 Throttling detected, adding {extra_wait:.0f}s extra wait")
+                    # Shared penalty: the retry waits for it in _request_slot()
+                    self.rate_limiter.report_flood_wait(HISTORY, wait_time + extra_wait)
+                    if retry_count >= max_retries:
                         logger.error(
                             f"❌ Max retries reached for topic {topic_id} batch fetching"
                         )
@@ -18,6 +18,7 @@ from telethon.tl.functions.account import (
 from telethon.tl.functions.messages import GetHistoryRequest
 
 from src.config import Config
+from src.core.rate_limiter import HISTORY
 from src.logging_context import set_worker_context
 from src.telegram_client import TelegramManager
 from src.utils import logger  # Use configured logger from utils
@@ -731,9 +732,12 @@ class ShardedTelegramManager(TelegramManager):
 
             wrapped_req = InvokeWithTakeoutRequest(takeout_id=takeout_id, query=req)
 
-            # Measure API request latency
-            request_start = time.time()
             while True:
+                # Shared pacing: all workers draw from one account-wide bucket
+                # and wait out a FloodWait reported by any of them
+                await self.rate_limiter.acquire(HISTORY)
+                # Measure API request latency (excluding rate limiter waits)
+                request_start = time.time()
                 try:
                     stats["requests"] += 1
                     res = await client(wrapped_req)
@@ -743,7 +747,7 @@ class ShardedTelegramManager(TelegramManager):
                         f"⏳ Worker {worker_idx} hit FloodWait: {e.seconds}s"
                     )
                     stats["flood_waits"] += 1
-                    await asyncio.sleep(e.seconds + 1)
+                    self.rate_limiter.report_flood_wait(HISTORY, e.seconds + 1)
 
             # Record request latency
             request_latency_ms = (time.time() - request_start) * 1000
@@ -983,9 +987,12 @@ class ShardedTelegramManager(TelegramManager):
 
             wrapped_req = InvokeWithTakeoutRequest(takeout_id=takeout_id, query=req)
 
-            # Measure API request latency
-            request_start = time.time()
             while True:
+                # Shared pacing: all workers draw from one account-wide bucket
+                # and wait out a FloodWait reported by any of them
+                await self.rate_limiter.acquire(HISTORY)
+                # Measure API request latency (excluding rate limiter waits)
+                request_start = time.time()
                 try:
                     stats["requests"] += 1
                     res = await client(wrapped_req)
@@ -995,7 +1002,7 @@ class ShardedTelegramManager(TelegramManager):
                         f"⏳ Worker {worker_idx} hit FloodWait: {e.seconds}s"
                     )
                     stats["flood_waits"] += 1
-                    await asyncio.sleep(e.seconds + 1)
+                    self.rate_limiter.report_flood_wait(HISTORY, e.seconds + 1)
 
             # Record request latency
             request_latency_ms = (time.time() - request_start) * 1000
@@ -1662,3 +1669,25 @@ class ShardedTelegramManager(TelegramManager):
         finally:
             await self._cleanup_sharding()
             # Note: No temp files to cleanup with streaming approach!
+
+    async def fetch_message_batches(
+        self,
+        entity: Any,
+        limit: Optional[int] = None,
+        min_id: Optional[int] = None,
+    ) -> AsyncGenerator[List["types.Message"], None]:  # type: ignore
+        """
+        Batch variant of fetch_messages() for the batch-mode AsyncPipeline.
+
+        Shards stream messages one by one, so regroup them into batches of
+        batch_fetch_size; the non-sharded fallback keeps the same batching.
+        """
+        batch_size = max(1, int(getattr(self.config, "batch_fetch_size", 100)))
+        batch: List[Any] = []
+        async for message in self.fetch_messages(entity, limit=limit, min_id=min_id):
+            batch.append(message)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
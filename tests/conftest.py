@@ -71,6 +71,7 @@ def mock_cache_manager():
     cache = MagicMock()
     cache.get = AsyncMock(return_value=None)
     cache.set = AsyncMock()
+    cache.flush_all_pending = AsyncMock()
     cache.load_cache = AsyncMock()
     return cache
 
@@ -199,3 +199,121 @@ async def test_pipeline_handles_processing_exceptions():
     assert stats.get("errors", 0) >= 1, (
         "Pipeline should have recorded at least one processing error"
     )
+
+
+class FakeBatchTelegramManager(FakeTelegramManager):
+    """Adds fetch_message_batches() yielding fixed-size batches."""
+
+    def __init__(self, messages: List[FakeMessage], batch_size: int):
+        super().__init__(messages)
+        self._batch_size = batch_size
+
+    async def fetch_message_batches(self, entity, limit: int = None, min_id: int = None):
+        for i in range(0, len(self._messages), self._batch_size):
+            yield self._messages[i : i + self._batch_size]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_batch_mode_preserves_order_and_bounds_inflight():
+    messages = [FakeMessage(i) for i in range(1, 101)]
+    tm = FakeBatchTelegramManager(messages, batch_size=10)
+
+    async def process_batch_fn(batch):
+        # Later batches finish first to exercise the reorder buffer
+        await asyncio.sleep(0.001 * (10 - batch[0].id // 10))
+        return [None if m.id % 7 == 0 else f"MSG {m.id}" for m in batch]
+
+    writes: List[List[str]] = []
+
+    async def writer_fn(results):
+        writes.append(results)
+
+    pipeline = AsyncPipeline(process_workers=4)
+    stats = await pipeline.run_batches(
+        entity=None,
+        telegram_manager=tm,
+        process_batch_fn=process_batch_fn,
+        writer_fn=writer_fn,
+        max_inflight_messages=30,
+    )
+
+    written = [line for batch in writes for line in batch]
+    assert written == [f"MSG {i}" for i in range(1, 101) if i % 7]
+    assert len(writes) == 10  # one writer call per batch
+    assert stats["batches"] == 10
+    assert stats["processed_count"] == len(written)
+    assert stats["max_inflight_messages"] <= 30
+
+
+@pytest.mark.asyncio
+async def test_pipeline_batch_mode_counts_failed_batches():
+    messages = [FakeMessage(i) for i in range(1, 26)]
+    tm = FakeTelegramManager(messages)  # no fetch_message_batches: grouped fallback
+
+    async def process_batch_fn(batch):
+        if any(m.id == 3 for m in batch):
+            raise RuntimeError("boom")
+        return [f"MSG {m.id}" for m in batch]
+
+    writes = []
+
+    async def writer_fn(results):
+        writes.extend(results)
+
+    stats = await AsyncPipeline(process_workers=2).run_batches(
+        entity=None,
+        telegram_manager=tm,
+        process_batch_fn=process_batch_fn,
+        writer_fn=writer_fn,
+        max_inflight_messages=10,
+    )
+
+    # The fallback groups all 25 messages into one batch, which failed
+    assert writes == []
+    assert stats["errors"] == 25
+
+
+@pytest.mark.asyncio
+async def test_pipeline_stage_metrics_flag_errors_not_counts(monkeypatch):
+    from src import monitoring
+    from src.monitoring import MetricsCollector
+
+    collector = MetricsCollector()
+    monkeypatch.setattr(monitoring, "get_metrics_collector", lambda: collector)
+
+    messages = [FakeMessage(i) for i in range(1, 11)]
+
+    async def render_fn(payloads):
+        return payloads
+
+    async def process_fn(message):
+        return f"MSG {message.id}"
+
+    async def writer_fn(result):
+        pass
+
+    await AsyncPipeline(process_workers=2).run(
+        entity=None,
+        telegram_manager=FakeTelegramManager(messages),
+        process_fn=process_fn,
+        writer_fn=writer_fn,
+        render_fn=render_fn,
+    )
+    for name in ("pipeline_fetch", "pipeline_process", "pipeline_write", "pipeline_render"):
+        assert collector.stages[name].errors == 0
+
+    messages[3].raise_on_process = True
+
+    async def failing_process_fn(message):
+        if message.raise_on_process:
+            raise ValueError("boom")
+        return f"MSG {message.id}"
+
+    await AsyncPipeline(process_workers=2).run(
+        entity=None,
+        telegram_manager=FakeTelegramManager(messages),
+        process_fn=failing_process_fn,
+        writer_fn=writer_fn,
+    )
+    assert collector.stages["pipeline_process"].errors == 1
+    assert collector.stages["pipeline_write"].errors == 0
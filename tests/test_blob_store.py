@@ -0,0 +1,138 @@
+"""
+Tests for the content-addressed media store.
+"""
+
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import msgpack
+import pytest
+
+from src.media.blob_store import BlobStore, materialize_file
+from src.media.downloader import MediaDownloader
+
+
+@pytest.mark.asyncio
+async def test_ingest_deduplicates_and_materializes(tmp_path):
+    store = BlobStore(tmp_path / "store")
+    data = os.urandom(10_000)
+    first = tmp_path / "a.tmp"
+    second = tmp_path / "b.tmp"
+    first.write_bytes(data)
+    second.write_bytes(data)
+
+    digest = await store.ingest(first)
+    assert await store.ingest(second) == digest
+    assert not first.exists() and not second.exists()
+    assert store.stats["ingested"] == 1
+    assert store.stats["ingest_dedup_hits"] == 1
+    # Blob is read-only so hardlinked outputs cannot change it
+    assert not os.stat(store.blob_path(digest)).st_mode & 0o222
+
+    outputs = [tmp_path / "chat1" / "x.bin", tmp_path / "chat2" / "y.bin"]
+    for out in outputs:
+        method = await store.materialize(digest, out)
+        assert method in ("reflink", "hardlink", "copy")
+        assert out.read_bytes() == data
+    assert store.refcount(digest) == 2
+
+    # A blob path is recognised and never re-ingested
+    assert store.digest_of(store.blob_path(digest)) == digest
+    assert store.digest_of(outputs[0]) is None
+
+
+def test_copy_mode_gives_independent_files(tmp_path):
+    src = tmp_path / "src"
+    src.write_bytes(b"payload")
+    dst = tmp_path / "out" / "dst"
+    assert materialize_file(src, dst, mode="copy") == "copy"
+    dst.write_bytes(b"changed")
+    assert src.read_bytes() == b"payload"
+
+
+def test_output_path_references_one_blob(tmp_path):
+    store = BlobStore(tmp_path / "store")
+    out = tmp_path / "chat" / "photo.jpg"
+
+    store.add_ref("a" * 64, out)
+    store.add_ref("b" * 64, out)  # Overwritten with another content
+    assert store.refcount("a" * 64) == 0 and store.refcount("b" * 64) == 1
+
+    store.flush()
+    reloaded = BlobStore(tmp_path / "store")
+    reloaded.release(out)
+    assert reloaded.refcount("b" * 64) == 0
+
+
+def test_legacy_refs_snapshot_is_migrated(tmp_path):
+    root = tmp_path / "store"
+    root.mkdir()
+    out = tmp_path / "chat" / "photo.jpg"
+    (root / "refs.msgpack").write_bytes(
+        msgpack.packb({"a" * 64: {str(out): "hardlink"}})
+    )
+
+    store = BlobStore(root)
+    assert store.refcount("a" * 64) == 1
+    assert not (root / "refs.msgpack").exists()
+    assert BlobStore(root).refcount("a" * 64) == 1
+
+
+@pytest.mark.asyncio
+async def test_gc_keeps_referenced_blobs_and_respects_grace(tmp_path):
+    root = tmp_path / "store"
+    store = BlobStore(root, mode="copy")
+    kept_src, dropped_src = tmp_path / "k", tmp_path / "d"
+    kept_src.write_bytes(b"kept" * 100)
+    dropped_src.write_bytes(b"dropped" * 100)
+    kept = await store.ingest(kept_src)
+    dropped = await store.ingest(dropped_src)
+
+    await store.materialize(kept, tmp_path / "out" / "kept.bin")
+    out = tmp_path / "out" / "dropped.bin"
+    await store.materialize(dropped, out)
+    out.unlink()
+    store.flush()
+
+    # References survive a restart; fresh blobs are protected by the grace period
+    store = BlobStore(root, mode="copy")
+    result = store.gc(grace_seconds=3600)
+    assert result["dead_refs"] == 1 and result["deleted_blobs"] == 0
+
+    old = time.time() - 7200
+    for digest in (kept, dropped):
+        os.utime(store.blob_path(digest), (old, old))
+    result = store.gc(grace_seconds=3600)
+    assert result["deleted_blobs"] == 1
+    assert store.has(kept) and not store.has(dropped)
+
+
+@pytest.mark.asyncio
+async def test_downloader_places_blobs_instead_of_moving(tmp_path):
+    data = os.urandom(4096)
+    config = SimpleNamespace(
+        cache_file=tmp_path / "cache" / "cache.json",
+        performance=SimpleNamespace(
+            hash_based_deduplication=False,
+            media_store_enabled=True,
+            media_store_link_mode="hardlink",
+        ),
+    )
+    downloader = MediaDownloader(
+        connection_manager=SimpleNamespace(download_semaphore=asyncio.Semaphore(1)),
+        temp_dir=tmp_path / "tmp",
+        config=config,
+    )
+    downloaded = tmp_path / "download.tmp"
+    downloaded.write_bytes(data)
+    digest = await downloader._blob_store.ingest(downloaded)
+    blob = downloader._blob_store.blob_path(digest)
+    assert downloader.is_blob(blob)
+
+    for name in ("one.bin", "two.bin"):
+        out = await downloader.place_media(blob, tmp_path / "export" / name)
+        assert out.read_bytes() == data
+    assert blob.exists()
+    assert downloader.get_statistics()["media_store"]["hardlink"] == 2
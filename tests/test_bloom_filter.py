@@ -0,0 +1,118 @@
+"""
+Tests for the NumPy-backed BloomFilter used for resume deduplication (TIER B-4).
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.export.exporter import BloomFilter, EntityCacheData, Exporter
+
+
+def test_no_false_negatives_scalar_and_batch():
+    bf = BloomFilter(expected_items=10_000)
+    bf.add_many(range(1, 5001))
+    for i in range(5001, 10001):
+        bf.add(i)
+
+    ids = list(range(1, 10001))
+    assert all(i in bf for i in ids)
+    assert bf.contains_many(ids).all()
+    assert bf.items_added == 10_000
+
+
+def test_scalar_and_batch_paths_agree():
+    bf = BloomFilter(expected_items=1_000, false_positive_rate=0.05)
+    bf.add_many(range(0, 2000, 3))
+
+    probe = list(range(0, 5000))
+    expected = np.array([i in bf for i in probe])
+    assert (bf.contains_many(probe) == expected).all()
+
+
+def test_false_positive_rate_is_bounded():
+    bf = BloomFilter(expected_items=50_000, false_positive_rate=0.01)
+    bf.add_many(range(1, 50_001))
+
+    rate = bf.contains_many(range(1_000_000, 1_100_000)).mean()
+    assert rate < 0.02
+
+
+def test_roundtrip_and_stable_across_processes():
+    bf = BloomFilter(expected_items=1_000)
+    bf.add_many([5, 42, 1_000_000_007])
+    data = bf.to_dict()
+
+    restored = BloomFilter.from_dict(data)
+    assert restored.contains_many([5, 42, 1_000_000_007]).all()
+    restored.add(77)
+    assert 77 in restored
+
+    # A filter built in another interpreter (different hash seed) must match
+    code = (
+        "from src.export.exporter import BloomFilter;"
+        "bf = BloomFilter(expected_items=1_000);"
+        "bf.add_many([5, 42, 1_000_000_007]);"
+        "print(bf.to_dict()['bit_array_b64'])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).resolve().parent.parent,
+        env={"PYTHONHASHSEED": "12345", "PATH": ""},
+    )
+    assert result.stdout.strip().splitlines()[-1] == data["bit_array_b64"]
+
+
+def test_legacy_format_is_rejected():
+    data = BloomFilter(expected_items=100).to_dict()
+    data.pop("format")
+    with pytest.raises(ValueError):
+        BloomFilter.from_dict(data)
+
+
+def test_exporter_batch_helpers_use_bloom_filter():
+    bf = BloomFilter(expected_items=1_000)
+    entity_data = EntityCacheData("1", "chat", "regular", processed_message_ids=bf)
+    Exporter._mark_processed(entity_data, [1, 2, 3])
+
+    class Msg:
+        def __init__(self, id):
+            self.id = id
+
+    remaining = Exporter._drop_processed([Msg(i) for i in range(1, 6)], bf)
+    assert [m.id for m in remaining] == [4, 5]
+    assert "processed_message_ids" in entity_data.to_dict()
+
+
+@pytest.mark.asyncio
+async def test_periodic_save_skips_bloom_filter():
+    class Cache:
+        def __init__(self):
+            self.saved = {}
+
+        async def set(self, key, value):
+            self.saved[key] = value
+
+    exporter = Exporter.__new__(Exporter)
+    exporter.cache_manager = Cache()
+    exporter._lazy_loader = None
+    exporter._pending_cache_updates = {}
+    exporter._cache_batch_size = 1
+
+    bf = BloomFilter(expected_items=1_000)
+    entity_data = EntityCacheData("1", "chat", "regular", processed_message_ids=bf)
+    Exporter._mark_processed(entity_data, [1, 2, 3])
+    entity_data.last_message_id = 3
+    await exporter._batch_cache_set("entity_state_1", entity_data)
+
+    saved = exporter.cache_manager.saved["entity_state_1"]
+    assert "processed_message_ids" not in saved
+    assert saved["last_message_id"] == 3
+    # Final and shutdown saves still persist it
+    assert "bit_array_b64" in entity_data.to_dict()["processed_message_ids"]
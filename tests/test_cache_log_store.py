@@ -0,0 +1,260 @@
+"""
+Tests for the append-only cache log (CacheLogStore) and CacheManager LOG backend.
+
+Covers round-trip persistence, torn-tail recovery, compaction with backup,
+index-based startup and migration from the JSON cache file.
+"""
+
+import json
+
+import pytest
+
+from src.core.cache import CacheBackend, CacheManager, CompressionType
+from src.core.log_store import CacheLogStore, LogWriteBuffer
+from src.exceptions import CacheError
+
+
+def make_store(tmp_path, **kwargs):
+    return CacheLogStore(tmp_path / "cache.log", **kwargs)
+
+
+def test_append_and_load_roundtrip(tmp_path):
+    store = make_store(tmp_path)
+    store.append(
+        [
+            ("a", store.encode_set("a", {"v": 1})),
+            ("b", store.encode_set("b", {"v": 2})),
+        ]
+    )
+    store.append([("a", store.encode_set("a", {"v": 3})), ("b", None)])
+
+    reloaded = make_store(tmp_path)
+    assert reloaded.load() == {"a": {"v": 3}}
+    stats = reloaded.stats()
+    assert stats["live_entries"] == 1
+    assert stats["dead_bytes"] > 0
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    store = make_store(tmp_path)
+    store.append([("a", store.encode_set("a", {"v": 1}))])
+    good_size = store.log_path.stat().st_size
+
+    # Simulate a crash in the middle of writing the next record
+    frame = store.encode_set("b", {"v": 2})
+    with open(store.log_path, "ab") as f:
+        f.write(frame[: len(frame) // 2])
+
+    reloaded = make_store(tmp_path)
+    assert reloaded.load() == {"a": {"v": 1}}
+    assert reloaded.truncated_bytes == len(frame) // 2
+    assert store.log_path.stat().st_size == good_size
+
+
+def test_record_without_string_key_is_treated_as_corrupt(tmp_path):
+    store = make_store(tmp_path)
+    store.append([("a", store.encode_set("a", {"v": 1}))])
+    good_size = store.log_path.stat().st_size
+
+    # CRC-valid record whose key is not a string
+    bad = store._frame({"op": "s", "k": 42, "e": {"v": 2}})
+    with open(store.log_path, "ab") as f:
+        f.write(bad)
+
+    reloaded = make_store(tmp_path)
+    assert reloaded.load() == {"a": {"v": 1}}
+    assert reloaded.truncated_bytes == len(bad)
+    assert store.log_path.stat().st_size == good_size
+
+
+def test_compaction_keeps_backup_and_index(tmp_path):
+    store = make_store(tmp_path, compaction_min_bytes=0)
+    for i in range(20):
+        store.append([("k", store.encode_set("k", {"v": i}))])
+    assert store.should_compact()
+
+    store.compact([("k", store.encode_set("k", {"v": 19}))])
+    assert store.backup_path.exists()
+    assert store.index_path.exists()
+    assert store.stats()["dead_bytes"] == 0
+
+    reloaded = make_store(tmp_path)
+    assert reloaded.load() == {"k": {"v": 19}}
+
+
+def test_index_and_tail_replay(tmp_path):
+    store = make_store(tmp_path)
+    store.append([("a", store.encode_set("a", {"v": 1}))])
+    store.write_index()
+    # Records appended after the index was written are replayed from the tail
+    store.append([("b", store.encode_set("b", {"v": 2}))])
+
+    reloaded = make_store(tmp_path)
+    assert reloaded.load() == {"a": {"v": 1}, "b": {"v": 2}}
+
+
+def test_load_returns_least_recently_written_first(tmp_path):
+    store = make_store(tmp_path)
+    for key in ("a", "b", "c"):
+        store.append([(key, store.encode_set(key, {"v": key}))])
+    store.write_index()
+    store.append([("a", store.encode_set("a", {"v": "a2"}))])
+
+    # Index path and tail replay agree on log order
+    assert list(make_store(tmp_path).load()) == ["b", "c", "a"]
+    make_store(tmp_path).index_path.unlink()
+    assert list(make_store(tmp_path).load()) == ["b", "c", "a"]
+
+
+def test_keys_only_load_and_offset_reads(tmp_path):
+    store = make_store(tmp_path)
+    store.append([(k, store.encode_set(k, {"v": k})) for k in ("a", "b", "c")])
+
+    reloaded = make_store(tmp_path)
+    assert reloaded.load(values=False) == {"a": None, "b": None, "c": None}
+    assert reloaded.read_many(["c", "missing", "a"]) == [("a", {"v": "a"}), ("c", {"v": "c"})]
+    assert reloaded.record_size("b") == len(store.encode_set("b", {"v": "b"}))
+
+
+def test_corrupt_log_restores_backup(tmp_path):
+    store = make_store(tmp_path, compaction_min_bytes=0)
+    store.append([("a", store.encode_set("a", {"v": 1}))])
+    store.compact([("a", store.encode_set("a", {"v": 1}))])
+    store.log_path.write_bytes(b"garbage")
+
+    reloaded = make_store(tmp_path)
+    assert reloaded.load() == {"a": {"v": 1}}
+
+
+def test_unloaded_log_is_never_overwritten(tmp_path):
+    store = make_store(tmp_path)
+    store.append([(f"k{i}", store.encode_set(f"k{i}", {"v": i})) for i in range(100)])
+
+    # A store whose load() never ran (or failed) must not start a new log
+    fresh = make_store(tmp_path)
+    with pytest.raises(CacheError):
+        fresh.append([("x", fresh.encode_set("x", {"v": 0}))])
+    assert len(make_store(tmp_path).load()) == 100
+
+    moved = fresh.set_aside()
+    fresh.append([("x", fresh.encode_set("x", {"v": 0}))])
+    assert make_store(tmp_path).load() == {"x": {"v": 0}}
+    assert len(CacheLogStore(moved).load()) == 100
+
+
+def test_write_buffer_rewrites_the_log_after_a_failed_append(tmp_path):
+    store = make_store(tmp_path)
+    live = {"a": {"v": 1}, "b": {"v": 2}}
+    writes = LogWriteBuffer(
+        store, lambda: ((k, store.encode_set(k, v)) for k, v in live.items()), flush_every=2
+    )
+    writes.put("a", store.encode_set("a", live["a"]))
+    writes.flush()
+
+    def torn_append(records):
+        with open(store.log_path, "ab") as f:
+            f.write(b"\x10\x00")
+        raise OSError("disk full")
+
+    append, store.append = store.append, torn_append
+    writes.put("b", store.encode_set("b", live["b"]))
+    with pytest.raises(OSError):
+        writes.flush()
+    assert writes.rewrite_pending and writes.read_many(["b"]) == [("b", {"v": 2})]
+
+    store.append = append
+    writes.flush()
+    assert not writes.rewrite_pending and not writes.pending
+    assert make_store(tmp_path).load() == live
+
+
+@pytest.mark.asyncio
+async def test_cache_manager_log_backend_roundtrip(tmp_path):
+    path = tmp_path / "cache.json"
+    manager = CacheManager(
+        path, backend=CacheBackend.LOG, compression=CompressionType.NONE
+    )
+    await manager._load_cache()
+    await manager.set("entity_1", {"processed_messages": {"10": {}}})
+    await manager.set("entity_2", {"title": "two"})
+    await manager._save_cache()
+    await manager.delete("entity_2")
+    await manager.shutdown()
+
+    assert not path.exists()
+    assert path.with_suffix(".log").exists()
+
+    restored = CacheManager(
+        path, backend=CacheBackend.LOG, compression=CompressionType.NONE
+    )
+    await restored._load_cache()
+    assert await restored.get("entity_1") == {"processed_messages": {"10": {}}}
+    assert await restored.get("entity_2") is None
+    assert await restored.is_processed(10, "1")
+
+
+@pytest.mark.asyncio
+async def test_failed_log_save_keeps_changes_dirty(tmp_path):
+    path = tmp_path / "cache.json"
+    manager = CacheManager(
+        path, backend=CacheBackend.LOG, compression=CompressionType.NONE
+    )
+    await manager._load_cache()
+    await manager.set("entity_1", {"title": "one"})
+
+    store = manager._log_store
+    append = store.append
+
+    def failing_append(records):
+        raise OSError("disk full")
+
+    store.append = failing_append
+    with pytest.raises(OSError):
+        await manager._save_cache()
+    assert "entity_1" in manager._log_writes.pending and manager._dirty
+
+    store.append = append
+    await manager._save_cache()
+    await manager.shutdown()
+
+    restored = CacheManager(
+        path, backend=CacheBackend.LOG, compression=CompressionType.NONE
+    )
+    await restored._load_cache()
+    assert await restored.get("entity_1") == {"title": "one"}
+
+
+@pytest.mark.asyncio
+async def test_cache_manager_migrates_json_cache(tmp_path):
+    path = tmp_path / "cache.json"
+    json_manager = CacheManager(path, compression=CompressionType.NONE)
+    await json_manager.set("key", {"value": 42})
+    await json_manager.shutdown()
+    assert json.loads(path.read_text())["entries"]
+
+    log_manager = CacheManager(
+        path, backend=CacheBackend.LOG, compression=CompressionType.NONE
+    )
+    await log_manager._load_cache()
+    assert await log_manager.get("key") == {"value": 42}
+    await log_manager.shutdown()
+
+    reloaded = CacheLogStore(path.with_suffix(".log"))
+    assert "key" in reloaded.load()
+    assert not path.exists()
+    assert path.with_name("cache.json.migrated").exists()
+
+    # Once the log exists, a JSON file is never imported over it, even
+    # when the log has no live entries left
+    log_manager = CacheManager(
+        path, backend=CacheBackend.LOG, compression=CompressionType.NONE
+    )
+    await log_manager._load_cache()
+    await log_manager.delete("key")
+    await log_manager.shutdown()
+    path.write_bytes(path.with_name("cache.json.migrated").read_bytes())
+    restored = CacheManager(
+        path, backend=CacheBackend.LOG, compression=CompressionType.NONE
+    )
+    await restored._load_cache()
+    assert await restored.get("key") is None
@@ -0,0 +1,110 @@
+"""
+Tests for the AIMD download concurrency controller.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.concurrency_controller import AIMDController
+from src.media.download_queue import DownloadTask
+from src.media.download_scheduler import LaneScheduler
+from src.media.downloader import MediaDownloader
+
+KB = 1024
+
+
+def _window(controller, now, kbps, in_flight):
+    controller.record_bytes(int(kbps * KB * controller.interval_s))
+    return controller.evaluate(in_flight, now=now)
+
+
+def test_probes_up_while_throughput_grows_and_reverts_without_gain():
+    controller = AIMDController(initial=2, max_limit=8, interval_s=10)
+    start = controller._window_start = 0.0  # Exact window arithmetic
+
+    assert _window(controller, start + 10, 400, 2)["reason"] == "probe_up"
+    assert _window(controller, start + 20, 600, 3)["reason"] == "probe_up"
+    assert controller.limit == 4
+
+    # Fourth connection did not help: one step back, then hold
+    decision = _window(controller, start + 30, 605, 4)
+    assert decision["reason"] == "no_gain" and controller.limit == 3
+    assert _window(controller, start + 40, 605, 3) is None
+    # Not saturated: nothing to learn
+    assert _window(controller, start + 80, 605, 1) is None
+    assert [d["to"] for d in controller.get_stats()["decisions"]] == [3, 4, 3]
+
+
+def test_windows_without_throughput_do_not_raise_the_limit():
+    controller = AIMDController(initial=2, max_limit=8, interval_s=10)
+    start = controller._window_start = 0.0  # Exact window arithmetic
+
+    # Saturated but nothing measured (e.g. single-part downloads): no probing
+    assert _window(controller, start + 10, 0, 2) is None
+    assert _window(controller, start + 20, 0, 2) is None
+    assert controller.limit == 2
+
+    # An empty window after a probe is not "gain" over the previous one
+    assert _window(controller, start + 30, 400, 2)["reason"] == "probe_up"
+    assert _window(controller, start + 40, 0, 3) is None
+    assert _window(controller, start + 50, 402, 3)["reason"] == "no_gain"
+
+
+def test_first_progress_report_is_counted():
+    controller = AIMDController(initial=2, interval_s=10)
+    downloader = SimpleNamespace(bandwidth_controller=controller)
+
+    async def fresh(downloaded, total):
+        pass
+
+    # Single-part download: its only report is the whole file
+    MediaDownloader._record_transfer(downloader, fresh, 512 * KB)
+    assert controller._window_bytes == 512 * KB
+
+    async def resumed(downloaded, total):
+        pass
+
+    resumed.last_transferred = 4096 * KB  # Resume offset
+    MediaDownloader._record_transfer(downloader, resumed, 4608 * KB)
+    assert controller._window_bytes == 1024 * KB
+
+
+def test_flood_wait_and_throttling_halve_the_limit():
+    flood_waits = [0]
+    controller = AIMDController(
+        initial=8,
+        max_limit=8,
+        interval_s=5,
+        throttle_kbps=50,
+        flood_wait_count=lambda: flood_waits[0],
+    )
+    start = controller._window_start = 0.0  # Exact window arithmetic
+    limits = []
+    controller.add_listener(limits.append)
+
+    flood_waits[0] += 1
+    assert _window(controller, start + 5, 2000, 8)["reason"] == "flood_wait"
+    # 120 KB/s over 4 downloads = 30 KB/s each, below the threshold
+    assert _window(controller, start + 10, 120, 4)["reason"] == "throttled"
+    assert limits == [4, 2]
+    # Calls before the end of the window do nothing
+    assert controller.evaluate(2, now=start + 12) is None
+
+
+@pytest.mark.asyncio
+async def test_scheduler_follows_the_controller_limit():
+    scheduler = LaneScheduler(max_workers=4)
+    scheduler.concurrency_limit = 1
+    for i in range(3):
+        await scheduler.put(DownloadTask(task_id=f"t{i}", message_id=i, entity_id=1))
+
+    first = await scheduler.get()
+    waiter = asyncio.ensure_future(scheduler.get())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    scheduler.set_limit(2)
+    assert (await asyncio.wait_for(waiter, 1)).task_id != first.task_id
+    assert scheduler.in_flight == 2
@@ -0,0 +1,114 @@
+"""
+Tests for the byte-range resume journal of persistent downloads.
+"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from src.media.download_journal import DownloadJournal
+from src.media.downloader import MediaDownloader
+from src.media.parallel_download import PartDownloadError
+
+PART = 4096
+
+
+class FakeClient:
+    """Serves iter_download() from memory; optionally breaks at a byte offset."""
+
+    def __init__(self, data: bytes, break_at=None):
+        self.data = data
+        self.break_at = break_at
+        self.offsets = []
+
+    async def iter_download(self, media, *, offset, limit, request_size, file_size, dc_id=None):
+        for i in range(limit):
+            start = offset + i * request_size
+            if self.break_at is not None and start >= self.break_at:
+                raise ConnectionError("Telegram is having internal issues")
+            self.offsets.append(start)
+            await asyncio.sleep(0)
+            yield self.data[start : start + request_size]
+
+
+def _write_parts(journal, data, indices):
+    with open(journal.data_path, "r+b") as f:
+        for index in indices:
+            offset, length = journal.parts[index]
+            f.seek(offset)
+            f.write(data[offset : offset + length])
+            journal.record(index, offset, data[offset : offset + length])
+
+
+def test_journal_reload_skips_torn_lines_and_corrupted_parts(tmp_path):
+    data = os.urandom(PART * 6 + 10)
+    path = tmp_path / "doc.part"
+    path.write_bytes(b"\0" * len(data))
+
+    journal = DownloadJournal.open(path, "doc_1_2", len(data), PART)
+    _write_parts(journal, data, [0, 1, 2, 6])
+    with open(journal.path, "a") as f:
+        f.write("3 12288 40")  # torn append
+
+    # Corrupt part 1 on disk
+    with open(path, "r+b") as f:
+        f.seek(PART + 100)
+        f.write(b"garbage")
+
+    reloaded = DownloadJournal.open(path, "doc_1_2", len(data), PART)
+    assert reloaded.done_parts == {0, 2, 6}
+    assert reloaded.dropped_parts == 1
+    assert reloaded.bytes_done == PART * 2 + 10
+    assert not reloaded.is_complete
+
+    # A different file (or part size) never reuses the journal
+    assert DownloadJournal.open(path, "doc_9_9", len(data), PART).done_parts == set()
+
+
+@pytest.mark.asyncio
+async def test_persistent_download_resumes_across_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.media.parallel_download.RETRY_BACKOFF_S", 0)
+    data = os.urandom(PART * 12 + 500)
+    config = SimpleNamespace(
+        cache_file=tmp_path / "cache" / "cache.json",
+        performance=SimpleNamespace(
+            hash_based_deduplication=False,
+            enable_parallel_download=False,
+            part_size_kb=4,
+        ),
+    )
+    message = SimpleNamespace(
+        id=42,
+        media=SimpleNamespace(document=SimpleNamespace(id=1, access_hash=2)),
+        file=SimpleNamespace(size=len(data)),
+    )
+
+    def _downloader(client):
+        downloader = MediaDownloader(
+            connection_manager=SimpleNamespace(download_semaphore=asyncio.Semaphore(1)),
+            temp_dir=tmp_path / "tmp",
+            client=client,
+            config=config,
+        )
+        downloader._persistent_enabled = True
+        return downloader
+
+    # First run dies half way (e.g. process killed after a server fast-fail)
+    first = _downloader(FakeClient(data, break_at=PART * 7))
+    journal = first._open_journal(message, len(data))
+    with pytest.raises(PartDownloadError):
+        await first._journaled_download(first.client, message, journal, None)
+    assert journal.done_parts == set(range(7))
+
+    # Second run continues with the missing parts only
+    healthy = FakeClient(data)
+    second = _downloader(healthy)
+    path = await second.download_media(message)
+
+    assert path == tmp_path / "cache" / "partial_downloads" / "doc_1_2.part"
+    assert path.read_bytes() == data
+    assert min(healthy.offsets) == PART * 7
+    assert not journal.path.exists()
+    assert second.get_statistics()["resume_journal"]["resumed_parts"] == 7
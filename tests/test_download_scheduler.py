@@ -0,0 +1,81 @@
+"""
+Tests for the lane scheduler of the background download queue.
+"""
+
+import asyncio
+
+import pytest
+
+from src.media.download_queue import DownloadTask
+from src.media.download_scheduler import LaneScheduler
+
+MB = 1024 * 1024
+
+
+def _task(name, entity, size):
+    return DownloadTask(task_id=name, message_id=0, entity_id=entity, expected_size=size)
+
+
+@pytest.mark.asyncio
+async def test_small_files_are_not_blocked_by_large_ones():
+    scheduler = LaneScheduler(
+        max_workers=3, large_file_threshold=10 * MB, max_bytes_in_flight=10_000 * MB
+    )
+    for i in range(4):
+        await scheduler.put(_task(f"video{i}", "chat", 2000 * MB))
+    for size in (300_000, 100_000, 200_000):
+        await scheduler.put(_task(f"photo{size}", "chat", size))
+
+    # Large lane capped at max_workers - 1; the remaining worker takes photos,
+    # smallest first
+    started = [await scheduler.get() for _ in range(3)]
+    assert [t.task_id for t in started] == ["video0", "video1", "photo100000"]
+    assert scheduler.get_lane_stats()["large"]["in_flight"] == 2
+
+    scheduler.task_done(started[2])
+    assert (await scheduler.get()).task_id == "photo200000"
+
+
+@pytest.mark.asyncio
+async def test_large_lane_leaves_a_slot_under_the_controller_limit():
+    # The queue spawns workers up to the controller's max_limit (6), while the
+    # controller currently allows only 3 downloads
+    scheduler = LaneScheduler(
+        max_workers=6, large_file_threshold=10 * MB, max_bytes_in_flight=10_000 * MB
+    )
+    scheduler.concurrency_limit = 3
+    for i in range(3):
+        await scheduler.put(_task(f"video{i}", "chat", 100 * MB))
+    for i in range(5):
+        await scheduler.put(_task(f"photo{i}", "chat", 100_000 + i))
+
+    started = [await asyncio.wait_for(scheduler.get(), 1) for _ in range(3)]
+    assert [t.task_id for t in started] == ["video0", "video1", "photo0"]
+    assert scheduler.large_lane_limit == 2
+
+
+@pytest.mark.asyncio
+async def test_entities_take_turns_and_budget_is_respected():
+    scheduler = LaneScheduler(max_workers=4, max_bytes_in_flight=10 * MB)
+    for i in range(3):
+        await scheduler.put(_task(f"a{i}", "chat_a", MB))
+    await scheduler.put(_task("b0", "chat_b", MB))
+    await scheduler.put(_task("c0", "chat_c", 9 * MB))
+
+    started = [await scheduler.get() for _ in range(3)]
+    assert [t.task_id for t in started] == ["a0", "b0", "a1"]
+
+    # c0 does not fit the remaining budget: a2 goes first, c0 waits
+    started.append(await scheduler.get())
+    assert started[-1].task_id == "a2"
+    waiter = asyncio.ensure_future(scheduler.get())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    scheduler.task_done(started[0])
+    scheduler.task_done(started[1])
+    await asyncio.sleep(0.01)
+    assert not waiter.done()  # 2 + 9 MB still above the budget
+    scheduler.task_done(started[2])
+    assert (await asyncio.wait_for(waiter, 1)).task_id == "c0"
+    assert scheduler.bytes_in_flight == 10 * MB
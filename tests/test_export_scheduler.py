@@ -0,0 +1,117 @@
+"""
+Tests for concurrent multi-target export scheduling (ExportScheduler / ExportBudget).
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.config import ExportTarget
+from src.export.scheduler import ExportBudget, ExportScheduler
+
+
+def _manager(sizes):
+    manager = SimpleNamespace(request_semaphore=None)
+
+    async def resolve_entity(target_id):
+        return SimpleNamespace(id=target_id)
+
+    async def get_total_message_count(entity):
+        size = sizes[entity.id]
+        if size is None:
+            raise RuntimeError("count unavailable")
+        return size
+
+    manager.resolve_entity = resolve_entity
+    manager.get_total_message_count = get_total_message_count
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_plan_orders_largest_first_and_unknown_last():
+    sizes = {1: 10, 2: None, 3: 5000, 4: 300}
+    scheduler = ExportScheduler(_manager(sizes), ExportBudget())
+    targets = [SimpleNamespace(id=i, name=f"chat{i}") for i in sizes]
+
+    plan = await scheduler.plan(targets)
+
+    assert [s.target.id for s in plan] == [3, 4, 1, 2]
+    assert plan[-1].estimated_messages == -1
+
+
+@pytest.mark.asyncio
+async def test_run_bounds_concurrency_and_keeps_result_order():
+    sizes = {i: i * 100 for i in range(1, 7)}
+    manager = _manager(sizes)
+    budget = ExportBudget(api=2)
+    scheduler = ExportScheduler(manager, budget, max_concurrent_targets=3)
+    targets = [SimpleNamespace(id=i, name=f"chat{i}") for i in sizes]
+
+    running = 0
+    peak = 0
+    started = []
+
+    async def export_fn(scheduled):
+        nonlocal running, peak
+        assert manager.request_semaphore is budget.api
+        started.append(scheduled.target.id)
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if scheduled.target.id == 2:
+            raise RuntimeError("boom")
+        return f"stats{scheduled.target.id}"
+
+    results = await scheduler.run(targets, export_fn)
+
+    assert peak == 3
+    assert started[:3] == [6, 5, 4]
+    assert results == ["stats1", None, "stats3", "stats4", "stats5", "stats6"]
+    assert manager.request_semaphore is None
+
+
+@pytest.mark.asyncio
+async def test_export_all_runs_targets_concurrently(
+    exporter, mock_config, mock_telegram_manager, tmp_path
+):
+    mock_config.export_concurrent_targets = 2
+    mock_config.export_api_concurrency = 2
+    mock_config.export_media_concurrency = 2
+    mock_config.export_disk_concurrency = 1
+    mock_config.get_export_path_for_entity = MagicMock(
+        side_effect=lambda entity_id: tmp_path / "export" / str(entity_id)
+    )
+
+    async def resolve_entity(target_id):
+        return MagicMock(title=f"Chat {target_id}", noforwards=False)
+
+    mock_telegram_manager.resolve_entity = AsyncMock(side_effect=resolve_entity)
+    mock_telegram_manager.get_total_message_count = AsyncMock(return_value=3)
+
+    class Msg:
+        def __init__(self, id, text):
+            self.id = id
+            self.text = text
+            self.date = None
+            self.sender_id = 1
+            self.sender = MagicMock(first_name="Test", last_name="User")
+            self.media = None
+            self.reactions = None
+
+    async def _fetch_messages(entity, limit=None, min_id=0, **kwargs):
+        for i in range(1, 4):
+            await asyncio.sleep(0)
+            yield Msg(i, f"{entity.title} message {i}")
+
+    mock_telegram_manager.fetch_messages = _fetch_messages
+
+    targets = [ExportTarget(id=i, name=f"Chat {i}", type="regular") for i in (1, 2, 3)]
+    results = await exporter.export_all(targets)
+
+    assert [r.messages_processed for r in results] == [3, 3, 3]
+    for i in (1, 2, 3):
+        content = (tmp_path / "export" / str(i) / f"Chat_{i}.md").read_text()
+        assert f"Chat {i} message 3" in content
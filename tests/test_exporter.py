@@ -183,3 +183,136 @@ async def test_export_forum(exporter, mock_config, mock_telegram_manager):
         content = f.read()
         assert "Random msg 1" in content
 
+
+
+@pytest.mark.asyncio
+async def test_export_regular_target_incremental_resume(exporter, mock_config, mock_telegram_manager):
+    target = ExportTarget(id=12345, name="Test Chat", type="regular")
+    mock_config.incremental_export = True
+    mock_telegram_manager.resolve_entity.return_value = MagicMock(title="Test Chat")
+
+    # Dict-backed cache so state survives between runs
+    store = {}
+
+    async def _get(key, default=None):
+        return store.get(key, default)
+
+    async def _set(key, value, ttl=None):
+        store[key] = value
+
+    exporter.cache_manager.get = _get
+    exporter.cache_manager.set = _set
+
+    messages = [MockMessage(id=1, text="First"), MockMessage(id=2, text="Second")]
+    fetched_min_ids = []
+
+    async def _fetch_messages(entity, limit=None, min_id=0, **kwargs):
+        fetched_min_ids.append(min_id)
+        for msg in messages:
+            if msg.id > min_id:
+                yield msg
+
+    mock_telegram_manager.fetch_messages = _fetch_messages
+
+    await exporter.export_target(target)
+    chat_file = mock_config.get_export_path_for_entity(12345) / "Test_Chat.md"
+    assert store["entity_state_12345"]["chat_file_last_id"] == 2
+
+    # Simulate a tail written after the last checkpoint by an interrupted run
+    with open(chat_file, "a") as f:
+        f.write("partial message from a crashed run")
+
+    messages.append(MockMessage(id=3, text="Third"))
+    await exporter.export_target(target)
+
+    assert fetched_min_ids == [0, 2]
+    content = chat_file.read_text()
+    assert content.count("# Chat Export: Test Chat") == 1
+    assert content.count("First") == 1
+    assert content.count("Second") == 1
+    assert "Third" in content
+    assert "partial message" not in content
+    assert "Total Messages: 3" in content
+
+
+@pytest.mark.asyncio
+async def test_incremental_resume_survives_crash_after_final_rewrite(exporter, mock_config, mock_telegram_manager):
+    target = ExportTarget(id=12345, name="Test Chat", type="regular")
+    mock_config.incremental_export = True
+    mock_telegram_manager.resolve_entity.return_value = MagicMock(title="Test Chat")
+
+    # Cache writes reach "disk" until the simulated crash
+    disk = {}
+    crashed = False
+
+    async def _get(key, default=None):
+        return disk.get(key, default)
+
+    async def _set(key, value, ttl=None):
+        if not crashed:
+            disk[key] = value
+
+    exporter.cache_manager.get = _get
+    exporter.cache_manager.set = _set
+
+    messages = [MockMessage(id=i, text=f"Message number {i}") for i in range(1, 10)]
+
+    async def _fetch_messages(entity, limit=None, min_id=0, **kwargs):
+        for msg in messages:
+            if msg.id > min_id:
+                yield msg
+
+    mock_telegram_manager.fetch_messages = _fetch_messages
+    await exporter.export_target(target)
+    chat_file = mock_config.get_export_path_for_entity(12345) / "Test_Chat.md"
+
+    # "Total Messages: 9" -> "10" moves every offset after the header; the
+    # process dies after the rewrite, before the new size is saved
+    messages.append(MockMessage(id=10, text="Message number 10"))
+    rewrite = exporter._update_message_count
+
+    async def _rewrite_then_crash(file_path, count):
+        nonlocal crashed
+        await rewrite(file_path, count)
+        crashed = True
+
+    exporter._update_message_count = _rewrite_then_crash
+    await exporter.export_target(target)
+    assert disk["entity_state_12345"]["chat_file_size"] is None
+
+    crashed = False
+    exporter._update_message_count = rewrite
+    await exporter.export_target(target)
+
+    content = chat_file.read_text()
+    assert "Total Messages: 10" in content
+    for i in range(1, 11):
+        assert content.count(f"Message number {i}\n\n") == 1
+    assert disk["entity_state_12345"]["chat_file_size"] == chat_file.stat().st_size
+
+
+@pytest.mark.asyncio
+async def test_export_regular_target_pipeline_batch_mode(exporter, mock_config, mock_telegram_manager):
+    target = ExportTarget(id=12345, name="Test Chat", type="regular")
+    mock_config.async_pipeline_enabled = True
+    mock_config.async_pipeline_batch_mode = True
+    mock_config.async_pipeline_max_inflight_messages = 4
+    mock_config.async_pipeline_render_workers = 0
+    mock_telegram_manager.resolve_entity.return_value = MagicMock(title="Test Chat")
+
+    messages = [MockMessage(id=i, text=f"Message {i}") for i in range(1, 8)]
+    messages.append(MockMessage(id=8))  # empty, skipped
+
+    async def _fetch_message_batches(entity, limit=None, min_id=0):
+        for i in range(0, len(messages), 3):
+            yield messages[i : i + 3]
+
+    mock_telegram_manager.fetch_message_batches = _fetch_message_batches
+
+    stats = await exporter.export_target(target)
+
+    assert stats.messages_processed == 7
+    content = (mock_config.get_export_path_for_entity(12345) / "Test_Chat.md").read_text()
+    positions = [content.index(f"Message {i}\n") for i in range(1, 8)]
+    assert positions == sorted(positions)
+    assert exporter.statistics.pipeline_stats["batches"] == 3
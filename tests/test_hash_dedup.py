@@ -0,0 +1,67 @@
+"""
+Tests for the log-backed hash deduplication cache.
+"""
+
+from pathlib import Path
+
+import msgpack
+import pytest
+
+from src.media.hash_dedup import HashBasedDeduplicator
+
+
+def _file(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"data-" + name.encode())
+    return path
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_batched_appends(tmp_path):
+    cache_path = tmp_path / "cache.msgpack"
+    dedup = HashBasedDeduplicator(cache_path, max_cache_size=2)
+    dedup._writes.flush_every = 2
+    log_path = dedup._log.log_path
+
+    a, b, c = (_file(tmp_path, n) for n in "abc")
+    dedup.add_to_cache("ha", a)
+    assert not log_path.exists()  # buffered
+    dedup.add_to_cache("hb", b)
+    size_after_two = log_path.stat().st_size
+
+    # Hit on "ha" makes "hb" the least recently used entry
+    assert await dedup.check_cache("ha") == a
+    dedup.add_to_cache("hc", c)
+    dedup.flush()
+    assert await dedup.check_cache("hb") is None
+    assert dedup.get_stats()["evictions"] == 1
+    # Appends only: the file grew, earlier records were not rewritten
+    assert log_path.stat().st_size > size_after_two
+
+    reloaded = HashBasedDeduplicator(cache_path, max_cache_size=2)
+    assert list(reloaded._hash_cache) == ["ha", "hc"]
+
+
+def test_legacy_snapshot_and_torn_tail(tmp_path):
+    cache_path = tmp_path / "cache.msgpack"
+    a = _file(tmp_path, "a")
+    # Entries are not checked at load time, only when looked up
+    missing = tmp_path / "gone.bin"
+    cache_path.write_bytes(msgpack.packb({"ha": str(a), "hm": str(missing)}))
+
+    dedup = HashBasedDeduplicator(cache_path)
+    assert set(dedup._hash_cache) == {"ha", "hm"}
+    assert not cache_path.exists()  # Migrated into the log
+    dedup.add_to_cache("hb", _file(tmp_path, "b"))
+    dedup.flush()
+
+    # Crash mid-append: the partial record is dropped, the rest survives
+    frame = dedup._encode("hc", tmp_path / "c")
+    with open(dedup._log.log_path, "ab") as f:
+        f.write(frame[:-3])
+    reloaded = HashBasedDeduplicator(cache_path)
+    assert set(reloaded._hash_cache) == {"ha", "hm", "hb"}
+    reloaded.add_to_cache("hd", _file(tmp_path, "d"))
+    reloaded.flush()
+    assert "hd" in HashBasedDeduplicator(cache_path)._hash_cache
+    assert Path(reloaded._hash_cache["ha"]) == a
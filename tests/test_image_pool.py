@@ -0,0 +1,95 @@
+"""
+Tests for process-pool image recompression.
+"""
+
+import asyncio
+
+import pytest
+from PIL import Image
+
+from src.media.models import ProcessingSettings, ProcessingTask
+from src.media.processors.image import ImageProcessor
+from src.media.processors.image_pool import ImageProcessPool, process_image_file
+
+
+def _jpeg(path, size, quality=95):
+    img = Image.new("RGB", size)
+    # Gradient: compressible, but not trivially
+    img.putdata([((x * 7) % 256, (y * 3) % 256, (x + y) % 256) for y in range(size[1]) for x in range(size[0])])
+    img.save(path, format="JPEG", quality=quality)
+    return path
+
+
+def test_large_downscale_uses_draft_decoding(tmp_path):
+    source = _jpeg(tmp_path / "big.jpg", (1600, 1200))
+    output = tmp_path / "out" / "big.jpg"
+
+    result = process_image_file(str(source), str(output), (320, 320), 85)
+
+    assert result["status"] == "optimized" and result["draft"]
+    with Image.open(output) as img:
+        assert max(img.size) == 320
+
+
+def test_output_not_smaller_is_not_written(tmp_path):
+    source = _jpeg(tmp_path / "small.jpg", (200, 150), quality=20)
+    output = tmp_path / "out.jpg"
+
+    result = process_image_file(str(source), str(output), (1920, 1920), 95)
+
+    assert result["status"] == "not_smaller"
+    assert result["output_size"] >= result["source_size"]
+    assert not output.exists()
+
+
+@pytest.mark.asyncio
+async def test_in_place_not_smaller_keeps_original(tmp_path):
+    # Deferred processing recompresses the downloaded file over itself
+    photo = _jpeg(tmp_path / "photo.jpg", (200, 150), quality=20)
+    original = photo.read_bytes()
+    processor = ImageProcessor(
+        thread_pool=None, settings=ProcessingSettings(image_quality=95)
+    )
+    processor.needs_processing_with_metadata = lambda metadata, settings: True
+
+    task = ProcessingTask(input_path=photo, output_path=photo, media_type="image")
+    assert await processor.process(task, "worker_0")
+
+    assert photo.read_bytes() == original
+    assert processor.get_statistics()["not_smaller"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_processes_images_in_batches(tmp_path):
+    sources = [_jpeg(tmp_path / f"{i}.jpg", (640, 480)) for i in range(3)]
+    pool = ImageProcessPool(workers=1, batch_size=2)
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                *(
+                    pool.process(str(s), str(tmp_path / f"out{i}.jpg"), (100, 100), 80)
+                    for i, s in enumerate(sources)
+                )
+            ),
+            20,
+        )
+    finally:
+        await pool.shutdown()
+
+    assert [r["status"] for r in results] == ["optimized"] * 3
+    assert pool.batches == 2  # One full batch, one flushed after the delay
+
+
+@pytest.mark.asyncio
+async def test_shutdown_resolves_queued_images(tmp_path):
+    source = _jpeg(tmp_path / "queued.jpg", (64, 48))
+    pool = ImageProcessPool(workers=1, batch_size=8, batch_delay=60)
+    job = asyncio.ensure_future(
+        pool.process(str(source), str(tmp_path / "out.jpg"), (32, 32), 80)
+    )
+    await asyncio.sleep(0)  # Queued, waiting for the batch timer
+
+    await pool.shutdown()
+
+    assert (await asyncio.wait_for(job, 1))["error"] == "pool stopped"
+    assert pool._flush_handle is None
@@ -0,0 +1,91 @@
+"""
+Tests for lazy media placeholders and batch hydration.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.media.lazy_loader import LazyMediaLoader
+
+
+def _message(msg_id, size, doc_id):
+    document = SimpleNamespace(
+        id=doc_id, access_hash=7, file_reference=b"\x01\x02", dc_id=2, size=size
+    )
+    return SimpleNamespace(
+        id=msg_id,
+        peer_id=None,
+        media=SimpleNamespace(document=document),
+        file=SimpleNamespace(name=f"file{msg_id}.mp4", size=size, mime_type="video/mp4"),
+    )
+
+
+class FakeProcessor:
+    def __init__(self, messages):
+        self.messages = messages
+        self.fetches = []
+        self.client = SimpleNamespace(get_messages=self._get_messages)
+
+    async def _get_messages(self, peer, ids):
+        self.fetches.append((peer, list(ids)))
+        return [self.messages.get(i) for i in ids]
+
+    async def _extract_media_from_message(self, message):
+        return [("video", message)]
+
+    async def download_and_process_media(self, message, entity_id, entity_media_path):
+        path = entity_media_path / "video" / message.file.name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * message.file.size)
+        return [path]
+
+    async def wait_for_downloads(self, show_progress=True):
+        return True
+
+
+@pytest.mark.asyncio
+async def test_placeholders_are_hydrated_by_filter(tmp_path):
+    messages = {1: _message(1, 10, 101), 2: _message(2, 5000, 102), 3: _message(3, 20, 103)}
+    processor = FakeProcessor(messages)
+    loader = LazyMediaLoader(processor, tmp_path / "lazy")
+    media_dir = tmp_path / "chat" / "media"
+
+    lines = []
+    for message in messages.values():
+        lines += await loader.defer_media(message, 42, media_dir, tmp_path / "chat")
+    note = tmp_path / "chat" / "chat.md"
+    note.parent.mkdir()
+    note.write_text("".join(lines), encoding="utf-8")
+    assert "Token: 42_2" in note.read_text()
+
+    stored = (await loader.list_pending_downloads())[0]
+    assert stored.document_id is not None and stored.file_reference == "0102"
+
+    # Only small files; message 3 was deleted since the export
+    del messages[3]
+    stats = await loader.hydrate(entity_id="42", max_size=1000)
+    assert stats == {"pending": 2, "hydrated": 1, "missing": 1, "failed": 0}
+    assert processor.fetches == [(42, [1, 3])]
+
+    text = note.read_text()
+    assert "![[media/video/file1.mp4]]" in text
+    assert "Token: 42_1" not in text and "Token: 42_2" in text
+
+    pending = await loader.list_pending_downloads()
+    assert sorted(m.message_id for m in pending) == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_replaced_media_is_not_downloaded(tmp_path):
+    messages = {1: _message(1, 10, 101)}
+    processor = FakeProcessor(messages)
+    loader = LazyMediaLoader(processor, tmp_path / "lazy")
+    media_dir = tmp_path / "chat" / "media"
+    await loader.defer_media(messages[1], 42, media_dir, tmp_path / "chat")
+
+    messages[1] = _message(1, 10, 555)  # Message edited with another file
+    stats = await loader.hydrate()
+
+    assert stats == {"pending": 1, "hydrated": 0, "missing": 1, "failed": 0}
+    assert not (media_dir / "video" / "file1.mp4").exists()
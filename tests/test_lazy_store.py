@@ -0,0 +1,67 @@
+"""
+Tests for the single-file lazy media metadata store.
+"""
+
+import json
+
+from src.media import lazy_store
+from src.media.lazy_store import LazyMetadataStore
+
+
+def _record(entity, msg_id, size, media_type="photo", created_at=1000.0):
+    return {
+        "lazy_load_token": f"{entity}_{msg_id}",
+        "entity_id": entity,
+        "message_id": msg_id,
+        "media_type": media_type,
+        "file_size": size,
+        "created_at": created_at,
+        "hydrated_path": None,
+    }
+
+
+def test_queries_survive_reload_and_torn_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(lazy_store, "FLUSH_EVERY", 3)
+    path = tmp_path / "metadata.log"
+    store = LazyMetadataStore(path)
+    store.put_many(_record(1, i, i * 100) for i in range(1, 6))
+    store.put_many(_record(2, i, i * 100, "video") for i in range(1, 3))
+    store.put({**_record(1, 2, 200), "hydrated_path": "/x/2.jpg"})
+    assert path.exists()  # batches appended before the explicit flush
+    store.flush()
+
+    # Crash mid-append: the partial record is dropped, the rest survives
+    frame = store._log.encode_set("4_1", _record(4, 1, 10))
+    with open(path, "ab") as f:
+        f.write(frame[:-3])
+    reloaded = LazyMetadataStore(path)
+    assert len(reloaded) == 7
+
+    small = reloaded.query(entity_id=1, max_size=300)
+    assert sorted(r["message_id"] for r in small) == [1, 3]
+    assert [r["message_id"] for r in reloaded.query(media_type="video", min_size=200)] == [2]
+    assert reloaded.get("1_2")["hydrated_path"] == "/x/2.jpg"
+
+    reloaded.put(_record(3, 1, 50))
+    reloaded.flush()
+    assert LazyMetadataStore(path).get("3_1")["file_size"] == 50
+
+
+def test_legacy_json_import_delete_and_compaction(tmp_path):
+    for i in range(3):
+        record = _record(5, i, 10, created_at=float(i))
+        (tmp_path / f"5_{i}.json").write_text(json.dumps(record), encoding="utf-8")
+
+    store = LazyMetadataStore(tmp_path / "metadata.log")
+    store._log.compaction_min_bytes = 0
+    assert store.import_json_dir(tmp_path) == 3
+    assert not list(tmp_path.glob("*.json"))
+
+    # Entries created before t=2 are removed; log records of dead entries
+    # trigger a rewrite with only the live one
+    removed = store.delete(store.match(created_before=2.0, include_hydrated=True))
+    store.flush()
+    assert removed == 2
+    stats = store.get_stats()
+    assert (stats["compactions"], stats["live_entries"], stats["dead_bytes"]) == (1, 1, 0)
+    assert [r["message_id"] for r in LazyMetadataStore(store.path).query()] == [2]
@@ -0,0 +1,118 @@
+"""
+Tests for pre-download deduplication by Telegram media identity.
+"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import msgpack
+import pytest
+
+from src.media.downloader import MediaDownloader
+from src.media.media_identity import MediaIdentityIndex, media_identity_key
+
+
+def _doc_message(msg_id, access_hash, size, doc_id=555, dc_id=2):
+    document = SimpleNamespace(id=doc_id, access_hash=access_hash, size=size, dc_id=dc_id)
+    return SimpleNamespace(
+        id=msg_id,
+        media=SimpleNamespace(document=document),
+        file=SimpleNamespace(size=size),
+    )
+
+
+def test_identity_ignores_access_hash_and_survives_restart(tmp_path):
+    first = _doc_message(1, access_hash=111, size=10)
+    forwarded = _doc_message(2, access_hash=222, size=10)
+    assert media_identity_key(first) == media_identity_key(forwarded) == "doc:555:10:2"
+
+    stored = tmp_path / "file.bin"
+    stored.write_bytes(b"x" * 10)
+    index = MediaIdentityIndex(tmp_path / "identity.log")
+    index.record(media_identity_key(first), stored)
+    moved = tmp_path / "export" / "file.bin"
+    moved.parent.mkdir()
+    stored.rename(moved)
+    index.relocate(stored, moved)
+    index.flush()
+
+    reloaded = MediaIdentityIndex(tmp_path / "identity.log")
+    assert reloaded.lookup(media_identity_key(forwarded)) == moved
+    # Size change after recording (e.g. truncated file) drops the entry
+    moved.write_bytes(b"x" * 3)
+    assert reloaded.lookup(media_identity_key(forwarded)) is None
+    assert len(reloaded) == 0
+
+
+def test_processed_output_keeps_the_identity(tmp_path):
+    raw = tmp_path / "download_1"
+    raw.write_bytes(b"x" * 100)
+    index = MediaIdentityIndex(tmp_path / "identity.log")
+    index.record("photo:9:100:2", raw)
+
+    # Recompression wrote a smaller output and the raw file was deleted
+    output = tmp_path / "export" / "photo.jpg"
+    output.parent.mkdir()
+    output.write_bytes(b"y" * 40)
+    raw.unlink()
+    index.relocate(raw, output)
+    index.flush()
+
+    assert MediaIdentityIndex(tmp_path / "identity.log").lookup("photo:9:100:2") == output
+
+
+def test_changes_are_appended_and_legacy_snapshot_migrated(tmp_path):
+    files = []
+    for i in range(3):
+        path = tmp_path / f"f{i}.bin"
+        path.write_bytes(b"x" * 10)
+        files.append(path)
+    (tmp_path / "identity.msgpack").write_bytes(
+        msgpack.packb({"doc:1:10:2": str(files[0])})
+    )
+
+    index = MediaIdentityIndex(tmp_path / "identity.log")
+    assert not (tmp_path / "identity.msgpack").exists()  # Migrated into the log
+    log_size = (tmp_path / "identity.log").stat().st_size
+    index.record("doc:2:10:2", files[1])
+    index.record("doc:3:10:2", files[2])
+    index.flush()
+    # Appends only: two new records, the migrated one is not rewritten
+    assert index.get_stats()["recorded"] == 2
+    assert (tmp_path / "identity.log").stat().st_size > log_size
+
+    reloaded = MediaIdentityIndex(tmp_path / "identity.log")
+    assert [reloaded.lookup(f"doc:{i}:10:2") for i in (1, 2, 3)] == files
+
+
+@pytest.mark.asyncio
+async def test_forwarded_media_is_not_downloaded_again(tmp_path):
+    data = os.urandom(2048)
+    config = SimpleNamespace(
+        cache_file=tmp_path / "cache" / "cache.json",
+        performance=SimpleNamespace(hash_based_deduplication=False),
+    )
+    downloader = MediaDownloader(
+        connection_manager=SimpleNamespace(download_semaphore=asyncio.Semaphore(1)),
+        temp_dir=tmp_path / "tmp",
+        client=None,  # Any network access would fail
+        config=config,
+    )
+    (tmp_path / "tmp").mkdir()
+    downloaded = tmp_path / "tmp" / "download_1"
+    downloaded.write_bytes(data)
+    original = _doc_message(1, access_hash=111, size=len(data))
+    downloader._identity_index.record(media_identity_key(original), downloaded)
+
+    # First export moves its result to the chat folder; the index follows it
+    output = await downloader.place_media(downloaded, tmp_path / "chat_a" / "doc.bin")
+
+    reused = await downloader.download_media(_doc_message(2, access_hash=222, size=len(data)))
+
+    assert reused is not None and reused != output
+    assert downloader.is_identity_copy(reused)
+    assert reused.read_bytes() == data
+    # The earlier export keeps its file
+    assert output.read_bytes() == data
+    assert downloader.get_statistics()["media_identity"]["hits"] == 1
@@ -0,0 +1,69 @@
+"""
+Tests for MetadataExtractor cache identity and Telegram attribute reuse.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.media import metadata as metadata_module
+from src.media.metadata import MetadataExtractor, sample_identity
+
+
+class DocumentAttributeVideo(SimpleNamespace):
+    pass
+
+
+def _video_message(doc_id, size, duration=12, w=1280, h=720):
+    document = SimpleNamespace(
+        id=doc_id,
+        dc_id=2,
+        size=size,
+        attributes=[DocumentAttributeVideo(duration=duration, w=w, h=h)],
+    )
+    return SimpleNamespace(media=SimpleNamespace(document=document), file=None)
+
+
+def test_sample_identity_reads_only_head_and_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(metadata_module, "SAMPLE_BYTES", 4)
+    a = tmp_path / "a.bin"
+    b = tmp_path / "b.bin"
+    a.write_bytes(b"HEAD" + b"x" * 100 + b"TAIL")
+    b.write_bytes(b"HEAD" + b"y" * 100 + b"TAIL")  # Differs only in the middle
+    assert sample_identity(a) == sample_identity(b)
+    b.write_bytes(b"HEAD" + b"y" * 100 + b"TAIX")
+    assert sample_identity(a) != sample_identity(b)
+
+
+@pytest.mark.asyncio
+async def test_telegram_video_attributes_skip_ffprobe(tmp_path, monkeypatch):
+    extractor = MetadataExtractor(thread_pool=None)
+
+    async def fail_probe(path):
+        raise AssertionError("ffprobe must not run")
+
+    monkeypatch.setattr(extractor, "_get_ffmpeg_metadata", fail_probe)
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"\0" * 3000)
+
+    message = _video_message(doc_id=55, size=3000)
+    metadata = await extractor.get_metadata(video, "video", message=message)
+    assert (metadata.duration, metadata.width, metadata.height) == (12.0, 1280, 720)
+    assert metadata.bitrate == 2000  # 3000 bytes * 8 / 12 s
+    assert metadata.checksum == "doc:55:3000:2"
+
+    # Same document again (e.g. forwarded): served from the cache
+    again = await extractor.get_metadata(tmp_path / "gone.mp4", "video", message=message)
+    assert again is metadata
+    assert extractor.get_statistics()["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(metadata_module, "METADATA_CACHE_SIZE", 2)
+    extractor = MetadataExtractor(thread_pool=None)
+    for i in range(3):
+        path = tmp_path / f"f{i}.bin"
+        path.write_bytes(bytes([i]) * 10)
+        await extractor.get_metadata(path, "document")
+    assert extractor.get_statistics()["cached"] == 2
@@ -0,0 +1,135 @@
+"""
+Tests for the multi-connection parallel part downloader.
+"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from src.media.downloader import MediaDownloader
+from src.media.parallel_download import (
+    ParallelPartDownloader,
+    PartDownloadError,
+    aligned_part_size,
+    plan_parts,
+)
+
+
+class FakeClient:
+    """Serves iter_download() from an in-memory file; can fail after N chunks."""
+
+    def __init__(self, data: bytes, connected_dc: int = 0, fail_after=None):
+        self.data = data
+        self.connected_dc = connected_dc
+        self.fail_after = fail_after
+        self.offsets = []
+
+    async def iter_download(self, media, *, offset, limit, request_size, file_size, dc_id=None):
+        for i in range(limit):
+            start = offset + i * request_size
+            if start >= len(self.data):
+                return
+            if self.fail_after is not None:
+                if self.fail_after == 0:
+                    self.fail_after = None
+                    raise ConnectionError("connection reset")
+                self.fail_after -= 1
+            self.offsets.append(start)
+            await asyncio.sleep(0)
+            yield self.data[start : start + request_size]
+
+
+def test_part_planning_is_aligned():
+    assert aligned_part_size(512) == 512 * 1024
+    assert aligned_part_size(300) == 256 * 1024
+    assert aligned_part_size(2048) == 512 * 1024
+    assert aligned_part_size(1) == 4 * 1024
+    assert plan_parts(10_000, 4096) == [(0, 4096), (4096, 4096), (8192, 1808)]
+
+
+@pytest.mark.asyncio
+async def test_parallel_download_spreads_parts_and_resumes(tmp_path):
+    data = os.urandom(4096 * 37 + 123)
+    flaky = FakeClient(data, connected_dc=2, fail_after=3)
+    steady = FakeClient(data, connected_dc=4)
+    downloader = ParallelPartDownloader([steady, flaky], connections=4, part_size_kb=4)
+
+    done = set()
+    path = tmp_path / "out.bin"
+    reported = []
+
+    async def progress(downloaded, total):
+        reported.append(downloaded)
+
+    await downloader.download(
+        object(), path, len(data), done, dc_id=2, progress_callback=progress
+    )
+
+    assert path.read_bytes() == data
+    assert len(done) == 38
+    assert reported[-1] == len(data)
+    # Same-DC worker is preferred, both carry traffic
+    assert downloader._ordered_clients(2)[0] is flaky
+    assert flaky.offsets and steady.offsets
+
+
+@pytest.mark.asyncio
+async def test_failed_parts_are_kept_for_the_next_round(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.media.parallel_download.RETRY_BACKOFF_S", 0)
+    data = os.urandom(4096 * 10)
+
+    class BrokenClient(FakeClient):
+        async def iter_download(self, media, **kwargs):
+            async for chunk in super().iter_download(media, **kwargs):
+                if kwargs["offset"] >= 4096 * 5:
+                    raise ConnectionError("boom")
+                yield chunk
+
+    path = tmp_path / "out.bin"
+    done = set()
+    with pytest.raises(PartDownloadError):
+        await ParallelPartDownloader([BrokenClient(data)], part_size_kb=4).download(
+            object(), path, len(data), done
+        )
+    assert done and len(done) < 10
+
+    healthy = FakeClient(data)
+    await ParallelPartDownloader([healthy], part_size_kb=4).download(
+        object(), path, len(data), done
+    )
+    assert path.read_bytes() == data
+    # Only the missing parts were fetched again
+    assert min(healthy.offsets) >= 4096 * 5
+
+
+@pytest.mark.asyncio
+async def test_media_downloader_uses_parallel_path(tmp_path):
+    data = os.urandom(4096 * 20)
+    config = SimpleNamespace(
+        performance=SimpleNamespace(
+            hash_based_deduplication=False,
+            enable_parallel_download=True,
+            parallel_download_min_size_mb=0,
+            max_parallel_connections=4,
+            part_size_kb=4,
+        )
+    )
+    downloader = MediaDownloader(
+        connection_manager=SimpleNamespace(download_semaphore=asyncio.Semaphore(2)),
+        temp_dir=tmp_path,
+        worker_clients=[FakeClient(data), FakeClient(data)],
+        config=config,
+    )
+    message = SimpleNamespace(
+        id=7,
+        media=SimpleNamespace(document=object()),
+        file=SimpleNamespace(size=len(data)),
+    )
+
+    path = await downloader.download_media(message)
+
+    assert path == tmp_path / "parallel_7.tmp"
+    assert path.read_bytes() == data
+    assert downloader.get_statistics()["parallel_downloads"]["successes"] == 1
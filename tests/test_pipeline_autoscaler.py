@@ -0,0 +1,109 @@
+"""
+Tests for AsyncPipeline process-worker autoscaling.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.export.autoscaler import WorkerAutoscaler
+from src.export.pipeline import AsyncPipeline
+
+
+class FakeTelegramManager:
+    def __init__(self, count, delay=0.0):
+        self._count = count
+        self._delay = delay
+
+    async def fetch_messages(self, entity, limit=None, min_id=None):
+        for i in range(1, self._count + 1):
+            if self._delay:
+                await asyncio.sleep(self._delay)
+            yield SimpleNamespace(id=i)
+
+
+def test_autoscaler_decisions_respect_bounds_and_patience():
+    scaler = WorkerAutoscaler(min_workers=1, max_workers=3, patience=2)
+
+    assert scaler.observe(2, fetch_fill=1.0, write_fill=0.0) == (0, "process-bound")
+    assert scaler.observe(2, fetch_fill=1.0, write_fill=0.0) == (1, "process-bound")
+    # Already at max: no growth
+    scaler.observe(3, fetch_fill=1.0, write_fill=0.0)
+    assert scaler.observe(3, fetch_fill=1.0, write_fill=0.0)[0] == 0
+
+    scaler.observe(3, fetch_fill=1.0, write_fill=0.9)
+    assert scaler.observe(3, fetch_fill=1.0, write_fill=0.9) == (-1, "write-bound")
+    scaler.observe(1, fetch_fill=0.0, write_fill=0.0)
+    assert scaler.observe(1, fetch_fill=0.0, write_fill=0.0) == (0, "fetch-bound")
+
+    stats = scaler.stats(final_workers=1)
+    assert stats["decision_count"] == 2
+    assert [d["reason"] for d in stats["decisions"]] == ["process-bound", "write-bound"]
+    assert stats["peak_workers"] == 3
+
+
+def test_reorder_buffer_backlog_is_write_bound():
+    scaler = WorkerAutoscaler(min_workers=1, max_workers=4, patience=1)
+
+    # Queues look process-bound, but the writer holds a large out-of-order
+    # backlog behind one slow message
+    assert scaler.observe(
+        3, fetch_fill=1.0, write_fill=0.0, buffered=9, buffer_capacity=10
+    ) == (-1, "write-bound")
+    assert scaler.observe(
+        2, fetch_fill=1.0, write_fill=0.0, buffered=2, buffer_capacity=10
+    ) == (1, "process-bound")
+    assert scaler.stats(final_workers=3)["decisions"][0]["buffered"] == 9
+
+
+@pytest.mark.asyncio
+async def test_pipeline_scales_up_when_process_bound():
+    async def process_fn(message):
+        await asyncio.sleep(0.01)
+        return message.id
+
+    written = []
+
+    async def writer_fn(value):
+        written.append(value)
+
+    pipeline = AsyncPipeline(
+        process_workers=1,
+        fetch_queue_size=8,
+        autoscale=True,
+        min_process_workers=1,
+        max_process_workers=6,
+        autoscale_interval=0.01,
+    )
+    stats = await pipeline.run(None, FakeTelegramManager(200), process_fn, writer_fn)
+
+    assert written == list(range(1, 201))
+    assert stats["autoscale"]["peak_workers"] > 1
+    assert stats["autoscale"]["decisions"][0]["reason"] == "process-bound"
+
+
+@pytest.mark.asyncio
+async def test_pipeline_scales_down_when_fetch_bound():
+    async def process_fn(message):
+        return message.id
+
+    written = []
+
+    async def writer_fn(value):
+        written.append(value)
+
+    pipeline = AsyncPipeline(
+        process_workers=4,
+        autoscale=True,
+        min_process_workers=1,
+        max_process_workers=4,
+        autoscale_interval=0.01,
+    )
+    stats = await pipeline.run(
+        None, FakeTelegramManager(40, delay=0.005), process_fn, writer_fn
+    )
+
+    assert written == list(range(1, 41))
+    assert stats["process_workers"] < 4
+    assert all(d["reason"] == "fetch-bound" for d in stats["autoscale"]["decisions"])
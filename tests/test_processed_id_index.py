@@ -0,0 +1,115 @@
+"""
+Tests for ProcessedIdIndex and its CacheManager integration.
+"""
+
+import random
+
+import pytest
+
+from src.core.cache import CacheManager, CompressionType
+from src.core.id_index import ProcessedIdIndex
+
+
+def test_in_order_adds_collapse_to_single_range():
+    index = ProcessedIdIndex()
+    for i in range(1, 100_001):
+        assert index.add(i)
+
+    assert len(index) == 100_000
+    assert index.range_count == 1
+    assert index.max_id == 100_000
+    assert 1 in index and 100_000 in index
+    assert 0 not in index and 100_001 not in index
+
+
+def test_gaps_and_merging():
+    index = ProcessedIdIndex([1, 2, 3, 10, 11, 5])
+    assert index.ranges() == [(1, 3), (5, 5), (10, 11)]
+
+    assert not index.add(2)  # duplicate
+    index.add(4)  # joins (1,3) and (5,5)
+    assert index.ranges() == [(1, 5), (10, 11)]
+    index.add(9)  # extends (10,11) to the left
+    assert index.ranges() == [(1, 5), (9, 11)]
+    assert len(index) == 8
+
+
+def test_matches_set_semantics_for_random_ids():
+    rng = random.Random(42)
+    ids = [rng.randint(1, 500) for _ in range(400)]
+    index = ProcessedIdIndex(ids)
+    expected = set(ids)
+
+    assert len(index) == len(expected)
+    assert list(index) == sorted(expected)
+    for i in range(0, 502):
+        assert (i in index) == (i in expected)
+
+
+def test_membership_accepts_numpy_integers():
+    np = pytest.importorskip("numpy")
+    index = ProcessedIdIndex()
+    index.add(np.int64(5))
+
+    assert np.int64(5) in index
+    assert np.int32(5) in index
+    assert np.int64(6) not in index
+    assert 5.0 not in index and "5" not in index
+
+
+def test_serialization_roundtrip():
+    index = ProcessedIdIndex([1, 2, 3, 7, 8, 20])
+    restored = ProcessedIdIndex.from_dict(index.to_dict())
+    assert restored.ranges() == index.ranges()
+    assert len(restored) == len(index)
+
+    with pytest.raises(ValueError):
+        ProcessedIdIndex.from_dict({"ranges": [5, 10, 8, 12]})
+
+
+def test_discard_above_rolls_back_to_checkpoint():
+    index = ProcessedIdIndex([1, 2, 3, 4, 8, 9, 10])
+    assert index.discard_above(3) == 4
+    assert index.ranges() == [(1, 3)]
+    assert index.max_id == 3
+    assert len(index) == 3
+    assert index.discard_above(100) == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_manager_uses_index(tmp_path):
+    path = tmp_path / "cache.json"
+    manager = CacheManager(path, compression=CompressionType.NONE)
+    for message_id in range(1, 1001):
+        await manager.add_processed_message_async(message_id, "42")
+
+    assert await manager.is_processed(500, "42")
+    assert not await manager.is_processed(1001, "42")
+    assert await manager.get_last_processed_message_id_async("42") == 1000
+    # IDs are not stored per message in the entity dict
+    assert await manager.get("entity_42") is None
+    await manager.shutdown()
+
+    restored = CacheManager(path, compression=CompressionType.NONE)
+    await restored._load_cache()
+    assert await restored.is_processed(1, "42")
+    assert await restored.get_last_processed_message_id_async("42") == 1000
+    assert (await restored.get_processed_index("42")).range_count == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_manager_migrates_legacy_processed_messages(tmp_path):
+    manager = CacheManager(tmp_path / "cache.json", compression=CompressionType.NONE)
+    await manager.set(
+        "entity_7",
+        {"processed_messages": {"3": {}, "4": {}, "9": {}}, "last_id": 9},
+    )
+
+    assert await manager.is_processed(4, "7")
+    assert not await manager.is_processed(5, "7")
+    assert await manager.get_last_processed_message_id_async("7") == 9
+
+    # Metadata is still available for reply linking
+    await manager.add_processed_message_async(10, "7", reply_to=9, filename="10.md")
+    processed = await manager.get_all_processed_messages_async("7")
+    assert processed["10"]["reply_to"] == 9
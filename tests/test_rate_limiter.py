@@ -0,0 +1,102 @@
+"""
+Tests for the account-wide Telegram API rate limiter.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from telethon.errors import FloodWaitError
+
+from src.core.rate_limiter import HISTORY, MEDIA, OTHER, RateLimiter
+from src.telegram_client import TelegramManager
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_after_burst():
+    limiter = RateLimiter(rates={HISTORY: 50.0}, burst=2)
+
+    start = time.monotonic()
+    for _ in range(6):
+        await limiter.acquire(HISTORY)
+    elapsed = time.monotonic() - start
+
+    # 2 burst tokens, then 4 more at 50/s
+    assert elapsed >= 0.07
+    stats = limiter.get_stats()[HISTORY]
+    assert stats["acquired"] == 6
+    assert stats["delayed"] == 4
+
+
+@pytest.mark.asyncio
+async def test_flood_wait_pauses_only_its_class_for_all_callers():
+    limiter = RateLimiter(rates={HISTORY: 100.0, MEDIA: 100.0}, burst=5)
+    limiter.report_flood_wait(HISTORY, 0.2)
+
+    assert limiter.get_stats()[HISTORY]["rate"] == 50.0
+    assert limiter.penalty_remaining(HISTORY) > 0
+
+    start = time.monotonic()
+    assert await limiter.acquire(MEDIA) == 0
+    assert time.monotonic() - start < 0.1
+
+    waits = await asyncio.gather(*(limiter.acquire(HISTORY) for _ in range(3)))
+    assert all(w >= 0.15 for w in waits)
+    assert limiter.get_stats()[HISTORY]["flood_waits"] == 1
+
+    # Unknown method classes share the "other" bucket
+    await limiter.acquire("resolve")
+    assert limiter.get_stats()[OTHER]["acquired"] == 1
+
+
+@pytest.mark.asyncio
+async def test_from_config_and_disabled_pacing():
+    config = MagicMock()
+    config.performance = SimpleNamespace(
+        rate_limit_enabled=False, rate_limit_calls_per_second=1.0
+    )
+    limiter = RateLimiter.from_config(config)
+
+    start = time.monotonic()
+    for _ in range(50):
+        await limiter.acquire(HISTORY)
+    assert time.monotonic() - start < 0.1
+
+    # Penalties still apply with pacing disabled
+    limiter.report_flood_wait(HISTORY, 0.05)
+    assert await limiter.acquire(HISTORY) > 0
+
+    # MagicMock attributes (unset settings) fall back to defaults
+    assert RateLimiter.from_config(MagicMock()).get_stats()[HISTORY]["rate"] == 10.0
+
+
+@pytest.mark.asyncio
+async def test_fetch_retries_flood_wait_through_shared_limiter():
+    class DummyConfig:
+        batch_fetch_size = 5
+        request_delay = 0
+        lazy_message_page_size = 50
+        performance = SimpleNamespace(workers=1)
+
+    class FakeClient:
+        calls = 0
+
+        async def get_messages(self, entity, limit=100, offset_id=0, min_id=0, **kwargs):
+            FakeClient.calls += 1
+            if FakeClient.calls == 1:
+                raise FloodWaitError(request=None, capture=0)
+            start = int(offset_id) + 1
+            return [SimpleNamespace(id=i) for i in range(start, min(start + limit, 4))]
+
+    mgr = TelegramManager(DummyConfig())
+    mgr.client = FakeClient()
+    mgr.rate_limiter = RateLimiter(rates={HISTORY: 0})
+
+    ids = [m.id async for m in mgr.fetch_messages(entity="dummy")]
+
+    assert ids == [1, 2, 3]
+    stats = mgr.rate_limiter.get_stats()[HISTORY]
+    assert stats["flood_waits"] == 1
+    assert stats["wait_seconds"] >= 0.9
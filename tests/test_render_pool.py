@@ -0,0 +1,121 @@
+"""
+Tests for the process-pool render stage (render_pool + AsyncPipeline render_fn).
+"""
+
+import asyncio
+import datetime as dt
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.config import Config
+from src.export.exporter import Exporter
+from src.export.pipeline import AsyncPipeline
+from src.export.render_pool import ProcessRenderPool, render_record
+
+
+class FakeTelegramManager:
+    def __init__(self, messages):
+        self._messages = list(messages)
+
+    async def fetch_messages(self, entity, limit=None, min_id=None):
+        for m in self._messages:
+            yield m
+
+
+def _record(msg_id, text="hello"):
+    return {
+        "id": msg_id,
+        "date": dt.datetime(2024, 1, 2, 10, 30, tzinfo=dt.timezone.utc),
+        "sender_name": "Alice",
+        "text": text,
+        "media_lines": [],
+        "reactions": [],
+        "has_media": False,
+        "media_count": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_render_record_matches_exporter_output():
+    config = MagicMock(spec=Config)
+    config.media_download = False
+    config.export_reactions = True
+    exporter = Exporter.__new__(Exporter)
+    exporter.config = config
+    exporter._interned_strings = set()
+    exporter._get_sender_name = AsyncMock(return_value="Alice")
+    exporter._lazy_log = MagicMock()
+
+    reaction = SimpleNamespace(
+        results=[
+            SimpleNamespace(reaction=SimpleNamespace(emoticon="👍"), count=3),
+            SimpleNamespace(reaction=SimpleNamespace(document_id=1), count=1),
+        ]
+    )
+    message = SimpleNamespace(
+        id=7,
+        text="hello",
+        media=None,
+        reactions=reaction,
+        date=dt.datetime(2024, 1, 2, 10, 30, tzinfo=dt.timezone.utc),
+    )
+
+    result = await exporter._process_message_parallel(message, None, None, None, None)
+    record = await exporter._prepare_render_record(message, None, None, None, None)
+
+    assert render_record(record) == result
+    assert result[0] == "Alice, [02.01.2024 13:30]\nhello\n**Reactions:** 👍 3, 🧩 1\n\n"
+
+
+@pytest.mark.asyncio
+async def test_process_pool_render_preserves_order():
+    pool = ProcessRenderPool(2)
+    try:
+        results = await pool.render([_record(i, f"m{i}") for i in range(1, 51)])
+    finally:
+        pool.shutdown()
+
+    assert [r[1] for r in results] == list(range(1, 51))
+    assert results[0][0] == "Alice, [02.01.2024 13:30]\nm1\n\n"
+    assert pool.records_rendered == 50
+
+
+@pytest.mark.asyncio
+async def test_pipeline_render_stage_orders_and_counts_errors():
+    messages = [SimpleNamespace(id=i) for i in range(1, 41)]
+
+    async def process_fn(message):
+        await asyncio.sleep(0.001 * (message.id % 3))
+        if message.id == 5:
+            raise RuntimeError("boom")
+        if message.id == 6:
+            return None  # skipped
+        return _record(message.id)
+
+    render_calls = []
+
+    async def render_fn(records):
+        render_calls.append(len(records))
+        return [render_record(r) for r in records]
+
+    written = []
+
+    async def writer_fn(result):
+        written.append(result[1])
+
+    pipeline = AsyncPipeline(process_workers=3, fetch_queue_size=16)
+    stats = await pipeline.run(
+        entity=None,
+        telegram_manager=FakeTelegramManager(messages),
+        process_fn=process_fn,
+        writer_fn=writer_fn,
+        render_fn=render_fn,
+        render_batch_size=8,
+    )
+
+    assert written == [i for i in range(1, 41) if i not in (5, 6)]
+    assert stats["errors"] == 1
+    assert stats["render_batches"] == len(render_calls)
+    assert max(render_calls) <= 8
@@ -0,0 +1,84 @@
+"""
+Tests for the streaming spill file reader/writer used by sharded fetch.
+"""
+
+import struct
+import zlib
+
+import msgpack
+import pytest
+
+from src.shard_spill import (
+    SpillFormatError,
+    SpillWriter,
+    inspect_spill_file,
+    iter_spill_file,
+    iter_spill_files,
+    main,
+    verify_spill_file,
+)
+
+
+def _records(ids):
+    return [{"id": i, "message": f"text {i}" * 20, "has_media": i % 2 == 0} for i in ids]
+
+
+def test_roundtrip_compressed_and_raw_chunks(tmp_path):
+    path = tmp_path / "worker_0.bin"
+    with open(path, "wb") as f:
+        SpillWriter(f).write_chunk(_records(range(3000, 0, -1)))
+        SpillWriter(f, compress=False).write_chunk(_records(range(4000, 3000, -1)))
+        SpillWriter(f).write_chunk([])
+
+    ids = [record["id"] for record in iter_spill_file(path)]
+    assert ids == list(range(3000, 0, -1)) + list(range(4000, 3000, -1))
+
+    summary = verify_spill_file(path)
+    assert summary["chunks"] == 3
+    assert summary["compressed_chunks"] == 2
+    assert summary["records"] == 4000
+    assert (summary["min_id"], summary["max_id"]) == (1, 4000)
+
+
+def test_reads_files_written_by_legacy_packb_writer(tmp_path):
+    path = tmp_path / "legacy.bin"
+    with open(path, "wb") as f:
+        for is_compressed, ids in ((1, [3, 2, 1]), (0, [6, 5, 4])):
+            data = msgpack.packb(_records(ids), use_bin_type=True)
+            if is_compressed:
+                data = zlib.compress(data, 1)
+            f.write(struct.pack(">I", len(data)))
+            f.write(struct.pack(">B", is_compressed))
+            f.write(data)
+
+    assert [r["id"] for r in iter_spill_files([path, path])] == [3, 2, 1, 6, 5, 4] * 2
+
+
+def test_corruption_is_reported(tmp_path):
+    path = tmp_path / "worker.bin"
+    with open(path, "wb") as f:
+        SpillWriter(f).write_chunk(_records(range(100)))
+    data = path.read_bytes()
+
+    truncated = tmp_path / "truncated.bin"
+    truncated.write_bytes(data[:-20])
+    with pytest.raises(SpillFormatError):
+        list(iter_spill_file(truncated))
+    assert inspect_spill_file(truncated)["error"]
+
+    flipped = bytearray(data)
+    flipped[40] ^= 0xFF
+    corrupted = tmp_path / "corrupted.bin"
+    corrupted.write_bytes(bytes(flipped))
+    with pytest.raises(SpillFormatError):
+        verify_spill_file(corrupted)
+
+    assert main(["verify", str(path)]) == 0
+    assert main(["verify", str(path), str(corrupted)]) == 1
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    assert list(iter_spill_file(path)) == []
+    assert verify_spill_file(path)["records"] == 0
@@ -0,0 +1,143 @@
+"""
+Tests for SHA-256 hashing fused into the download write path.
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from src.media.downloader import MediaDownloader
+from src.media.streaming_hash import StreamingHasher, sha256_file_async
+
+PART = 4096
+
+
+@pytest.mark.asyncio
+async def test_out_of_order_parts_are_hashed_without_rereading(tmp_path):
+    data = os.urandom(PART * 20 + 77)
+    path = tmp_path / "file.bin"
+    path.write_bytes(data)
+    parts = [(o, data[o : o + PART]) for o in range(0, len(data), PART)]
+    random.Random(3).shuffle(parts)
+
+    hasher = StreamingHasher(path)
+    for offset, chunk in parts + parts[:3]:  # duplicates are ignored
+        hasher.update_at(offset, chunk)
+
+    assert hasher.streamed_bytes == len(data)
+    path.write_bytes(b"")  # a re-read would now give a different digest
+    assert await hasher.hexdigest(len(data)) == hashlib.sha256(data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_unstreamed_tail_is_read_from_disk(tmp_path):
+    data = os.urandom(PART * 10)
+    path = tmp_path / "file.bin"
+    path.write_bytes(data)
+
+    # Tiny buffer: early parts overflow, part 0 arrives last
+    hasher = StreamingHasher(path, max_pending_bytes=PART)
+    for offset in list(range(PART, len(data), PART)) + [0]:
+        hasher.update_at(offset, data[offset : offset + PART])
+
+    assert hasher.streamed_bytes < len(data)
+    digest = await hasher.hexdigest(len(data))
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert digest == await sha256_file_async(path)
+
+
+class FakeClient:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def iter_download(self, media, *, offset, limit, request_size, file_size, dc_id=None):
+        for i in range(limit):
+            start = offset + i * request_size
+            await asyncio.sleep(0)
+            yield self.data[start : start + request_size]
+
+
+@pytest.mark.asyncio
+async def test_downloader_passes_streamed_digest_to_the_store(tmp_path):
+    data = os.urandom(PART * 16 + 5)
+    config = SimpleNamespace(
+        cache_file=tmp_path / "cache" / "cache.json",
+        performance=SimpleNamespace(
+            hash_based_deduplication=False,
+            enable_parallel_download=True,
+            parallel_download_min_size_mb=0,
+            max_parallel_connections=4,
+            part_size_kb=4,
+            media_store_enabled=True,
+        ),
+    )
+    downloader = MediaDownloader(
+        connection_manager=SimpleNamespace(download_semaphore=asyncio.Semaphore(2)),
+        temp_dir=tmp_path / "tmp",
+        worker_clients=[FakeClient(data), FakeClient(data)],
+        config=config,
+    )
+    message = SimpleNamespace(
+        id=9,
+        media=SimpleNamespace(document=SimpleNamespace(id=1, access_hash=2)),
+        file=SimpleNamespace(size=len(data)),
+    )
+
+    path = await downloader.download_media(message)
+
+    assert path.name == hashlib.sha256(data).hexdigest()
+    assert path.read_bytes() == data
+    hashing = downloader.get_statistics()["content_hashing"]
+    assert hashing["streamed_bytes"] + hashing["reread_bytes"] == len(data)
+    assert hashing["streamed_bytes"] > 0
+
+
+class FailingClient(FakeClient):
+    """Serves the first part of the file, then the connection breaks."""
+
+    async def iter_download(self, media, *, offset, limit, request_size, file_size, dc_id=None):
+        if offset == 0:
+            yield self.data[:request_size]
+        raise ConnectionError("connection reset")
+
+
+@pytest.mark.asyncio
+async def test_failed_download_drops_its_streamed_hash(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.media.parallel_download.RETRY_BACKOFF_S", 0)
+    data = os.urandom(PART * 8)
+    config = SimpleNamespace(
+        cache_file=tmp_path / "cache" / "cache.json",
+        performance=SimpleNamespace(
+            hash_based_deduplication=False,
+            enable_parallel_download=True,
+            parallel_download_min_size_mb=0,
+            max_parallel_connections=2,
+            part_size_kb=4,
+            media_store_enabled=True,
+        ),
+    )
+    downloader = MediaDownloader(
+        connection_manager=SimpleNamespace(download_semaphore=asyncio.Semaphore(2)),
+        temp_dir=tmp_path / "tmp",
+        worker_clients=[FailingClient(data)],
+        config=config,
+    )
+    downloader.rate_limiter = None  # Retries without pacing
+    message = SimpleNamespace(
+        id=9,
+        media=SimpleNamespace(document=SimpleNamespace(id=1, access_hash=2)),
+        file=SimpleNamespace(size=len(data)),
+    )
+
+    assert await downloader._parallel_download(message, len(data)) is None
+    assert downloader._stream_hashers == {}
+
+    # A journal reopened for a retry never resumes a leftover hash
+    journal = downloader._open_journal(message, len(data))
+    downloader._stream_hashers[str(journal.data_path)] = StreamingHasher(journal.data_path)
+    journal = downloader._open_journal(message, len(data))
+    assert downloader._stream_hashers == {}
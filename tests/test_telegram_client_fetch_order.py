@@ -65,3 +65,31 @@ async def test_fetch_messages_yields_messages_in_chronological_order():
         "Expected fetch_messages to yield messages in ascending order (oldest->newest). "
         f"Got order: {collected}"
     )
+
+
+@pytest.mark.asyncio
+async def test_fetch_message_batches_yields_get_messages_batches():
+    class DummyConfig:
+        batch_fetch_size = 4
+        request_delay = 0
+        lazy_message_page_size = 50
+        performance = SimpleNamespace(workers=1)
+
+    class FakeClient:
+        async def get_messages(self, entity, limit=100, offset_id=0, min_id=0, **kwargs):
+            start = max(int(offset_id), int(min_id)) + 1
+            end = min(start + int(limit) - 1, 10)
+            # id 6 is a service message and must be filtered out
+            return [
+                SimpleNamespace(id=i, action="pin" if i == 6 else None)
+                for i in range(start, end + 1)
+            ]
+
+    mgr = TelegramManager(DummyConfig())
+    mgr.client = FakeClient()
+
+    batches = [[m.id for m in batch] async for batch in mgr.fetch_message_batches("dummy")]
+    assert batches == [[1, 2, 3, 4], [5, 7, 8], [9, 10]]
+
+    limited = [[m.id for m in b] async for b in mgr.fetch_message_batches("dummy", limit=5)]
+    assert limited == [[1, 2, 3, 4], [5]]
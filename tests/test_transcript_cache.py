@@ -0,0 +1,45 @@
+"""
+Tests for the content-keyed transcript cache.
+"""
+
+from src.media.transcript_cache import TranscriptCache, transcript_key
+
+
+def _record(text):
+    return {"text": text, "language": "ru", "duration_seconds": 3.0}
+
+
+def test_same_document_hits_across_chats_and_reloads(tmp_path):
+    path = tmp_path / "transcripts.log"
+    cache = TranscriptCache(path)
+    # Forwarded voice note: same document identity, different chat and file
+    key = transcript_key("doc:77:4096:2", "ru", "int8")
+    cache.put(key, _record("привет"))
+    assert cache.get(transcript_key("doc:77:4096:2", "ru", "int8"))["text"] == "привет"
+    assert cache.get(transcript_key("doc:77:4096:2", None, "int8")) is None
+    cache.flush()
+
+    frame = cache._log.encode_set("other", _record("обрыв"))
+    with open(path, "ab") as f:
+        f.write(frame[:-3])  # Torn append
+    reloaded = TranscriptCache(path)
+    assert reloaded.get(key)["text"] == "привет"
+    assert path.stat().st_size == reloaded.get_stats()["log_bytes"]
+
+
+def test_least_recently_used_transcripts_are_evicted(tmp_path):
+    path = tmp_path / "transcripts.log"
+    cache = TranscriptCache(path)
+    cache.max_bytes = 2 * len(cache._log.encode_set("a", _record("x" * 100)))
+    cache.put("a", _record("x" * 100))
+    cache.put("b", _record("y" * 100))
+    assert cache.get("a") is not None  # "b" is now least recently used
+    cache.put("c", _record("z" * 100))
+
+    assert cache.get("b") is None
+    assert cache.get_stats()["evicted"] == 1
+    cache.flush()
+
+    reloaded = TranscriptCache(path, max_bytes=cache.max_bytes)
+    assert list(reloaded._lru) == ["a", "c"]
+    assert reloaded.get("c")["text"] == "z" * 100
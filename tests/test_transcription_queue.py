@@ -0,0 +1,71 @@
+"""
+Tests for the background transcription stage.
+"""
+
+import asyncio
+
+import pytest
+
+from src.media.transcription_queue import TranscriptionQueue
+
+
+def _voice(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"ogg")
+    return path
+
+
+@pytest.mark.asyncio
+async def test_backlog_is_ordered_by_duration(tmp_path):
+    order = []
+
+    async def transcribe(path, identity):
+        order.append(path.name)
+        return f"text of {path.stem}"
+
+    for sorting, expected in (
+        ("size_asc", ["short.ogg", "mid.ogg", "long.ogg"]),
+        ("size_desc", ["long.ogg", "mid.ogg", "short.ogg"]),
+    ):
+        order.clear()
+        queue = TranscriptionQueue(transcribe, workers=1, sorting=sorting)
+        paths = [_voice(tmp_path, n) for n in ("mid.ogg", "long.ogg", "short.ogg")]
+        for path, duration in zip(paths, (30, 300, 3)):
+            queue.submit(path, duration=duration)
+
+        await queue.start()  # Whole backlog is known before the first pick
+        results = await asyncio.wait_for(queue.wait_for(paths), 2)
+        await queue.stop()
+
+        assert order == expected
+        assert results[paths[1]] == "text of long"
+        assert queue.get_stats()["completed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_jobs_wait_for_pending_downloads(tmp_path):
+    downloading = set()
+
+    async def transcribe(path, identity):
+        return path.read_text()
+
+    queue = TranscriptionQueue(
+        transcribe, workers=2, is_pending=downloading.__contains__
+    )
+    await queue.start()
+
+    late = tmp_path / "late.ogg"
+    downloading.add(late)
+    future = queue.submit(late, duration=5)
+    late.write_text("hel")  # Partially written
+    await asyncio.sleep(0.05)
+    assert not future.done()
+
+    late.write_text("hello")
+    downloading.discard(late)
+    queue.notify_downloaded(late)  # Called by the download queue
+    missing = tmp_path / "never.ogg"  # Not downloading and not on disk
+    results = await asyncio.wait_for(queue.wait_for([late, missing]), 2)
+    await queue.stop()
+
+    assert results == {late: "hello", missing: None}
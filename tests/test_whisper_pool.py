@@ -0,0 +1,75 @@
+"""
+Tests for sizing the Whisper process pool.
+"""
+
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+import pytest
+
+from src.media.manager import MediaProcessor
+from src.media.processors import whisper_pool
+from src.media.processors.whisper_pool import WhisperProcessPool, whisper_pool_size
+
+GB = 1024**3
+
+
+def test_pool_size_is_bounded_by_cores_and_memory():
+    # 32 cores carry 8 int8 workers, 64 GB of RAM carries all of them
+    assert whisper_pool_size("int8", cpu_count=32, available_memory=64 * GB) == 8
+    # Same cores with 12 GB free: (12 - 2) / 2 GB per model
+    assert whisper_pool_size("int8", cpu_count=32, available_memory=12 * GB) == 5
+    # float32 models are three times larger
+    assert whisper_pool_size("float32", cpu_count=32, available_memory=12 * GB) == 1
+    # Always at least one worker
+    assert whisper_pool_size("int8", cpu_count=2, available_memory=1 * GB) == 1
+
+
+def test_requested_workers_are_capped_by_pool_size(monkeypatch):
+    monkeypatch.setattr(whisper_pool, "whisper_pool_size", lambda compute_type: 1)
+    processor = SimpleNamespace(_transcriber=SimpleNamespace(compute_type="int8"))
+    config = SimpleNamespace(batch_size=8, duration_threshold=60, use_batched=True)
+
+    # Two model copies do not fit: the default max_concurrent=2 gets one worker
+    pool = MediaProcessor._create_whisper_pool(processor, config, 2, None)
+    assert pool.workers == 1
+    pool.shutdown()
+
+
+def test_workers_split_the_cores():
+    pool = WhisperProcessPool(workers=2)
+    assert pool.cpu_threads >= 1
+    assert pool.get_stats()["files_transcribed"] == 0
+    pool.shutdown()  # Never started: no processes to stop
+
+
+class _BrokenExecutor:
+    """Stands in for a pool whose worker was killed."""
+
+    def __init__(self):
+        self.shutdowns = 0
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns += 1
+
+
+@pytest.mark.asyncio
+async def test_broken_pool_is_dropped_once():
+    pool = WhisperProcessPool(workers=2)
+    broken = _BrokenExecutor()
+    pool._executor = broken
+
+    results = await asyncio.gather(
+        pool.transcribe("a.ogg"), pool.transcribe("b.ogg")
+    )
+
+    assert results == [None, None]
+    assert pool._executor is None  # Next call starts a fresh pool
+    assert pool.restarts == 1 and broken.shutdowns == 1